@@ -0,0 +1,2 @@
+# apps/__init__.py
+"""Public-facing APIs (driver app, client/partner API)."""
@@ -0,0 +1,2 @@
+# apps/client_app_api/__init__.py
+"""Client/Partner API. ASGI app: apps.client_app_api.api:app."""
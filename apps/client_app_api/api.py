@@ -1,55 +1,244 @@
 # apps/client_app_api/api.py
 
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List, Tuple
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import requests
-from settings import DISPATCHER_URL, FINANCE_URL
+import httpx
+from apps.common.http_client import DownstreamClients
+from bots.common.config import settings
+from bots.common.event_bus import JOB_MATCHED, JOB_SUBMITTED, RequestReply, open_event_bus
+from bots.common.instrumentation import configure_from_settings, get_logger, instrument_app, log_event
+from bots.common.storage import open_storage
+from apps.client_app_api.jobs import (
+    CANCELLED, FAILED, MATCHED, QUEUED, JobIdBlocks, JobPipeline, JobRecord, QueueFullError, TERMINAL_STATES,
+)
+from bots.finance_bot.pricing import PricingEngine
 
-app = FastAPI(title="PickupLink Client API")
+log = get_logger("client_api")
+
+# One pooled async client for all downstream bots; each bot gets its own timeout and concurrency cap
+downstream = DownstreamClients()
+dispatcher_service = downstream.service("dispatcher", settings.DISPATCHER_URL, timeout=5.0, max_concurrency=100)
+finance_service = downstream.service("finance", settings.FINANCE_URL, timeout=10.0, max_concurrency=20)
+
+# With settings.EVENT_BUS_URL set, match requests go over the event bus (batched on the Dispatcher side)
+event_bus = open_event_bus(getattr(settings, "EVENT_BUS_URL", None))
+match_requests = RequestReply(event_bus, JOB_MATCHED) if event_bus is not None else None
+
+async def _match_via_dispatcher(job_data: dict) -> dict:
+    if match_requests is not None:
+        return await match_requests.request(JOB_SUBMITTED, job_data, timeout=5.0)
+    response = await dispatcher_service.post("/match_job", json=job_data)
+    return response.json()
+
+# Quotes from distance, capacity, express and per-cell surge (online drivers vs open jobs)
+pricing = PricingEngine()
+SUPPLY_REFRESH_SECONDS = 5.0
+MAX_BATCH_QUOTES = 10_000
+# A job counts as open demand until a driver is assigned or it is cancelled; clients
+# that never cancel an unmatched job stop adding to surge after this long
+UNSERVED_DEMAND_SECONDS = 900.0
+unserved_jobs: "OrderedDict[int, float]" = OrderedDict()  # unmatched job id -> when matching gave up
+
+# With settings.DATABASE_URL set, every job is written to the shared jobs table, with ids reserved from it
+# (unique across Client API processes). DB calls run on worker threads, off the event loop.
+storage = open_storage(getattr(settings, "DATABASE_URL", None))
+job_ids = JobIdBlocks(storage.reserve_job_ids) if storage is not None else None
+
+async def _on_job_finished(record: JobRecord):
+    if record.status == MATCHED:
+        pricing.surge_table.close_job(record.job_id)
+    else:
+        unserved_jobs[record.job_id] = time.time()
+    # The Dispatcher writes the outcomes it decides (MATCHED / NO_MATCH_FOUND); only a failed call is ours
+    if storage is not None and record.status == FAILED:
+        await asyncio.to_thread(storage.update_job_status, record.job_id, FAILED)
+
+# Jobs are accepted immediately and matched by a worker pool behind a bounded queue
+pipeline = JobPipeline(_match_via_dispatcher, workers=16, max_queue=2_000, on_finished=_on_job_finished)
+
+def _expire_unserved_demand(now: float):
+    while unserved_jobs:
+        job_id, since = next(iter(unserved_jobs.items()))
+        if now - since < UNSERVED_DEMAND_SECONDS:
+            return
+        del unserved_jobs[job_id]
+        pricing.surge_table.close_job(job_id)
+
+async def _refresh_supply_forever():
+    """Pulls online driver counts per pricing cell from the Dispatcher; only changed cells are re-priced."""
+    while True:
+        _expire_unserved_demand(time.time())
+        try:
+            response = await dispatcher_service.get("/fleet/supply", params={"cell_deg": pricing.surge_table.cell_deg})
+            pricing.surge_table.set_supply_counts({(i, j): count for i, j, count in response.json()["cells"]})
+        except httpx.HTTPError as e:
+            # Keep quoting from the last known supply
+            log_event(log, logging.WARNING, "supply_refresh_failed", error=str(e))
+        await asyncio.sleep(SUPPLY_REFRESH_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await downstream.start()
+    if event_bus is not None:
+        await event_bus.start()
+    await pipeline.start()
+    supply_refresher = asyncio.create_task(_refresh_supply_forever())
+    yield
+    supply_refresher.cancel()
+    await pipeline.stop()
+    if event_bus is not None:
+        await event_bus.stop()
+    await downstream.aclose()
+
+app = FastAPI(title="PickupLink Client API", lifespan=lifespan)
+# Request metrics and GET /metrics; settings.PROFILER_ENABLED adds the /debug/profiler endpoints
+instrument_app(app, "client_api", profiler_enabled=configure_from_settings(settings))
 
 class DeliveryRequest(BaseModel):
-    pickup_coords: tuple
-    dropoff_coords: tuple
+    pickup_coords: Tuple[float, float]
+    dropoff_coords: Tuple[float, float]
     required_capacity: float
     is_express: bool = False
     client_id: int
 
-@app.post("/jobs/create")
-def create_job(request: DeliveryRequest):
-    """Submits a new delivery request to the Dispatcher Bot."""
-    print(f"Client {request.client_id} submitted new job.")
-    
-    # 1. Calculate preliminary price (Simplification: Fixed rate per km)
-    # (In a real system, this would call the Dispatcher/Finance for dynamic pricing)
-    preliminary_price = 50.00 # Placeholder base price
-    
+class QuoteRequest(BaseModel):
+    # (lat, lon): anything else is a 422 for that request, not a 500 for the whole batch
+    pickup_coords: Tuple[float, float]
+    dropoff_coords: Tuple[float, float]
+    required_capacity: float = 0.0
+    is_express: bool = False
+
+@app.post("/jobs/create", status_code=202)
+async def create_job(request: DeliveryRequest):
+    """Accepts a new delivery request; matching by the Dispatcher Bot happens asynchronously."""
+
+    # 1. Price the job: distance/duration, capacity tier, express and live surge at the pickup
+    quote = pricing.quote(request.pickup_coords, request.dropoff_coords, request.required_capacity,
+                          request.is_express)
+
     job_data = request.dict()
-    job_data['base_price'] = preliminary_price
-    
-    # 2. Forward the request to the Dispatcher Bot for matching
+    job_data['base_price'] = quote.price
+
+    # 2. Store the job before it is queued, so the Dispatcher's outcome always finds its row
+    job_id = None
     try:
-        dispatcher_response = requests.post(f"{DISPATCHER_URL}/match_job", json=job_data)
-        dispatcher_response.raise_for_status()
-        match_result = dispatcher_response.json()
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=503, detail=f"Dispatcher service unavailable: {e}")
+        pipeline.check_capacity()
+        if storage is not None:
+            job_id = await job_ids.next_id()
+            await asyncio.to_thread(storage.insert_jobs, [{
+                "id": job_id, "client_id": request.client_id, "status": QUEUED,
+                "pickup_lat": request.pickup_coords[0], "pickup_lon": request.pickup_coords[1],
+                "dropoff_lat": request.dropoff_coords[0], "dropoff_lon": request.dropoff_coords[1],
+                "required_capacity": request.required_capacity, "base_price_cents": int(round(quote.price * 100)),
+                "is_express": request.is_express, "created_at": time.time(),
+            }])
+        # 3. Queue the job for matching; the client polls /track, /wait or /events for the result
+        record = pipeline.submit(request.client_id, job_data, job_id)
+    except QueueFullError as e:
+        if job_id is not None:  # The queue filled up while the row was being written
+            await asyncio.to_thread(storage.update_job_status, job_id, CANCELLED)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    pricing.surge_table.open_job(record.job_id, *request.pickup_coords)
+    log_event(log, logging.DEBUG, "job_submitted", job_id=record.job_id, client_id=request.client_id)
+
+    return {"status": "Job Submitted", "job_id": record.job_id, "match_status": record.status,
+            "quote": quote.to_dict(), "tracking_url": f"/jobs/{record.job_id}/track"}
+
+@app.post("/quotes")
+async def quote_job(request: QuoteRequest):
+    """Price for a prospective job (not booked)."""
+    return pricing.quote(request.pickup_coords, request.dropoff_coords, request.required_capacity,
+                         request.is_express).to_dict()
+
+@app.post("/quotes/batch")
+async def quote_jobs(requests: List[QuoteRequest]):
+    """Bulk pricing for partners: one quote per shipment, in order."""
+    if len(requests) > MAX_BATCH_QUOTES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_QUOTES} shipments per batch.")
+    quotes = pricing.quote_many(request.dict() for request in requests)
+    return {"quotes": [quote.to_dict() for quote in quotes]}
 
-    return {"status": "Job Submitted", "job_id": 9001, "match_info": match_result}
+@app.get("/pricing/stats")
+async def pricing_stats():
+    return {**pricing.surge_table.stats(), "quotes": pricing.quotes}
+
+@app.get("/jobs/metrics")
+async def job_metrics():
+    """Queue depth, throughput and latency counters for the job pipeline."""
+    return pipeline.metrics()
 
 @app.get("/jobs/{job_id}/track")
-def track_job(job_id: int):
-    """Retrieves real-time status and location of a job."""
-    # This would query the Dispatcher Bot or the main DB
-    # Simulation:
-    return {"job_id": job_id, "status": "EN_ROUTE", "driver_location": (35.25, -80.8)}
+async def track_job(job_id: int):
+    """Retrieves the current status and match details of a job."""
+    record = pipeline.store.get(job_id)
+    if record is not None:
+        return record.to_dict()
+    # Accepted before this process started (or evicted): the shared jobs table still has it
+    row = await asyncio.to_thread(storage.job, job_id) if storage is not None else None
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return {"job_id": row["id"], "client_id": row["client_id"], "status": row["status"],
+            "driver_id": row["driver_id"], "match_info": None, "error": None,
+            "created_at": row["created_at"], "updated_at": row["updated_at"]}
+
+@app.get("/jobs/{job_id}/wait")
+async def wait_for_match(job_id: int, timeout: float = 10.0):
+    """Long-poll: returns when matching finishes or after `timeout` seconds (max 30)."""
+    record = await pipeline.wait(job_id, min(max(timeout, 0.0), 30.0))
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return record.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: int):
+    """Server-Sent Events stream of status changes, closed once matching finishes."""
+    record = pipeline.store.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+
+    async def stream():
+        last_status = None
+        while True:
+            if record.status != last_status:
+                last_status = record.status
+                yield f"event: status\ndata: {json.dumps(record.to_dict())}\n\n"
+            if record.status in TERMINAL_STATES:
+                return
+            try:
+                await asyncio.wait_for(record.done.wait(), timeout=0.5)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: int):
+    """Cancels a job that has no driver yet; it stops counting as demand for surge pricing."""
+    record = pipeline.store.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    if not pipeline.cancel(record):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {record.status} and cannot be cancelled.")
+    unserved_jobs.pop(job_id, None)
+    pricing.surge_table.close_job(job_id)
+    if storage is not None:
+        await asyncio.to_thread(storage.update_job_status, job_id, CANCELLED)
+    return record.to_dict()
 
 @app.post("/jobs/{job_id}/invoice")
-def process_invoice(job_id: int):
+async def process_invoice(job_id: int):
     """Triggers final fee calculation and invoicing via Finance Bot."""
     # Sends job completion data to Finance Bot
     try:
-        finance_response = requests.post(f"{FINANCE_URL}/process_invoice", json={"job_id": job_id})
-        finance_response.raise_for_status()
+        finance_response = await finance_service.post("/process_invoice", json={"job_id": job_id})
         return {"status": "Invoicing Complete", "details": finance_response.json()}
-    except:
+    except httpx.HTTPError:
         raise HTTPException(status_code=500, detail="Finance Bot processing failed.")
@@ -0,0 +1,244 @@
+# apps/client_app_api/jobs.py
+
+import asyncio
+import inspect
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from bots.common.instrumentation import get_logger, log_event
+
+log = get_logger("client_api.jobs")
+
+# Job lifecycle
+QUEUED = "QUEUED"
+MATCHING = "MATCHING"
+MATCHED = "MATCHED"
+NO_MATCH = "NO_MATCH_FOUND"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+TERMINAL_STATES = {MATCHED, NO_MATCH, FAILED, CANCELLED}
+CANCELLABLE_STATES = {QUEUED, NO_MATCH, FAILED}  # Not while the Dispatcher is matching it, nor once assigned
+
+
+class QueueFullError(Exception):
+    """Raised when the pipeline is at capacity; the API answers 429 so partners back off."""
+
+
+@dataclass
+class JobRecord:
+    job_id: int
+    client_id: int
+    request: Dict[str, Any]
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    match_info: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "client_id": self.client_id,
+            "status": self.status,
+            "driver_id": (self.match_info or {}).get("driver_id"),
+            "match_info": self.match_info,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class JobStore:
+    """
+    Job records by id. Finished jobs beyond `max_records` are dropped oldest
+    first so the store stays bounded.
+
+    The records, the match queue and the /wait and /events notifications live
+    in this process only. When DATABASE_URL is set the jobs table has each
+    job and its status, and /track falls back to it, but jobs still queued or
+    being matched when the process stops are not resumed: they stay
+    QUEUED/MATCHING in the table and must be resubmitted. With the shared DB
+    the ids are passed in (JobIdBlocks), unique across processes; /wait and
+    /events only see jobs created by the same process.
+    """
+
+    def __init__(self, max_records: int = 100_000, first_id: int = 1):
+        self.max_records = max_records
+        self._records: "OrderedDict[int, JobRecord]" = OrderedDict()
+        self._ids = itertools.count(first_id)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def create(self, client_id: int, request: Dict[str, Any], job_id: Optional[int] = None) -> JobRecord:
+        record = JobRecord(job_id=next(self._ids) if job_id is None else job_id, client_id=client_id,
+                           request=request)
+        self._records[record.job_id] = record
+        self._evict()
+        return record
+
+    def get(self, job_id: int) -> Optional[JobRecord]:
+        return self._records.get(job_id)
+
+    def update(self, record: JobRecord, status: str, **changes):
+        record.status = status
+        record.updated_at = time.time()
+        for name, value in changes.items():
+            setattr(record, name, value)
+        if status in TERMINAL_STATES:
+            record.done.set()
+
+    def _evict(self):
+        while len(self._records) > self.max_records:
+            oldest_id, oldest = next(iter(self._records.items()))
+            if oldest.status not in TERMINAL_STATES:
+                break
+            del self._records[oldest_id]
+
+
+class JobIdBlocks:
+    """
+    Job ids reserved from the shared DB `block_size` at a time
+    (Storage.reserve_job_ids), so Client API processes never collide. The
+    reservation runs on a worker thread, once per block.
+    """
+
+    def __init__(self, reserve: Callable[[int], int], block_size: int = 1_000):
+        self.reserve = reserve
+        self.block_size = block_size
+        self._next = self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def next_id(self) -> int:
+        async with self._lock:
+            if self._next >= self._end:
+                self._next = await asyncio.to_thread(self.reserve, self.block_size)
+                self._end = self._next + self.block_size
+            job_id = self._next
+            self._next += 1
+            return job_id
+
+
+class JobPipeline:
+    """
+    Accept-now, match-later pipeline for delivery jobs.
+
+    `submit` persists the job and returns its real id immediately; a pool of
+    asyncio workers pulls jobs off a bounded queue and matches them through
+    `match` (the Dispatcher call). A full queue raises QueueFullError instead
+    of letting bursts pile up as slow requests.
+    """
+
+    def __init__(self, match: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 store: Optional[JobStore] = None, workers: int = 16, max_queue: int = 2_000,
+                 on_finished: Optional[Callable[[JobRecord], Union[None, Awaitable[None]]]] = None):
+        self.match = match
+        # Called (or awaited, if a coroutine function) once a job reaches a terminal state (e.g. pricing demand)
+        self.on_finished = on_finished
+        self.store = store if store is not None else JobStore()
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._queue_wait_total = 0.0
+        self._match_time_total = 0.0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def check_capacity(self):
+        """Raises QueueFullError now, before the caller does work (e.g. a DB insert) for a job submit would refuse."""
+        if self._queue is None:
+            raise RuntimeError("JobPipeline.start() has not been called")
+        if self._queue.full():
+            self.rejected += 1
+            raise QueueFullError(f"Job queue is full ({self.max_queue} pending)")
+
+    def submit(self, client_id: int, request: Dict[str, Any], job_id: Optional[int] = None) -> JobRecord:
+        self.check_capacity()
+        record = self.store.create(client_id, request, job_id)
+        self._queue.put_nowait(record)
+        self.submitted += 1
+        return record
+
+    def cancel(self, record: JobRecord) -> bool:
+        """Cancels a job still waiting for a driver. False if it is being matched or already assigned."""
+        if record.status not in CANCELLABLE_STATES:
+            return False
+        self.store.update(record, CANCELLED)
+        return True
+
+    async def wait(self, job_id: int, timeout: float) -> Optional[JobRecord]:
+        """Long-poll: returns once the job reaches a terminal state or `timeout` elapses."""
+        record = self.store.get(job_id)
+        if record is None:
+            return None
+        try:
+            await asyncio.wait_for(record.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return record
+
+    async def _worker(self):
+        while True:
+            record = await self._queue.get()
+            if record.status == CANCELLED:  # Cancelled while waiting in the queue
+                self._queue.task_done()
+                continue
+            self.in_flight += 1
+            started = time.time()
+            self._queue_wait_total += started - record.created_at
+            self.store.update(record, MATCHING)
+            try:
+                result = await self.match({**record.request, "job_id": record.job_id})
+                status = MATCHED if result.get("status") == MATCHED else NO_MATCH
+                self.store.update(record, status, match_info=result)
+                self.completed += 1
+            except Exception as e:
+                self.store.update(record, FAILED, error=str(e))
+                self.failed += 1
+            finally:
+                self._match_time_total += time.time() - started
+                self.in_flight -= 1
+                self._queue.task_done()
+                if self.on_finished is not None:
+                    try:
+                        result = self.on_finished(record)
+                        if inspect.isawaitable(result):
+                            await result
+                    except Exception as e:
+                        # The worker must outlive a failing callback (e.g. the DB being unreachable)
+                        log_event(log, logging.ERROR, "job_finished_callback_failed", job_id=record.job_id,
+                                  status=record.status, error=repr(e), exc_info=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_capacity": self.max_queue,
+            "in_flight": self.in_flight,
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(1000 * self._queue_wait_total / finished, 2) if finished else 0.0,
+            "avg_match_ms": round(1000 * self._match_time_total / finished, 2) if finished else 0.0,
+        }
@@ -0,0 +1,2 @@
+# apps/common/__init__.py
+"""Helpers shared by the app APIs."""
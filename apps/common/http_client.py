@@ -0,0 +1,103 @@
+# apps/common/http_client.py
+
+import asyncio
+import random
+from typing import Any, Dict, Optional
+
+import httpx
+
+RETRYABLE_STATUS = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class ServiceClient:
+    """
+    Async caller for one downstream bot (Dispatcher, Finance, Legal...).
+
+    Requests share the pooled connections of the parent DownstreamClients, use
+    this service's own timeout, and are capped at `max_concurrency` in flight so
+    one slow bot cannot take every pooled connection.
+
+    Idempotent requests (GET/PUT/DELETE..., or a POST sent with
+    idempotent=True) are retried up to `retries` times with full-jitter
+    exponential backoff on transport errors, timeouts and 502/503/504. Other
+    POSTs may already have taken effect when those happen, so they are only
+    retried when the connection could not be opened at all.
+    """
+
+    def __init__(self, pool: "DownstreamClients", name: str, base_url: str, timeout: float = 5.0,
+                 max_concurrency: int = 50, retries: int = 2,
+                 backoff_base: float = 0.05, backoff_max: float = 1.0):
+        self.pool = pool
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 2.0))
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0.0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def request(self, method: str, path: str, idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request with retries; raises httpx.HTTPError once retries are
+        exhausted. `idempotent` defaults to what the method implies.
+        """
+        url = f"{self.base_url}{path}"
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    response = await self.pool.client.request(method, url, timeout=self.timeout, **kwargs)
+            except httpx.TransportError as e:
+                # ConnectError/ConnectTimeout: nothing reached the service, safe to resend anything
+                sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt >= self.retries or (sent and not idempotent):
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS or attempt >= self.retries or not idempotent:
+                    response.raise_for_status()
+                    return response
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def post(self, path: str, json: Optional[Any] = None, idempotent: bool = False) -> httpx.Response:
+        """POST; pass idempotent=True for calls that are safe to repeat (checks, upserts, last-write-wins)."""
+        return await self.request("POST", path, idempotent=idempotent, json=json)
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        return await self.request("GET", path, params=params)
+
+
+class DownstreamClients:
+    """
+    One pooled httpx.AsyncClient shared by every downstream service of an app.
+    Call `start()` on app startup and `aclose()` on shutdown (see the apps' lifespan).
+    """
+
+    def __init__(self, max_connections: int = 200, max_keepalive: int = 50):
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.services: Dict[str, ServiceClient] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self.limits)
+        return self._client
+
+    def service(self, name: str, base_url: str, **kwargs) -> ServiceClient:
+        self.services[name] = ServiceClient(self, name, base_url, **kwargs)
+        return self.services[name]
+
+    async def start(self):
+        _ = self.client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,2 @@
+# apps/driver_app_api/__init__.py
+"""Driver App API. ASGI app: apps.driver_app_api.api:app."""
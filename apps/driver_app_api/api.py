@@ -1,37 +1,177 @@
 # apps/driver_app_api/api.py
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+import time
+from typing import List, Optional
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import requests
-from settings import DISPATCHER_URL, LEGAL_URL
+import httpx
+from apps.common.http_client import DownstreamClients
+from bots.common.config import settings
+from bots.common.event_bus import DRIVER_LOCATIONS, open_event_bus
+from bots.common.instrumentation import configure_from_settings, get_logger, instrument_app, log_event
+from bots.common.storage import open_storage
+from apps.driver_app_api.registration import (
+    DriverRegistry, LegalServiceUnavailable, RegistrationPipeline, StorageDriverRegistry,
+)
+from bots.dispatcher_bot.ingestion import LocationIngestor
+from bots.dispatcher_bot.models import LocationPing
 
-app = FastAPI(title="PickupLink Driver API")
+# One pooled async client for all downstream bots; each bot gets its own timeout and concurrency cap
+downstream = DownstreamClients()
+dispatcher_service = downstream.service("dispatcher", settings.DISPATCHER_URL, timeout=5.0, max_concurrency=20)
+legal_service = downstream.service("legal", settings.LEGAL_URL, timeout=10.0, max_concurrency=50)
+
+# Pings are buffered and forwarded once per second, keeping only each driver's latest position
+location_buffer = LocationIngestor(flush_interval=1.0)
+# With settings.EVENT_BUS_URL set, batches are published to the bus instead of POSTed
+event_bus = open_event_bus(getattr(settings, "EVENT_BUS_URL", None))
+
+log = get_logger("driver_api")
+
+# Truck and licence/insurance checks run concurrently; verified drivers get real ids, kept in the
+# shared drivers table when settings.DATABASE_URL is set (in memory otherwise)
+storage = open_storage(getattr(settings, "DATABASE_URL", None))
+registrations = RegistrationPipeline(legal_service,
+                                     StorageDriverRegistry(storage) if storage is not None else DriverRegistry(),
+                                     batch_size=200, max_concurrent_batches=4)
+MAX_BULK_IMPORT = 5_000
+
+async def _forward_locations_forever():
+    """Sends one coalesced batch of pings to the Dispatcher Bot per flush interval."""
+    while True:
+        await asyncio.sleep(location_buffer.flush_interval)
+        pings = location_buffer.drain()
+        if not pings:
+            continue
+        try:
+            await _forward_locations(pings)
+        except Exception as e:
+            # Any failure only loses this batch (superseded by each driver's next ping); the loop must survive
+            log_event(log, logging.ERROR, "location_forward_failed", pings=len(pings), error=repr(e), exc_info=True)
+
+async def _forward_locations(pings):
+    await _announce_new_drivers(pings)
+    batch = {"pings": [asdict(p) for p in pings]}
+    if event_bus is not None:
+        event_bus.publish(DRIVER_LOCATIONS, batch)
+        return
+    try:
+        # Latest position per driver: applying a batch twice changes nothing
+        await dispatcher_service.post("/update_locations", json=batch, idempotent=True)
+    except httpx.HTTPError as e:
+        # Superseded by each driver's next ping anyway
+        log_event(log, logging.WARNING, "location_forward_failed", pings=len(pings), error=str(e))
+
+async def _announce_new_drivers(pings):
+    """Newly registered drivers are added to the Dispatcher's fleet before their first pings arrive there."""
+    announcements = registrations.pending_announcements(pings)
+    if not announcements:
+        return
+    try:
+        await dispatcher_service.post("/drivers", json=announcements, idempotent=True)  # An upsert
+    except httpx.HTTPError as e:
+        # Retried with the drivers' next pings
+        log_event(log, logging.WARNING, "driver_announce_failed", drivers=len(announcements), error=str(e))
+        return
+    registrations.mark_announced(announcements)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await downstream.start()
+    if event_bus is not None:
+        await event_bus.start()
+    forwarder = asyncio.create_task(_forward_locations_forever())
+    yield
+    forwarder.cancel()
+    if event_bus is not None:
+        await event_bus.stop()
+    await downstream.aclose()
+
+app = FastAPI(title="PickupLink Driver API", lifespan=lifespan)
+# Request metrics and GET /metrics; settings.PROFILER_ENABLED adds the /debug/profiler endpoints
+instrument_app(app, "driver_api", profiler_enabled=configure_from_settings(settings))
 
 class DriverRegistration(BaseModel):
     license_number: str
     truck_plate: str
     vehicle_type: str
     insurance_status: bool
+    capacity: float = 0.0  # Cargo capacity, in the units of a job's required_capacity
+    vin: Optional[str] = None
 
 @app.post("/register")
-def register_driver(data: DriverRegistration):
-    """Initial driver registration and truck verification."""
-    # 1. Check TRUCKS ONLY compliance via Legal Bot
-    legal_response = requests.post(f"{LEGAL_URL}/verify_truck", json={"vehicle_type": data.vehicle_type})
-    
-    if legal_response.json().get("status") != "SUCCESS":
-        raise HTTPException(status_code=400, detail="Registration failed: Vehicle is not an approved truck type.")
-
-    # 2. Register driver in the database (simulated)
-    # db_insert(data)
-    
-    return {"status": "SUCCESS", "driver_id": 9000, "message": "Truck verified and driver registered."}
+async def register_driver(data: DriverRegistration):
+    """Initial driver registration: truck, licence and insurance verification via Legal Bot."""
+    try:
+        result = await registrations.register(data.dict())
+    except LegalServiceUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Legal service unavailable: {e}")
+
+    if result["status"] != "SUCCESS":
+        raise HTTPException(status_code=400, detail={"message": "Registration failed.", "reasons": result["reasons"]})
+    return result
+
+@app.post("/register/bulk")
+async def register_drivers_bulk(drivers: List[DriverRegistration]):
+    """Bulk import for partner fleets: verified in batches, one result per driver in order."""
+    if len(drivers) > MAX_BULK_IMPORT:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_IMPORT} drivers per import.")
+    try:
+        results = await registrations.register_many([d.dict() for d in drivers])
+    except LegalServiceUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Legal service unavailable: {e}")
+    registered = sum(1 for r in results if r["status"] == "SUCCESS")
+    return {"status": "Import Complete", "registered": registered,
+            "rejected": len(results) - registered, "results": results}
+
+@app.get("/drivers/{driver_id}")
+async def get_driver(driver_id: int):
+    record = await registrations.get(driver_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Driver {driver_id} not found.")
+    return record.to_dict()
+
+class StatusUpdate(BaseModel):
+    driver_id: int
+    lat: float
+    lon: float
+    is_active: Optional[bool] = None
+    timestamp: Optional[float] = None
 
 @app.put("/status")
-def update_driver_status(driver_id: int, lat: float, lon: float, is_active: bool):
+async def update_driver_status(driver_id: int, lat: float, lon: float, is_active: bool):
     """Updates driver's location and active status for Dispatcher Bot."""
-    # Sends data directly to the Dispatcher Bot for real-time matching
-    requests.post(f"{DISPATCHER_URL}/update_location", json={"driver_id": driver_id, "lat": lat, "lon": lon})
+    # Buffered: the Dispatcher receives the latest position per driver in batches
+    location_buffer.submit(LocationPing(driver_id=driver_id, lat=lat, lon=lon,
+                                        is_active=is_active, timestamp=time.time()))
     return {"status": "Updated", "active": is_active}
 
-# ... (Routes for /job_accept, /job_complete, etc.)
+@app.put("/status/batch")
+async def update_driver_status_batch(updates: List[StatusUpdate]):
+    """Accepts several queued pings at once (e.g. sent by the app after a connectivity gap)."""
+    now = time.time()
+    location_buffer.submit_batch([
+        LocationPing(driver_id=u.driver_id, lat=u.lat, lon=u.lon, is_active=u.is_active,
+                     timestamp=u.timestamp or now)
+        for u in updates
+    ])
+    return {"status": "Updated", "accepted": len(updates)}
+
+class DeliveryReport(BaseModel):
+    driver_id: int
+    delivered: bool = True
+
+@app.post("/jobs/{job_id}/complete")
+async def complete_job(job_id: int, report: DeliveryReport):
+    """The driver dropped off a single-job load (delivered=False: abandoned); feeds delivery KPIs."""
+    try:
+        await dispatcher_service.post(f"/jobs/{job_id}/delivery", json=report.dict())
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Dispatcher unavailable: {e}")
+    return {"status": "Recorded", "job_id": job_id, "delivered": report.delivered}
+
+# ... (Routes for /job_accept, etc.)
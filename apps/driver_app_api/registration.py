@@ -0,0 +1,276 @@
+# apps/driver_app_api/registration.py
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from apps.common.http_client import ServiceClient
+from bots.common.storage import Storage
+
+# Registration outcomes
+REGISTERED = "SUCCESS"
+REJECTED = "FAILED"
+NEW_DRIVER_RATING = 5.0  # Same default as the Dispatcher's POST /drivers
+
+
+class LegalServiceUnavailable(Exception):
+    """The Legal Bot could not be reached; the caller should retry later (HTTP 503)."""
+
+
+@dataclass
+class DriverRecord:
+    driver_id: int
+    license_number: str
+    truck_plate: str
+    vehicle_type: str
+    capacity: float = 0.0
+    vin: Optional[str] = None
+    make: Optional[str] = None
+    model: Optional[str] = None
+    registered_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "driver_id": self.driver_id,
+            "license_number": self.license_number,
+            "truck_plate": self.truck_plate,
+            "vehicle_type": self.vehicle_type,
+            "capacity": self.capacity,
+            "vin": self.vin,
+            "make": self.make,
+            "model": self.model,
+            "registered_at": self.registered_at,
+        }
+
+
+class DriverRegistry:
+    """
+    Registered drivers by id, unique per licence number: registering the same
+    licence again returns the existing driver instead of a duplicate. In memory
+    (ids restart with the process); StorageDriverRegistry keeps them in the
+    shared drivers table.
+    """
+
+    def __init__(self, first_id: int = 9001):
+        self._drivers: Dict[int, DriverRecord] = {}
+        self._by_license: Dict[str, int] = {}
+        self._ids = itertools.count(first_id)
+
+    def __len__(self) -> int:
+        return len(self._drivers)
+
+    def get(self, driver_id: int) -> Optional[DriverRecord]:
+        return self._drivers.get(driver_id)
+
+    def find_by_license(self, license_number: str) -> Optional[DriverRecord]:
+        return self._find_many([license_number.strip().upper()]).get(license_number.strip().upper())
+
+    def _find_many(self, license_numbers: List[str]) -> Dict[str, DriverRecord]:
+        """Existing drivers by (normalized) licence number."""
+        return {number: self._drivers[self._by_license[number]]
+                for number in license_numbers if number in self._by_license}
+
+    def _save(self, records: List[DriverRecord]):
+        for record in records:
+            self._drivers[record.driver_id] = record
+            self._by_license[record.license_number] = record.driver_id
+
+    def add(self, registration: Dict[str, Any], vehicle: Dict[str, Any]) -> DriverRecord:
+        return self.add_many([(registration, vehicle)])[0]
+
+    def add_many(self, rows: List[tuple]) -> List[DriverRecord]:
+        """Bulk insert of (registration, vehicle) pairs; one call (one write) per verified batch."""
+        existing = self._find_many([registration["license_number"].strip().upper() for registration, _ in rows])
+        new: Dict[str, DriverRecord] = {}
+        records = []
+        for registration, vehicle in rows:
+            license_number = registration["license_number"].strip().upper()
+            record = existing.get(license_number) or new.get(license_number)
+            if record is None:
+                record = new[license_number] = DriverRecord(
+                    driver_id=next(self._ids),
+                    license_number=license_number,
+                    truck_plate=registration["truck_plate"],
+                    vehicle_type=registration["vehicle_type"],
+                    capacity=registration.get("capacity", 0.0),
+                    vin=registration.get("vin"),
+                    make=vehicle.get("make"),
+                    model=vehicle.get("model"),
+                )
+            records.append(record)
+        if new:
+            self._save(list(new.values()))
+        return records
+
+
+class StorageDriverRegistry(DriverRegistry):
+    """
+    DriverRegistry on the shared drivers table. Ids continue from the largest
+    stored id, so they survive restarts; new drivers are written verified and
+    offline, and go online in the Dispatcher with their first location ping.
+    One writer (the Driver API) hands out ids.
+    """
+
+    def __init__(self, storage: Storage, first_id: int = 9001):
+        super().__init__(max(first_id, storage.next_driver_id()))
+        self.storage = storage
+
+    def __len__(self) -> int:
+        return self.storage.count_drivers()
+
+    def get(self, driver_id: int) -> Optional[DriverRecord]:
+        row = self.storage.driver(driver_id)
+        return self._record(row) if row is not None and row["license_number"] else None
+
+    def _find_many(self, license_numbers: List[str]) -> Dict[str, DriverRecord]:
+        return {row["license_number"]: self._record(row)
+                for row in self.storage.drivers_by_license(sorted(set(license_numbers)))}
+
+    def _save(self, records: List[DriverRecord]):
+        self.storage.upsert_drivers({
+            "id": record.driver_id, "license_number": record.license_number, "plate": record.truck_plate,
+            "vehicle_type": record.vehicle_type, "vin": record.vin, "make": record.make, "model": record.model,
+            "capacity": record.capacity, "rating": NEW_DRIVER_RATING, "is_verified": True, "is_active": False,
+            "registered_at": record.registered_at,
+        } for record in records)
+
+    @staticmethod
+    def _record(row: Dict[str, Any]) -> DriverRecord:
+        return DriverRecord(driver_id=row["id"], license_number=row["license_number"], truck_plate=row["plate"],
+                            vehicle_type=row["vehicle_type"], capacity=row["capacity"], vin=row["vin"],
+                            make=row["make"], model=row["model"],
+                            registered_at=row["registered_at"] or 0.0)
+
+
+def _truck_payload(registration: Dict[str, Any]) -> Dict[str, Any]:
+    return {"vehicle_type": registration["vehicle_type"], "plate": registration["truck_plate"],
+            "vin": registration.get("vin")}
+
+
+def _documents_payload(registration: Dict[str, Any]) -> Dict[str, Any]:
+    return {"license_number": registration["license_number"], "plate": registration["truck_plate"],
+            "insurance_status": registration.get("insurance_status", False)}
+
+
+def _rejection(truck: Dict[str, Any], documents: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Rejection payload, or None when both checks passed."""
+    reasons = []
+    if truck.get("status") != "SUCCESS":
+        reasons.append(f"Vehicle is not an approved truck type. {truck.get('reason', '')}".strip())
+    if documents.get("status") == "ERROR":
+        reasons.append("Driver license or insurance could not be checked; try again later.")
+    elif not documents.get("documents_valid"):
+        reasons.append("Driver license or insurance is invalid.")
+    if reasons:
+        return {"status": REJECTED, "driver_id": None, "reasons": reasons}
+    return None
+
+
+class RegistrationPipeline:
+    """
+    Driver onboarding: the TRUCKS ONLY check and the licence/insurance check run
+    concurrently against the Legal Bot, and verified drivers are persisted with
+    real ids. Bulk imports are verified in batches (one Legal call per check per
+    batch) with up to `max_concurrent_batches` batches in flight. New drivers
+    are announced to the Dispatcher (POST /drivers) with their first location
+    ping, since that is when their position is known. Registry calls (DB
+    queries with StorageDriverRegistry) run on worker threads, off the event
+    loop; writes are serialized so a licence is never added twice.
+    """
+
+    def __init__(self, legal_service: ServiceClient, registry: Optional[DriverRegistry] = None,
+                 batch_size: int = 200, max_concurrent_batches: int = 4):
+        self.legal_service = legal_service
+        self.registry = registry if registry is not None else DriverRegistry()
+        self.batch_size = batch_size
+        self._batch_slots = asyncio.Semaphore(max_concurrent_batches)
+        self.registered = 0
+        self.rejected = 0
+        self._unannounced: Dict[int, DriverRecord] = {}  # Registered, not yet known to the Dispatcher
+        self._writes = asyncio.Lock()
+
+    async def get(self, driver_id: int) -> Optional[DriverRecord]:
+        return await asyncio.to_thread(self.registry.get, driver_id)
+
+    async def _add_many(self, rows: List[tuple]) -> List[DriverRecord]:
+        async with self._writes:
+            return await asyncio.to_thread(self.registry.add_many, rows)
+
+    def pending_announcements(self, pings: List[Any]) -> List[Dict[str, Any]]:
+        """Dispatcher POST /drivers payloads for newly registered drivers in `pings`, placed at their ping."""
+        payloads = []
+        for ping in pings:
+            record = self._unannounced.get(ping.driver_id)
+            if record is not None:
+                payloads.append({"driver_id": record.driver_id, "lat": ping.lat, "lon": ping.lon,
+                                 "capacity": record.capacity, "rating": NEW_DRIVER_RATING,
+                                 "is_verified": True, "is_active": bool(ping.is_active)})
+        return payloads
+
+    def mark_announced(self, payloads: List[Dict[str, Any]]):
+        for payload in payloads:
+            self._unannounced.pop(payload["driver_id"], None)
+
+    async def _post(self, path: str, payload: Any) -> Any:
+        try:
+            # Verification calls are read-only checks, safe to retry
+            return (await self.legal_service.post(path, json=payload, idempotent=True)).json()
+        except httpx.HTTPError as e:
+            raise LegalServiceUnavailable(str(e)) from e
+
+    async def register(self, registration: Dict[str, Any]) -> Dict[str, Any]:
+        existing = await asyncio.to_thread(self.registry.find_by_license, registration["license_number"])
+        if existing is not None:
+            return {"status": REGISTERED, "driver_id": existing.driver_id, "message": "Driver already registered."}
+
+        truck, documents = await asyncio.gather(
+            self._post("/verify_truck", _truck_payload(registration)),
+            self._post("/verify_documents", _documents_payload(registration)),
+        )
+        rejection = _rejection(truck, documents)
+        if rejection is not None:
+            self.rejected += 1
+            return rejection
+        record = (await self._add_many([(registration, truck)]))[0]
+        self._unannounced[record.driver_id] = record
+        self.registered += 1
+        return {"status": REGISTERED, "driver_id": record.driver_id,
+                "message": "Truck verified and driver registered."}
+
+    async def _register_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        async with self._batch_slots:
+            trucks, documents = await asyncio.gather(
+                self._post("/verify_trucks", [_truck_payload(r) for r in batch]),
+                self._post("/verify_documents/batch", [_documents_payload(r) for r in batch]),
+            )
+        results: List[Optional[Dict[str, Any]]] = []
+        verified = []
+        for registration, truck, docs in zip(batch, trucks["results"], documents["results"]):
+            rejection = _rejection(truck, docs)
+            results.append(rejection)
+            if rejection is None:
+                verified.append((registration, truck))
+        records = iter(await self._add_many(verified))
+        for position, rejection in enumerate(results):
+            if rejection is None:
+                record = next(records)
+                self._unannounced[record.driver_id] = record
+                results[position] = {"status": REGISTERED, "driver_id": record.driver_id}
+        self.registered += len(verified)
+        self.rejected += len(batch) - len(verified)
+        return results
+
+    async def register_many(self, registrations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bulk import (partner fleets). One result per registration, in input order."""
+        batches = [registrations[i:i + self.batch_size] for i in range(0, len(registrations), self.batch_size)]
+        results: List[Dict[str, Any]] = []
+        for batch_results in await asyncio.gather(*(self._register_batch(batch) for batch in batches)):
+            results.extend(batch_results)
+        return results
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"registered": self.registered, "rejected": self.rejected, "drivers": len(self.registry)}
@@ -0,0 +1,66 @@
+# benchmarks/bench_assignment.py
+#
+# Total empty miles of greedy first-come matching (each job takes its nearest
+# unclaimed truck) versus Dispatcher.assign_jobs (global min-cost assignment),
+# plus solve time, for growing batch windows in a busy downtown area.
+#
+# Usage: python benchmarks/bench_assignment.py   (settings.py must be importable)
+
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.bench_match_job import make_fleet, make_jobs
+from bots.dispatcher_bot.dispatcher import Dispatcher
+
+FLEET_SIZE = 1_000
+BATCH_SIZES = [10, 50, 200, 500]
+
+
+def greedy_exclusive(dispatcher: Dispatcher, jobs, k: int = 64):
+    """Jobs in arrival order each claim their nearest truck nobody else has claimed."""
+    claimed = set()
+    total, matched = 0.0, 0
+    for job in jobs:
+        for distance, driver in dispatcher.driver_index.nearest(
+            job.pickup_location, k, required_capacity=job.required_capacity
+        ):
+            if driver.id not in claimed:
+                claimed.add(driver.id)
+                total += round(distance, 2)  # Same rounding as match results
+                matched += 1
+                break
+    return total, matched
+
+
+def main():
+    rng = random.Random(11)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dispatcher = Dispatcher()
+        for driver in make_fleet(FLEET_SIZE, rng):
+            dispatcher.update_driver(driver)
+
+    print(f"{'batch':>6} {'greedy km':>10} {'global km':>10} {'saved':>7} {'solve ms':>9}")
+    for batch_size in BATCH_SIZES:
+        jobs = make_jobs(batch_size, rng)
+        greedy_km, greedy_matched = greedy_exclusive(dispatcher, jobs)
+
+        start = time.perf_counter()
+        results = dispatcher.assign_jobs(jobs)
+        solve_ms = (time.perf_counter() - start) * 1000.0
+        assigned = [r for r in results if r["status"] == "MATCHED"]
+        global_km = sum(r["empty_miles_km"] for r in assigned)
+        assert len({r["driver_id"] for r in assigned}) == len(assigned), "driver assigned twice"
+
+        saved = 1.0 - global_km / greedy_km if greedy_km else 0.0
+        print(f"{batch_size:>6} {greedy_km:>10.1f} {global_km:>10.1f} {saved:>6.1%} {solve_ms:>9.1f}"
+              f"  ({len(assigned)} vs {greedy_matched} matched)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_compliance_cache.py
+#
+# Registration burst against the local stand-in DMV: many concurrent
+# verify_insurance_and_license calls for a smaller set of drivers (re-submits,
+# retries, duplicate partner uploads). Compares upstream DMV calls and wall
+# time with no cache versus the ComplianceCache with single-flight loads.
+#
+# Usage: python benchmarks/bench_compliance_cache.py [registrations] [drivers] [threads]
+
+import contextlib
+import io
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.legal_bot.compliance_cache import ComplianceCache, LocalDMVService
+from bots.legal_bot.legal_bot import LegalBot
+
+DMV_LATENCY = 0.05
+
+
+class _NoCache(ComplianceCache):
+    """Baseline: every lookup goes upstream."""
+
+    def get_or_load(self, key, loader, expires_at=None, is_negative=None):
+        return loader()
+
+
+def run(bot: LegalBot, registrations, threads: int) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(bot.verify_insurance_and_license, registrations))
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    drivers = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    rng = random.Random(9)
+    registrations = [{"license_number": f"NC{d:07d}", "plate": f"PK{d:05d}", "insurance_status": True}
+                     for d in (rng.randrange(drivers) for _ in range(count))]
+
+    print(f"registrations: {count:,}  distinct drivers: {drivers}  threads: {threads}  "
+          f"DMV latency: {DMV_LATENCY * 1000:.0f} ms")
+    for label, cache in (("no cache", _NoCache()), ("ComplianceCache", ComplianceCache())):
+        dmv = LocalDMVService(latency=DMV_LATENCY)
+        with contextlib.redirect_stdout(io.StringIO()):
+            bot = LegalBot(dmv=dmv, compliance_cache=cache)
+        elapsed = run(bot, registrations, threads)
+        line = f"{label:16s} {count / elapsed:9,.0f} checks/s  DMV calls: {dmv.calls:6,}"
+        if not isinstance(cache, _NoCache):
+            stats = cache.stats()
+            line += f"  coalesced: {stats['coalesced']:,}  hit rate: {stats['hit_rate']:.1%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_content_pipeline.py
+#
+# Statewide campaign draft generation against the local LLM stand-in:
+# the old one-region-at-a-time loop versus ContentPipeline (bounded
+# concurrency, prompt dedupe, TTL cache, streaming), reporting total time,
+# time until the first campaign can launch, and LLM calls made. A second
+# run over the same regions is served from the draft cache.
+#
+# Usage: python benchmarks/bench_content_pipeline.py [regions] [latency_s] [concurrency]
+#        (settings.py must be importable)
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.standins import BackgroundServer
+from bots.marketing_bot.content_pipeline import ContentPipeline, LLMClient, build_prompt, parse_draft
+from bots.marketing_bot.llm_standin import make_llm_standin
+from bots.marketing_bot.models import MarketDemandSignal
+
+COUNTIES = ["Mecklenburg", "Wake", "Guilford", "Forsyth", "Durham", "Buncombe", "Cumberland", "Union",
+            "Gaston", "Cabarrus", "New Hanover", "Johnston", "Iredell", "Onslow", "Pitt", "Alamance",
+            "Davidson", "Catawba", "Rowan", "Randolph", "Orange", "Harnett", "Wayne", "Brunswick",
+            "Henderson", "Cleveland", "Craven", "Nash", "Rockingham", "Burke", "Moore", "Caldwell"]
+
+
+def signals(count: int):
+    # Overlapping territories: some regions are asked for twice (e.g. by two demand scans)
+    return [MarketDemandSignal(region=f"{COUNTIES[i % len(COUNTIES)]} County, NC", driver_density_score=0.35,
+                               delivery_requests_7d=200 + 25 * i, conversion_rate=0.08, priority_score=0.9)
+            for i in range(count)]
+
+
+async def sequential(url: str, batch):
+    async with LLMClient(url, max_concurrency=1) as client:
+        start = time.perf_counter()
+        first = None
+        for signal in batch:
+            parse_draft(await client.complete(build_prompt(signal)), signal)
+            first = first if first is not None else time.perf_counter() - start
+        return time.perf_counter() - start, first, client.requests
+
+
+async def pipelined(pipeline: ContentPipeline, batch):
+    start = time.perf_counter()
+    first = None
+    async for _ in pipeline.stream(batch):
+        first = first if first is not None else time.perf_counter() - start
+    return time.perf_counter() - start, first
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.25
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    batch = signals(count)
+    unique = len({signal.region for signal in batch})
+
+    with BackgroundServer(make_llm_standin(latency_s=latency)) as url:
+        total, first, calls = asyncio.run(sequential(url, batch))
+        print(f"{count} regions ({unique} unique), LLM latency {latency * 1000:.0f} ms")
+        print(f"  sequential:              total {total:6.2f} s  first draft {first:5.2f} s  LLM calls {calls}")
+
+        async def run_pipeline():
+            async with LLMClient(url, max_concurrency=concurrency) as client:
+                pipeline = ContentPipeline(client)
+                cold = await pipelined(pipeline, batch)
+                warm = await pipelined(pipeline, batch)
+                return cold, warm, pipeline.stats()
+
+        (total, first), (warm_total, warm_first), stats = asyncio.run(run_pipeline())
+        print(f"  {f'pipeline (x{concurrency}):':24s} total {total:6.2f} s  first draft {first:5.2f} s  "
+              f"LLM calls {stats['llm_requests']}")
+        print(f"  pipeline, cached re-run: total {warm_total:6.2f} s  first draft {warm_first:5.2f} s  "
+              f"cache {stats['cache']}")
+
+
+if __name__ == "__main__":
+    main()
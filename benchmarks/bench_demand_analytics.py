@@ -0,0 +1,115 @@
+# benchmarks/bench_demand_analytics.py
+#
+# Region-wide demand signals for MarketingBot: one vectorized load of a week
+# of job history, then the hourly refresh (new jobs + driver pings + top-k
+# regions) on the incrementally maintained bucket tables versus rebuilding
+# them from the full history each time. Also the same incremental refresh
+# read from the shared Storage (only job_events rows newer than the last refresh).
+#
+# Usage: python benchmarks/bench_demand_analytics.py [jobs_per_week] [drivers]
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.common.storage import Storage
+from bots.marketing_bot.demand_analytics import WEEK_SECONDS, DemandAnalytics
+
+# Demand centres across North Carolina: (lat, lon, share of jobs)
+METROS = [(35.23, -80.84, 0.35), (35.78, -78.64, 0.25), (36.07, -79.79, 0.15), (36.10, -80.24, 0.1),
+          (35.60, -82.55, 0.08), (34.23, -77.94, 0.07)]
+
+
+def pickups(rng: np.random.Generator, count: int):
+    shares = np.array([share for _, _, share in METROS])
+    metro = rng.choice(len(METROS), size=count, p=shares / shares.sum())
+    centres = np.array([(lat, lon) for lat, lon, _ in METROS])[metro]
+    return centres[:, 0] + rng.normal(0, 0.15, count), centres[:, 1] + rng.normal(0, 0.2, count)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    jobs_per_week = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    drivers = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    rng = np.random.default_rng(9)
+    now = 1_800_000_000.0
+    clock = lambda: now
+
+    lats, lons = pickups(rng, jobs_per_week)
+    created = np.sort(now - rng.uniform(0, WEEK_SECONDS, jobs_per_week))
+    matched = rng.random(jobs_per_week) < 0.75
+    driver_lats, driver_lons = pickups(rng, drivers)
+    # Drivers are spread more evenly than demand: the big metros are short
+    driver_lats += rng.normal(0, 0.4, drivers)
+
+    analytics = DemandAnalytics(clock=clock)
+    _, load_ms = timed(lambda: analytics.record_jobs(lats, lons, created, matched))
+    analytics.set_active_drivers(list(range(drivers)), driver_lats, driver_lons)
+    print(f"{jobs_per_week:,} jobs over 7 days, {drivers:,} drivers -> {analytics.stats()}")
+    print(f"initial vectorized load:                {load_ms:8.1f} ms")
+
+    hourly = jobs_per_week // 168
+    new_lats, new_lons = pickups(rng, hourly)
+    now += 3600.0
+    new_created = now - rng.uniform(0, 3600.0, hourly)
+    new_matched = rng.random(hourly) < 0.75
+    moved = rng.choice(drivers, size=2_000, replace=False)
+
+    def incremental():
+        analytics.record_jobs(new_lats, new_lons, new_created, new_matched)
+        analytics.record_drivers(moved.tolist(), driver_lats[moved] + 0.01, driver_lons[moved])
+        return analytics.top_k(10)
+
+    def rescan():
+        fresh = DemandAnalytics(clock=clock)
+        fresh.record_jobs(np.concatenate([lats, new_lats]), np.concatenate([lons, new_lons]),
+                          np.concatenate([created, new_created]), np.concatenate([matched, new_matched]))
+        fresh.set_active_drivers(list(range(drivers)), driver_lats, driver_lons)
+        return fresh.top_k(10)
+
+    top, incremental_ms = timed(incremental)
+    _, rescan_ms = timed(rescan)
+    _, signals_ms = timed(analytics.signals)
+    _, top_ms = timed(lambda: analytics.top_k(10))
+    print(f"hourly refresh, incremental ({hourly:,} jobs): {incremental_ms:8.1f} ms")
+    print(f"hourly refresh, full rescan:            {rescan_ms:8.1f} ms")
+    print(f"signals for all {len(analytics):,} regions:       {signals_ms:8.1f} ms")
+    print(f"top-10 query:                           {top_ms:8.2f} ms")
+    for signal in top[:3]:
+        print(f"  {signal.region}: {signal.delivery_requests_7d} requests, density "
+              f"{signal.driver_density_score}, priority {signal.priority_score}")
+
+    # The same refresh fed from the shared Storage
+    stored = min(jobs_per_week, 200_000)
+    storage = Storage("sqlite://")
+    storage.init_schema()
+    storage.insert_jobs({"id": i, "client_id": 1, "status": "MATCHED" if matched[-stored + i] else "OPEN",
+                         "pickup_lat": lats[-stored + i], "pickup_lon": lons[-stored + i], "dropoff_lat": 0.0,
+                         "dropoff_lon": 0.0, "base_price_cents": 6_000,
+                         "driver_id": 1 if matched[-stored + i] else None, "created_at": created[-stored + i]}
+                        for i in range(stored))
+    from_storage = DemandAnalytics(clock=clock)
+    _, first_ms = timed(lambda: from_storage.refresh_from_storage(storage))
+    storage.insert_jobs({"id": stored + i, "client_id": 1, "status": "OPEN", "pickup_lat": new_lats[i],
+                         "pickup_lon": new_lons[i], "dropoff_lat": 0.0, "dropoff_lon": 0.0,
+                         "base_price_cents": 6_000, "created_at": new_created[i]} for i in range(hourly))
+    # Jobs from the last hour that found a driver after they were stored
+    storage.update_jobs_status((stored + i, "MATCHED", 1) for i in range(0, hourly, 2))
+    loaded, again_ms = timed(lambda: from_storage.refresh_from_storage(storage))
+    print(f"storage refresh, first ({stored:,} rows):   {first_ms:8.1f} ms")
+    print(f"storage refresh, next hour ({loaded['jobs_loaded']:,} new jobs, "
+          f"{loaded['match_changes']:,} matches): {again_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
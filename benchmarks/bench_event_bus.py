@@ -0,0 +1,143 @@
+# benchmarks/bench_event_bus.py
+#
+# Messages/sec over the event bus versus the HTTP round trips it replaces:
+#   1. Fire-and-forget location batches: POST /update_locations to the real
+#      Dispatcher app vs publishing to the in-process bus and the file log
+#      (consumed by a consumer group), plus replay of the stored log.
+#   2. Job matching needing an answer: POST /match_job vs RequestReply over
+#      the bus, answered by the Dispatcher app's batched serve() consumer.
+#
+# Usage: python benchmarks/bench_event_bus.py [messages] [concurrency]
+#        (settings.py must be importable; EVENT_BUS_URL is set to memory:// here)
+
+import asyncio
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import settings
+
+settings.EVENT_BUS_URL = "memory://"
+
+from benchmarks.bench_match_job import make_fleet
+from benchmarks.standins import BackgroundServer
+from bots.common.event_bus import (
+    DRIVER_LOCATIONS, JOB_MATCHED, JOB_SUBMITTED, EventBus, InProcessEventBus, LogEventBus, RequestReply,
+)
+from bots.dispatcher_bot import api as dispatcher_api
+
+PINGS_PER_BATCH = 20
+
+
+def location_batch(i: int, rng: random.Random):
+    return {"pings": [{"driver_id": rng.randrange(5_000), "lat": 35.2 + rng.uniform(-0.3, 0.3),
+                       "lon": -80.8 + rng.uniform(-0.3, 0.3), "is_active": True, "timestamp": float(i)}
+                      for _ in range(PINGS_PER_BATCH)]}
+
+
+def match_request(i: int, rng: random.Random):
+    lat, lon = 35.2 + rng.uniform(-0.3, 0.3), -80.8 + rng.uniform(-0.3, 0.3)
+    return {"pickup_coords": [lat, lon], "dropoff_coords": [lat + 0.05, lon + 0.05], "required_capacity": 100.0,
+            "is_express": False, "client_id": 1, "base_price": 50.0, "job_id": i}
+
+
+async def http_round_trips(url: str, path: str, payloads, concurrency: int) -> float:
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        async def send(payload):
+            async with slots:
+                (await client.post(path, json=payload)).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send(payload) for payload in payloads))
+        return time.perf_counter() - start
+
+
+async def bus_pubsub(bus: EventBus, payloads, publish_batch: int) -> float:
+    """Publishes everything (in publish_many chunks) and waits until one consumer group has it all."""
+    done = asyncio.Event()
+    received = 0
+
+    async def consume(events):
+        nonlocal received
+        received += len(events)
+        if received >= len(payloads):
+            done.set()
+
+    bus.subscribe("bench.locations", "bench", consume, batch_size=500)
+    await bus.start()
+    start = time.perf_counter()
+    for offset in range(0, len(payloads), publish_batch):
+        bus.publish_many("bench.locations", payloads[offset:offset + publish_batch])
+        await asyncio.sleep(0)  # let the consumer run, as a busy service would
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    await bus.stop()
+    return elapsed
+
+
+async def bus_requests(payloads, concurrency: int) -> float:
+    requester = RequestReply(dispatcher_api.event_bus, JOB_MATCHED)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(payload):
+        async with slots:
+            await requester.request(JOB_SUBMITTED, payload, timeout=60.0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(payload) for payload in payloads))
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    rng = random.Random(3)
+    batches = [location_batch(i, rng) for i in range(count)]
+    jobs = [match_request(i, rng) for i in range(count)]
+    lines = []
+
+    def report(label: str, n: int, elapsed: float):
+        lines.append(f"{label:44s} {n / elapsed:11,.0f} msg/s  ({n:,} in {elapsed:.2f} s)")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for driver in make_fleet(2_000, rng):
+            dispatcher_api.dispatcher.update_driver(driver)
+        with BackgroundServer(dispatcher_api.app) as url:
+            report(f"HTTP POST /update_locations (x{concurrency})", count,
+                   asyncio.run(http_round_trips(url, "/update_locations", batches, concurrency)))
+            report(f"HTTP POST /match_job (x{concurrency})", count,
+                   asyncio.run(http_round_trips(url, "/match_job", jobs, concurrency)))
+            report(f"bus request/reply match (x{concurrency})", count,
+                   asyncio.run(bus_requests(jobs, concurrency)))
+
+        report("bus in-process, publish one at a time", count,
+               asyncio.run(bus_pubsub(InProcessEventBus(), batches, 1)))
+        report("bus in-process, publish_many x100", count,
+               asyncio.run(bus_pubsub(InProcessEventBus(), batches, 100)))
+        with tempfile.TemporaryDirectory() as tmp:
+            report("bus file log, publish one at a time", count,
+                   asyncio.run(bus_pubsub(LogEventBus(f"{tmp}/plain"), batches, 1)))
+            report("bus file log + fsync, publish_many x100", count,
+                   asyncio.run(bus_pubsub(LogEventBus(f"{tmp}/durable", fsync=True), batches, 100)))
+            replay_bus = LogEventBus(f"{tmp}/plain")
+            start = time.perf_counter()
+            replayed = sum(len(batch) for batch in replay_bus.replay("bench.locations"))
+            report("file log replay (cold open)", replayed, time.perf_counter() - start)
+            replay_bus.close()
+
+    print(f"messages: {count:,} (location batches of {PINGS_PER_BATCH} pings / match requests)")
+    print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
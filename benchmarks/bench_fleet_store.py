@@ -0,0 +1,94 @@
+# benchmarks/bench_fleet_store.py
+#
+# Memory per driver and eligibility-scan time for 100k drivers: plain
+# dataclass objects, the __slots__ DriverStatus, and the columnar FleetStore.
+#
+# Usage: python benchmarks/bench_fleet_store.py
+
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.dispatcher_bot.fleet_store import FleetStore
+from bots.dispatcher_bot.models import DriverStatus
+
+FLEET_SIZE = 100_000
+SCANS = 20
+REQUIRED_CAPACITY = 150.0
+
+
+@dataclass
+class DictDriverStatus:
+    """DriverStatus as it was before __slots__ (one __dict__ per instance)."""
+    id: int
+    location: Tuple[float, float]
+    capacity: float
+    rating: float
+    is_verified: bool = True
+    is_active: bool = False
+
+
+def make_rows(rng: random.Random):
+    return [
+        (i, 35.2271 + rng.uniform(-0.5, 0.5), -80.8431 + rng.uniform(-0.5, 0.5),
+         rng.choice([120.0, 180.0, 250.0]), round(rng.uniform(4.0, 5.0), 1), rng.random() < 0.8)
+        for i in range(FLEET_SIZE)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fleet = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return fleet, (after - before) / FLEET_SIZE
+
+
+def scan_objects(fleet):
+    return [d.id for d in fleet if d.is_active and d.is_verified and d.capacity >= REQUIRED_CAPACITY]
+
+
+def scan_store(store: FleetStore):
+    return store.ids[store.eligible_mask(REQUIRED_CAPACITY)]
+
+
+def timed_ms(fn, fleet):
+    start = time.perf_counter()
+    for _ in range(SCANS):
+        fn(fleet)
+    return (time.perf_counter() - start) * 1000.0 / SCANS
+
+
+def main():
+    rows = make_rows(random.Random(5))
+
+    def build_store():
+        store = FleetStore(initial_capacity=FLEET_SIZE)
+        for i, lat, lon, cap, rating, active in rows:
+            store.upsert(i, lat, lon, cap, rating, active)
+        return store
+
+    dict_fleet, dict_bytes = measure(lambda: [DictDriverStatus(i, (lat, lon), cap, rating, is_active=active)
+                                              for i, lat, lon, cap, rating, active in rows])
+    slot_fleet, slot_bytes = measure(lambda: [DriverStatus(i, (lat, lon), cap, rating, is_active=active)
+                                              for i, lat, lon, cap, rating, active in rows])
+    store, store_bytes = measure(build_store)
+
+    assert len(scan_objects(slot_fleet)) == len(scan_store(store))
+    print(f"{FLEET_SIZE:,} drivers")
+    print(f"{'layout':<22} {'bytes/driver':>12} {'scan ms':>9}")
+    print(f"{'dataclass (__dict__)':<22} {dict_bytes:>12.0f} {timed_ms(scan_objects, dict_fleet):>9.2f}")
+    print(f"{'dataclass (__slots__)':<22} {slot_bytes:>12.0f} {timed_ms(scan_objects, slot_fleet):>9.2f}")
+    print(f"{'FleetStore':<22} {store_bytes:>12.0f} {timed_ms(scan_store, store):>9.2f}")
+    print(f"  (column buffers alone: {store.nbytes() / FLEET_SIZE:.0f} bytes/driver; the rest is the id -> row map)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+# benchmarks/bench_instrumentation.py
+#
+# Overhead of bots/common/instrumentation.py:
+#   1. Per call on a trivial function: plain call vs @timed with metrics
+#      disabled / enabled, counter increments, and a disabled-level log_event
+#      vs the print() it replaced (to an in-memory stream).
+#   2. Dispatcher.match_job over a 10k-driver fleet: unwrapped vs metrics
+#      disabled vs enabled vs enabled with the sampling profiler running.
+#
+# Variants are interleaved: every round runs each of them once, in a shuffled
+# order, and the median over --rounds is reported, so drift (CPU frequency,
+# cache warmth, other tenants) hits all variants alike. Overheads are taken
+# per round against the baseline measured in that same round.
+#
+# Exits 1 when match_job with metrics disabled is more than
+# --max-disabled-overhead percent (default 2%) slower than the unwrapped call:
+# disabled instrumentation must cost nothing measurable on the hot path.
+#
+# Usage: python benchmarks/bench_instrumentation.py [--rounds 9] [--max-disabled-overhead 2.0]
+#        (settings.py must be importable)
+
+import argparse
+import contextlib
+import io
+import logging
+import random
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.bench_match_job import make_fleet, make_jobs
+from bots.common.instrumentation import PROFILER, counter, get_logger, log_event, set_enabled, timed
+from bots.dispatcher_bot.dispatcher import Dispatcher
+
+CALLS = 200_000
+MATCHES = 1_000
+
+# (label, metrics enabled, timing function returning one measurement)
+Variant = Tuple[str, bool, Callable[[], float]]
+
+
+def interleaved(variants: Sequence[Variant], rounds: int, seed: int = 7) -> Dict[str, List[float]]:
+    """Runs every variant once per round, in a fresh shuffled order each round."""
+    rng = random.Random(seed)
+    samples: Dict[str, List[float]] = {label: [] for label, _, _ in variants}
+    order = list(variants)
+    for _ in range(rounds):
+        rng.shuffle(order)
+        for label, enabled, measure in order:
+            set_enabled(enabled)
+            samples[label].append(measure())
+    set_enabled(True)
+    return samples
+
+
+def ns_per_call(statement, number: int = CALLS) -> Callable[[], float]:
+    return lambda: timeit.timeit(statement, number=number) / number * 1e9
+
+
+def plain(x):
+    return x + 1
+
+
+instrumented = timed("bench_instrumented_seconds")(plain)
+events = counter("bench_events_total", "Benchmark counter")
+labelled = counter("bench_labelled_total", "Benchmark counter", ("outcome",))
+log = get_logger("bench")
+
+
+def printed():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ns_per_call(lambda: print(f"Searching DB for active drivers near {(35.2, -80.8)}..."),
+                           number=CALLS // 10)()
+
+
+def micro(rounds: int):
+    log.setLevel(logging.INFO)
+    variants: List[Variant] = [
+        ("plain call", True, ns_per_call(lambda: plain(1))),
+        ("@timed, metrics disabled", False, ns_per_call(lambda: instrumented(1))),
+        ("counter.inc, disabled", False, ns_per_call(events.inc)),
+        ("@timed, metrics enabled", True, ns_per_call(lambda: instrumented(1))),
+        ("counter.inc, enabled", True, ns_per_call(events.inc)),
+        ("counter.labels(...).inc, enabled", True, ns_per_call(lambda: labelled.labels("MATCHED").inc())),
+        ("log_event at DEBUG (level off)", True,
+         ns_per_call(lambda: log_event(log, logging.DEBUG, "match_found", job_id=1, driver_id=2, empty_km=0.5))),
+        ("print() it replaced (to memory)", True, printed),
+    ]
+    samples = interleaved(variants, rounds)
+    baseline = samples["plain call"]
+    print(f"per call ({CALLS:,} calls, median of {rounds} interleaved rounds):")
+    for label, _, _ in variants:
+        ns = statistics.median(samples[label])
+        extra = ""
+        if label.startswith("@timed"):
+            extra = f"  (+{statistics.median(a - b for a, b in zip(samples[label], baseline)):5.0f} ns)"
+        print(f"  {label:36s} {ns:8.0f} ns{extra}")
+
+
+def match_rate(jobs, match) -> Callable[[], float]:
+    def measure() -> float:
+        start = time.perf_counter()
+        for job in jobs:
+            match(job)
+        return (time.perf_counter() - start) / len(jobs) * 1e6
+    return measure
+
+
+def profiled(jobs, match, reports: List[dict]) -> Callable[[], float]:
+    measure = match_rate(jobs, match)
+
+    def run() -> float:
+        PROFILER.start()
+        try:
+            return measure()
+        finally:
+            reports.append(PROFILER.stop())
+    return run
+
+
+def end_to_end(rounds: int) -> float:
+    """Prints the match_job table; returns the median metrics-disabled overhead in percent."""
+    rng = random.Random(7)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dispatcher = Dispatcher(warm_from_db=False)
+        for driver in make_fleet(10_000, rng):
+            dispatcher.update_driver(driver)
+    jobs = make_jobs(MATCHES, rng)
+    unwrapped = Dispatcher.match_job.__wrapped__
+    reports: List[dict] = []
+    match_rate(jobs, dispatcher.match_job)()  # Warm the route cache
+
+    variants: List[Variant] = [
+        ("unwrapped match_job", True, match_rate(jobs, lambda job: unwrapped(dispatcher, job))),
+        ("metrics disabled", False, match_rate(jobs, dispatcher.match_job)),
+        ("metrics enabled", True, match_rate(jobs, dispatcher.match_job)),
+        ("metrics + sampling profiler (5 ms)", True, profiled(jobs, dispatcher.match_job, reports)),
+    ]
+    samples = interleaved(variants, rounds)
+    base = samples["unwrapped match_job"]
+    print(f"Dispatcher.match_job, 10k drivers, {MATCHES:,} jobs, median of {rounds} interleaved rounds:")
+    overheads = {}
+    for label, _, _ in variants:
+        overheads[label] = statistics.median((us / b - 1) * 100 for us, b in zip(samples[label], base))
+        print(f"  {label:36s} {statistics.median(samples[label]):8.1f} us/match  ({overheads[label]:+5.1f}%)")
+    report = reports[-1]
+    print(f"  profiler: {report['samples']} samples, top: {report['top'][:3]}")
+    return overheads["metrics disabled"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=9)
+    parser.add_argument("--max-disabled-overhead", type=float, default=2.0,
+                        help="percent match_job may slow down with metrics disabled")
+    args = parser.parse_args(argv)
+
+    micro(args.rounds)
+    overhead = end_to_end(args.rounds)
+    if overhead > args.max_disabled_overhead:
+        print(f"Disabled instrumentation costs {overhead:+.1f}% on match_job "
+              f"(bound {args.max_disabled_overhead:.1f}%)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
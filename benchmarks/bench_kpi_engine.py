@@ -0,0 +1,82 @@
+# benchmarks/bench_kpi_engine.py
+#
+# KPIEngine ingest rate and KPI read latency over a simulated event stream
+# (matches, deliveries, payouts, marketing), plus a check of the rolling-window
+# totals against a brute-force recount of the events inside the window.
+#
+# Usage: python benchmarks/bench_kpi_engine.py [events]
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.governance_bot import kpi_engine as k
+
+WINDOW = 3600.0
+BUCKET = 10.0
+EVENTS_PER_SECOND = 200  # simulated platform event rate
+
+
+def make_events(count: int, rng: random.Random):
+    kinds = [
+        (k.JOB_MATCHED, 0.35), (k.JOB_UNMATCHED, 0.03), (k.DELIVERY_COMPLETED, 0.3),
+        (k.DELIVERY_FAILED, 0.01), (k.PAYOUT_SUCCEEDED, 0.25), (k.PAYOUT_FAILED, 0.02),
+        (k.MARKETING_SPEND, 0.02), (k.MARKETING_REVENUE, 0.02),
+    ]
+    names, weights = zip(*kinds)
+    start = 1_700_000_000.0
+    events = []
+    for i, kind in enumerate(rng.choices(names, weights, k=count)):
+        payload = {"timestamp": start + i / EVENTS_PER_SECOND}
+        if kind == k.JOB_MATCHED:
+            payload.update(empty_km=rng.uniform(0.5, 8), loaded_km=rng.uniform(3, 40))
+        elif kind in (k.PAYOUT_SUCCEEDED, k.PAYOUT_FAILED, k.MARKETING_SPEND, k.MARKETING_REVENUE):
+            payload["amount"] = rng.uniform(10, 500)
+        events.append((kind, payload))
+    return events
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    events = make_events(count, random.Random(3))
+    engine = k.KPIEngine(window_seconds=WINDOW, bucket_seconds=BUCKET)
+
+    start = time.perf_counter()
+    for kind, payload in events:
+        engine.handle(kind, payload)
+    ingest_s = time.perf_counter() - start
+
+    now = events[-1][1]["timestamp"]
+    reads = 10_000
+    start = time.perf_counter()
+    for _ in range(reads):
+        kpis = engine.kpis(now)
+    read_us = (time.perf_counter() - start) / reads * 1e6
+
+    # Brute force: recount everything in the buckets still inside the window
+    head = int(now // BUCKET)
+    oldest = head - engine.num_buckets + 1
+    inside = [(kind, p) for kind, p in events if int(p["timestamp"] // BUCKET) >= oldest]
+    completed = sum(kind == k.DELIVERY_COMPLETED for kind, _ in inside)
+    failed = sum(kind == k.DELIVERY_FAILED for kind, _ in inside)
+    empty = sum(p.get("empty_km", 0) for kind, p in inside if kind == k.JOB_MATCHED)
+    loaded = sum(p.get("loaded_km", 0) for kind, p in inside if kind == k.JOB_MATCHED)
+    expected_success = completed / (completed + failed)
+    expected_empty = empty / (empty + loaded)
+
+    print(f"events: {count:,} over {count / EVENTS_PER_SECOND / 3600:.1f} h  "
+          f"window: {WINDOW:.0f}s in {engine.num_buckets} buckets of {BUCKET:.0f}s")
+    print(f"ingest: {count / ingest_s:12,.0f} events/s  ({ingest_s / count * 1e6:.2f} us/event)")
+    print(f"kpis(): {read_us:12.2f} us/read")
+    print(f"kpis: { {name: round(value, 4) for name, value in kpis.items()} }")
+    ok = (abs(kpis["delivery_success_rate"] - expected_success) < 1e-9
+          and abs(kpis["empty_miles_ratio"] - expected_empty) < 1e-9)
+    print(f"brute-force window recount: {'match' if ok else 'MISMATCH'} "
+          f"(success {expected_success:.6f}, empty-miles {expected_empty:.6f})")
+
+
+if __name__ == "__main__":
+    main()
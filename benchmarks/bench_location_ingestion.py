@@ -0,0 +1,73 @@
+# benchmarks/bench_location_ingestion.py
+#
+# Location ingestion throughput (pings/sec): batched, coalescing LocationIngestor
+# feeding Dispatcher.apply_locations, versus applying every ping individually.
+#
+# Usage: python benchmarks/bench_location_ingestion.py   (settings.py must be importable)
+
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.bench_match_job import CHARLOTTE, make_fleet
+from bots.dispatcher_bot.dispatcher import Dispatcher
+from bots.dispatcher_bot.ingestion import LocationIngestor
+from bots.dispatcher_bot.models import LocationPing
+
+FLEET_SIZE = 10_000
+PINGS = 500_000
+BATCH_SIZE = 500          # Pings per /update_locations request
+FLUSH_EVERY_BATCHES = 20  # ~ one flush per interval under this load
+
+
+def make_pings(count: int, rng: random.Random):
+    pings = []
+    for i in range(count):
+        driver_id = rng.randrange(FLEET_SIZE)
+        pings.append(LocationPing(
+            driver_id=driver_id,
+            lat=CHARLOTTE[0] + rng.uniform(-0.5, 0.5),
+            lon=CHARLOTTE[1] + rng.uniform(-0.5, 0.5),
+            timestamp=float(i),
+        ))
+    return pings
+
+
+def main():
+    rng = random.Random(3)
+    pings = make_pings(PINGS, rng)
+    with contextlib.redirect_stdout(io.StringIO()):
+        direct = Dispatcher()
+        batched = Dispatcher()
+    for dispatcher in (direct, batched):
+        for driver in make_fleet(FLEET_SIZE, random.Random(1)):
+            dispatcher.update_driver(driver)
+
+    start = time.perf_counter()
+    for ping in pings:
+        direct.apply_locations([ping])
+    direct_s = time.perf_counter() - start
+
+    ingestor = LocationIngestor(batched.apply_locations)
+    start = time.perf_counter()
+    for n, offset in enumerate(range(0, len(pings), BATCH_SIZE), start=1):
+        ingestor.submit_batch(pings[offset:offset + BATCH_SIZE])
+        if n % FLUSH_EVERY_BATCHES == 0:
+            ingestor.flush()
+    ingestor.flush()
+    batched_s = time.perf_counter() - start
+
+    stats = ingestor.stats()
+    print(f"pings: {PINGS:,}  drivers: {FLEET_SIZE:,}")
+    print(f"per-ping apply : {PINGS / direct_s:>12,.0f} pings/sec")
+    print(f"batched+coalesce: {PINGS / batched_s:>11,.0f} pings/sec "
+          f"({stats['flushed']:,} fleet updates, {stats['coalesced']:,} coalesced)")
+
+
+if __name__ == '__main__':
+    main()
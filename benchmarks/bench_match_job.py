@@ -0,0 +1,87 @@
+# benchmarks/bench_match_job.py
+#
+# Match latency of Dispatcher.match_job with the spatial driver index versus the
+# old full scan (route every driver), at 1k / 10k / 100k drivers around Charlotte.
+#
+# Usage: python benchmarks/bench_match_job.py   (settings.py must be importable)
+
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.dispatcher_bot.dispatcher import Dispatcher
+from bots.dispatcher_bot.models import DeliveryJob, DriverStatus
+
+CHARLOTTE = (35.2271, -80.8431)
+FLEET_SIZES = [1_000, 10_000, 100_000]
+JOBS_PER_RUN = 200
+SCAN_JOBS_PER_RUN = 5  # The full scan is slow; keep its sample small
+
+
+def make_fleet(size: int, rng: random.Random):
+    return [
+        DriverStatus(
+            id=i,
+            location=(CHARLOTTE[0] + rng.uniform(-0.5, 0.5), CHARLOTTE[1] + rng.uniform(-0.5, 0.5)),
+            capacity=rng.choice([120.0, 180.0, 250.0]),
+            rating=round(rng.uniform(4.0, 5.0), 1),
+            is_active=rng.random() < 0.8,
+        )
+        for i in range(size)
+    ]
+
+
+def make_jobs(count: int, rng: random.Random):
+    return [
+        DeliveryJob(
+            id=i,
+            pickup_location=(CHARLOTTE[0] + rng.uniform(-0.4, 0.4), CHARLOTTE[1] + rng.uniform(-0.4, 0.4)),
+            dropoff_location=(CHARLOTTE[0] + rng.uniform(-0.4, 0.4), CHARLOTTE[1] + rng.uniform(-0.4, 0.4)),
+            base_price=60.0,
+            required_capacity=rng.choice([50.0, 100.0, 200.0]),
+        )
+        for i in range(count)
+    ]
+
+
+def full_scan_match(dispatcher: Dispatcher, fleet, job: DeliveryJob):
+    """Pre-index behaviour: route every active driver with enough capacity."""
+    best = None
+    for driver in fleet:
+        if not driver.is_active or driver.capacity < job.required_capacity:
+            continue
+        route = dispatcher.optimize_route(driver.location, job.pickup_location)
+        if best is None or route.distance_km < best[1]:
+            best = (driver.id, route.distance_km)
+    return best
+
+
+def timed_ms(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) * 1000.0 / len(items)
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'drivers':>8} {'index ms/match':>15} {'scan ms/match':>14} {'speedup':>8}")
+    for size in FLEET_SIZES:
+        fleet = make_fleet(size, rng)
+        jobs = make_jobs(JOBS_PER_RUN, rng)
+        with contextlib.redirect_stdout(io.StringIO()):
+            dispatcher = Dispatcher()
+            for driver in fleet:
+                dispatcher.update_driver(driver)
+            index_ms = timed_ms(dispatcher.match_job, jobs)
+            scan_ms = timed_ms(lambda job: full_scan_match(dispatcher, fleet, job), jobs[:SCAN_JOBS_PER_RUN])
+        print(f"{size:>8} {index_ms:>15.3f} {scan_ms:>14.3f} {scan_ms / index_ms:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
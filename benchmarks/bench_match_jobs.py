@@ -0,0 +1,48 @@
+# benchmarks/bench_match_jobs.py
+#
+# Burst matching: Dispatcher.match_jobs (one vectorized jobs x drivers matrix)
+# versus looping Dispatcher.match_job over the same burst.
+#
+# Usage: python benchmarks/bench_match_jobs.py   (settings.py must be importable)
+
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.bench_match_job import make_fleet, make_jobs
+from bots.dispatcher_bot.dispatcher import Dispatcher
+
+SCENARIOS = [(100, 1_000), (500, 1_000), (500, 10_000), (500, 100_000)]  # (jobs, drivers)
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'jobs':>5} {'drivers':>8} {'loop ms':>9} {'batch ms':>9} {'speedup':>8}")
+    for job_count, fleet_size in SCENARIOS:
+        fleet = make_fleet(fleet_size, rng)
+        jobs = make_jobs(job_count, rng)
+        with contextlib.redirect_stdout(io.StringIO()):
+            dispatcher = Dispatcher()
+            for driver in fleet:
+                dispatcher.update_driver(driver)
+
+            start = time.perf_counter()
+            looped = [dispatcher.match_job(job) for job in jobs]
+            loop_ms = (time.perf_counter() - start) * 1000.0
+
+            start = time.perf_counter()
+            batched = dispatcher.match_jobs(jobs)
+            batch_ms = (time.perf_counter() - start) * 1000.0
+
+        agree = sum(a.get("driver_id") == b.get("driver_id") for a, b in zip(looped, batched))
+        print(f"{job_count:>5} {fleet_size:>8} {loop_ms:>9.1f} {batch_ms:>9.1f} {loop_ms / batch_ms:>7.1f}x"
+              f"  ({agree}/{job_count} same driver)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_pricing.py
+#
+# Pricing engine latency: single quotes against a busy surge table (target
+# under 1 ms), incremental surge refreshes per driver/job event, a full
+# supply snapshot from the Dispatcher, and partner batch quotes.
+#
+# Usage: python benchmarks/bench_pricing.py [drivers] [open_jobs] [batch]
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.finance_bot.pricing import PricingEngine
+
+CHARLOTTE = (35.2271, -80.8431)
+
+
+def point(rng: random.Random, spread: float = 0.4):
+    return (CHARLOTTE[0] + rng.uniform(-spread, spread), CHARLOTTE[1] + rng.uniform(-spread, spread))
+
+
+def shipment(rng: random.Random):
+    pickup = point(rng)
+    return {"pickup_coords": pickup, "dropoff_coords": point(rng), "required_capacity": rng.choice([80.0, 200.0, 400.0]),
+            "is_express": rng.random() < 0.2}
+
+
+def percentiles(samples_us):
+    samples_us = sorted(samples_us)
+    return (statistics.median(samples_us), samples_us[int(len(samples_us) * 0.99)], samples_us[-1])
+
+
+def main():
+    drivers = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    open_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 10_000
+    rng = random.Random(11)
+    engine = PricingEngine()
+    table = engine.surge_table
+
+    # Downtown is short of trucks: jobs cluster near the centre, drivers spread out
+    start = time.perf_counter()
+    for driver_id in range(drivers):
+        table.set_driver(driver_id, *point(rng, 0.5))
+    for job_id in range(open_jobs):
+        table.open_job(job_id, *point(rng, 0.08))
+    load_s = time.perf_counter() - start
+    events = drivers + open_jobs
+    print(f"drivers: {drivers:,}  open jobs: {open_jobs:,}  -> {table.stats()}")
+    print(f"incremental refresh: {load_s / events * 1e6:8.1f} us per driver/job event")
+
+    samples = []
+    for job_id in range(open_jobs, open_jobs + 20_000):
+        lat, lon = point(rng, 0.08)
+        t = time.perf_counter()
+        table.open_job(job_id, lat, lon)
+        table.close_job(job_id)
+        samples.append((time.perf_counter() - t) * 1e6 / 2)
+    print("open/close job event:  p50 {:7.1f} us  p99 {:7.1f} us  max {:7.1f} us".format(*percentiles(samples)))
+
+    shipments = [shipment(rng) for _ in range(20_000)]
+    samples = []
+    for s in shipments:
+        t = time.perf_counter()
+        engine.quote(s["pickup_coords"], s["dropoff_coords"], s["required_capacity"], s["is_express"])
+        samples.append((time.perf_counter() - t) * 1e6)
+    print("single quote:          p50 {:7.1f} us  p99 {:7.1f} us  max {:7.1f} us".format(*percentiles(samples)))
+
+    snapshot = dict(table.supply)
+    for cell in list(snapshot)[::3]:
+        snapshot[cell] = max(0, snapshot[cell] + rng.choice([-2, -1, 1, 2]))
+    t = time.perf_counter()
+    table.set_supply_counts(snapshot)
+    print(f"supply snapshot:       {len(snapshot):,} cells ({len(snapshot) // 3:,} changed) in "
+          f"{(time.perf_counter() - t) * 1000:.1f} ms")
+
+    shipments = [shipment(rng) for _ in range(batch)]
+    t = time.perf_counter()
+    looped = [engine.quote(s["pickup_coords"], s["dropoff_coords"], s["required_capacity"], s["is_express"])
+              for s in shipments]
+    loop_ms = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    batched = engine.quote_many(shipments)
+    batch_ms = (time.perf_counter() - t) * 1000
+    mismatches = sum(1 for a, b in zip(looped, batched) if abs(a.price_cents - b.price_cents) > 1)
+    print(f"batch of {batch:,}:       loop {loop_ms:7.1f} ms   quote_many {batch_ms:7.1f} ms   "
+          f"({batch / batch_ms * 1000:,.0f} quotes/s, {mismatches} price mismatches)")
+
+
+if __name__ == "__main__":
+    main()
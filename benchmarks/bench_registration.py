@@ -0,0 +1,92 @@
+# benchmarks/bench_registration.py
+#
+# Driver onboarding throughput over HTTP: the Driver API in front of the real
+# Legal Bot service (offline DMV stand-in with fixed latency). Compares one
+# registration at a time, concurrent /register calls, and /register/bulk.
+#
+# Usage: python benchmarks/bench_registration.py [drivers] [concurrency]
+#        (settings.py must be importable; its URLs are overridden with local servers)
+
+import asyncio
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.standins import BackgroundServer
+from bots.common.config import settings
+
+settings.DMV_STANDIN = True  # Offline DMV answers for the Legal Bot app
+
+from apps.driver_app_api import api as driver_api
+from bots.legal_bot import api as legal_api
+
+DMV_LATENCY = 0.02
+VEHICLES = ["FORD F-150", "TOYOTA TACOMA", "GMC SIERRA 1500", "RAM 1500", "HONDA CIVIC SEDAN"]
+
+
+def make_drivers(count: int, prefix: str, rng: random.Random):
+    return [{"license_number": f"{prefix}{i:07d}", "truck_plate": f"{prefix}{i:05d}",
+             "vehicle_type": rng.choice(VEHICLES), "insurance_status": True} for i in range(count)]
+
+
+async def one_at_a_time(client: httpx.AsyncClient, drivers):
+    for driver in drivers:
+        await client.post("/register", json=driver)
+
+
+async def concurrent(client: httpx.AsyncClient, drivers, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def register(driver):
+        async with slots:
+            await client.post("/register", json=driver)
+
+    await asyncio.gather(*(register(driver) for driver in drivers))
+
+
+async def bulk(client: httpx.AsyncClient, drivers, chunk: int = 1_000):
+    for offset in range(0, len(drivers), chunk):
+        response = await client.post("/register/bulk", json=drivers[offset:offset + chunk])
+        response.raise_for_status()
+
+
+async def run(api_url: str, count: int, concurrency: int):
+    lines = []
+    rng = random.Random(4)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=api_url, limits=limits, timeout=120.0) as client:
+        serial_count = max(1, count // 10)
+        for label, coro, n in (
+            ("one at a time (old flow)", one_at_a_time(client, make_drivers(serial_count, "S", rng)), serial_count),
+            (f"{concurrency} concurrent /register", concurrent(client, make_drivers(count, "C", rng), concurrency), count),
+            ("/register/bulk", bulk(client, make_drivers(count, "B", rng)), count),
+        ):
+            start = time.perf_counter()
+            await coro
+            elapsed = time.perf_counter() - start
+            lines.append(f"{label:28s} {n / elapsed:9,.1f} drivers/s  ({n:,} drivers in {elapsed:.1f} s)")
+    return lines
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    legal_api.legal.dmv.latency = DMV_LATENCY
+    with contextlib.redirect_stdout(io.StringIO()), BackgroundServer(legal_api.app) as legal_url:
+        driver_api.legal_service.base_url = legal_url
+        with BackgroundServer(driver_api.app) as api_url:
+            lines = asyncio.run(run(api_url, count, concurrency))
+    print(f"drivers: {count:,}  DMV latency: {DMV_LATENCY * 1000:.0f} ms")
+    print("\n".join(lines))
+    print(f"registry: {driver_api.registrations.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
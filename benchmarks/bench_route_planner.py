@@ -0,0 +1,104 @@
+# benchmarks/bench_route_planner.py
+#
+# Multi-stop planning:
+#   1. One truck, jobs arriving one at a time: incremental insertion + local
+#      search into the live plan versus re-building the plan from scratch on
+#      every arrival (latency per job and final plan km).
+#   2. A fleet: Dispatcher.assign_multi_stop versus one-job-per-driver
+#      (match_job, each driver drives pickup -> dropoff and is done), in total
+#      km driven and trucks used.
+#
+# Usage: python benchmarks/bench_route_planner.py [jobs_per_truck] [fleet_jobs]
+#        (settings.py must be importable)
+
+import contextlib
+import io
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.bench_match_job import CHARLOTTE, make_fleet
+from bots.dispatcher_bot.dispatcher import Dispatcher
+from bots.dispatcher_bot.geo import haversine_km
+from bots.dispatcher_bot.models import DeliveryJob, DriverStatus
+from bots.dispatcher_bot.route_planner import RoutePlanner
+
+
+def make_job(job_id: int, rng: random.Random, spread: float = 0.15) -> DeliveryJob:
+    point = lambda: (CHARLOTTE[0] + rng.uniform(-spread, spread), CHARLOTTE[1] + rng.uniform(-spread, spread))
+    return DeliveryJob(id=job_id, pickup_location=point(), dropoff_location=point(), base_price=60.0,
+                       required_capacity=rng.choice([50.0, 100.0, 200.0]))
+
+
+def single_truck(jobs_per_truck: int, rng: random.Random):
+    planner = RoutePlanner()
+    driver = DriverStatus(id=1, location=CHARLOTTE, capacity=800.0, rating=5.0, is_active=True)
+    jobs = [make_job(i, rng) for i in range(jobs_per_truck)]
+
+    plan = planner.new_plan(driver)
+    incremental = []
+    for job in jobs:
+        t = time.perf_counter()
+        planner.add_job(plan, job)
+        incremental.append((time.perf_counter() - t) * 1000)
+
+    rebuild = []
+    for n in range(1, len(jobs) + 1):
+        t = time.perf_counter()
+        rebuilt, _ = planner.build(driver, jobs[:n])
+        rebuild.append((time.perf_counter() - t) * 1000)
+
+    print(f"one truck, {len(jobs)} jobs arriving one at a time:")
+    print(f"  incremental insert:   mean {statistics.mean(incremental):7.2f} ms  last {incremental[-1]:7.2f} ms  "
+          f"plan {plan.cost():7.1f} km")
+    print(f"  rebuild from scratch: mean {statistics.mean(rebuild):7.2f} ms  last {rebuild[-1]:7.2f} ms  "
+          f"plan {rebuilt.cost():7.1f} km")
+
+
+def fleet(fleet_jobs: int, rng: random.Random):
+    drivers = make_fleet(2_000, rng)
+    jobs = [make_job(i, rng) for i in range(fleet_jobs)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        single = Dispatcher(warm_from_db=False)
+        for driver in drivers:
+            single.update_driver(driver)
+        single_km, used = 0.0, set()
+        for job in jobs:
+            result = single.match_job(job)
+            if result["status"] == "MATCHED":
+                # The driver is busy with this job until it is delivered
+                single_km += result["empty_miles_km"] + haversine_km(job.pickup_location, job.dropoff_location)
+                used.add(result["driver_id"])
+                single.remove_driver(result["driver_id"])
+
+        multi = Dispatcher(warm_from_db=False)
+        for driver in drivers:
+            multi.update_driver(driver)
+        start = time.perf_counter()
+        results = [multi.assign_multi_stop(job) for job in jobs]
+        multi_ms = (time.perf_counter() - start) * 1000 / len(jobs)
+    matched = sum(1 for result in results if result["status"] == "MATCHED")
+    multi_km = sum(plan.cost() for plan in multi.plans.values())
+
+    print(f"fleet of {len(drivers):,} drivers, {len(jobs)} jobs (straight-line km):")
+    print(f"  one job per driver:   {single_km:8.1f} km  {len(used):4d} trucks")
+    print(f"  multi-stop plans:     {multi_km:8.1f} km  {len(multi.plans):4d} trucks  "
+          f"({matched} matched, {multi_ms:.2f} ms per job, "
+          f"{max(len(plan.jobs) for plan in multi.plans.values())} jobs on the busiest truck)")
+
+
+def main():
+    jobs_per_truck = int(sys.argv[1]) if len(sys.argv) > 1 else 25
+    fleet_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rng = random.Random(5)
+    single_truck(jobs_per_truck, rng)
+    fleet(fleet_jobs, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_settlement.py
+#
+# End-of-day settlement throughput: SettlementEngine over a streamed CSV ledger
+# versus calling FinanceBot.calculate_distribution once per job. Also checks
+# that driver payouts + platform fees add up to gross revenue to the cent.
+#
+# Usage: python benchmarks/bench_settlement.py [rows]   (settings.py must be importable)
+
+import contextlib
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from settings import DRIVER_EXPRESS_PERCENT, DRIVER_STANDARD_PERCENT
+from bots.finance_bot.finance_bot import FinanceBot
+from bots.finance_bot.payout_executor import LocalStandInGateway
+from bots.finance_bot.settlement import SettlementEngine, read_ledger_csv
+
+DRIVERS = 20_000
+PER_JOB_SAMPLE = 100_000
+
+
+def write_ledger(path: str, rows: int, rng: random.Random):
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["job_id", "driver_id", "base_price", "is_express"])
+        for job_id in range(rows):
+            writer.writerow([job_id, rng.randrange(DRIVERS), f"{rng.uniform(15, 250):.2f}",
+                             int(rng.random() < 0.3)])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.csv")
+        write_ledger(path, rows, random.Random(9))
+
+        engine = SettlementEngine(DRIVER_STANDARD_PERCENT, DRIVER_EXPRESS_PERCENT)
+        start = time.perf_counter()
+        report = engine.settle(read_ledger_csv(path))
+        settle_s = time.perf_counter() - start
+
+        # Separate run for memory: tracemalloc slows allocation-heavy code down a lot
+        tracemalloc.start()
+        engine.settle(read_ledger_csv(path))
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+        sample = []
+        with open(path, newline="") as handle:
+            for i, record in enumerate(csv.DictReader(handle)):
+                if i == PER_JOB_SAMPLE:
+                    break
+                sample.append({"base_price": float(record["base_price"]),
+                               "is_express": record["is_express"] == "1"})
+        with contextlib.redirect_stdout(io.StringIO()):
+            finance = FinanceBot(LocalStandInGateway(), payout_journal_path=os.path.join(tmp, "payouts.jsonl"))
+        start = time.perf_counter()
+        for job in sample:
+            finance.calculate_distribution(job)
+        per_job_s = (time.perf_counter() - start) * rows / len(sample)
+
+    assert report.driver_cents + report.platform_cents == report.gross_cents
+    print(f"ledger rows: {rows:,}  drivers paid: {len(report.drivers):,} (one payout each)")
+    print(f"settlement engine (CSV parse included): {rows / settle_s:>12,.0f} rows/s  peak {peak_mb:.1f} MB")
+    print(f"calculate_distribution per job (no I/O): {rows / per_job_s:>11,.0f} rows/s  (extrapolated)")
+    print(f"totals: {report.summary()}")
+
+
+if __name__ == '__main__':
+    main()
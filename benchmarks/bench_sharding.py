@@ -0,0 +1,81 @@
+# benchmarks/bench_sharding.py
+#
+# Matching throughput of ShardedDispatcher (one worker process per region cell)
+# as the same area is split into 1, 2, 4 and 8 shards, against one unsharded
+# Dispatcher. Also reports how often the sharded match equals the global one
+# (border jobs are matched against neighbouring shards too).
+#
+# Usage: python benchmarks/bench_sharding.py [drivers] [jobs] [batch]
+# Scaling is bounded by the number of CPU cores available.
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.dispatcher_bot.dispatcher import Dispatcher
+from bots.dispatcher_bot.models import DeliveryJob, DriverStatus
+from bots.dispatcher_bot.sharding import ShardedDispatcher, ShardMap
+
+# Carolinas-sized test area: 4 degrees of latitude x 8 of longitude
+MIN_LAT, MIN_LON = 32.0, -84.0
+LAT_SPAN, LON_SPAN = 4.0, 8.0
+LAYOUTS = {1: (4.0, 8.0), 2: (4.0, 4.0), 4: (2.0, 4.0), 8: (2.0, 2.0)}  # shards -> cell size
+
+
+def make_world(drivers: int, jobs: int, rng: random.Random):
+    def point():
+        return (MIN_LAT + rng.random() * LAT_SPAN, MIN_LON + rng.random() * LON_SPAN)
+
+    fleet = [DriverStatus(id=i, location=point(), capacity=rng.choice([120.0, 180.0, 250.0]),
+                          rating=4.5, is_active=True) for i in range(drivers)]
+    work = [DeliveryJob(id=i, pickup_location=point(), dropoff_location=point(), base_price=50.0,
+                        required_capacity=rng.choice([50.0, 150.0, 200.0])) for i in range(jobs)]
+    return fleet, work
+
+
+def run_batches(matcher, jobs, batch):
+    results = []
+    start = time.perf_counter()
+    for offset in range(0, len(jobs), batch):
+        results.extend(matcher.match_jobs(jobs[offset:offset + batch]))
+    return results, time.perf_counter() - start
+
+
+def main():
+    drivers = int(sys.argv[1]) if len(sys.argv) > 1 else 40_000
+    jobs_count = int(sys.argv[2]) if len(sys.argv) > 2 else 8_000
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    fleet, jobs = make_world(drivers, jobs_count, random.Random(11))
+    print(f"cpu cores: {os.cpu_count()}  drivers: {drivers:,}  jobs: {jobs_count:,}  batch: {batch}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        single = Dispatcher(warm_from_db=False)
+        for driver in fleet:
+            single.update_driver(driver)
+    reference, elapsed = run_batches(single, jobs, batch)
+    baseline = jobs_count / elapsed
+    print(f"unsharded Dispatcher.match_jobs:   {baseline:10,.0f} jobs/s")
+
+    for shards, (cell_lat, cell_lon) in LAYOUTS.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            sharded = ShardedDispatcher(ShardMap(cell_lat, cell_lon), border_km=15.0)
+            sharded.update_drivers(fleet)
+            sharded.match_jobs(jobs[:10])  # warm up worker processes
+        try:
+            results, elapsed = run_batches(sharded, jobs, batch)
+        finally:
+            sharded.close()
+        same = sum(a.get("driver_id") == b.get("driver_id") for a, b in zip(results, reference))
+        rate = jobs_count / elapsed
+        print(f"{shards} shard(s) {sharded.shard_map.cell_lat_deg:.0f}x{sharded.shard_map.cell_lon_deg:.0f} deg: "
+              f"{rate:10,.0f} jobs/s  x{rate / baseline:5.2f}  same driver as global: {same / jobs_count:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/bench_startup.py
+#
+# Cold-start budget for the bot services. Every entry module is imported in a
+# fresh interpreter under `python -X importtime`. Two things are enforced:
+#   - its cumulative import time (best of --repeat runs) must stay within budget
+#   - heavy dependencies it must not pull in (requests, numpy, fastapi, ...)
+#     must not appear in the import log at all
+# Exits 1 on any violation. tests/test_startup.py runs the import checks (not
+# the time budgets, which depend on the machine) as part of the test suite.
+#
+# Usage: python benchmarks/bench_startup.py [--repeat 5] [--scale 1.0] [--only SUBSTRING] [--json FILE]
+#        (--scale multiplies every budget, for slower CI machines)
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+BOT_ONLY = ("requests", "httpx", "numpy", "fastapi", "uvicorn")
+WEB = ("requests", "httpx")
+
+
+@dataclass(frozen=True)
+class Budget:
+    module: str
+    ms: float
+    forbidden: Tuple[str, ...] = ()
+
+
+# Budgets are about 1.5-2x what a 1-vCPU container measures, to absorb noise
+BUDGETS = [
+    Budget("bots.common.config", 60.0, BOT_ONLY),
+    Budget("bots.common.cli", 80.0, BOT_ONLY),  # What `python -m bots.<bot>` loads before dispatching
+    Budget("bots.legal_bot.legal_bot", 150.0, BOT_ONLY),
+    Budget("bots.governance_bot.governance_bot", 150.0, BOT_ONLY),
+    Budget("bots.finance_bot.finance_bot", 350.0, BOT_ONLY),
+    Budget("bots.marketing_bot.marketing_bot", 350.0, BOT_ONLY),
+    Budget("bots.dispatcher_bot.dispatcher", 600.0, ("requests", "httpx", "fastapi", "uvicorn")),
+    Budget("bots.legal_bot.api", 2000.0, WEB + ("numpy",)),
+    Budget("bots.finance_bot.api", 2000.0, WEB + ("numpy",)),
+    Budget("bots.governance_bot.api", 2000.0, WEB + ("numpy",)),
+    Budget("bots.dispatcher_bot.api", 2500.0, WEB),
+]
+
+
+@dataclass
+class StartupResult:
+    module: str
+    budget_ms: float
+    import_ms: float
+    wall_ms: float
+    top: List[Tuple[str, float]] = field(default_factory=list)
+    forbidden_loaded: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.import_ms <= self.budget_ms and not self.forbidden_loaded
+
+
+def importtime(module: str) -> Tuple[float, List[Tuple[str, float]], List[str], float]:
+    """
+    One fresh `-X importtime` run: the module's cumulative import time (ms),
+    its direct imports by cost, every module it loaded, and the wall time.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    env.setdefault("PICKUPLINK_DMV_STANDIN", "true")  # The Legal Bot app refuses to start without a DMV client
+    env.setdefault("PICKUPLINK_PAYOUT_STANDIN", "true")  # Likewise the Finance Bot app without a payout gateway
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    # "import time: self [us] | cumulative | imported package", children listed before their parent
+    # and indented two spaces deeper; imports done by site (before -c runs) come first and are ignored.
+    rows = []
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, total, name = line[len("import time:"):].split("|")
+            rows.append((len(name) - len(name.lstrip()), name.strip(), int(total) / 1000.0))
+    position = max(i for i, (_, name, _) in enumerate(rows) if name == module)
+    level, _, total_ms = rows[position]
+    start = position
+    while start > 0 and rows[start - 1][0] > level:
+        start -= 1
+    subtree = rows[start:position]
+    direct = sorted(((name, ms) for depth, name, ms in subtree if depth == level + 2), key=lambda item: -item[1])
+    return total_ms, direct, [name for _, name, _ in subtree], float(proc.stdout.strip().splitlines()[-1]) * 1000.0
+
+
+def measure(budget: Budget, repeat: int, scale: float) -> StartupResult:
+    runs = [importtime(budget.module) for _ in range(repeat)]
+    total_ms, direct, _, wall_ms = min(runs, key=lambda run: run[0])
+    loaded = set().union(*(set(names) for _, _, names, _ in runs))
+    return StartupResult(module=budget.module, budget_ms=budget.ms * scale, import_ms=round(total_ms, 1),
+                         wall_ms=round(wall_ms, 1), top=[(name, round(ms, 1)) for name, ms in direct[:3]],
+                         forbidden_loaded=sorted(name for name in budget.forbidden if name in loaded))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--only", default=None)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'module':38s} {'import ms':>9s} {'budget':>7s}  slowest dependencies")
+    for budget in BUDGETS:
+        if args.only and args.only not in budget.module:
+            continue
+        result = measure(budget, args.repeat, args.scale)
+        results.append(result)
+        top = ", ".join(f"{name} {ms:.0f}" for name, ms in result.top)
+        status = "ok" if result.ok else "OVER BUDGET" if not result.forbidden_loaded else \
+            f"IMPORTS {', '.join(result.forbidden_loaded)}"
+        print(f"{result.module:38s} {result.import_ms:9.1f} {result.budget_ms:7.0f}  {top}  [{status}]")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps([{**asdict(result), "ok": result.ok} for result in results], indent=2))
+    failed = [result.module for result in results if not result.ok]
+    if failed:
+        print(f"Startup budget exceeded: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# benchmarks/bench_storage.py
+#
+# Storage layer at production-like volume (SQLite backend): bulk-loads drivers,
+# jobs and transactions, then times the hot queries — nearby online drivers,
+# jobs by status, one driver's statement, revenue for a day — with the
+# schema's indexes and again after dropping them. Prints each query plan.
+#
+# Usage: python benchmarks/bench_storage.py [rows] [drivers]
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.common.storage import Storage
+
+DAY = 86_400.0
+STATUSES = ["PENDING"] * 2 + ["MATCHED"] * 3 + ["DELIVERED"] * 90 + ["FAILED"] * 5
+KINDS = ["job_earning"] * 6 + ["platform_fee"] * 3 + ["payout"]
+INDEXES = ["idx_drivers_active_geocell", "idx_jobs_status_created", "idx_jobs_driver",
+           "idx_transactions_driver_created", "idx_transactions_created"]
+
+
+def load(storage: Storage, rows: int, drivers: int, rng: random.Random, now: float):
+    start = time.perf_counter()
+    storage.upsert_drivers({
+        "id": i, "lat": rng.uniform(34.9, 35.5), "lon": rng.uniform(-81.1, -80.5),
+        "capacity": rng.choice([150.0, 250.0, 400.0]), "rating": rng.uniform(4.0, 5.0),
+        "is_verified": rng.random() < 0.9, "is_active": rng.random() < 0.15, "updated_at": now,
+    } for i in range(1, drivers + 1))
+    storage.insert_jobs({
+        "id": i, "client_id": rng.randrange(50_000), "status": rng.choice(STATUSES),
+        "pickup_lat": 35.2, "pickup_lon": -80.8, "dropoff_lat": 35.3, "dropoff_lon": -80.7,
+        "base_price_cents": rng.randrange(2_000, 30_000), "driver_id": rng.randrange(1, drivers + 1),
+        "created_at": now - rng.uniform(0, 365 * DAY),
+    } for i in range(1, rows + 1))
+    storage.record_transactions(
+        (rng.randrange(1, drivers + 1), None, rng.choice(KINDS), rng.randrange(100, 30_000), None,
+         now - rng.uniform(0, 365 * DAY))
+        for _ in range(rows)
+    )
+    return time.perf_counter() - start
+
+
+def hot_queries(storage: Storage, rng: random.Random, drivers: int, now: float):
+    """(label, callable) for each hot path."""
+    lat, lon = 35.2271, -80.8431
+    return [
+        ("drivers near pickup (5 km)", lambda: storage.active_drivers_near(lat, lon, 5.0, 200.0)),
+        ("pending jobs, oldest 100", lambda: storage.jobs_by_status("PENDING", now - 30 * DAY, 100)),
+        ("driver statement (30 days)",
+         lambda: storage.driver_transactions(rng.randrange(1, drivers + 1), now - 30 * DAY, now)),
+        ("platform revenue (1 day)", lambda: storage.revenue_between(now - DAY, now)),
+    ]
+
+
+PLANS = [
+    ("SELECT id FROM drivers WHERE is_active AND is_verified AND geocell IN (?, ?) AND capacity >= ?", (0, 1, 0.0)),
+    ("SELECT id FROM jobs WHERE status = ? AND created_at >= ? ORDER BY created_at LIMIT ?", ("PENDING", 0.0, 100)),
+    ("SELECT id FROM transactions WHERE driver_id = ? AND created_at >= ? AND created_at < ?", (1, 0.0, 1.0)),
+    ("SELECT SUM(amount_cents) FROM transactions WHERE created_at >= ? AND created_at < ? AND kind = ?",
+     (0.0, 1.0, "platform_fee")),
+]
+
+
+def time_queries(storage: Storage, drivers: int, now: float, repeats: int):
+    rng = random.Random(7)
+    for label, query in hot_queries(storage, rng, drivers, now):
+        query()  # warm the page cache
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            query()
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"  {label:28s} median {statistics.median(samples):9.3f} ms   max {max(samples):9.3f} ms")
+    for statement, params in PLANS:
+        print(f"  plan: {'; '.join(line.split(' ', 3)[-1] for line in storage.explain(statement, params).splitlines())}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    drivers = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    rng = random.Random(1)
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(f"sqlite:///{tmp}/bench.db", pool_size=2)
+        storage.init_schema()
+        elapsed = load(storage, rows, drivers, rng, now)
+        loaded = drivers + 2 * rows
+        print(f"bulk load: {loaded:,} rows in {elapsed:.1f} s ({loaded / elapsed:,.0f} rows/s)")
+        storage.execute("ANALYZE")
+
+        print("\nwith indexes:")
+        time_queries(storage, drivers, now, repeats=50)
+
+        for index in INDEXES:
+            storage.execute(f"DROP INDEX {index}")
+        storage.execute("ANALYZE")
+        print("\nwithout indexes:")
+        time_queries(storage, drivers, now, repeats=3)
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_vehicle_classifier.py
+#
+# Nightly compliance sweep: re-verify every driver's vehicle with
+# LegalBot.verify_many (compiled make/model regex + offline VIN decode) versus
+# the previous keyword scan. Reports vehicles/s and accuracy on a labelled mix
+# that includes models the keyword list missed and substring traps.
+#
+# Usage: python benchmarks/bench_vehicle_classifier.py [vehicles]   (settings.py must be importable)
+
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bots.legal_bot.compliance_cache import LocalDMVService
+from bots.legal_bot.legal_bot import LegalBot
+from bots.legal_bot.vehicle_classifier import vin_check_digit
+
+# (description, VIN prefix or None, is_truck)
+SAMPLES = [
+    ("FORD F-150 LIGHT DUTY", "1FTFW1E5", True), ("2021 Ford F150 SuperCrew", None, True),
+    ("TOYOTA TACOMA TRD", "3TMCZ5AN", True), ("Toyota Tundra CrewMax", "5TFDY5F1", True),
+    ("GMC SIERRA 1500", "3GTU9DED", True), ("Chevy Colorado Z71", "1GCGTDEN", True),
+    ("Chevrolet Silverado 2500HD", "1GC4YNEY", True), ("FORD RANGER XLT", "1FTER4FH", True),
+    ("RAM 1500 BIG HORN", "1C6SRFFT", True), ("Nissan Frontier", "1N6ED1EK", True),
+    ("Honda Ridgeline", "5FPYK3F7", True), ("Jeep Gladiator Rubicon", "1C6JJTBG", True),
+    ("pickup", None, True),
+    ("TOYOTA CAMRY SEDAN", "4T1B11HK", False), ("Honda Civic", "2HGFC2F5", False),
+    ("RAM PROMASTER VAN", "3C6TRVDG", False), ("Ford Transit 250", "1FTBR2CM", False),
+    ("Ford Explorer", "1FM5K8GC", False), ("Toyota RAV4", "2T3P1RFV", False),
+    ("TRAMPOLINE DELIVERY CO", None, False), ("Chevy Tahoe SUV", "1GNSKCKC", False),
+    ("FORD F-150", "1FA6P8TH", False),  # sedan VIN with a truck description
+]
+KEYWORDS = ["PICKUP", "TRUCK", "F-150", "RAM", "SILVERADO", "TUNDRA"]
+
+
+def with_check_digit(prefix: str, rng: random.Random) -> str:
+    body = prefix + "0" + "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ0123456789") for _ in range(8))
+    return body[:8] + vin_check_digit(body) + body[9:]
+
+
+def keyword_scan(registration: dict) -> bool:
+    vehicle_type = registration.get("vehicle_type", "").upper()
+    return any(keyword in vehicle_type for keyword in KEYWORDS)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(5)
+    registrations, labels = [], []
+    for i in range(count):
+        description, vin_prefix, is_truck = rng.choice(SAMPLES)
+        registrations.append({"vehicle_type": description, "plate": f"PL{i:06d}", "owner_id": i,
+                              "vin": with_check_digit(vin_prefix, rng) if vin_prefix else None})
+        labels.append(is_truck)
+
+    start = time.perf_counter()
+    old = [keyword_scan(registration) for registration in registrations]
+    old_s = time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = LegalBot(LocalDMVService())
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        new = [result["is_truck"] for result in bot.verify_many(registrations)]
+    new_s = time.perf_counter() - start
+
+    def accuracy(predictions):
+        return sum(p == label for p, label in zip(predictions, labels)) / count
+
+    print(f"vehicles: {count:,}")
+    print(f"keyword scan (old, text only):   {count / old_s:12,.0f} vehicles/s  accuracy {accuracy(old):.2%}")
+    print(f"LegalBot.verify_many (text+VIN): {count / new_s:12,.0f} vehicles/s  accuracy {accuracy(new):.2%}")
+    print(f"nightly sweep of 1M drivers: ~{1_000_000 / (count / new_s):.1f} s")
+
+
+if __name__ == "__main__":
+    main()
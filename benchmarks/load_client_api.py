@@ -0,0 +1,80 @@
+# benchmarks/load_client_api.py
+#
+# Load test for the async Client API over HTTP, against local stand-in
+# Dispatcher and Finance services. Reports requests/sec and p50/p99 latency.
+#
+# Usage: python benchmarks/load_client_api.py [concurrency] [seconds]
+#        (settings.py must be importable; its URLs are overridden with the stand-ins)
+
+import asyncio
+import contextlib
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.standins import BackgroundServer, make_dispatcher_standin, make_finance_standin
+from apps.client_app_api import api as client_api
+
+JOB = {"pickup_coords": [35.2271, -80.8431], "dropoff_coords": [35.35, -80.70],
+       "required_capacity": 100.0, "is_express": False, "client_id": 7}
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+
+async def run_load(base_url: str, concurrency: int, seconds: float):
+    latencies = {"create": [], "invoice": []}
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        async def worker(n: int):
+            nonlocal errors
+            i = 0
+            while time.perf_counter() < deadline:
+                kind = "invoice" if (n + i) % 4 == 0 else "create"
+                start = time.perf_counter()
+                if kind == "create":
+                    response = await client.post("/jobs/create", json=JOB)
+                else:
+                    response = await client.post(f"/jobs/{n * 1000 + i}/invoice")
+                latencies[kind].append((time.perf_counter() - start) * 1000.0)
+                errors += response.status_code >= 400
+                i += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+
+    with BackgroundServer(make_dispatcher_standin()) as dispatcher_url, \
+            BackgroundServer(make_finance_standin()) as finance_url:
+        client_api.dispatcher_service.base_url = dispatcher_url
+        client_api.finance_service.base_url = finance_url
+        with BackgroundServer(client_api.app) as api_url, contextlib.redirect_stdout(io.StringIO()):
+            latencies, errors, elapsed = asyncio.run(run_load(api_url, concurrency, seconds))
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"concurrency={concurrency} duration={elapsed:.1f}s requests={total} errors={errors}")
+    print(f"throughput: {total / elapsed:,.0f} req/s")
+    for kind, samples in latencies.items():
+        if samples:
+            print(f"{kind:>8}: p50={statistics.median(samples):.1f} ms  p99={percentile(samples, 99):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/standins.py
+#
+# Local stand-ins for the downstream bots, served by uvicorn on a background
+# thread, so the apps can be load-tested over real HTTP without the full stack.
+
+import asyncio
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+def make_dispatcher_standin(latency_s: float = 0.02) -> FastAPI:
+    app = FastAPI(title="Dispatcher stand-in")
+
+    @app.post("/match_job")
+    async def match_job(request: Request):
+        await request.json()
+        await asyncio.sleep(latency_s)
+        return {"driver_id": 101, "status": "MATCHED", "empty_miles_km": 0.7}
+
+    @app.post("/update_locations")
+    async def update_locations(request: Request):
+        body = await request.json()
+        return {"status": "ACCEPTED", "accepted": len(body.get("pings", []))}
+
+    return app
+
+
+def make_finance_standin(latency_s: float = 0.03) -> FastAPI:
+    app = FastAPI(title="Finance stand-in")
+
+    @app.post("/process_invoice")
+    async def process_invoice(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency_s)
+        return {"job_id": body.get("job_id"), "driver_payout": 40.0, "platform_fee": 10.0}
+
+    return app
+
+
+def make_legal_standin(latency_s: float = 0.05) -> FastAPI:
+    app = FastAPI(title="Legal stand-in")
+
+    @app.post("/verify_truck")
+    async def verify_truck(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency_s)
+        is_truck = "SEDAN" not in body.get("vehicle_type", "").upper()
+        return {"status": "SUCCESS" if is_truck else "FAILED", "is_truck": is_truck}
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Runs an ASGI app with uvicorn on a daemon thread: `with BackgroundServer(app) as url: ...`"""
+
+    def __init__(self, app, port: int = 0):
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port,
+                                                    log_level="warning", access_log=False))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        deadline = time.monotonic() + 10.0
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server on port {self.port} did not start")
+            time.sleep(0.02)
+        return self.url
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join(timeout=10.0)
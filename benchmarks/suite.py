@@ -0,0 +1,328 @@
+# benchmarks/suite.py
+#
+# Benchmark suite for the dispatch path, on synthetic workloads (workload.py)
+# around Charlotte and statewide:
+#   - Dispatcher.match_job / match_jobs and FinanceBot.calculate_distribution, in-process
+#   - the Dispatcher app in-process (TestClient) and over HTTP (uvicorn)
+#   - end to end over HTTP: Client API -> Dispatcher app, with a Finance stand-in
+# Every case reports ops/sec, p50/p99 latency and peak traced memory; results
+# go to a JSON file so runs can be compared across releases (--baseline).
+#
+# Usage: python benchmarks/suite.py [--quick] [--only SUBSTRING] [--output FILE]
+#                                   [--baseline FILE] [--tolerance 0.2]
+#        (settings.py must be importable; downstream URLs are overridden)
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.standins import BackgroundServer, make_finance_standin
+from benchmarks.workload import (
+    AREAS, WorkloadGenerator, create_job_request, distribution_request, match_request, ping_batch,
+)
+
+SUITE_VERSION = 1
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+@dataclass
+class CaseResult:
+    name: str
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    peak_memory_mb: float  # tracemalloc peak over a separate, shorter pass
+    errors: int = 0
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))] if ordered else 0.0
+
+
+def measure(name: str, run: Callable[[int], "tuple[List[float], int]"], ops: int, memory_ops: int,
+            **params) -> CaseResult:
+    """
+    `run(n)` performs n operations and returns (per-op latencies in ms, errors).
+    Timing and memory use separate passes: tracemalloc slows allocation-heavy code.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        latencies, errors = run(ops)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        try:
+            run(memory_ops)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return CaseResult(name, ops, round(elapsed, 4), round(ops / elapsed, 1),
+                      round(percentile(latencies, 50), 3), round(percentile(latencies, 99), 3),
+                      round(peak / 1e6, 2), errors, params)
+
+
+def timed_calls(fn: Callable[[Any], Any], items: List[Any]) -> "tuple[List[float], int]":
+    latencies, errors = [], 0
+    for item in items:
+        start = time.perf_counter()
+        try:
+            fn(item)
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return latencies, errors
+
+
+def cycle(items: List[Any], n: int) -> List[Any]:
+    return [items[i % len(items)] for i in range(n)]
+
+
+# --- In-process cases ---
+
+def new_dispatcher(fleet):
+    from bots.dispatcher_bot.dispatcher import Dispatcher
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        dispatcher = Dispatcher(warm_from_db=False)
+        for driver in fleet:
+            dispatcher.update_driver(driver)
+    return dispatcher
+
+
+def case_match_job(area: str, fleet_size: int, ops: int) -> CaseResult:
+    generator = WorkloadGenerator(AREAS[area], seed=1)
+    dispatcher = new_dispatcher(generator.fleet(fleet_size))
+    jobs = generator.jobs(1_000)
+    return measure(f"dispatcher.match_job/in-process/{area}",
+                   lambda n: timed_calls(dispatcher.match_job, cycle(jobs, n)),
+                   ops, min(ops, 200), fleet_size=fleet_size)
+
+
+def case_match_jobs(area: str, fleet_size: int, ops: int, batch: int = 200) -> CaseResult:
+    generator = WorkloadGenerator(AREAS[area], seed=2)
+    dispatcher = new_dispatcher(generator.fleet(fleet_size))
+    jobs = generator.jobs(max(batch, 1_000))
+
+    def run(n: int):
+        stream = cycle(jobs, n)
+        batches = [stream[i:i + batch] for i in range(0, n, batch)]
+        latencies, errors = timed_calls(dispatcher.match_jobs, batches)
+        # Per-job latency: each job in a batch waits for the whole batch
+        return [ms for ms, jobs_in_batch in zip(latencies, batches) for _ in jobs_in_batch], errors
+
+    return measure(f"dispatcher.match_jobs/in-process/{area}", run, ops, min(ops, batch * 2),
+                   fleet_size=fleet_size, batch=batch)
+
+
+def case_calculate_distribution(ops: int) -> CaseResult:
+    from bots.finance_bot.finance_bot import FinanceBot
+    from bots.finance_bot.payout_executor import LocalStandInGateway
+
+    requests = [distribution_request(job) for job in WorkloadGenerator(AREAS["statewide"], seed=3).jobs(1_000)]
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        finance = FinanceBot(LocalStandInGateway(),
+                             payout_journal_path=os.path.join(tmp, "payout_retry_queue.jsonl"))
+        return measure("finance.calculate_distribution/in-process",
+                       lambda n: timed_calls(finance.calculate_distribution, cycle(requests, n)),
+                       ops, min(ops, 2_000))
+
+
+# --- Apps ---
+
+def load_dispatcher_app(area: str, fleet_size: int):
+    generator = WorkloadGenerator(AREAS[area], seed=4)
+    fleet = generator.fleet(fleet_size)
+    with contextlib.redirect_stdout(io.StringIO()):
+        from bots.dispatcher_bot import api as dispatcher_api
+
+        for driver in fleet:
+            dispatcher_api.dispatcher.update_driver(driver)
+    return dispatcher_api, generator, fleet
+
+
+def case_dispatcher_app_in_process(area: str, fleet_size: int, ops: int) -> CaseResult:
+    from fastapi.testclient import TestClient
+
+    dispatcher_api, generator, _ = load_dispatcher_app(area, fleet_size)
+    payloads = [match_request(job) for job in generator.jobs(1_000)]
+    with TestClient(dispatcher_api.app) as client:
+        def post(payload):
+            client.post("/match_job", json=payload).raise_for_status()
+
+        return measure(f"dispatcher_app.match_job/in-process/{area}",
+                       lambda n: timed_calls(post, cycle(payloads, n)), ops, min(ops, 200),
+                       fleet_size=fleet_size)
+
+
+async def http_load(base_url: str, requests: List[Callable[[httpx.AsyncClient], Any]],
+                    concurrency: int) -> "tuple[List[float], int]":
+    """Closed loop: `concurrency` workers send the requests; each callable does one logical operation."""
+    latencies, errors = [], 0
+    queue = iter(requests)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def worker():
+            nonlocal errors
+            for request in queue:
+                start = time.perf_counter()
+                try:
+                    await request(client)
+                except (httpx.HTTPError, KeyError, AssertionError):
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000.0)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def case_dispatcher_app_http(area: str, fleet_size: int, ops: int, concurrency: int) -> List[CaseResult]:
+    dispatcher_api, generator, fleet = load_dispatcher_app(area, fleet_size)
+    payloads = [match_request(job) for job in generator.jobs(1_000)]
+    batches = [ping_batch(generator.pings(fleet, 50, timestamp=1e9 + i * 50)) for i in range(200)]
+
+    def post(path: str, body):
+        async def send(client: httpx.AsyncClient):
+            (await client.post(path, json=body)).raise_for_status()
+        return send
+
+    with BackgroundServer(dispatcher_api.app) as url:
+        return [
+            measure(f"dispatcher_app.match_job/http/{area}",
+                    lambda n: asyncio.run(http_load(url, [post("/match_job", p) for p in cycle(payloads, n)],
+                                                    concurrency)),
+                    ops, min(ops, 200), fleet_size=fleet_size, concurrency=concurrency),
+            measure("dispatcher_app.update_locations/http",
+                    lambda n: asyncio.run(http_load(url, [post("/update_locations", b) for b in cycle(batches, n)],
+                                                    concurrency)),
+                    ops, min(ops, 200), pings_per_request=50, concurrency=concurrency),
+        ]
+
+
+def case_end_to_end_http(area: str, fleet_size: int, ops: int, concurrency: int) -> CaseResult:
+    """Client API create + long-poll until matched, with the real Dispatcher app behind it over HTTP."""
+    from apps.client_app_api import api as client_api
+
+    dispatcher_api, generator, _ = load_dispatcher_app(area, fleet_size)
+    payloads = [create_job_request(job) for job in generator.jobs(1_000)]
+
+    async def create_and_wait(client: httpx.AsyncClient, payload):
+        response = await client.post("/jobs/create", json=payload)
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        record = (await client.get(f"/jobs/{job_id}/wait", params={"timeout": 30})).json()
+        assert record["status"] == "MATCHED"
+
+    with BackgroundServer(dispatcher_api.app) as dispatcher_url, \
+            BackgroundServer(make_finance_standin()) as finance_url:
+        client_api.dispatcher_service.base_url = dispatcher_url
+        client_api.finance_service.base_url = finance_url
+        with BackgroundServer(client_api.app) as url:
+            return measure(
+                f"client_app.create_until_matched/http/{area}",
+                lambda n: asyncio.run(http_load(
+                    url, [lambda c, p=p: create_and_wait(c, p) for p in cycle(payloads, n)], concurrency)),
+                ops, min(ops, 200), fleet_size=fleet_size, concurrency=concurrency)
+
+
+# --- Runner ---
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parents[1], timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"suite_version": SUITE_VERSION, "git_commit": commit, "timestamp": time.time(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()}
+
+
+def compare(results: List[CaseResult], baseline_path: str, tolerance: float) -> List[str]:
+    """Cases whose throughput fell or p99 rose by more than `tolerance` versus the baseline run."""
+    baseline = {case["name"]: case for case in json.loads(Path(baseline_path).read_text())["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get(result.name)
+        if before is None:
+            continue
+        if result.ops_per_sec < before["ops_per_sec"] * (1.0 - tolerance):
+            regressions.append(f"{result.name}: {before['ops_per_sec']:,.0f} -> {result.ops_per_sec:,.0f} ops/s")
+        if before["p99_ms"] and result.p99_ms > before["p99_ms"] * (1.0 + tolerance):
+            regressions.append(f"{result.name}: p99 {before['p99_ms']:.3f} -> {result.p99_ms:.3f} ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="PickupLink dispatch-path benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="smaller fleets and fewer operations")
+    parser.add_argument("--only", default=None, help="run only cases whose name contains this")
+    parser.add_argument("--output", default=None, help="JSON results file (default: benchmarks/results/)")
+    parser.add_argument("--baseline", default=None, help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    fleet = 2_000 if args.quick else 20_000
+    ops = 500 if args.quick else 5_000
+    http_ops = 300 if args.quick else 2_000
+    cases: List[tuple] = [
+        ("dispatcher.match_job/in-process/charlotte", lambda: case_match_job("charlotte", fleet, ops)),
+        ("dispatcher.match_job/in-process/statewide", lambda: case_match_job("statewide", fleet, ops)),
+        ("dispatcher.match_jobs/in-process/charlotte", lambda: case_match_jobs("charlotte", fleet, ops)),
+        ("finance.calculate_distribution/in-process", lambda: case_calculate_distribution(ops * 20)),
+        ("dispatcher_app.match_job/in-process/charlotte",
+         lambda: case_dispatcher_app_in_process("charlotte", fleet, http_ops)),
+        ("dispatcher_app.match_job/http/charlotte dispatcher_app.update_locations/http",
+         lambda: case_dispatcher_app_http("charlotte", fleet, http_ops, args.concurrency)),
+        ("client_app.create_until_matched/http/charlotte",
+         lambda: case_end_to_end_http("charlotte", fleet, http_ops, args.concurrency)),
+    ]
+
+    results: List[CaseResult] = []
+    for names, run in cases:
+        if args.only and args.only not in names:
+            continue
+        outcome = run()
+        for result in outcome if isinstance(outcome, list) else [outcome]:
+            results.append(result)
+            print(f"{result.name:52s} {result.ops_per_sec:11,.0f} ops/s  p50 {result.p50_ms:8.3f} ms  "
+                  f"p99 {result.p99_ms:8.3f} ms  peak {result.peak_memory_mb:7.2f} MB  errors {result.errors}")
+
+    report = {**environment(), "args": vars(args),
+              "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+              "results": [asdict(result) for result in results]}
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{report['git_commit'] or 'nogit'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"results: {output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
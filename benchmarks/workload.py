@@ -0,0 +1,136 @@
+# benchmarks/workload.py
+#
+# Synthetic workloads for the benchmark suite: driver fleets, job streams and
+# driver pings around Charlotte or across North Carolina's metros, plus the
+# request payloads the APIs expect. Deterministic for a given seed.
+
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+from bots.dispatcher_bot.geo import haversine_km
+from bots.dispatcher_bot.models import DeliveryJob, DriverStatus, LocationPing
+
+
+@dataclass(frozen=True)
+class Hotspot:
+    lat: float
+    lon: float
+    spread_deg: float  # Standard deviation of points around the centre
+    weight: float      # Share of drivers/jobs
+
+
+@dataclass(frozen=True)
+class Area:
+    name: str
+    hotspots: Tuple[Hotspot, ...]
+
+
+CHARLOTTE = Area("charlotte", (
+    Hotspot(35.2271, -80.8431, 0.08, 0.5),   # Uptown / South End
+    Hotspot(35.3000, -80.7500, 0.06, 0.2),   # University City
+    Hotspot(35.1500, -80.9500, 0.07, 0.2),   # Airport / warehouses
+    Hotspot(35.2271, -80.8431, 0.30, 0.1),   # Suburbs
+))
+
+STATEWIDE = Area("statewide", (
+    Hotspot(35.2271, -80.8431, 0.20, 0.35),  # Charlotte
+    Hotspot(35.7796, -78.6382, 0.20, 0.25),  # Raleigh-Durham
+    Hotspot(36.0726, -79.7920, 0.15, 0.15),  # Greensboro
+    Hotspot(36.0999, -80.2442, 0.12, 0.10),  # Winston-Salem
+    Hotspot(35.5951, -82.5515, 0.12, 0.08),  # Asheville
+    Hotspot(34.2257, -77.9447, 0.10, 0.07),  # Wilmington
+))
+
+AREAS = {area.name: area for area in (CHARLOTTE, STATEWIDE)}
+
+CAPACITY_MIX = ((120.0, 0.5), (180.0, 0.3), (250.0, 0.2))     # Truck bed sizes (sqft) in the fleet
+LOAD_MIX = ((50.0, 0.45), (100.0, 0.35), (200.0, 0.20))       # Required capacity of jobs
+MEDIAN_TRIP_KM = 12.0
+MAX_TRIP_KM = 150.0
+
+
+class WorkloadGenerator:
+    def __init__(self, area: Area = CHARLOTTE, seed: int = 0):
+        self.area = area
+        self.rng = random.Random(seed)
+        self._weights = [hotspot.weight for hotspot in area.hotspots]
+
+    def _pick(self, mix: Sequence[Tuple[float, float]]) -> float:
+        return self.rng.choices([value for value, _ in mix], weights=[weight for _, weight in mix])[0]
+
+    def point(self) -> Tuple[float, float]:
+        hotspot = self.rng.choices(self.area.hotspots, weights=self._weights)[0]
+        return (round(self.rng.gauss(hotspot.lat, hotspot.spread_deg), 6),
+                round(self.rng.gauss(hotspot.lon, hotspot.spread_deg), 6))
+
+    def trip_end(self, start: Tuple[float, float]) -> Tuple[float, float]:
+        """A dropoff a log-normally distributed distance away (most trips are short)."""
+        km = min(MAX_TRIP_KM, self.rng.lognormvariate(math.log(MEDIAN_TRIP_KM), 0.7))
+        bearing = self.rng.uniform(0.0, 2 * math.pi)
+        d_lat = km * math.cos(bearing) / 111.2
+        d_lon = km * math.sin(bearing) / (111.2 * math.cos(math.radians(start[0])))
+        return round(start[0] + d_lat, 6), round(start[1] + d_lon, 6)
+
+    def fleet(self, size: int, active_share: float = 0.8, first_id: int = 1) -> List[DriverStatus]:
+        return [
+            DriverStatus(id=first_id + i, location=self.point(), capacity=self._pick(CAPACITY_MIX),
+                         rating=round(self.rng.uniform(4.0, 5.0), 1), is_verified=True,
+                         is_active=self.rng.random() < active_share)
+            for i in range(size)
+        ]
+
+    def jobs(self, count: int, express_share: float = 0.2, first_id: int = 1) -> List[DeliveryJob]:
+        jobs = []
+        for i in range(count):
+            pickup = self.point()
+            dropoff = self.trip_end(pickup)
+            km = haversine_km(pickup, dropoff)
+            jobs.append(DeliveryJob(id=first_id + i, pickup_location=pickup, dropoff_location=dropoff,
+                                    base_price=round(25.0 + 2.1 * km, 2), required_capacity=self._pick(LOAD_MIX),
+                                    is_express=self.rng.random() < express_share))
+        return jobs
+
+    def arrivals(self, count: int, rate_per_s: float) -> List[float]:
+        """Poisson arrival offsets (seconds from start) for an open-loop job stream."""
+        offsets, clock = [], 0.0
+        for _ in range(count):
+            clock += self.rng.expovariate(rate_per_s)
+            offsets.append(clock)
+        return offsets
+
+    def pings(self, fleet: Sequence[DriverStatus], count: int, timestamp: float = 0.0) -> List[LocationPing]:
+        """Drivers moving up to ~1 km from their last position."""
+        pings = []
+        for i in range(count):
+            driver = fleet[self.rng.randrange(len(fleet))]
+            lat, lon = driver.location
+            pings.append(LocationPing(driver_id=driver.id, lat=lat + self.rng.uniform(-0.01, 0.01),
+                                      lon=lon + self.rng.uniform(-0.01, 0.01), is_active=True,
+                                      timestamp=timestamp + i))
+        return pings
+
+
+def match_request(job: DeliveryJob, client_id: int = 1) -> Dict[str, Any]:
+    """Dispatcher /match_job body."""
+    return {"pickup_coords": list(job.pickup_location), "dropoff_coords": list(job.dropoff_location),
+            "required_capacity": job.required_capacity, "is_express": job.is_express, "client_id": client_id,
+            "base_price": job.base_price, "job_id": job.id}
+
+
+def create_job_request(job: DeliveryJob, client_id: int = 1) -> Dict[str, Any]:
+    """Client API /jobs/create body."""
+    return {"pickup_coords": list(job.pickup_location), "dropoff_coords": list(job.dropoff_location),
+            "required_capacity": job.required_capacity, "is_express": job.is_express, "client_id": client_id}
+
+
+def distribution_request(job: DeliveryJob) -> Dict[str, Any]:
+    """FinanceBot.calculate_distribution input."""
+    return {"job_id": job.id, "base_price": job.base_price, "is_express": job.is_express}
+
+
+def ping_batch(pings: Sequence[LocationPing]) -> Dict[str, Any]:
+    """Dispatcher /update_locations body."""
+    return {"pings": [{"driver_id": p.driver_id, "lat": p.lat, "lon": p.lon, "is_active": p.is_active,
+                       "timestamp": p.timestamp} for p in pings]}
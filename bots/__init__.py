@@ -0,0 +1,2 @@
+# bots/__init__.py
+"""PickupLink bots. Each bot runs as its own service: `python -m bots.<bot> --help`."""
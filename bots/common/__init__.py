@@ -0,0 +1,2 @@
+# bots/common/__init__.py
+"""Infrastructure shared by the bots: settings, storage, event bus, instrumentation."""
@@ -0,0 +1,90 @@
+# bots/common/cli.py
+#
+# Shared `python -m bots.<bot>` command line:
+#   run       the bot's example workflow (the module's __main__ block)
+#   serve     the bot's ASGI app under uvicorn (bots with an HTTP API)
+#   settings  validate the configuration and show what this bot will use
+
+import argparse
+import runpy
+import sys
+from typing import List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from bots.common.config import SCHEMA, MissingSettingError, SettingsError, settings
+
+DEFAULT_PORT = 8000
+
+
+def _default_port(url_setting: Optional[str]) -> int:
+    url = getattr(settings, url_setting, None) if url_setting else None
+    return (urlsplit(url).port if url else None) or DEFAULT_PORT
+
+
+def _serve(app: str, args: argparse.Namespace) -> int:
+    import uvicorn  # Deferred: `run` and `settings` never need the server
+
+    # An import string rather than the app object: each worker process imports it itself
+    uvicorn.run(app, host=args.host, port=args.port, workers=args.workers, log_level=args.log_level.lower())
+    return 0
+
+
+def _show_settings(needs: Sequence[str]) -> int:
+    values = settings.as_dict()
+    missing = [name for name in needs if name not in values]
+    for name in sorted(set(values) | set(SCHEMA)):
+        value = values.get(name, "<unset>")
+        if name.endswith("_KEY") and name in values:
+            value = f"{str(value)[:3]}***"
+        marker = "*" if name in needs else " "
+        print(f"{marker} {name} = {value}")
+    if missing:
+        print(f"Missing required settings: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(prog: str, module: str, app: Optional[str] = None, url_setting: Optional[str] = None,
+         needs: Sequence[str] = (), argv: Optional[List[str]] = None, single_process: bool = False) -> int:
+    """
+    `module` holds the example workflow, `app` is the "module:attribute" ASGI
+    app for `serve` (its default port comes from the `url_setting` URL) and
+    `needs` lists the settings this bot cannot start without. Apps that keep
+    their state in process memory pass `single_process`: `serve` then refuses
+    --workers > 1, since each worker would hold its own copy of that state.
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("run", help="Run the bot's example workflow")
+    commands.add_parser("settings", help="Validate and print the settings (* = required by this bot)")
+    if app is not None:
+        serve = commands.add_parser("serve", help=f"Serve {app} with uvicorn")
+        serve.add_argument("--host", default="0.0.0.0")
+        serve.add_argument("--port", type=int, default=None, help=f"Default: the port of {url_setting}")
+        serve.add_argument("--workers", type=int, default=1)
+        serve.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    command = args.command or ("serve" if app is not None else "run")
+
+    try:
+        if command == "settings":
+            return _show_settings(needs)
+        missing = [name for name in needs if getattr(settings, name, None) is None]
+        if missing:
+            raise MissingSettingError(f"missing {', '.join(missing)}: set them in the settings module "
+                                      f"or as PICKUPLINK_<NAME> environment variables")
+        if command == "serve":
+            if args.command is None:
+                args = parser.parse_args(["serve"])
+            if single_process and args.workers > 1:
+                print(f"{prog}: {app} keeps its state in memory and must run as a single worker "
+                      f"(got --workers {args.workers})", file=sys.stderr)
+                return 2
+            if args.port is None:
+                args.port = _default_port(url_setting)
+            return _serve(app, args)
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+        return 0
+    except SettingsError as e:
+        print(f"{prog}: {e}", file=sys.stderr)
+        return 2
@@ -0,0 +1,205 @@
+# bots/common/config.py
+#
+# Service settings, loaded on first use instead of at import time: values come
+# from the deployment's `settings` module (infrastructure/config; pick another
+# with PICKUPLINK_SETTINGS_MODULE) with PICKUPLINK_<NAME> environment
+# overrides, are validated once and cached for the life of the process.
+#
+#   from bots.common.config import settings
+#   settings.DISPATCHER_URL                      # required: MissingSettingError if unset
+#   getattr(settings, "EVENT_BUS_URL", None)     # optional settings keep working with getattr
+
+import importlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional
+
+SETTINGS_MODULE_ENV = "PICKUPLINK_SETTINGS_MODULE"
+DEFAULT_SETTINGS_MODULE = "settings"
+ENV_PREFIX = "PICKUPLINK_"
+
+_REQUIRED = object()
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off", ""}
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+ROUTING_BACKENDS = ("haversine", "ors", "road_graph")
+
+
+class SettingsError(ValueError):
+    """A setting has the wrong type or an invalid value."""
+
+
+class MissingSettingError(SettingsError, AttributeError):
+    """A required setting is not configured. An AttributeError, so getattr() defaults still apply."""
+
+
+@dataclass(frozen=True)
+class Setting:
+    type: type
+    default: Any = _REQUIRED
+    check: Optional[Callable[[Any], bool]] = None
+    expected: str = ""  # Shown when `check` fails
+
+    @property
+    def required(self) -> bool:
+        return self.default is _REQUIRED
+
+
+def _is_url(value: str) -> bool:
+    return value.startswith(("http://", "https://"))
+
+
+def _is_share(value: float) -> bool:
+    return 0.0 < value <= 1.0
+
+
+URL = dict(check=_is_url, expected="an http(s) URL")
+SHARE = dict(check=_is_share, expected="a share in (0, 1]")
+
+SCHEMA: Dict[str, Setting] = {
+    # Service endpoints
+    "DISPATCHER_URL": Setting(str, **URL),
+    "FINANCE_URL": Setting(str, **URL),
+    "LEGAL_URL": Setting(str, **URL),
+    "GOVERNANCE_URL": Setting(str, **URL),
+    "MARKETING_LLM_URL": Setting(str, None, **URL),
+    "EVENT_BUS_URL": Setting(str, None),
+    # Shared DB (bots.common.storage): "sqlite:////var/lib/pickuplink.db" or "postgresql://..."
+    "DATABASE_URL": Setting(str, None),
+    "DMV_URL": Setting(str, None, **URL),
+    "FINANCE_PAYOUT_URL": Setting(str, None, **URL),
+    # Development only: answer DMV/insurer lookups offline (LocalDMVService) when DMV_URL is unset
+    "DMV_STANDIN": Setting(bool, False),
+    # Development only: simulate payouts (LocalStandInGateway) when FINANCE_PAYOUT_URL is unset
+    "PAYOUT_STANDIN": Setting(bool, False),
+    # Local state (payout retry journal, ...); PAYOUT_JOURNAL_PATH defaults to a file in it
+    "DATA_DIR": Setting(str, "/var/lib/pickuplink"),
+    "PAYOUT_JOURNAL_PATH": Setting(str, None),
+    # Dispatcher routing backend (see build_routing_provider); road_graph needs an OSM XML extract
+    "ROUTING_BACKEND": Setting(str, "haversine", check=lambda value: value in ROUTING_BACKENDS,
+                               expected=f"one of {', '.join(ROUTING_BACKENDS)}"),
+    "ROUTING_OSM_PATH": Setting(str, None),
+    # Dispatcher batch assignment: jobs arriving within the window are assigned together (latency vs
+    # empty miles), each against its ASSIGNMENT_CANDIDATES nearest eligible drivers
+    "ASSIGNMENT_WINDOW_SECONDS": Setting(float, 1.0, check=lambda value: value >= 0, expected="seconds >= 0"),
+    "ASSIGNMENT_CANDIDATES": Setting(int, 8, check=lambda value: value >= 1, expected="a count >= 1"),
+    # Credentials
+    "ORS_API_KEY": Setting(str),
+    "FINANCE_PAYOUT_API_KEY": Setting(str),
+    "AI_MARKETING_API_KEY": Setting(str),
+    "DMV_API_KEY": Setting(str, None),
+    # Business rules
+    "DRIVER_STANDARD_PERCENT": Setting(float, **SHARE),
+    "DRIVER_EXPRESS_PERCENT": Setting(float, **SHARE),
+    "PHASE": Setting(str, check=lambda value: value in ("1", "2", "3", "4", "5"), expected="a roadmap phase 1-5"),
+    "TRUCKS_ONLY_ENABLED": Setting(bool),
+    # Observability
+    "METRICS_ENABLED": Setting(bool, True),
+    "LOG_LEVEL": Setting(str, "INFO", check=lambda value: value.upper() in LOG_LEVELS,
+                         expected=f"one of {', '.join(LOG_LEVELS)}"),
+    "LOG_JSON": Setting(bool, True),
+    "PROFILER_ENABLED": Setting(bool, False),
+}
+
+
+def _from_env(name: str, spec: Setting, raw: str) -> Any:
+    if spec.type is bool:
+        lowered = raw.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+        raise SettingsError(f"{ENV_PREFIX}{name}={raw!r}: expected a boolean (true/false)")
+    try:
+        return spec.type(raw)
+    except ValueError:
+        raise SettingsError(f"{ENV_PREFIX}{name}={raw!r}: expected {spec.type.__name__}") from None
+
+
+def _validate(name: str, spec: Setting, value: Any) -> Any:
+    if value is None and not spec.required:
+        return None
+    if spec.type is float and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    if not isinstance(value, spec.type) or (spec.type is not bool and isinstance(value, bool)):
+        raise SettingsError(f"{name}={value!r}: expected {spec.type.__name__}, got {type(value).__name__}")
+    if spec.check is not None and not spec.check(value):
+        raise SettingsError(f"{name}={value!r}: expected {spec.expected}")
+    return value
+
+
+def load_settings(module_name: Optional[str] = None, environ: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """
+    Reads and validates every setting. Unset optional settings get their
+    defaults; unset required ones are simply absent (reported on access).
+    Upper-case names outside SCHEMA are passed through unchecked.
+    """
+    environ = os.environ if environ is None else environ
+    module_name = module_name or environ.get(SETTINGS_MODULE_ENV, DEFAULT_SETTINGS_MODULE)
+    raw: Dict[str, Any] = {}
+    try:
+        module = importlib.import_module(module_name)
+    except ModuleNotFoundError as e:
+        if e.name != module_name:
+            raise  # The settings module exists but one of its own imports is missing
+    else:
+        raw.update((name, value) for name, value in vars(module).items() if name.isupper())
+
+    values: Dict[str, Any] = {}
+    for name, value in raw.items():
+        values[name] = _validate(name, SCHEMA[name], value) if name in SCHEMA else value
+    for name, spec in SCHEMA.items():
+        env_value = environ.get(ENV_PREFIX + name)
+        if env_value is not None:
+            values[name] = _validate(name, spec, _from_env(name, spec, env_value))
+        elif name not in values and not spec.required:
+            values[name] = spec.default
+    return values
+
+
+class Settings:
+    """
+    Attribute access to the validated settings, like the old `settings` module.
+    Nothing is read until the first attribute lookup.
+    """
+
+    def __init__(self, module_name: Optional[str] = None, environ: Optional[Mapping[str, str]] = None):
+        object.__setattr__(self, "_source", (module_name, environ))
+        object.__setattr__(self, "_values", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self) -> Dict[str, Any]:
+        values = self._values
+        if values is None:
+            with self._lock:
+                values = self._values
+                if values is None:
+                    values = load_settings(*self._source)
+                    object.__setattr__(self, "_values", values)
+        return values
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        values = self._load()
+        if name in values:
+            return values[name]
+        if name in SCHEMA:
+            raise MissingSettingError(f"{name} is not configured: set it in the settings module "
+                                      f"or the {ENV_PREFIX}{name} environment variable")
+        raise AttributeError(f"Unknown setting {name!r}")
+
+    def __setattr__(self, name: str, value: Any):
+        """Runtime override (tests, benchmarks), validated like a configured value."""
+        self._load()[name] = _validate(name, SCHEMA[name], value) if name in SCHEMA else value
+
+    def reload(self):
+        """Drops the cached values; the next lookup reads the module and environment again."""
+        object.__setattr__(self, "_values", None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self._load())
+
+
+settings = Settings()
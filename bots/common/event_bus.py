@@ -0,0 +1,768 @@
+# bots/common/event_bus.py
+
+import asyncio
+import bisect
+import inspect
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Union
+from urllib.parse import parse_qsl
+
+try:
+    import fcntl  # Cross-process append lock for the file log (POSIX)
+    LOCK_EX, LOCK_UN = fcntl.LOCK_EX, fcntl.LOCK_UN
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    LOCK_EX = LOCK_UN = 0
+
+from bots.common.instrumentation import get_logger, log_event
+
+log = get_logger("event_bus")
+
+# Topics used by the bots (payloads are plain JSON dicts)
+DRIVER_LOCATIONS = "driver.locations"            # Driver API -> Dispatcher: {"pings": [...]}
+JOB_SUBMITTED = "jobs.submitted"                 # Client API -> Dispatcher (request/reply)
+JOB_MATCHED = "jobs.matched"                     # Dispatcher -> Client API replies
+FUNDING_REQUESTED = "finance.funding_requested"  # Marketing Bot -> Finance Bot
+FUNDING_DECIDED = "finance.funding_decided"      # Finance Bot -> whoever asked
+PLATFORM_EVENTS = "platform.events"              # Dispatcher/Finance Bot event hooks -> Governance KPIs (key: event type)
+
+EARLIEST = "earliest"
+LATEST = "latest"
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_RETENTION_SECONDS = 7 * 24 * 3600.0
+
+
+@dataclass
+class Event:
+    topic: str
+    offset: int
+    payload: Dict[str, Any]
+    key: Optional[str] = None
+    timestamp: float = 0.0
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+Handler = Callable[[List[Event]], Union[None, Awaitable[None]]]
+
+
+# --- Topic logs ---
+
+class MemoryTopicLog:
+    """Append-only list of events; offsets are list positions."""
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self._events: List[Event] = []
+        self._lock = threading.Lock()
+
+    def append_many(self, records: Sequence[tuple]) -> List[int]:
+        """Appends (payload, key, headers) records; returns their offsets."""
+        now = time.time()
+        with self._lock:
+            start = len(self._events)
+            self._events.extend(Event(self.topic, start + i, payload, key, now, headers or {})
+                                for i, (payload, key, headers) in enumerate(records))
+        return list(range(start, start + len(records)))
+
+    def read(self, offset: int, limit: int) -> List[Event]:
+        return self._events[offset:offset + limit]
+
+    def start_offset(self) -> int:
+        return 0
+
+    def end_offset(self) -> int:
+        return len(self._events)
+
+    def close(self):
+        pass
+
+
+class _Segment:
+    """One file of a FileTopicLog: events `base`, `base + 1`, ..., one JSON line each."""
+
+    def __init__(self, base: int, path: Path, create: bool = True):
+        self.base = base
+        self.path = path
+        # Writes seek to the end under the log's flock; an existing segment is never recreated
+        self.file = open(path, "a+b" if create else "r+b")
+        self.positions: List[int] = []  # byte offset of each line
+        self.indexed_bytes = 0
+        self.refresh()
+
+    @property
+    def end(self) -> int:
+        return self.base + len(self.positions)
+
+    def refresh(self):
+        """Indexes complete lines appended since the last call (by us or another process)."""
+        size = os.fstat(self.file.fileno()).st_size
+        if size <= self.indexed_bytes:
+            return
+        self.file.seek(self.indexed_bytes)
+        position = self.indexed_bytes
+        for line in self.file:
+            if not line.endswith(b"\n"):
+                break  # Partially written by another process; indexed next time
+            self.positions.append(position)
+            position += len(line)
+        self.indexed_bytes = position
+
+    def close(self):
+        self.file.close()
+
+
+class FileTopicLog:
+    """
+    Append-only topic log in `directory`, split into JSON-lines segment files
+    named after the offset of their first event; offsets are line numbers
+    across segments. Several processes may append to and read the same log:
+    appends take an exclusive flock and re-index any lines other writers added
+    first, and readers pick up new lines and segments on `end_offset()`.
+    `fsync=True` makes every append durable before it returns (one fsync per
+    publish_many call).
+
+    Retention: an append that finds the active segment at `segment_bytes`
+    (every process sharing the log must use the same value) starts a new one
+    and deletes the closed segments whose newest event is older than
+    `retention_seconds`, then the oldest ones while the log is over
+    `retention_bytes` (None keeps everything). The active segment is never
+    deleted. Reads below the oldest retained offset start at it.
+    """
+
+    def __init__(self, topic: str, directory: Path, fsync: bool = False,
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 retention_seconds: Optional[float] = DEFAULT_RETENTION_SECONDS,
+                 retention_bytes: Optional[int] = None):
+        self.topic = topic
+        self.directory = directory
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self.retention_seconds = retention_seconds
+        self.retention_bytes = retention_bytes
+        self._lock = threading.Lock()
+        directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(directory / ".lock", "a+b")  # flock target shared by all segments
+        self._segments: List[_Segment] = []
+        for base in sorted(int(path.stem) for path in directory.glob("*.log") if path.stem.isdigit()):
+            try:
+                self._segments.append(_Segment(base, self._segment_path(base), create=False))
+            except FileNotFoundError:
+                pass  # Removed by retention in another process since the listing
+        if not self._segments:
+            self._segments.append(_Segment(0, self._segment_path(0)))
+        self._refresh()
+
+    def _segment_path(self, base: int) -> Path:
+        return self.directory / f"{base:020d}.log"
+
+    def _refresh(self):
+        """Picks up appends, new segments and deleted ones since the last call (by us or another process)."""
+        active = self._segments[-1]
+        active.refresh()
+        # Writers roll over (and apply retention) only once the active segment is full, so the
+        # directory needs looking at only then; the next segment starts where this one ends
+        while active.indexed_bytes >= self.segment_bytes and self._segment_path(active.end).exists():
+            active = _Segment(active.end, self._segment_path(active.end), create=False)
+            self._segments.append(active)
+            while not self._segments[0].path.exists():
+                self._segments.pop(0).close()  # Removed by retention in another process
+
+    def _flock(self, operation: int):
+        if fcntl is not None:
+            fcntl.flock(self._lock_file, operation)
+
+    def append_many(self, records: Sequence[tuple]) -> List[int]:
+        now = time.time()
+        data = b"".join(
+            json.dumps({"ts": now, "key": key, "headers": headers or {}, "payload": payload},
+                       separators=(",", ":")).encode() + b"\n"
+            for payload, key, headers in records
+        )
+        with self._lock:
+            self._flock(LOCK_EX)
+            try:
+                self._refresh()
+                active = self._segments[-1]
+                if active.indexed_bytes >= self.segment_bytes:
+                    active = _Segment(active.end, self._segment_path(active.end))
+                    self._segments.append(active)
+                    self._delete_expired()
+                start = active.end
+                active.file.seek(0, os.SEEK_END)
+                active.file.write(data)
+                active.file.flush()
+                if self.fsync:
+                    os.fsync(active.file.fileno())
+                active.refresh()
+            finally:
+                self._flock(LOCK_UN)
+        return list(range(start, start + len(records)))
+
+    def enforce_retention(self) -> int:
+        """Deletes the closed segments retention no longer keeps; returns how many."""
+        with self._lock:
+            self._flock(LOCK_EX)
+            try:
+                self._refresh()
+                return self._delete_expired()
+            finally:
+                self._flock(LOCK_UN)
+
+    def _delete_expired(self) -> int:
+        closed = self._segments[:-1]
+        sizes = [os.fstat(segment.file.fileno()) for segment in closed]
+        total = sum(stat.st_size for stat in sizes) + self._segments[-1].indexed_bytes
+        cutoff = time.time() - self.retention_seconds if self.retention_seconds is not None else None
+        expired = 0
+        for segment, stat in zip(closed, sizes):
+            too_old = cutoff is not None and stat.st_mtime < cutoff
+            too_big = self.retention_bytes is not None and total > self.retention_bytes
+            if not (too_old or too_big):
+                break
+            os.unlink(segment.path)
+            segment.close()
+            total -= stat.st_size
+            expired += 1
+        del self._segments[:expired]
+        return expired
+
+    def read(self, offset: int, limit: int) -> List[Event]:
+        with self._lock:
+            segments = self._segments
+            offset = max(offset, segments[0].base)
+            first = offset
+            lines: List[bytes] = []
+            index = bisect.bisect_right([segment.base for segment in segments], offset) - 1
+            for segment in segments[index:]:
+                count = min(limit - len(lines), segment.end - offset)
+                if count > 0:
+                    segment.file.seek(segment.positions[offset - segment.base])
+                    lines.extend(segment.file.readline() for _ in range(count))
+                    offset += count
+                if len(lines) >= limit:
+                    break
+        events = []
+        for i, line in enumerate(lines):
+            record = json.loads(line)
+            events.append(Event(self.topic, first + i, record["payload"], record.get("key"),
+                                record.get("ts", 0.0), record.get("headers") or {}))
+        return events
+
+    def start_offset(self) -> int:
+        with self._lock:
+            return self._segments[0].base
+
+    def end_offset(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._segments[-1].end
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
+        self._lock_file.close()
+
+
+# --- Committed offsets per (topic, group) ---
+
+class MemoryOffsetStore:
+    def __init__(self):
+        self._offsets: Dict[tuple, int] = {}
+
+    def load(self, topic: str, group: str) -> Optional[int]:
+        return self._offsets.get((topic, group))
+
+    def save(self, topic: str, group: str, offset: int):
+        self._offsets[(topic, group)] = offset
+
+    def acquire(self, topic: str, group: str):
+        pass  # Nothing outside this process can see the group
+
+
+class FileOffsetStore:
+    """
+    One small file per (topic, group), replaced atomically on every commit.
+    A group's position between commits (what is claimed, what is in flight)
+    lives in the consuming process, so `acquire()` reserves the group for one
+    process with a flock held until it exits.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._held: Dict[tuple, Any] = {}
+
+    def _path(self, topic: str, group: str) -> Path:
+        return self.directory / f"{topic}.{group}.offset"
+
+    def load(self, topic: str, group: str) -> Optional[int]:
+        try:
+            return int(self._path(topic, group).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def acquire(self, topic: str, group: str):
+        if fcntl is None or (topic, group) in self._held:
+            return
+        lock_file = open(self.directory / f"{topic}.{group}.lock", "a+b")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(f"Consumer group {group!r} on {topic!r} is already consumed by another process; "
+                               f"a group's members must share one process") from None
+        self._held[(topic, group)] = lock_file
+
+    def save(self, topic: str, group: str, offset: int):
+        path = self._path(topic, group)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(str(offset))
+        os.replace(tmp, path)
+
+
+# --- Consumer groups ---
+
+class _GroupState:
+    """
+    Shared cursor of one consumer group on one topic. Members claim disjoint
+    batches; the committed offset only advances past batches every member has
+    finished, so a crash redelivers (at-least-once) and never skips.
+    """
+
+    def __init__(self, topic: str, group: str, start: int):
+        self.topic = topic
+        self.group = group
+        self.cursor = start
+        self.committed = start
+        self.in_flight: Dict[int, int] = {}  # batch start -> end
+        self._lock = threading.Lock()  # Members may run on different event loops
+        self.delivered = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+        self.saved = start  # last committed offset written to the offset store
+        self.saved_at = 0.0
+
+    def claim(self, topic_log, batch_size: int) -> List[Event]:
+        with self._lock:
+            batch = topic_log.read(self.cursor, batch_size)
+            if batch:
+                start, end = batch[0].offset, batch[-1].offset + 1
+                if start > self.cursor:
+                    log_event(log, logging.WARNING, "consumer_skipped_expired_events", group=self.group,
+                              topic=self.topic, from_offset=self.cursor, to_offset=start)
+                self.in_flight[start] = end
+                self.cursor = end
+            return batch
+
+    def ack(self, batch: List[Event]):
+        with self._lock:
+            self.in_flight.pop(batch[0].offset, None)
+            self.delivered += len(batch)
+            self.batches += 1
+            self.committed = min(self.in_flight) if self.in_flight else self.cursor
+
+    def save(self, offsets, min_interval: float = 0.0):
+        """Writes the committed offset if it moved and `min_interval` has passed since the last write."""
+        now = time.monotonic()
+        if self.committed != self.saved and now - self.saved_at >= min_interval:
+            self.saved, self.saved_at = self.committed, now
+            offsets.save(self.topic, self.group, self.saved)
+
+
+class Subscription:
+    """One consumer-group member: an asyncio task delivering batches to `handler`."""
+
+    def __init__(self, bus: "EventBus", state: _GroupState, handler: Handler, batch_size: int,
+                 max_attempts: int, retry_backoff: float):
+        self.bus = bus
+        self.state = state
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._is_async = inspect.iscoroutinefunction(handler)
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def lag(self) -> int:
+        return self.bus.topic(self.state.topic).end_offset() - self.state.committed
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Starts delivering on the running event loop."""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+            self.state.save(self.bus.offsets)
+
+    def notify(self):
+        """Wakes the consumer after an append (callable from any thread or loop)."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            wakeup.set()
+        else:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def _deliver(self, batch: List[Event]):
+        if self._is_async:
+            await self.handler(batch)
+        else:
+            # Plain functions run on the default thread pool, off the event loop
+            await asyncio.to_thread(self.handler, batch)
+
+    async def _run(self):
+        state = self.state
+        topic_log = self.bus.topic(state.topic)
+        wakeup = self._wakeup
+        while True:
+            wakeup.clear()
+            batch = state.claim(topic_log, self.batch_size)
+            if not batch:
+                state.save(self.bus.offsets)  # Caught up: persist the final position
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.bus.poll_interval)
+                except asyncio.TimeoutError:
+                    topic_log.end_offset()  # Picks up appends from other processes
+                continue
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    await self._deliver(batch)
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    state.failed_batches += 1
+                    if attempt == self.max_attempts:
+                        log_event(log, logging.ERROR, "consumer_batch_dead_lettered", group=state.group,
+                                  topic=state.topic, first_offset=batch[0].offset, last_offset=batch[-1].offset,
+                                  error=repr(e))
+                        self.bus.publish_many(f"{state.topic}.dead", [
+                            {"offset": event.offset, "group": state.group, "error": str(e), "payload": event.payload}
+                            for event in batch
+                        ])
+                        state.dead_lettered += len(batch)
+                    else:
+                        await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+            state.ack(batch)
+            state.save(self.bus.offsets, self.bus.commit_interval)
+
+
+class EventBus:
+    """
+    Publish/subscribe between bots, replacing point-to-point HTTP calls.
+
+    Every topic is an append-only log. `publish` appends and returns at once
+    (it never waits for a consumer), so a slow or stopped consumer does not slow
+    the publisher down. Consumers subscribe as members of a named group: each
+    group sees every event once, members of one group share its events in
+    batches, and the group's committed offset survives restarts (with the file
+    log), so delivery resumes where it stopped. All members of a group run in
+    one process. Any retained offset can be replayed with `read()` or by
+    `seek()`-ing a group back.
+
+    Use InProcessEventBus within one process and LogEventBus to connect
+    processes through a shared directory. `publish(topic, payload)` also fits
+    the bots' `event_hook` signature.
+    """
+
+    def __init__(self, log_factory: Callable[[str], Any], offsets, poll_interval: float = 0.05,
+                 commit_interval: float = 0.0):
+        self._log_factory = log_factory
+        self.offsets = offsets
+        self.poll_interval = poll_interval
+        # While busy, committed offsets are written at most this often (a crash redelivers at most that much)
+        self.commit_interval = commit_interval
+        self._logs: Dict[str, Any] = {}
+        self._groups: Dict[tuple, _GroupState] = {}
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def topic(self, name: str):
+        log = self._logs.get(name)
+        if log is None:
+            with self._lock:
+                log = self._logs.get(name)
+                if log is None:
+                    log = self._logs[name] = self._log_factory(name)
+        return log
+
+    # --- Publishing ---
+
+    def publish(self, topic: str, payload: Dict[str, Any], key: Optional[str] = None,
+                headers: Optional[Dict[str, str]] = None) -> int:
+        """Appends one event; returns its offset. Safe to call from any thread."""
+        return self.publish_many(topic, [payload], key, headers)[0]
+
+    def publish_many(self, topic: str, payloads: Sequence[Dict[str, Any]], key: Optional[str] = None,
+                     headers: Optional[Dict[str, str]] = None) -> List[int]:
+        """Appends a batch in one write (one fsync for the durable log)."""
+        return self._append(topic, [(payload, key, headers) for payload in payloads])
+
+    def _append(self, topic: str, records: Sequence[tuple]) -> List[int]:
+        offsets = self.topic(topic).append_many(records)
+        self._notify(topic)
+        return offsets
+
+    def _notify(self, topic: str):
+        for subscription in self._subscriptions.get(topic, ()):
+            subscription.notify()
+
+    # --- Consuming ---
+
+    def subscribe(self, topic: str, group: str, handler: Handler, batch_size: int = 100,
+                  start: str = EARLIEST, max_attempts: int = 5, retry_backoff: float = 0.1) -> Subscription:
+        """
+        Adds a member to `group` on `topic`. `handler` receives a list of up to
+        `batch_size` events (a coroutine function is awaited, a plain function
+        runs on a worker thread); if it raises, the batch is retried with
+        backoff and after `max_attempts` moved to the "<topic>.dead" topic.
+        A group with no committed offset starts at the EARLIEST or LATEST event.
+        Delivery begins on `start()`, or at once when called on a running loop.
+        """
+        state = self._groups.get((topic, group))
+        if state is None:
+            self.offsets.acquire(topic, group)
+            committed = self.offsets.load(topic, group)
+            if committed is None:
+                committed = 0 if start == EARLIEST else self.topic(topic).end_offset()
+            state = self._groups[(topic, group)] = _GroupState(topic, group, committed)
+        subscription = Subscription(self, state, handler, batch_size, max_attempts, retry_backoff)
+        self._subscriptions.setdefault(topic, []).append(subscription)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return subscription  # Started by start() from the app's startup
+        subscription.start()
+        return subscription
+
+    def seek(self, topic: str, group: str, offset: int):
+        """Moves a group's position (e.g. back to 0 to replay a topic through it)."""
+        state = self._groups.get((topic, group))
+        if state is not None:
+            with state._lock:
+                state.cursor = state.committed = state.saved = offset
+                state.in_flight.clear()
+        self.offsets.save(topic, group, offset)
+
+    def read(self, topic: str, offset: int = 0, limit: int = 1_000) -> List[Event]:
+        """Replay: the stored events from `offset`, independent of any group."""
+        return self.topic(topic).read(offset, limit)
+
+    def replay(self, topic: str, offset: int = 0, batch_size: int = 1_000) -> Iterator[List[Event]]:
+        """Iterates over every stored event from `offset` in batches."""
+        while True:
+            batch = self.read(topic, offset, batch_size)
+            if not batch:
+                return
+            yield batch
+            offset += len(batch)
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        """Starts the subscriptions not running yet on the running loop (call from app startup)."""
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.start()
+
+    async def stop(self):
+        """Stops the subscriptions delivering on this loop."""
+        loop = asyncio.get_running_loop()
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                if subscription._loop is loop:
+                    await subscription.stop()
+
+    def close(self):
+        for log in self._logs.values():
+            log.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": {name: log.end_offset() for name, log in self._logs.items()},
+            "groups": {f"{state.topic}/{state.group}": {
+                "committed": state.committed, "lag": self.topic(state.topic).end_offset() - state.committed,
+                "delivered": state.delivered, "batches": state.batches,
+                "failed_batches": state.failed_batches, "dead_lettered": state.dead_lettered,
+            } for state in self._groups.values()},
+        }
+
+
+class InProcessEventBus(EventBus):
+    """Bus within one process (asyncio delivery, nothing persisted)."""
+
+    def __init__(self, poll_interval: float = 0.05):
+        super().__init__(MemoryTopicLog, MemoryOffsetStore(), poll_interval)
+
+
+class LogEventBus(EventBus):
+    """
+    Bus backed by segmented log files in `directory` (a subdirectory per
+    topic) plus committed offsets per group. Services in different processes
+    on the same host (or a shared volume) exchange events through it; events
+    are kept for `retention_seconds` / up to `retention_bytes` per topic (see
+    FileTopicLog) and offsets survive restarts. Any number of processes may
+    publish to a topic, but each consumer group is consumed by one process:
+    subscribing to a group another process holds raises RuntimeError.
+    """
+
+    def __init__(self, directory: Union[str, Path], fsync: bool = False, poll_interval: float = 0.05,
+                 commit_interval: float = 0.5, segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 retention_seconds: Optional[float] = DEFAULT_RETENTION_SECONDS,
+                 retention_bytes: Optional[int] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self.retention_seconds = retention_seconds
+        self.retention_bytes = retention_bytes
+        super().__init__(self._open_topic, FileOffsetStore(self.directory), poll_interval, commit_interval)
+
+    def _open_topic(self, topic: str) -> FileTopicLog:
+        directory = self.directory / topic
+        legacy = self.directory / f"{topic}.log"  # Single-file log written before segments
+        if legacy.is_file() and not directory.exists():
+            directory.mkdir(exist_ok=True)
+            try:
+                os.replace(legacy, directory / f"{0:020d}.log")
+            except FileNotFoundError:
+                pass  # Another process moved it first
+        return FileTopicLog(topic, directory, self.fsync, self.segment_bytes, self.retention_seconds,
+                            self.retention_bytes)
+
+
+_open_buses: Dict[str, EventBus] = {}
+
+
+def open_event_bus(url: Optional[str]) -> Optional[EventBus]:
+    """
+    Bus from a settings value: "memory://" or "file:///var/lib/pickuplink/events".
+    File bus options go in the query: fsync=1 for durable appends,
+    retention_hours (default 168; 0 keeps everything), retention_mb per topic
+    and segment_mb (default 64), e.g. "file:///var/lib/pickuplink/events?fsync=1&retention_hours=24".
+    None/empty keeps direct HTTP calls. Services in one process asking for the
+    same URL share one bus.
+    """
+    if not url:
+        return None
+    if url not in _open_buses:
+        if url.startswith("memory://"):
+            _open_buses[url] = InProcessEventBus()
+        elif url.startswith("file://"):
+            path, _, query = url[len("file://"):].partition("?")
+            options = dict(parse_qsl(query))
+            retention_hours = float(options.get("retention_hours", DEFAULT_RETENTION_SECONDS / 3600))
+            retention_mb = options.get("retention_mb")
+            _open_buses[url] = LogEventBus(
+                path, fsync=options.get("fsync") == "1",
+                segment_bytes=int(float(options.get("segment_mb", DEFAULT_SEGMENT_BYTES / 2 ** 20)) * 2 ** 20),
+                retention_seconds=retention_hours * 3600 if retention_hours > 0 else None,
+                retention_bytes=int(float(retention_mb) * 2 ** 20) if retention_mb else None,
+            )
+        else:
+            raise ValueError(f"Unsupported event bus URL: {url}")
+    return _open_buses[url]
+
+
+# --- Request/reply over the bus ---
+
+class RequestReply:
+    """
+    Awaitable request/response on top of pub/sub, for calls that need an
+    answer (e.g. job matching). Requests carry a correlation id and the reply
+    topic in their headers; `serve()` on the other side publishes the replies.
+    Each RequestReply reads the reply topic with its own group and resolves
+    only its own pending requests.
+    """
+
+    def __init__(self, bus: EventBus, reply_topic: str):
+        self.bus = bus
+        self.reply_topic = reply_topic
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._prefix = uuid.uuid4().hex[:12]
+        bus.subscribe(reply_topic, f"replies-{self._prefix}", self._on_replies, batch_size=500, start=LATEST)
+
+    async def _on_replies(self, events: List[Event]):
+        for event in events:
+            future = self._pending.pop(event.headers.get("correlation_id", ""), None)
+            if future is not None:
+                # The requester may be on another event loop than this subscription
+                future.get_loop().call_soon_threadsafe(_resolve, future, event.payload)
+
+    async def request(self, topic: str, payload: Dict[str, Any], timeout: float = 5.0) -> Dict[str, Any]:
+        correlation_id = f"{self._prefix}-{next(self._ids)}"
+        future = asyncio.get_running_loop().create_future()
+        self._pending[correlation_id] = future
+        self.bus.publish(topic, payload, headers={"correlation_id": correlation_id, "reply_to": self.reply_topic})
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(correlation_id, None)
+
+
+def _resolve(future: asyncio.Future, result: Dict[str, Any]):
+    if not future.done():
+        future.set_result(result)
+
+
+def serve(bus: EventBus, topic: str, group: str,
+          handle_batch: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+          batch_size: int = 100) -> Subscription:
+    """
+    Answers RequestReply requests on `topic`: `handle_batch` maps the batch's
+    payloads to one reply each (in order), which is run on a worker thread and
+    published to each request's reply topic in one write per topic.
+    """
+
+    def on_batch(events: List[Event]):
+        replies = handle_batch([event.payload for event in events])
+        by_topic: Dict[str, List[tuple]] = {}
+        for event, reply in zip(events, replies):
+            reply_to = event.headers.get("reply_to")
+            if reply_to:
+                by_topic.setdefault(reply_to, []).append((reply, None, {"correlation_id": event.headers["correlation_id"]}))
+        for reply_topic, records in by_topic.items():
+            bus._append(reply_topic, records)
+
+    return bus.subscribe(topic, group, on_batch, batch_size=batch_size)
+
+
+def publish_hook(bus: EventBus, topic: str = PLATFORM_EVENTS) -> Callable[[str, Dict[str, Any]], None]:
+    """An `event_hook(event_type, payload)` that publishes each event to `topic`, keyed by its type."""
+
+    def hook(event_type: str, payload: Dict[str, Any]):
+        bus.publish(topic, payload, key=event_type)
+
+    return hook
@@ -0,0 +1,438 @@
+# bots/common/instrumentation.py
+
+import bisect
+import collections
+import functools
+import json
+import logging
+import math
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers cache hits (sub-ms) through slow upstream calls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+
+class _State:
+    """Global switch read on every instrumented call; flipping it needs no restart."""
+    enabled = True
+
+
+_state = _State()
+
+
+def set_enabled(enabled: bool):
+    _state.enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+# --- Metrics ---
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any, **kwargs: Any):
+        """The child series for these label values (created on first use, then cached)."""
+        key = tuple(str(v) for v in values) if values else tuple(str(kwargs[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        if not self.labelnames:
+            return [((), self._root)]
+        with self._lock:
+            return sorted(self._children.items())
+
+    def _new_child(self):
+        raise NotImplementedError
+
+
+class _CounterValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        if not _state.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._root = _CounterValue()
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self._root.inc(amount)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_label_text(self.labelnames, key)} {child.value:g}" for key, child in self._series()]
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        if not _state.enabled:
+            return
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets (linear within the bucket), as Prometheus' histogram_quantile does."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self._root = _HistogramValue(self.bounds)
+
+    def _new_child(self):
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float):
+        self._root.observe(value)
+
+    def quantile(self, q: float) -> float:
+        return self._root.quantile(q)
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, child in self._series():
+            with child._lock:
+                counts, total, value_sum = list(child.counts), child.count, child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {value_sum:.9g}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {total}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+def timed(name: str, documentation: str = ""):
+    """
+    Decorator recording the call's latency in the `name` histogram (seconds).
+    When instrumentation is disabled the wrapper only checks one flag.
+    """
+    def decorate(fn):
+        metric = histogram(name, documentation or f"Latency of {fn.__qualname__} in seconds")
+        series = metric._root
+        perf_counter = time.perf_counter
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                series.observe(perf_counter() - start)
+
+        wrapper.metric = metric
+        return wrapper
+    return decorate
+
+
+# --- Structured logging ---
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus the record's `fields`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"ts": round(record.created, 6), "level": record.levelname, "logger": record.name,
+                 "msg": record.getMessage()}
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"pickuplink.{name}")
+
+
+def log_event(logger: logging.Logger, level: int, event: str, exc_info: bool = False, **fields: Any):
+    """Structured log line; nothing is formatted unless the level is enabled. exc_info adds the traceback."""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+
+def configure_logging(level: str = "INFO", json_format: bool = True, stream=None):
+    """Sets up the `pickuplink` logger tree once per process (apps call this at startup)."""
+    root = logging.getLogger("pickuplink")
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    if not any(getattr(handler, "_pickuplink", False) for handler in root.handlers):
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler._pickuplink = True
+        root.addHandler(handler)
+        root.propagate = False
+    for handler in root.handlers:
+        if getattr(handler, "_pickuplink", False):
+            handler.setFormatter(JSONFormatter() if json_format else
+                                 logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+
+# --- Sampling profiler ---
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler: a daemon thread snapshots every other thread's
+    Python stack each `interval` seconds and counts the collapsed stacks
+    ("mod:func;mod:func" -> samples, the flamegraph.pl / speedscope input).
+    Costs nothing until started; while running, roughly the time to walk the
+    stacks once per interval.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: "collections.Counter[str]" = collections.Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, reset: bool = True):
+        with self._lock:
+            if self.running:
+                return
+            if reset:
+                self.stacks.clear()
+                self.samples = 0
+            self._stop.clear()
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> Dict[str, Any]:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+        return self.report()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own:
+                    continue
+                parts = []
+                while frame is not None and len(parts) < self.max_depth:
+                    code = frame.f_code
+                    parts.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, n: int = 20) -> List[Tuple[str, int]]:
+        """Functions by samples where they were on top of the stack (self time)."""
+        leaves: "collections.Counter[str]" = collections.Counter()
+        for stack, count in list(self.stacks.items()):
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def report(self, n: int = 20) -> Dict[str, Any]:
+        return {"running": self.running, "samples": self.samples, "interval": self.interval,
+                "started_at": self.started_at, "top": self.top_functions(n)}
+
+
+PROFILER = SamplingProfiler()
+
+
+# --- FastAPI wiring ---
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: request latency per route template, method and status."""
+
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+        self.requests = histogram("http_request_duration_seconds", "HTTP request latency in seconds",
+                                  ("service", "method", "route", "status"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _state.enabled:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Streaming responses are timed until the app returns, i.e. the whole stream
+            self.requests.labels(self.service, scope["method"], getattr(route, "path", "unmatched"),
+                                 status[0]).observe(time.perf_counter() - start)
+
+
+def instrument_app(app, service: str, profiler_enabled: bool = False):
+    """
+    Adds request metrics, GET /metrics (Prometheus text) and, when
+    `profiler_enabled`, POST /debug/profiler/start|stop and GET /debug/profiler.
+    """
+    from fastapi import HTTPException
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(MetricsMiddleware, service=service)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    def require_profiler():
+        if not profiler_enabled:
+            raise HTTPException(status_code=404, detail="Profiler is disabled (settings.PROFILER_ENABLED).")
+
+    @app.post("/debug/profiler/start", include_in_schema=False)
+    def profiler_start(interval: float = 0.005):
+        require_profiler()
+        PROFILER.interval = min(max(interval, 0.001), 1.0)
+        PROFILER.start()
+        return PROFILER.report()
+
+    @app.post("/debug/profiler/stop", include_in_schema=False)
+    def profiler_stop():
+        require_profiler()
+        return PROFILER.stop()
+
+    @app.get("/debug/profiler", include_in_schema=False)
+    def profiler_collapsed():
+        """Collapsed stacks of the current/last run (feed to flamegraph.pl or speedscope)."""
+        require_profiler()
+        return PlainTextResponse(PROFILER.collapsed())
+
+    return app
+
+
+def configure_from_settings(settings_module) -> bool:
+    """Applies METRICS_ENABLED / LOG_LEVEL / LOG_JSON; returns PROFILER_ENABLED."""
+    set_enabled(getattr(settings_module, "METRICS_ENABLED", True))
+    configure_logging(getattr(settings_module, "LOG_LEVEL", "INFO"), getattr(settings_module, "LOG_JSON", True))
+    return bool(getattr(settings_module, "PROFILER_ENABLED", False))
@@ -0,0 +1,26 @@
+# bots/common/lazy.py
+
+import importlib
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """
+    Module-level __getattr__/__dir__ (PEP 562) for a package __init__: each
+    name in `exports` is imported from its submodule on first access, so
+    importing the package (e.g. for `python -m`) does not load the bot.
+
+        __getattr__, __dir__ = lazy_exports(__name__, {"Dispatcher": "dispatcher"})
+    """
+    def __getattr__(name: str):
+        submodule = exports.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f"{package}.{submodule}"), name)
+        setattr(importlib.import_module(package), name, value)  # Later lookups skip __getattr__
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
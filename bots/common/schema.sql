@@ -0,0 +1,101 @@
+-- bots/common/schema.sql
+--
+-- PickupLink operational schema. Written in the SQL subset shared by
+-- PostgreSQL and SQLite (3.24+); the SQLite backend only rewrites BIGSERIAL.
+-- Money is stored as integer cents, timestamps as epoch seconds.
+
+CREATE TABLE IF NOT EXISTS drivers (
+    id              BIGINT PRIMARY KEY,
+    license_number  TEXT UNIQUE,
+    plate           TEXT,
+    vehicle_type    TEXT,
+    vin             TEXT,
+    make            TEXT,
+    model           TEXT,
+    capacity        DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rating          DOUBLE PRECISION NOT NULL DEFAULT 0,
+    is_verified     BOOLEAN NOT NULL DEFAULT FALSE,
+    is_active       BOOLEAN NOT NULL DEFAULT FALSE,
+    lat             DOUBLE PRECISION,
+    lon             DOUBLE PRECISION,
+    geocell         BIGINT,
+    registered_at   DOUBLE PRECISION,
+    updated_at      DOUBLE PRECISION NOT NULL
+);
+
+-- Matching: "online, verified drivers in these cells". Partial, so offline
+-- drivers (most of the table at any moment) are not in the index at all.
+CREATE INDEX IF NOT EXISTS idx_drivers_active_geocell
+    ON drivers (geocell, capacity) WHERE is_active AND is_verified;
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id                BIGINT PRIMARY KEY,
+    client_id         BIGINT NOT NULL,
+    status            TEXT NOT NULL,
+    pickup_lat        DOUBLE PRECISION NOT NULL,
+    pickup_lon        DOUBLE PRECISION NOT NULL,
+    dropoff_lat       DOUBLE PRECISION NOT NULL,
+    dropoff_lon       DOUBLE PRECISION NOT NULL,
+    required_capacity DOUBLE PRECISION NOT NULL DEFAULT 0,
+    base_price_cents  BIGINT NOT NULL,
+    is_express        BOOLEAN NOT NULL DEFAULT FALSE,
+    driver_id         BIGINT,
+    created_at        DOUBLE PRECISION NOT NULL,
+    updated_at        DOUBLE PRECISION NOT NULL
+);
+
+-- Queue views and dashboards: "jobs in status X, oldest/newest first, since T"
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+-- Dashboards: "jobs created since T"
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_driver ON jobs (driver_id) WHERE driver_id IS NOT NULL;
+
+-- Next unassigned id per table ('jobs'): processes reserve blocks of ids from
+-- here (Storage.reserve_job_ids), so several Client API processes never hand
+-- out the same job id
+CREATE TABLE IF NOT EXISTS id_blocks (
+    name     TEXT PRIMARY KEY,
+    next_id  BIGINT NOT NULL
+);
+
+-- Append-only job history for incremental readers (demand analytics): one
+-- 'created' row per inserted job and one 'status' row per status change,
+-- written in the same transaction as the jobs row. Readers resume from the
+-- last id they applied instead of a timestamp.
+CREATE TABLE IF NOT EXISTS job_events (
+    id           BIGSERIAL PRIMARY KEY,
+    job_id       BIGINT NOT NULL,
+    kind         TEXT NOT NULL,             -- 'created' or 'status'
+    status       TEXT NOT NULL,
+    driver_id    BIGINT,
+    recorded_at  DOUBLE PRECISION NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id            BIGSERIAL PRIMARY KEY,
+    driver_id     BIGINT NOT NULL,
+    job_id        BIGINT,
+    kind          TEXT NOT NULL,            -- 'job_earning', 'payout', 'platform_fee', ...
+    amount_cents  BIGINT NOT NULL,
+    reference     TEXT,                     -- e.g. payout idempotency key
+    created_at    DOUBLE PRECISION NOT NULL
+);
+
+-- Statements and settlement: "driver D between dates A and B"
+CREATE INDEX IF NOT EXISTS idx_transactions_driver_created ON transactions (driver_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_created ON transactions (created_at);
+-- Idempotent booking: "was settlement run R already recorded?"
+CREATE INDEX IF NOT EXISTS idx_transactions_reference ON transactions (reference) WHERE reference IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS bot_missions (
+    id              BIGSERIAL PRIMARY KEY,
+    mission         TEXT NOT NULL,
+    bot             TEXT NOT NULL,
+    region          TEXT,
+    approved_cents  BIGINT NOT NULL DEFAULT 0,
+    revenue_cents   BIGINT NOT NULL DEFAULT 0,
+    status          TEXT NOT NULL,
+    created_at      DOUBLE PRECISION NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_bot_missions_created ON bot_missions (created_at);
@@ -0,0 +1,468 @@
+# bots/common/storage.py
+
+import itertools
+import math
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+SCHEMA_PATH = Path(__file__).with_name("schema.sql")
+GEOCELL_DEG = 0.02  # Same cell size as the Dispatcher's in-memory DriverSpatialIndex
+_LON_CELLS = int(360 / GEOCELL_DEG) + 1
+BULK_CHUNK = 10_000  # rows per executemany/transaction in bulk writes
+
+_memory_ids = itertools.count(1)
+
+
+def geocell(lat: float, lon: float) -> int:
+    """Integer id of the GEOCELL_DEG x GEOCELL_DEG cell containing (lat, lon)."""
+    lat_cell = math.floor(lat / GEOCELL_DEG) + int(90 / GEOCELL_DEG)
+    lon_cell = math.floor(lon / GEOCELL_DEG) + int(180 / GEOCELL_DEG)
+    return lat_cell * _LON_CELLS + lon_cell
+
+
+def geocells_around(lat: float, lon: float, radius_km: float) -> List[int]:
+    """Every cell overlapping the box of `radius_km` around a point (for `geocell IN (...)`)."""
+    d_lat = radius_km / 111.2
+    d_lon = radius_km / (111.2 * max(math.cos(math.radians(lat)), 1e-6))
+    lat_steps = math.ceil(d_lat / GEOCELL_DEG)
+    lon_steps = math.ceil(d_lon / GEOCELL_DEG)
+    center = geocell(lat, lon)
+    return [center + i * _LON_CELLS + j
+            for i in range(-lat_steps, lat_steps + 1) for j in range(-lon_steps, lon_steps + 1)]
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of DB-API connections. `with pool.connection() as conn:` hands
+    out an idle connection (opening one if the pool is not full yet, waiting
+    otherwise), commits on success, rolls back on error and returns it.
+    """
+
+    def __init__(self, connect: Callable[[], Any], size: int = 8, timeout: float = 30.0):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection free after {self.timeout}s (pool size {self.size})")
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+class Storage:
+    """
+    Shared persistence for the bots: drivers, jobs, transactions and bot missions.
+
+    Backed by SQLite locally (`sqlite:///path.db`, or `sqlite://` for a shared
+    in-memory DB) and by PostgreSQL in production (`postgresql://...`, needs
+    psycopg). Both run the same schema.sql and the same queries; only the
+    placeholder style differs. Bulk writes go through executemany in chunks of
+    BULK_CHUNK rows per transaction.
+    """
+
+    def __init__(self, database_url: str = "sqlite://", pool_size: int = 8):
+        self.database_url = database_url
+        if database_url.startswith("sqlite:"):
+            self.dialect = "sqlite"
+            self.pool = ConnectionPool(self._sqlite_connector(database_url), size=pool_size)
+        elif database_url.startswith(("postgresql:", "postgres:")):
+            self.dialect = "postgresql"
+            self.pool = ConnectionPool(self._postgres_connector(database_url), size=pool_size)
+        else:
+            raise ValueError(f"Unsupported DATABASE_URL scheme: {database_url}")
+        self._keepalive = None
+        if self.dialect == "sqlite" and "mode=memory" in self._sqlite_target:
+            # A shared in-memory DB lives only while a connection is open
+            self._keepalive = self._connect_sqlite()
+
+    # --- Connections ---
+
+    def _sqlite_connector(self, url: str) -> Callable[[], Any]:
+        path = url[len("sqlite://"):].lstrip("/") if url != "sqlite://" else ""
+        if url.startswith("sqlite:////"):
+            path = "/" + path  # absolute path: sqlite:////var/lib/pickuplink.db
+        if not path or path == ":memory:":
+            path = f"file:pickuplink_mem_{next(_memory_ids)}?mode=memory&cache=shared"
+        self._sqlite_target = path
+        return self._connect_sqlite
+
+    def _connect_sqlite(self):
+        target = self._sqlite_target
+        conn = sqlite3.connect(target, uri=target.startswith("file:"), check_same_thread=False, timeout=30.0)
+        if "mode=memory" not in target:
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _postgres_connector(url: str) -> Callable[[], Any]:
+        try:
+            import psycopg
+        except ImportError as e:
+            raise ImportError("PostgreSQL storage requires psycopg (pip install 'psycopg[binary]')") from e
+        return lambda: psycopg.connect(url)
+
+    def _sql(self, statement: str) -> str:
+        return statement.replace("?", "%s") if self.dialect == "postgresql" else statement
+
+    def execute(self, statement: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self._sql(statement), params)
+            return cursor.fetchall() if cursor.description else []
+
+    def executemany(self, statement: str, rows: Iterable[Sequence[Any]]) -> int:
+        """Bulk write, committed every BULK_CHUNK rows. Returns the number of rows sent."""
+        statement = self._sql(statement)
+        return self._write_chunks(rows, lambda cursor, chunk: cursor.executemany(statement, chunk))
+
+    def _write_chunks(self, rows: Iterable[Any], write: Callable[[Any, List[Any]], None]) -> int:
+        """Calls write(cursor, chunk) for every BULK_CHUNK rows, one transaction per chunk."""
+        total = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, BULK_CHUNK))
+            if not chunk:
+                return total
+            with self.pool.connection() as conn:
+                write(conn.cursor(), chunk)
+            total += len(chunk)
+
+    def init_schema(self):
+        ddl = SCHEMA_PATH.read_text()
+        if self.dialect == "sqlite":
+            ddl = ddl.replace("BIGSERIAL PRIMARY KEY", "INTEGER PRIMARY KEY")
+        ddl = "\n".join(line.split("--", 1)[0] for line in ddl.splitlines())
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            for statement in ddl.split(";"):
+                if statement.strip():
+                    cursor.execute(statement)
+
+    def explain(self, statement: str, params: Sequence[Any] = ()) -> str:
+        """Query plan, to check which index a hot query uses."""
+        prefix = "EXPLAIN QUERY PLAN " if self.dialect == "sqlite" else "EXPLAIN "
+        return "\n".join(" ".join(str(col) for col in row) for row in self.execute(prefix + statement, params))
+
+    def close(self):
+        self.pool.close()
+        if self._keepalive is not None:
+            self._keepalive.close()
+            self._keepalive = None
+
+    # --- Drivers ---
+
+    _UPSERT_DRIVER = """
+        INSERT INTO drivers (id, license_number, plate, vehicle_type, vin, make, model, capacity, rating,
+                             is_verified, is_active, lat, lon, geocell, registered_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            license_number = COALESCE(excluded.license_number, drivers.license_number),
+            plate = COALESCE(excluded.plate, drivers.plate),
+            vehicle_type = COALESCE(excluded.vehicle_type, drivers.vehicle_type),
+            vin = COALESCE(excluded.vin, drivers.vin),
+            make = COALESCE(excluded.make, drivers.make),
+            model = COALESCE(excluded.model, drivers.model),
+            capacity = excluded.capacity, rating = excluded.rating,
+            is_verified = excluded.is_verified, is_active = excluded.is_active,
+            lat = COALESCE(excluded.lat, drivers.lat), lon = COALESCE(excluded.lon, drivers.lon),
+            geocell = COALESCE(excluded.geocell, drivers.geocell),
+            registered_at = COALESCE(drivers.registered_at, excluded.registered_at),
+            updated_at = excluded.updated_at
+    """
+    _DRIVER_COLUMNS = ("id", "license_number", "plate", "vehicle_type", "vin", "make", "model", "capacity",
+                       "rating", "is_verified", "is_active", "lat", "lon", "registered_at")
+
+    def upsert_drivers(self, drivers: Iterable[Dict[str, Any]]) -> int:
+        """
+        Bulk insert/update. Each dict needs an id; other columns are optional.
+        Drivers without a location yet (just registered) keep lat/lon NULL.
+        """
+        now = time.time()
+        return self.executemany(self._UPSERT_DRIVER, (
+            (d["id"], d.get("license_number"), d.get("plate"), d.get("vehicle_type"), d.get("vin"), d.get("make"),
+             d.get("model"), d.get("capacity", 0.0), d.get("rating", 0.0), bool(d.get("is_verified", False)),
+             bool(d.get("is_active", False)), d.get("lat"), d.get("lon"),
+             geocell(d["lat"], d["lon"]) if d.get("lat") is not None else None,
+             d.get("registered_at"), d.get("updated_at", now))
+            for d in drivers
+        ))
+
+    def drivers_by_license(self, license_numbers: Sequence[str]) -> List[Dict[str, Any]]:
+        """Drivers with any of these licence numbers (registration de-duplication)."""
+        if not license_numbers:
+            return []
+        rows = self.execute(
+            f"SELECT {', '.join(self._DRIVER_COLUMNS)} FROM drivers "
+            f"WHERE license_number IN ({','.join('?' * len(license_numbers))})",
+            tuple(license_numbers),
+        )
+        return [dict(zip(self._DRIVER_COLUMNS, row)) for row in rows]
+
+    def driver(self, driver_id: int) -> Optional[Dict[str, Any]]:
+        rows = self.execute(f"SELECT {', '.join(self._DRIVER_COLUMNS)} FROM drivers WHERE id = ?", (driver_id,))
+        return dict(zip(self._DRIVER_COLUMNS, rows[0])) if rows else None
+
+    def next_driver_id(self) -> int:
+        """First unused driver id, so new registrations never reuse an id after a restart."""
+        return int(self.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM drivers")[0][0])
+
+    def count_drivers(self) -> int:
+        return int(self.execute("SELECT COUNT(*) FROM drivers")[0][0])
+
+    def update_driver_locations(self, pings: Iterable[Any]) -> int:
+        """Bulk location/online update from LocationPing-like objects (one statement per flush)."""
+        now = time.time()
+        return self.executemany(
+            "UPDATE drivers SET lat = ?, lon = ?, geocell = ?, is_active = COALESCE(?, is_active), updated_at = ? "
+            "WHERE id = ?",
+            ((p.lat, p.lon, geocell(p.lat, p.lon), p.is_active, p.timestamp or now, p.driver_id) for p in pings),
+        )
+
+    def active_drivers_near(self, lat: float, lon: float, radius_km: float = 5.0,
+                            min_capacity: float = 0.0) -> List[Dict[str, Any]]:
+        """Online, verified drivers in the cells around a point (served by idx_drivers_active_geocell)."""
+        cells = geocells_around(lat, lon, radius_km)
+        rows = self.execute(
+            f"SELECT id, lat, lon, capacity, rating FROM drivers "
+            f"WHERE is_active AND is_verified AND geocell IN ({','.join('?' * len(cells))}) AND capacity >= ?",
+            (*cells, min_capacity),
+        )
+        return [{"id": r[0], "lat": r[1], "lon": r[2], "capacity": r[3], "rating": r[4]} for r in rows]
+
+    def active_drivers(self) -> List[Dict[str, Any]]:
+        rows = self.execute("SELECT id, lat, lon, capacity, rating FROM drivers WHERE is_active AND is_verified")
+        return [{"id": r[0], "lat": r[1], "lon": r[2], "capacity": r[3], "rating": r[4]} for r in rows]
+
+    def verified_drivers(self, driver_ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """Verified drivers among `driver_ids`, online or not (drivers first seen after the cold start)."""
+        if not driver_ids:
+            return []
+        rows = self.execute(
+            f"SELECT id, lat, lon, capacity, rating, is_active FROM drivers "
+            f"WHERE is_verified AND id IN ({','.join('?' * len(driver_ids))})",
+            tuple(driver_ids),
+        )
+        return [{"id": r[0], "lat": r[1], "lon": r[2], "capacity": r[3], "rating": r[4], "is_active": bool(r[5])}
+                for r in rows]
+
+    def count_active_drivers(self) -> int:
+        return int(self.execute("SELECT COUNT(*) FROM drivers WHERE is_active AND is_verified")[0][0])
+
+    # --- Jobs ---
+
+    _JOB_COLUMNS = ("id", "client_id", "status", "pickup_lat", "pickup_lon", "dropoff_lat", "dropoff_lon",
+                    "required_capacity", "base_price_cents", "is_express", "driver_id", "created_at", "updated_at")
+
+    _INSERT_JOB_EVENT = ("INSERT INTO job_events (job_id, kind, status, driver_id, recorded_at) "
+                         "VALUES (?, ?, ?, ?, ?)")
+
+    def insert_jobs(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """Bulk insert; each job also gets its 'created' row in job_events (same transaction)."""
+        now = time.time()
+        placeholders = ", ".join("?" * len(self._JOB_COLUMNS))
+        insert_job = self._sql(f"INSERT INTO jobs ({', '.join(self._JOB_COLUMNS)}) VALUES ({placeholders})")
+        insert_event = self._sql(self._INSERT_JOB_EVENT)
+
+        def write(cursor, chunk):
+            cursor.executemany(insert_job, chunk)
+            cursor.executemany(insert_event, [(row[0], "created", row[2], row[10], now) for row in chunk])
+
+        return self._write_chunks(
+            ((j["id"], j["client_id"], j["status"], j["pickup_lat"], j["pickup_lon"], j["dropoff_lat"],
+              j["dropoff_lon"], j.get("required_capacity", 0.0), j["base_price_cents"], bool(j.get("is_express")),
+              j.get("driver_id"), j.get("created_at", now), j.get("updated_at", j.get("created_at", now)))
+             for j in jobs),
+            write,
+        )
+
+    def update_job_status(self, job_id: int, status: str, driver_id: Optional[int] = None):
+        self.update_jobs_status([(job_id, status, driver_id)])
+
+    def update_jobs_status(self, rows: Iterable[Tuple[int, str, Optional[int]]]) -> int:
+        """
+        Bulk status change from (job_id, status, driver_id); a None driver_id
+        keeps the current one. Each change is also appended to job_events.
+        """
+        now = time.time()
+        update_job = self._sql("UPDATE jobs SET status = ?, driver_id = COALESCE(?, driver_id), updated_at = ? "
+                               "WHERE id = ?")
+        # Events only for jobs that exist (the Dispatcher also matches jobs the Client API never stored)
+        insert_event = self._sql("INSERT INTO job_events (job_id, kind, status, driver_id, recorded_at) "
+                                 "SELECT id, 'status', ?, ?, ? FROM jobs WHERE id = ?")
+
+        def write(cursor, chunk):
+            changes = [(status, driver_id, now, job_id) for job_id, status, driver_id in chunk]
+            cursor.executemany(update_job, changes)
+            cursor.executemany(insert_event, changes)
+
+        return self._write_chunks(rows, write)
+
+    def job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        rows = self.execute(f"SELECT {', '.join(self._JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+        return dict(zip(self._JOB_COLUMNS, rows[0])) if rows else None
+
+    def next_job_id(self) -> int:
+        """First unused job id, so job numbering carries on across restarts."""
+        return int(self.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM jobs")[0][0])
+
+    def reserve_job_ids(self, count: int) -> int:
+        """
+        Reserves `count` consecutive job ids for the caller and returns the first.
+        The counter row is locked by the UPDATE until commit, so concurrent
+        processes always get disjoint blocks; it starts after the largest stored id.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            # "WHERE TRUE": SQLite needs it to parse ON CONFLICT after INSERT ... SELECT
+            cursor.execute(self._sql("INSERT INTO id_blocks (name, next_id) SELECT 'jobs', COALESCE(MAX(id), 0) + 1 "
+                                     "FROM jobs WHERE TRUE ON CONFLICT (name) DO NOTHING"))
+            cursor.execute(self._sql("UPDATE id_blocks SET next_id = next_id + ? WHERE name = 'jobs'"), (count,))
+            cursor.execute(self._sql("SELECT next_id FROM id_blocks WHERE name = 'jobs'"))
+            return int(cursor.fetchone()[0]) - count
+
+    def job_events_since(self, after_id: int, created_since: float = 0.0) -> List[Tuple[Any, ...]]:
+        """
+        (event_id, kind, job_id, status, pickup_lat, pickup_lon, job created_at)
+        for job_events rows with id > `after_id`, in id order, limited to jobs
+        created at or after `created_since`.
+        """
+        return [tuple(row) for row in self.execute(
+            "SELECT e.id, e.kind, e.job_id, e.status, j.pickup_lat, j.pickup_lon, j.created_at "
+            "FROM job_events e JOIN jobs j ON j.id = e.job_id "
+            "WHERE e.id > ? AND j.created_at >= ? ORDER BY e.id", (after_id, created_since))]
+
+    def jobs_by_status(self, status: str, since: float = 0.0, limit: int = 100,
+                       newest_first: bool = False) -> List[Dict[str, Any]]:
+        """Served by idx_jobs_status_created (equality on status, range + order on created_at)."""
+        order = "DESC" if newest_first else "ASC"
+        rows = self.execute(
+            f"SELECT {', '.join(self._JOB_COLUMNS)} FROM jobs WHERE status = ? AND created_at >= ? "
+            f"ORDER BY created_at {order} LIMIT ?",
+            (status, since, limit),
+        )
+        return [dict(zip(self._JOB_COLUMNS, row)) for row in rows]
+
+    def count_jobs_by_status(self, since: float = 0.0) -> Dict[str, int]:
+        rows = self.execute("SELECT status, COUNT(*) FROM jobs WHERE created_at >= ? GROUP BY status", (since,))
+        return {status: count for status, count in rows}
+
+    # --- Transactions ---
+
+    def record_transactions(self, rows: Iterable[Tuple[int, Optional[int], str, int, Optional[str], float]]) -> int:
+        """Bulk insert of (driver_id, job_id, kind, amount_cents, reference, created_at)."""
+        return self.executemany(
+            "INSERT INTO transactions (driver_id, job_id, kind, amount_cents, reference, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def has_transactions(self, reference: str, kind: str) -> bool:
+        """Whether rows of `kind` were already booked under `reference` (e.g. a settlement run)."""
+        return bool(self.execute("SELECT 1 FROM transactions WHERE reference = ? AND kind = ? LIMIT 1",
+                                 (reference, kind)))
+
+    def driver_transactions(self, driver_id: int, start: float, end: float) -> List[Dict[str, Any]]:
+        """One driver's statement between two timestamps (idx_transactions_driver_created)."""
+        rows = self.execute(
+            "SELECT id, job_id, kind, amount_cents, reference, created_at FROM transactions "
+            "WHERE driver_id = ? AND created_at >= ? AND created_at < ? ORDER BY created_at",
+            (driver_id, start, end),
+        )
+        return [dict(zip(("id", "job_id", "kind", "amount_cents", "reference", "created_at"), r)) for r in rows]
+
+    def driver_balance(self, driver_id: int, start: float, end: float) -> Dict[str, int]:
+        rows = self.execute(
+            "SELECT kind, SUM(amount_cents) FROM transactions "
+            "WHERE driver_id = ? AND created_at >= ? AND created_at < ? GROUP BY kind",
+            (driver_id, start, end),
+        )
+        return {kind: int(total) for kind, total in rows}
+
+    def revenue_between(self, start: float, end: float, kind: str = "platform_fee") -> int:
+        rows = self.execute(
+            "SELECT COALESCE(SUM(amount_cents), 0) FROM transactions "
+            "WHERE created_at >= ? AND created_at < ? AND kind = ?",
+            (start, end, kind),
+        )
+        return int(rows[0][0])
+
+    # --- Bot missions ---
+
+    def record_mission(self, mission: str, bot: str, approved_cents: int, region: Optional[str] = None,
+                       status: str = "APPROVED") -> None:
+        self.execute(
+            "INSERT INTO bot_missions (mission, bot, region, approved_cents, revenue_cents, status, created_at) "
+            "VALUES (?, ?, ?, ?, 0, ?, ?)",
+            (mission, bot, region, approved_cents, status, time.time()),
+        )
+
+    def mission_totals(self, since: float = 0.0) -> Dict[str, int]:
+        rows = self.execute(
+            "SELECT COALESCE(SUM(approved_cents), 0), COALESCE(SUM(revenue_cents), 0) FROM bot_missions "
+            "WHERE created_at >= ?",
+            (since,),
+        )
+        return {"approved_cents": int(rows[0][0]), "revenue_cents": int(rows[0][1])}
+
+
+_open_storages: Dict[str, Storage] = {}
+_open_lock = threading.Lock()
+
+
+def open_storage(url: Optional[str]) -> Optional[Storage]:
+    """
+    Storage from a settings value (settings.DATABASE_URL), with the schema
+    created if missing. None/empty means no shared DB. Services in one
+    process asking for the same URL share one Storage.
+    """
+    if not url:
+        return None
+    with _open_lock:
+        if url not in _open_storages:
+            storage = Storage(url)
+            storage.init_schema()
+            _open_storages[url] = storage
+        return _open_storages[url]
@@ -0,0 +1,7 @@
+# bots/dispatcher_bot/__init__.py
+"""Dispatcher Bot: matches delivery jobs to nearby trucks. `python -m bots.dispatcher_bot` (serves the API)."""
+
+from bots.common.lazy import lazy_exports
+
+__all__ = ["Dispatcher"]
+__getattr__, __dir__ = lazy_exports(__name__, {"Dispatcher": "dispatcher"})
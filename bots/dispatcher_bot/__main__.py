@@ -0,0 +1,9 @@
+# bots/dispatcher_bot/__main__.py
+
+import sys
+
+from bots.common.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main("python -m bots.dispatcher_bot", "bots.dispatcher_bot.dispatcher",
+                  app="bots.dispatcher_bot.api:app", url_setting="DISPATCHER_URL", single_process=True))
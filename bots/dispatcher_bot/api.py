@@ -0,0 +1,205 @@
+# bots/dispatcher_bot/api.py
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel
+
+from bots.common.config import settings
+from bots.common.event_bus import DRIVER_LOCATIONS, JOB_SUBMITTED, Event, open_event_bus, publish_hook, serve
+from bots.common.instrumentation import configure_from_settings, instrument_app
+from bots.common.storage import open_storage
+from bots.dispatcher_bot.assignment import BatchAssigner
+from bots.dispatcher_bot.dispatcher import Dispatcher, build_routing_provider
+from bots.dispatcher_bot.ingestion import LocationIngestor
+from bots.dispatcher_bot.models import DeliveryJob, DriverStatus, LocationPing
+
+# With settings.EVENT_BUS_URL set, pings and match requests also arrive over the event bus, and match and
+# delivery events are published for Governance's KPIs
+event_bus = open_event_bus(getattr(settings, "EVENT_BUS_URL", None))
+# With settings.DATABASE_URL set, the fleet is loaded from and drivers/match outcomes written to the shared DB;
+# settings.ROUTING_BACKEND picks the routing provider
+dispatcher = Dispatcher(routing=build_routing_provider(),
+                        event_hook=publish_hook(event_bus) if event_bus is not None else None,
+                        storage=open_storage(getattr(settings, "DATABASE_URL", None)))
+# Match requests arriving within one window compete in a single global assignment (settings.ASSIGNMENT_*)
+assigner = BatchAssigner(dispatcher, window_seconds=getattr(settings, "ASSIGNMENT_WINDOW_SECONDS", 1.0),
+                         candidates_per_job=getattr(settings, "ASSIGNMENT_CANDIDATES", 8))
+# Pings are coalesced per driver and applied to the live fleet in one batch per interval
+ingestor = LocationIngestor(dispatcher.apply_locations, flush_interval=0.5)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ingestor.start()
+    assigner.start()
+    if event_bus is not None:
+        await event_bus.start()
+    yield
+    if event_bus is not None:
+        await event_bus.stop()
+    assigner.stop()
+    ingestor.stop()
+
+
+app = FastAPI(title="PickupLink Dispatcher Bot", lifespan=lifespan)
+# Request metrics and GET /metrics; settings.PROFILER_ENABLED adds the /debug/profiler endpoints
+instrument_app(app, "dispatcher", profiler_enabled=configure_from_settings(settings))
+
+
+class LocationUpdate(BaseModel):
+    driver_id: int
+    lat: float
+    lon: float
+    is_active: Optional[bool] = None
+    timestamp: float = 0.0
+
+
+class LocationBatch(BaseModel):
+    pings: List[LocationUpdate]
+
+
+class DriverUpsert(BaseModel):
+    """A registered driver's matching details (Driver App after verification, or ops tooling)."""
+    driver_id: int
+    lat: float
+    lon: float
+    capacity: float
+    rating: float = 5.0
+    is_verified: bool = True
+    is_active: bool = False
+
+
+class MatchRequest(BaseModel):
+    pickup_coords: tuple
+    dropoff_coords: tuple
+    required_capacity: float
+    is_express: bool = False
+    client_id: int
+    base_price: float
+    job_id: int = 0
+    # Multi-stop only: optional windows in epoch seconds
+    pickup_window: Optional[Tuple[float, float]] = None
+    dropoff_deadline: Optional[float] = None
+
+
+def _to_ping(update: LocationUpdate) -> LocationPing:
+    return LocationPing(driver_id=update.driver_id, lat=update.lat, lon=update.lon,
+                        is_active=update.is_active, timestamp=update.timestamp)
+
+
+def _to_job(request: MatchRequest) -> DeliveryJob:
+    return DeliveryJob(
+        id=request.job_id,
+        pickup_location=tuple(request.pickup_coords),
+        dropoff_location=tuple(request.dropoff_coords),
+        base_price=request.base_price,
+        required_capacity=request.required_capacity,
+        is_express=request.is_express,
+        pickup_window=tuple(request.pickup_window) if request.pickup_window else None,
+        dropoff_deadline=request.dropoff_deadline,
+    )
+
+
+@app.post("/update_location")
+def update_location(update: LocationUpdate):
+    """Accepts a single driver ping (buffered, applied on the next flush)."""
+    ingestor.submit(_to_ping(update))
+    return {"status": "ACCEPTED"}
+
+
+@app.post("/update_locations")
+def update_locations(batch: LocationBatch):
+    """Accepts a batch of driver pings in one request."""
+    ingestor.submit_batch([_to_ping(update) for update in batch.pings])
+    return {"status": "ACCEPTED", "accepted": len(batch.pings)}
+
+
+@app.post("/drivers")
+def upsert_drivers(drivers: List[DriverUpsert]):
+    """Adds or refreshes drivers in the shared DB and the live fleet; pings only move drivers known here."""
+    dispatcher.add_drivers([DriverStatus(id=driver.driver_id, location=(driver.lat, driver.lon),
+                                         capacity=driver.capacity, rating=driver.rating,
+                                         is_verified=driver.is_verified, is_active=driver.is_active)
+                            for driver in drivers])
+    return {"status": "ACCEPTED", "drivers": len(drivers)}
+
+
+@app.post("/match_job")
+async def match_job(request: MatchRequest):
+    """Waits up to one assignment window for the job's match."""
+    return await asyncio.wrap_future(assigner.submit(_to_job(request)))
+
+
+@app.post("/match_jobs")
+async def match_jobs(requests: List[MatchRequest]):
+    futures = assigner.submit_many([_to_job(request) for request in requests])
+    return await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+
+
+@app.post("/match_job_multi_stop")
+def match_job_multi_stop(request: MatchRequest):
+    """Adds the job to a nearby driver's multi-stop plan (trucks with spare capacity take several loads)."""
+    return dispatcher.assign_multi_stop(_to_job(request))
+
+
+@app.get("/plans/{driver_id}")
+def driver_plan(driver_id: int):
+    plan = dispatcher.plans.get(driver_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="No active plan for this driver")
+    return plan.to_dict()
+
+
+@app.post("/plans/{driver_id}/complete_stop")
+def complete_stop(driver_id: int):
+    """Driver App: the next stop of the plan is done."""
+    result = dispatcher.complete_stop(driver_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No active plan for this driver")
+    return result
+
+
+class DeliveryReport(BaseModel):
+    driver_id: int
+    delivered: bool = True
+
+
+@app.post("/jobs/{job_id}/delivery")
+def report_delivery(job_id: int, report: DeliveryReport):
+    """Driver App: a single-job match was dropped off (or abandoned); multi-stop plans use complete_stop."""
+    dispatcher.record_delivery(job_id, report.driver_id, report.delivered)
+    return {"status": "RECORDED", "job_id": job_id}
+
+
+@app.get("/fleet/supply")
+def fleet_supply(cell_deg: float = Query(0.05, gt=0)):
+    """Online driver counts per grid cell (feeds the Client API's surge pricing)."""
+    cells = dispatcher.supply_by_cell(cell_deg)
+    return {"cell_deg": cell_deg, "cells": [[i, j, count] for (i, j), count in cells.items()]}
+
+
+def _match_requests(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Bus match requests join the current assignment window (this runs on a worker thread, so it may block)."""
+    futures = assigner.submit_many([_to_job(MatchRequest(**payload)) for payload in payloads])
+    return [future.result() for future in futures]
+
+
+async def _on_location_batches(events: List[Event]):
+    for event in events:
+        ingestor.submit_batch([_to_ping(LocationUpdate(**ping)) for ping in event.payload["pings"]])
+
+
+if event_bus is not None:
+    event_bus.subscribe(DRIVER_LOCATIONS, "dispatcher", _on_location_batches, batch_size=50)
+    # A full batch fills the assigner's window, which then flushes without waiting it out
+    serve(event_bus, JOB_SUBMITTED, "dispatcher", _match_requests, batch_size=assigner.max_batch_size)
+
+
+@app.get("/fleet/stats")
+def fleet_stats():
+    return {"drivers_tracked": len(dispatcher.driver_index), "ingestion": ingestor.stats(),
+            "route_cache": dispatcher.route_cache.stats(),
+            "event_bus": event_bus.stats() if event_bus is not None else None}
@@ -0,0 +1,186 @@
+# bots/dispatcher_bot/assignment.py
+
+import heapq
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bots.dispatcher_bot.models import DeliveryJob
+
+# Candidate edges for one job: (column, cost). Columns are drivers or dummy slots.
+Edges = Sequence[Tuple[int, float]]
+
+
+def min_cost_assignment(edges: Sequence[Edges], num_columns: int) -> List[int]:
+    """
+    Min-cost bipartite assignment on a sparse candidate graph.
+
+    `edges[row]` lists the (column, cost) pairs row may take; costs must be
+    non-negative and each column is used at most once. Returns the chosen column
+    per row, or -1 for rows that cannot reach a free column.
+
+    Successive shortest augmenting paths (Hungarian method) with Dijkstra over
+    reduced costs, so each augmentation only explores the jobs and drivers that
+    actually compete for the same trucks.
+    """
+    row_match = [-1] * len(edges)
+    column_owner = [-1] * num_columns
+    row_potential = [0.0] * len(edges)
+    column_potential = [0.0] * num_columns
+
+    for source in range(len(edges)):
+        row_dist: Dict[int, float] = {source: 0.0}
+        column_dist: Dict[int, float] = {}
+        column_pred: Dict[int, int] = {}
+        finalized_columns: List[int] = []
+        done = set()
+        heap: List[Tuple[float, int]] = []
+
+        def relax(row: int):
+            base = row_dist[row] - row_potential[row]
+            for column, cost in edges[row]:
+                if column in done:
+                    continue  # Guards against float drift re-opening finalized columns
+                candidate = base + cost - column_potential[column]
+                if candidate < column_dist.get(column, float('inf')):
+                    column_dist[column] = candidate
+                    column_pred[column] = row
+                    heapq.heappush(heap, (candidate, column))
+
+        relax(source)
+        target = -1
+        while heap:
+            dist, column = heapq.heappop(heap)
+            if column in done or dist > column_dist[column]:
+                continue
+            done.add(column)
+            finalized_columns.append(column)
+            owner = column_owner[column]
+            if owner == -1:
+                target = column
+                break
+            row_dist[owner] = dist
+            relax(owner)
+
+        if target == -1:
+            continue  # No free column reachable; leave this row unassigned
+
+        shortest = column_dist[target]
+        for row, dist in row_dist.items():
+            if dist < shortest:
+                row_potential[row] += shortest - dist
+        for column in finalized_columns:
+            if column_dist[column] < shortest:
+                column_potential[column] -= shortest - column_dist[column]
+
+        column = target
+        while True:
+            row = column_pred[column]
+            previous = row_match[row]
+            row_match[row] = column
+            column_owner[column] = row
+            if row == source:
+                break
+            column = previous
+
+    return row_match
+
+
+class BatchAssigner:
+    """
+    Collects incoming jobs over a short window and assigns them together with
+    `Dispatcher.assign_jobs`, so jobs arriving close together never claim the
+    same truck.
+
+    `window_seconds` is the latency/quality knob: a longer window lets more jobs
+    compete in one global assignment (fewer total empty miles) at the cost of
+    each job waiting up to that long for its match. `window_seconds=0` matches
+    each job as soon as it arrives. A batch is also flushed early once it
+    reaches `max_batch_size` jobs. `candidates_per_job` is passed on to
+    `assign_jobs` (more candidates, better assignments, slower solve).
+    """
+
+    def __init__(self, dispatcher, window_seconds: float = 2.0, max_batch_size: int = 500,
+                 candidates_per_job: int = 8):
+        if window_seconds < 0:
+            raise ValueError("window_seconds must be >= 0")
+        if candidates_per_job < 1:
+            raise ValueError("candidates_per_job must be >= 1")
+        self.dispatcher = dispatcher
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.candidates_per_job = candidates_per_job
+        self._pending: List[Tuple[DeliveryJob, Future]] = []
+        self._window_deadline: Optional[float] = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, job: DeliveryJob) -> Future:
+        """Queues a job for the current window; the Future resolves to its match result."""
+        return self.submit_many([job])[0]
+
+    def submit_many(self, jobs: List[DeliveryJob]) -> List[Future]:
+        """Queues jobs into the same window (one batch request); one Future per job, in order."""
+        futures: List[Future] = [Future() for _ in jobs]
+        with self._condition:
+            if not self._pending and jobs:
+                self._window_deadline = time.monotonic() + self.window_seconds
+            self._pending.extend(zip(jobs, futures))
+            self._condition.notify()
+        return futures
+
+    def flush(self) -> int:
+        """Assigns every pending job now. Returns the number of jobs assigned."""
+        with self._condition:
+            batch, self._pending = self._pending, []
+            self._window_deadline = None
+        if not batch:
+            return 0
+        try:
+            results = self.dispatcher.assign_jobs([job for job, _ in batch], self.candidates_per_job)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return 0
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        return len(batch)
+
+    def start(self):
+        """Runs the window loop on a background thread."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="batch-assigner", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the window loop and assigns whatever is still pending."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._window_due():
+                    timeout = None
+                    if self._window_deadline is not None:
+                        timeout = max(0.0, self._window_deadline - time.monotonic())
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+            self.flush()
+
+    def _window_due(self) -> bool:
+        if not self._pending:
+            return False
+        return (len(self._pending) >= self.max_batch_size
+                or time.monotonic() >= self._window_deadline)
@@ -1,25 +1,154 @@
 # bots/dispatcher_bot/dispatcher.py
 
-import requests
 import json
-from settings import ORS_API_KEY # Assuming settings.py is correctly imported
-from bots.dispatcher_bot.models import DeliveryJob, DriverStatus, Route
-from typing import List, Optional, Tuple, Dict, Any
+import logging
+import threading
+import numpy as np
+from bots.dispatcher_bot.assignment import min_cost_assignment
+from bots.dispatcher_bot.fleet_store import FleetStore
+from bots.dispatcher_bot.geo import cosine_to_km, haversine_km, unit_vectors
+from bots.dispatcher_bot.models import DeliveryJob, DriverStatus, LocationPing, Route
+from bots.dispatcher_bot.route_cache import CachedRouting, RouteCache
+from bots.dispatcher_bot.route_planner import DROPOFF, RoutePlan, RoutePlanner
+from bots.dispatcher_bot.routing import HaversineRouting, ORSRouting, RoadGraphRouting, RoutingProvider
+from bots.dispatcher_bot.spatial_index import DriverSpatialIndex
+from bots.common.config import settings
+from bots.common.instrumentation import counter, get_logger, log_event, timed
+from bots.common.storage import Storage
+from typing import Callable, List, Optional, Tuple, Dict, Any
+
+# Settings (ORS_API_KEY etc.) come from bots.common.config: the 'settings.py' module from
+# infrastructure/config on the path, or PICKUPLINK_<NAME> environment variables.
+
+MAX_MATRIX_CELLS = 4_000_000  # Upper bound on jobs x drivers entries computed at once (~32 MB)
+UNASSIGNED_PENALTY_KM = 1000.0  # Cost of leaving a job unmatched in a global assignment
+
+log = get_logger("dispatcher")
+MATCH_OUTCOMES = counter("dispatcher_matches_total", "Match attempts by outcome", ("outcome",))
+ROUTING_FAILURES = counter("dispatcher_routing_failures_total", "Routing backend errors (fallback route used)")
+
+
+def build_routing_provider(backend: Optional[str] = None, osm_path: Optional[str] = None) -> RoutingProvider:
+    """
+    Routing backend by name: 'haversine' (straight line, default), 'ors'
+    (OpenRouteService, uses ORS_API_KEY) or 'road_graph' (offline, needs an OSM extract).
+    Both arguments default to settings.ROUTING_BACKEND / ROUTING_OSM_PATH.
+    """
+    backend = backend or getattr(settings, "ROUTING_BACKEND", "haversine")
+    osm_path = osm_path or getattr(settings, "ROUTING_OSM_PATH", None)
+    if backend == "haversine":
+        return HaversineRouting()
+    if backend == "ors":
+        return ORSRouting(api_key=settings.ORS_API_KEY)
+    if backend == "road_graph":
+        if not osm_path:
+            raise ValueError("road_graph routing needs osm_path (an .osm XML extract)")
+        return RoadGraphRouting.from_osm_xml(osm_path)
+    raise ValueError(f"Unknown routing backend: {backend}")
 
-# NOTE: For this script to run, you must ensure 'settings.py' (from infrastructure/config)
-# is accessible, likely by configuring Python's path or by running the bot as a microservice.
 
 class Dispatcher:
-    def __init__(self):
-        self.ors_base_url = "https://api.openrouteservice.org/v2/directions"
-        print("Dispatcher Bot initialized. Matching algorithm ready.")
+    def __init__(self, candidate_pool_size: int = 5, routing: Optional[RoutingProvider] = None,
+                 route_cache: Optional[RouteCache] = None,
+                 event_hook: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 warm_from_db: bool = True, storage: Optional[Storage] = None):
+        # Every route goes through the cache first, whichever backend is configured
+        self.route_cache = route_cache if route_cache is not None else RouteCache()
+        self.routing = CachedRouting(routing or HaversineRouting(), self.route_cache)
+        # The live fleet, as contiguous columns (vectorized batch scans); the only copy of driver state
+        self.fleet = FleetStore()
+        # Grid of driver ids over the fleet's locations; only the nearest `candidate_pool_size`
+        # eligible drivers around a pickup are routed, regardless of fleet size.
+        self.driver_index = DriverSpatialIndex(self.fleet)
+        self.fleet_lock = threading.RLock()  # Location ingestion and matching run on different threads
+        self.candidate_pool_size = candidate_pool_size
+        # Receives match/delivery events, e.g. GovernanceBot's KPIEngine.handle
+        self.event_hook = event_hook
+        # Region shards are fed their drivers explicitly and must not load the DB fleet
+        self.warm_from_db = warm_from_db
+        self._fleet_loaded = False  # Set once the DB fleet has been merged in, however many drivers are known
+        # Shared DB: cold-start source and sink for location batches and registered
+        # drivers; match outcomes are written back to the jobs table
+        self.storage = storage
+        # Multi-stop plans of drivers carrying several jobs, keyed by driver id
+        self.route_planner = RoutePlanner(self.routing)
+        self.plans: Dict[int, RoutePlan] = {}
+        log_event(log, logging.INFO, "dispatcher_initialized", routing=self.routing.name)
+
+    def update_driver(self, driver: DriverStatus):
+        """Adds or refreshes a driver in the live index used for matching."""
+        with self.fleet_lock:
+            self.fleet.upsert_driver(driver)
+            self.driver_index.place(driver.id)
+
+    def add_drivers(self, drivers: List[DriverStatus]):
+        """Registers drivers: written to the drivers table (when there is one), then added to the live fleet."""
+        if self.storage is not None:
+            self.storage.upsert_drivers({"id": driver.id, "lat": driver.location[0], "lon": driver.location[1],
+                                         "capacity": driver.capacity, "rating": driver.rating,
+                                         "is_verified": driver.is_verified, "is_active": driver.is_active}
+                                        for driver in drivers)
+        for driver in drivers:
+            self.update_driver(driver)
+
+    def remove_driver(self, driver_id: int) -> Optional[DriverStatus]:
+        """Drops a driver from the live fleet (e.g. handed to another shard). Returns its last state."""
+        with self.fleet_lock:
+            driver = self.fleet.driver(driver_id)
+            self.driver_index.remove(driver_id)
+            self.fleet.remove(driver_id)
+        return driver
+
+    def apply_locations(self, pings: List[LocationPing]) -> int:
+        """
+        Applies a coalesced batch of location pings to the live fleet. Pings only
+        move known drivers: the DB fleet is loaded first, and a driver first seen
+        later is looked up in the drivers table (verified drivers only). Pings of
+        drivers the Dispatcher has no record of are dropped until the driver is
+        added (update_driver / POST /drivers). Returns the number of pings dropped.
+        """
+        if not pings:
+            return 0
+        self._ensure_driver_index((pings[0].lat, pings[0].lon))
+        with self.fleet_lock:
+            missing = [ping for ping in pings if not self._move(ping)]
+        if missing and self.storage is not None:
+            rows = {row["id"]: row for row in self.storage.verified_drivers([ping.driver_id for ping in missing])}
+            with self.fleet_lock:
+                for ping in missing:
+                    row = rows.get(ping.driver_id)
+                    if row is not None and ping.driver_id not in self.driver_index:
+                        # Placed at the ping: a just-registered driver has no stored location yet
+                        self.update_driver(self._driver_from_row({**row, "lat": ping.lat, "lon": ping.lon}))
+                missing = [ping for ping in missing if not self._move(ping)]
+        if self.storage is not None:
+            # One bulk UPDATE per coalesced batch, outside the fleet lock
+            self.storage.update_driver_locations(pings)
+        return len(missing)
+
+    def _move(self, ping: LocationPing) -> bool:
+        if not self.fleet.update_location(ping.driver_id, ping.lat, ping.lon, ping.is_active):
+            return False
+        return self.driver_index.place(ping.driver_id)
+
+    def supply_by_cell(self, cell_deg: float) -> Dict[Tuple[int, int], int]:
+        """Online, verified drivers per (floor(lat / cell_deg), floor(lon / cell_deg)) cell, for pricing."""
+        with self.fleet_lock:
+            mask = self.fleet.eligible_mask()
+            cells = np.column_stack((np.floor(self.fleet.lat[mask] / cell_deg),
+                                     np.floor(self.fleet.lon[mask] / cell_deg))).astype(np.int64)
+        if not len(cells):
+            return {}
+        unique, counts = np.unique(cells, axis=0, return_counts=True)
+        return {(int(i), int(j)): int(count) for (i, j), count in zip(unique.tolist(), counts.tolist())}
 
+    @timed("dispatcher_db_query_seconds")
     def _simulate_db_query(self, location: Tuple[float, float]) -> List[DriverStatus]:
         """
         Simulates database lookup for active, nearby, and verified TRUCK drivers (F-150, etc.).
         """
         # Phase 1: Charlotte, NC Area (Example Coordinates)
-        print(f"Searching DB for active drivers near {location}...")
+        log_event(log, logging.DEBUG, "driver_db_query", location=location)
         
         return [
             # Driver 1: Closer to Uptown (35.2271, -80.8431)
@@ -28,56 +157,119 @@ class Dispatcher:
             DriverStatus(id=102, location=(35.2900, -80.7500), capacity=180.0, rating=4.5, is_active=True), 
         ]
 
+    @timed("dispatcher_optimize_route_seconds")
     def optimize_route(self, start_loc: Tuple[float, float], end_loc: Tuple[float, float]) -> Route:
         """
-        Uses OpenRouteService (ORS) API (simulated) to calculate distance and duration.
+        Calculates distance and duration through the configured routing provider
+        (straight-line haversine, OpenRouteService or the offline road graph).
         The goal is to minimize the distance from the driver's current location to the pickup point (empty miles).
         """
-        print("Calculating route via ORS API...")
-        
-        # --- ORS API Call Simulation (Replace with actual request in live system) ---
-        
         try:
-            # Format: longitude,latitude
-            start_str = f"{start_loc[1]},{start_loc[0]}"
-            end_str = f"{end_loc[1]},{end_loc[0]}"
-            
-            # Simulated calculation based on a simple distance metric for demo
-            
-            # Haversine distance calculation (simple approximation)
-            import math
-            R = 6371 # Earth radius in km
-            d_lat = math.radians(end_loc[0] - start_loc[0])
-            d_lon = math.radians(end_loc[1] - start_loc[1])
-            a = (math.sin(d_lat / 2) * math.sin(d_lat / 2) +
-                 math.cos(math.radians(start_loc[0])) * math.cos(math.radians(end_loc[0])) * math.sin(d_lon / 2) * math.sin(d_lon / 2))
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-            distance_km = R * c
-            
-            # Simple duration estimation (e.g., 60 km/h average speed)
-            duration_minutes = (distance_km / 60.0) * 60.0
-            
-            return Route(distance_km=distance_km, duration_minutes=duration_minutes)
+            return self.routing.route(start_loc, end_loc)
 
         except Exception as e:
-            # Fallback if external API fails
-            print(f"Warning: ORS simulation failed. Using default fallback. Error: {e}")
+            # Fallback if the routing backend fails (e.g. ORS timeout or rate limit)
+            ROUTING_FAILURES.inc()
+            log_event(log, logging.WARNING, "routing_failed", backend=self.routing.name, error=str(e))
             return Route(distance_km=10.0, duration_minutes=15.0)
 
+    def _ensure_driver_index(self, location: Tuple[float, float]):
+        """
+        Cold start: merges the driver DB into the live index, once. Drivers already
+        known (added or moved before the first load) keep their live state.
+        """
+        if self._fleet_loaded or not self.warm_from_db:
+            return
+        with self.fleet_lock:
+            if self._fleet_loaded:
+                return
+            for driver in self._load_drivers(location):
+                if driver.id not in self.driver_index:
+                    self.update_driver(driver)
+            self._fleet_loaded = True
+
+    def _load_drivers(self, location: Tuple[float, float]) -> List[DriverStatus]:
+        if self.storage is None:
+            return self._simulate_db_query(location)
+        return [self._driver_from_row(row) for row in self.storage.active_drivers()]
+
+    @staticmethod
+    def _driver_from_row(row: Dict[str, Any]) -> DriverStatus:
+        return DriverStatus(id=row["id"], location=(row["lat"], row["lon"]), capacity=row["capacity"],
+                            rating=row["rating"], is_verified=True, is_active=row.get("is_active", True))
+
+    def _emit(self, event_type: str, payload: Dict[str, Any]):
+        if self.event_hook is None:
+            return
+        try:
+            self.event_hook(event_type, payload)
+        except Exception as e:
+            # Metrics must never break matching
+            log_event(log, logging.WARNING, "event_hook_failed", event_type=event_type, error=str(e))
+
+    def _record_match(self, job: DeliveryJob, result: Dict[str, Any], persist: bool = True) -> Dict[str, Any]:
+        """
+        Emits the match outcome (with empty vs loaded km) and passes the result
+        through. Batch paths pass persist=False and write all outcomes at once.
+        """
+        MATCH_OUTCOMES.labels(result["status"]).inc()
+        if self.event_hook is not None:
+            if result["status"] == "MATCHED":
+                self._emit("job_matched", {
+                    "job_id": job.id, "driver_id": result["driver_id"],
+                    "empty_km": result["empty_miles_km"],
+                    "loaded_km": haversine_km(job.pickup_location, job.dropoff_location),
+                })
+            else:
+                self._emit("job_unmatched", {"job_id": job.id})
+        if persist:
+            self._persist_outcomes([job], [result])
+        return result
+
+    def _persist_outcomes(self, jobs: List[DeliveryJob], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Writes match outcomes to the jobs table (rows created by the Client API) in one
+        batch. The Dispatcher owns these status changes; the Client API only writes
+        the ones it decides itself (FAILED, CANCELLED).
+        """
+        if self.storage is not None:
+            self.storage.update_jobs_status((job.id, result["status"], result.get("driver_id"))
+                                            for job, result in zip(jobs, results) if job.id)
+        return results
+
+    def record_delivery(self, job_id: int, driver_id: int, delivered: bool):
+        """Reported by the Driver App when a job is dropped off (or abandoned)."""
+        self._emit("delivery_completed" if delivered else "delivery_failed",
+                   {"job_id": job_id, "driver_id": driver_id})
+
+    @staticmethod
+    def _match_result(driver: Optional[DriverStatus], empty_miles: float) -> Dict[str, Any]:
+        """Response payload shared by match_job and match_jobs."""
+        if driver is None:
+            return {"status": "NO_MATCH_FOUND", "message": "No suitable truck found in the area."}
+        return {
+            "driver_id": driver.id,
+            "status": "MATCHED",
+            "empty_miles_km": round(empty_miles, 2)
+        }
 
+    @timed("dispatcher_match_job_seconds")
     def match_job(self, job: DeliveryJob) -> Dict[str, Any]:
         """
         Core AI Matching Algorithm: Finds the driver with the lowest 'Empty Miles'
         that meets capacity requirements.
         """
-        drivers = self._simulate_db_query(job.pickup_location)
+        self._ensure_driver_index(job.pickup_location)
+
+        # Only the nearest eligible (active, verified, enough capacity) drivers are routed
+        with self.fleet_lock:
+            candidates = self.driver_index.nearest(
+                job.pickup_location, self.candidate_pool_size, required_capacity=job.required_capacity
+            )
         best_match: Optional[Tuple[DriverStatus, Route, float]] = None
         min_empty_miles = float('inf')
 
-        for driver in drivers:
-            if not driver.is_active or driver.capacity < job.required_capacity:
-                continue
-
+        for _, driver in candidates:
             # Route from Driver's current location to Pickup point (Empty Miles)
             route_to_pickup = self.optimize_route(driver.location, job.pickup_location)
             
@@ -89,25 +281,168 @@ class Dispatcher:
 
         if best_match:
             driver, route, empty_miles = best_match
-            print(f"\n✅ MATCH FOUND! Driver ID: {driver.id} selected.")
-            print(f"   -> Empty Miles: {empty_miles:.2f} km")
+            log_event(log, logging.DEBUG, "match_found", job_id=job.id, driver_id=driver.id,
+                      empty_km=round(empty_miles, 2))
             
             # Send job alert to driver's app API here
             
-            return {
-                "driver_id": driver.id,
-                "status": "MATCHED",
-                "empty_miles_km": round(empty_miles, 2)
-            }
+            return self._record_match(job, self._match_result(driver, empty_miles))
         
-        return {"status": "NO_MATCH_FOUND", "message": "No suitable truck found in the area."}
+        return self._record_match(job, self._match_result(None, 0.0))
+
+    @timed("dispatcher_assign_multi_stop_seconds")
+    def assign_multi_stop(self, job: DeliveryJob) -> Dict[str, Any]:
+        """
+        Adds the job to the nearby driver whose plan it lengthens least: its
+        pickup and dropoff go into that driver's existing stop sequence (or a
+        new one) under capacity and time-window constraints, instead of needing
+        a free truck. Returns a `match_job`-style result plus the km added.
+        """
+        self._ensure_driver_index(job.pickup_location)
+        with self.fleet_lock:
+            candidates = self.driver_index.nearest(
+                job.pickup_location, self.candidate_pool_size, required_capacity=job.required_capacity
+            )
+            best = None  # (added_km, plan, insertion)
+            for _, driver in candidates:
+                plan = self.plans.get(driver.id)
+                if plan is None:
+                    plan = self.route_planner.new_plan(driver)
+                insertion = plan.find_insertion(job)
+                if insertion is None:
+                    continue
+                if best is None or insertion.added_km < best[0]:
+                    if best is not None:
+                        best[1].discard(best[2])
+                    best = (insertion.added_km, plan, insertion)
+                else:
+                    plan.discard(insertion)
+
+            if best is None:
+                return self._record_match(job, self._match_result(None, 0.0))
+            added_km, plan, insertion = best
+            plan.insert(job, insertion)
+            plan.improve(self.route_planner.improve_passes)
+            self.plans[plan.driver_id] = plan
+            driver = self.fleet.driver(plan.driver_id)
+
+        # Empty km is the leg into this job's pickup in the final sequence
+        stops = plan.schedule()
+        pickup_index = next(i for i, stop in enumerate(stops) if stop["job_id"] == job.id)
+        result = self._match_result(driver, stops[pickup_index]["leg_km"])
+        result.update({"added_km": round(added_km, 2), "stops_planned": len(stops),
+                       "jobs_in_plan": len(plan.jobs)})
+        log_event(log, logging.DEBUG, "multi_stop_assigned", job_id=job.id, driver_id=plan.driver_id,
+                  added_km=round(added_km, 2), stops=len(stops))
+        return self._record_match(job, result)
+
+    def complete_stop(self, driver_id: int) -> Optional[Dict[str, Any]]:
+        """Driver App reports the next planned stop done; a dropoff counts as a delivery."""
+        with self.fleet_lock:
+            plan = self.plans.get(driver_id)
+            stop = plan.complete_next_stop() if plan is not None else None
+            if plan is not None and not plan.stops:
+                del self.plans[driver_id]
+        if stop is None:
+            return None
+        if stop.kind == DROPOFF:
+            self.record_delivery(stop.job_id, driver_id, delivered=True)
+        return {"job_id": stop.job_id, "kind": stop.kind, "stops_remaining": len(plan.stops)}
+
+    @timed("dispatcher_match_jobs_seconds")
+    def match_jobs(self, jobs: List[DeliveryJob]) -> List[Dict[str, Any]]:
+        """
+        Batch matching for partner bursts: scores the jobs x drivers empty-miles
+        matrix in one vectorized pass and returns one `match_job`-style result per
+        job, in input order. Each job independently gets its closest eligible driver.
+        """
+        if not jobs:
+            return []
+        self._ensure_driver_index(jobs[0].pickup_location)
+
+        with self.fleet_lock:
+            # Eligibility is a mask over zero-copy column views; only eligible rows are gathered
+            rows = np.flatnonzero(self.fleet.eligible_mask())
+            driver_vectors = self.fleet.xyz[rows]
+            capacities = self.fleet.capacity[rows]
+            driver_ids = self.fleet.ids[rows]
+        if not len(rows):
+            return self._persist_outcomes(jobs, [self._record_match(job, self._match_result(None, 0.0), persist=False)
+                                                 for job in jobs])
+
+        results: List[Dict[str, Any]] = []
+        # Bound the matrix size so a large burst against a large fleet stays in memory
+        chunk = max(1, MAX_MATRIX_CELLS // len(rows))
+        for offset in range(0, len(jobs), chunk):
+            batch = jobs[offset:offset + chunk]
+            required = np.array([job.required_capacity for job in batch], dtype=np.float64)
+
+            # Cosine of the central angle: larger means closer, so argmax = fewest empty miles.
+            # Cosines lie in [-1, 1]; subtracting 4 pushes under-capacity trucks below any real one.
+            closeness = unit_vectors([job.pickup_location for job in batch]) @ driver_vectors.T
+            closeness -= 4.0 * (capacities[np.newaxis, :] < required[:, np.newaxis])
+            best = np.argmax(closeness, axis=1)
+            best_closeness = closeness[np.arange(len(batch)), best]
+            feasible = best_closeness >= -1.0 - 1e-9
+            empty_miles = cosine_to_km(np.where(feasible, best_closeness, 1.0))
+
+            for job, column, is_feasible, miles in zip(batch, best.tolist(), feasible.tolist(),
+                                                       empty_miles.tolist()):
+                if is_feasible:
+                    result = self._match_result(self.fleet.driver(int(driver_ids[column])), miles)
+                else:
+                    result = self._match_result(None, 0.0)
+                results.append(self._record_match(job, result, persist=False))
+        return self._persist_outcomes(jobs, results)
+
+    def assign_jobs(self, jobs: List[DeliveryJob], candidates_per_job: int = 8) -> List[Dict[str, Any]]:
+        """
+        Global assignment for a batch of pending jobs: each driver takes at most one
+        job and the total empty miles across the batch is minimized, instead of
+        every job greedily claiming its own nearest truck. Candidates are each
+        job's `candidates_per_job` nearest eligible drivers (more candidates, better
+        assignments, slower solve). Returns `match_job`-style results in input order.
+        """
+        if not jobs:
+            return []
+        self._ensure_driver_index(jobs[0].pickup_location)
+
+        drivers: List[DriverStatus] = []
+        column_of: Dict[int, int] = {}
+        edges: List[List[Tuple[int, float]]] = []
+        with self.fleet_lock:
+            for job in jobs:
+                job_edges = []
+                for distance, driver in self.driver_index.nearest(
+                    job.pickup_location, candidates_per_job, required_capacity=job.required_capacity
+                ):
+                    if driver.id not in column_of:
+                        column_of[driver.id] = len(drivers)
+                        drivers.append(driver)
+                    job_edges.append((column_of[driver.id], distance))
+                edges.append(job_edges)
+
+        # A private "unassigned" column per job keeps the problem feasible when
+        # there are more jobs than trucks; leaving a job unmatched costs the penalty.
+        for row, job_edges in enumerate(edges):
+            job_edges.append((len(drivers) + row, UNASSIGNED_PENALTY_KM))
 
+        choice = min_cost_assignment(edges, len(drivers) + len(jobs))
+        costs = [dict(job_edges) for job_edges in edges]
+        results: List[Dict[str, Any]] = []
+        for row, column in enumerate(choice):
+            if 0 <= column < len(drivers):
+                result = self._match_result(drivers[column], costs[row][column])
+            else:
+                result = self._match_result(None, 0.0)
+            results.append(self._record_match(jobs[row], result, persist=False))
+        return self._persist_outcomes(jobs, results)
 
 if __name__ == '__main__':
     # --- Example Execution ---
-    # NOTE: You must have a basic 'settings.py' file available for this to run!
+    # Also: python -m bots.dispatcher_bot run
     
-    dispatcher = Dispatcher()
+    dispatcher = Dispatcher(routing=build_routing_provider())
     
     # Mock Job: Pickup in Uptown Charlotte, req capacity 100 sqft
     job_request = DeliveryJob(
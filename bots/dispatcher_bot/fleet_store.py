@@ -0,0 +1,172 @@
+# bots/dispatcher_bot/fleet_store.py
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+from bots.dispatcher_bot.models import DriverStatus
+
+
+class FleetStore:
+    """
+    Columnar live-fleet table: one contiguous NumPy array per attribute instead
+    of one Python object per driver.
+
+    Rows are addressed through an id -> row dict, so upserts and location
+    updates are O(1); removal swaps the last row into the hole. Column
+    properties return zero-copy views over the live rows, and each driver's
+    position is also kept as a unit vector (x, y, z) so the matcher can score
+    distances with a single matrix product without recomputing trigonometry.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._size = 0
+        self._row_of: Dict[int, int] = {}
+        self._alloc(max(1, initial_capacity))
+
+    def _alloc(self, capacity: int):
+        old = getattr(self, "_columns", None)
+        columns = {
+            "ids": np.zeros(capacity, dtype=np.int64),
+            "lat": np.zeros(capacity, dtype=np.float64),
+            "lon": np.zeros(capacity, dtype=np.float64),
+            "xyz": np.zeros((capacity, 3), dtype=np.float64),
+            "capacity": np.zeros(capacity, dtype=np.float64),
+            "rating": np.zeros(capacity, dtype=np.float32),
+            "is_active": np.zeros(capacity, dtype=np.bool_),
+            "is_verified": np.zeros(capacity, dtype=np.bool_),
+        }
+        if old is not None:
+            for name, column in columns.items():
+                column[:self._size] = old[name][:self._size]
+        self._columns = columns
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, driver_id: int) -> bool:
+        return driver_id in self._row_of
+
+    def row_of(self, driver_id: int) -> Optional[int]:
+        return self._row_of.get(driver_id)
+
+    # --- Zero-copy column views over the live rows ---
+
+    def _view(self, name: str) -> np.ndarray:
+        return self._columns[name][:self._size]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._view("ids")
+
+    @property
+    def lat(self) -> np.ndarray:
+        return self._view("lat")
+
+    @property
+    def lon(self) -> np.ndarray:
+        return self._view("lon")
+
+    @property
+    def xyz(self) -> np.ndarray:
+        return self._view("xyz")
+
+    @property
+    def capacity(self) -> np.ndarray:
+        return self._view("capacity")
+
+    @property
+    def rating(self) -> np.ndarray:
+        return self._view("rating")
+
+    @property
+    def is_active(self) -> np.ndarray:
+        return self._view("is_active")
+
+    @property
+    def is_verified(self) -> np.ndarray:
+        return self._view("is_verified")
+
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers (allocated capacity, not just live rows)."""
+        return sum(column.nbytes for column in self._columns.values())
+
+    # --- Updates ---
+
+    def upsert(self, driver_id: int, lat: float, lon: float, capacity: float, rating: float,
+               is_active: bool, is_verified: bool = True) -> int:
+        """Inserts or overwrites a driver's row. Returns the row index."""
+        row = self._row_of.get(driver_id)
+        if row is None:
+            if self._size == len(self._columns["ids"]):
+                self._alloc(2 * self._size)
+            row = self._size
+            self._size += 1
+            self._row_of[driver_id] = row
+            self._columns["ids"][row] = driver_id
+        columns = self._columns
+        columns["capacity"][row] = capacity
+        columns["rating"][row] = rating
+        columns["is_active"][row] = is_active
+        columns["is_verified"][row] = is_verified
+        self._set_location(row, lat, lon)
+        return row
+
+    def upsert_driver(self, driver: DriverStatus) -> int:
+        return self.upsert(driver.id, driver.location[0], driver.location[1], driver.capacity,
+                           driver.rating, driver.is_active, driver.is_verified)
+
+    def update_location(self, driver_id: int, lat: float, lon: float, is_active: Optional[bool] = None) -> bool:
+        """Moves a known driver (and optionally flips online status). Returns False if unknown."""
+        row = self._row_of.get(driver_id)
+        if row is None:
+            return False
+        self._set_location(row, lat, lon)
+        if is_active is not None:
+            self._columns["is_active"][row] = is_active
+        return True
+
+    def remove(self, driver_id: int) -> bool:
+        row = self._row_of.pop(driver_id, None)
+        if row is None:
+            return False
+        last = self._size - 1
+        if row != last:
+            for column in self._columns.values():
+                column[row] = column[last]
+            self._row_of[int(self._columns["ids"][row])] = row
+        self._size -= 1
+        return True
+
+    def _set_location(self, row: int, lat: float, lon: float):
+        columns = self._columns
+        columns["lat"][row] = lat
+        columns["lon"][row] = lon
+        lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+        cos_lat = math.cos(lat_rad)
+        columns["xyz"][row] = (cos_lat * math.cos(lon_rad), cos_lat * math.sin(lon_rad), math.sin(lat_rad))
+
+    # --- Queries ---
+
+    def eligible_mask(self, required_capacity: float = 0.0) -> np.ndarray:
+        """Boolean mask over live rows: active, verified and with enough capacity."""
+        mask = self.is_active & self.is_verified
+        if required_capacity > 0:
+            mask &= self.capacity >= required_capacity
+        return mask
+
+    def driver(self, driver_id: int) -> Optional[DriverStatus]:
+        """Materializes one row as a DriverStatus (for single-object APIs)."""
+        row = self._row_of.get(driver_id)
+        if row is None:
+            return None
+        columns = self._columns
+        return DriverStatus(
+            id=driver_id,
+            location=(float(columns["lat"][row]), float(columns["lon"][row])),
+            capacity=float(columns["capacity"][row]),
+            rating=float(columns["rating"][row]),
+            is_verified=bool(columns["is_verified"][row]),
+            is_active=bool(columns["is_active"][row]),
+        )
@@ -0,0 +1,59 @@
+# bots/dispatcher_bot/geo.py
+
+import math
+from typing import Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180.0  # ~111.2 km per degree of latitude
+
+
+def haversine_km(start_loc: Tuple[float, float], end_loc: Tuple[float, float]) -> float:
+    """Great-circle distance in km between two (latitude, longitude) points."""
+    lat1, lon1 = start_loc
+    lat2, lon2 = end_loc
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (math.sin(d_lat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def km_per_degree_lon(latitude: float) -> float:
+    """Length of one degree of longitude at the given latitude."""
+    return KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 1e-6)
+
+
+def unit_vector(location: Tuple[float, float]) -> np.ndarray:
+    """One (lat, lon) point as a unit vector on the sphere (same layout as unit_vectors rows)."""
+    lat, lon = math.radians(location[0]), math.radians(location[1])
+    cos_lat = math.cos(lat)
+    return np.array((cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)))
+
+
+def unit_vectors(coords: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """(lat, lon) points as an (n, 3) array of unit vectors on the sphere."""
+    coords = np.radians(np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+    cos_lat = np.cos(coords[:, 0])
+    return np.column_stack((cos_lat * np.cos(coords[:, 1]),
+                            cos_lat * np.sin(coords[:, 1]),
+                            np.sin(coords[:, 0])))
+
+
+def cosine_to_km(cos_angle: np.ndarray) -> np.ndarray:
+    """Converts cosines of central angles (unit-vector dot products) to great-circle km."""
+    chord = np.sqrt(np.clip(2.0 - 2.0 * cos_angle, 0.0, 4.0))
+    return 2 * EARTH_RADIUS_KM * np.arcsin(chord / 2.0)
+
+
+def haversine_matrix(origins: Sequence[Tuple[float, float]],
+                     destinations: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """
+    Vectorized great-circle distances in km: result[i, j] is the distance from
+    origins[i] to destinations[j]. Accepts lists of (lat, lon) or (n, 2) arrays.
+
+    Computed as one matrix product of unit vectors, which gives the same
+    distances as the haversine formula without per-pair trigonometry.
+    """
+    return cosine_to_km(unit_vectors(origins) @ unit_vectors(destinations).T)
@@ -0,0 +1,130 @@
+# bots/dispatcher_bot/ingestion.py
+
+import logging
+import threading
+import time
+from dataclasses import replace
+from typing import Callable, Dict, Iterable, List, Optional
+
+from bots.dispatcher_bot.models import LocationPing
+from bots.common.instrumentation import get_logger, log_event
+
+log = get_logger("dispatcher.ingestion")
+
+
+class LocationIngestor:
+    """
+    Coalescing buffer for driver location pings.
+
+    Pings are accepted singly or in batches and folded into one pending entry
+    per driver (the newest by timestamp wins, late out-of-order pings are
+    dropped). `flush()` hands the coalesced batch to `sink` in one call, so a
+    truck pinging every few seconds costs one update per flush interval instead
+    of one round trip per ping. `start()` flushes every `flush_interval` on a
+    background thread; async callers can instead `drain()` the batch themselves.
+    """
+
+    def __init__(self, sink: Optional[Callable[[List[LocationPing]], None]] = None, flush_interval: float = 0.5,
+                 max_pending: int = 50_000):
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[int, LocationPing] = {}
+        self._last_seen: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.received = 0
+        self.coalesced = 0
+        self.stale_dropped = 0
+        self.flushed = 0
+
+    def submit(self, ping: LocationPing):
+        self.submit_batch((ping,))
+
+    def submit_batch(self, pings: Iterable[LocationPing]):
+        flush_now = False
+        with self._lock:
+            for ping in pings:
+                self.received += 1
+                if ping.timestamp < self._last_seen.get(ping.driver_id, float('-inf')):
+                    self.stale_dropped += 1
+                    continue
+                self._last_seen[ping.driver_id] = ping.timestamp
+                previous = self._pending.get(ping.driver_id)
+                if previous is not None:
+                    self.coalesced += 1
+                    if ping.is_active is None and previous.is_active is not None:
+                        # Keep an online/offline change carried by an earlier ping
+                        ping = replace(ping, is_active=previous.is_active)
+                self._pending[ping.driver_id] = ping
+            flush_now = len(self._pending) >= self.max_pending
+        if flush_now and self.sink is not None:
+            self.flush()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def drain(self) -> List[LocationPing]:
+        """Takes the coalesced batch (latest ping per driver) without sending it."""
+        with self._lock:
+            batch = list(self._pending.values())
+            self._pending = {}
+        self.flushed += len(batch)
+        return batch
+
+    def flush(self) -> int:
+        """Sends the latest ping per driver to the sink. Returns how many were sent."""
+        with self._flush_lock:
+            batch = self.drain()
+            if batch:
+                self.sink(batch)
+            return len(batch)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="location-ingestor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background thread and flushes what is still pending."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._safe_flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._safe_flush()
+
+    def _safe_flush(self):
+        # A lost batch is superseded by the next ping from each driver, so log and move on
+        try:
+            self.flush()
+        except Exception as e:
+            log_event(log, logging.WARNING, "location_flush_failed", error=repr(e), exc_info=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "stale_dropped": self.stale_dropped,
+            "flushed": self.flushed,
+            "pending": len(self._pending),
+            "tracked_drivers": len(self._last_seen),
+        }
+
+
+def ping_from_dict(data: dict) -> LocationPing:
+    """Builds a LocationPing from the JSON body sent by the Driver API."""
+    return LocationPing(
+        driver_id=int(data["driver_id"]),
+        lat=float(data["lat"]),
+        lon=float(data["lon"]),
+        is_active=data.get("is_active"),
+        timestamp=float(data.get("timestamp") or time.time()),
+    )
@@ -1,9 +1,9 @@
 # bots/dispatcher_bot/models.py
 
 from dataclasses import dataclass
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 
-@dataclass
+@dataclass(slots=True)
 class DeliveryJob:
     """Represents a delivery request submitted by a client/partner."""
     id: int
@@ -12,8 +12,11 @@ class DeliveryJob:
     base_price: float
     required_capacity: float                # Truck capacity needed (e.g., in sqft)
     is_express: bool = False
+    # Optional time windows (epoch seconds) honoured by the multi-stop planner
+    pickup_window: Optional[Tuple[float, float]] = None
+    dropoff_deadline: Optional[float] = None
 
-@dataclass
+@dataclass(slots=True)
 class DriverStatus:
     """Represents the current status of an available and verified driver."""
     id: int
@@ -23,7 +26,7 @@ class DriverStatus:
     is_verified: bool = True
     is_active: bool = False                 # Online status
 
-@dataclass
+@dataclass(slots=True)
 class Route:
     """Represents the optimized route details."""
     distance_km: float
@@ -34,3 +37,12 @@ class Route:
             "distance_km": round(self.distance_km, 2),
             "duration_minutes": round(self.duration_minutes, 2)
         }
+
+@dataclass(slots=True)
+class LocationPing:
+    """A single driver location update sent by the Driver App."""
+    driver_id: int
+    lat: float
+    lon: float
+    is_active: Optional[bool] = None        # None keeps the current online status
+    timestamp: float = 0.0                  # Client send time (epoch seconds); newer wins
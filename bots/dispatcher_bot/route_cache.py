@@ -0,0 +1,145 @@
+# bots/dispatcher_bot/route_cache.py
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bots.dispatcher_bot.models import Route
+from bots.dispatcher_bot.routing import Coordinate, RoutingProvider
+
+CacheKey = Tuple[float, float, float, float]
+
+
+def _estimate_entry_bytes() -> int:
+    """Approximate memory held by one cache entry (key, value, route and LRU links)."""
+    route = Route(distance_km=1.2345, duration_minutes=2.345)
+    key = (35.227, -80.843, 35.23, -80.85)
+    value = (0.0, route)
+    route_bytes = sys.getsizeof(route) + (sys.getsizeof(route.__dict__) if hasattr(route, "__dict__") else 0)
+    floats = 7 * sys.getsizeof(0.0)  # 4 key coordinates, expiry, distance, duration
+    return sys.getsizeof(key) + sys.getsizeof(value) + route_bytes + floats + 100  # + OrderedDict slot/links
+
+
+class RouteCache:
+    """
+    Bounded cache of routing results keyed on quantized (start, end) coordinates.
+
+    Coordinates are rounded to `precision` decimals (3 = ~110 m), so a driver
+    re-matched from nearly the same spot reuses the earlier route. Entries expire
+    after `ttl_seconds` and the least recently used entry is evicted once either
+    `max_entries` or the `max_bytes` estimate is reached.
+    """
+
+    ENTRY_BYTES = _estimate_entry_bytes()
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 900.0, precision: int = 3,
+                 max_bytes: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        if max_bytes is not None:
+            max_entries = min(max_entries, max_bytes // self.ENTRY_BYTES)
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.precision = precision
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Route]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, start_loc: Coordinate, end_loc: Coordinate) -> CacheKey:
+        p = self.precision
+        return (round(start_loc[0], p), round(start_loc[1], p), round(end_loc[0], p), round(end_loc[1], p))
+
+    def get(self, start_loc: Coordinate, end_loc: Coordinate) -> Optional[Route]:
+        key = self.key(start_loc, end_loc)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, route = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return route
+
+    def put(self, start_loc: Coordinate, end_loc: Coordinate, route: Route):
+        if self.max_entries == 0:
+            return
+        key = self.key(start_loc, end_loc)
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, route)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for sizing the cache: hits, misses, evictions, expirations, size and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "approx_bytes": len(self._entries) * self.ENTRY_BYTES,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CachedRouting(RoutingProvider):
+    """Puts a RouteCache in front of any RoutingProvider."""
+
+    def __init__(self, provider: RoutingProvider, cache: Optional[RouteCache] = None):
+        self.provider = provider
+        self.cache = cache if cache is not None else RouteCache()
+        self.name = provider.name
+
+    def route(self, start_loc: Coordinate, end_loc: Coordinate) -> Route:
+        route = self.cache.get(start_loc, end_loc)
+        if route is None:
+            route = self.provider.route(start_loc, end_loc)
+            self.cache.put(start_loc, end_loc, route)
+        return route
+
+    def distance_matrix(self, origins: Sequence[Coordinate],
+                        destinations: Sequence[Coordinate]) -> Tuple[np.ndarray, np.ndarray]:
+        distances = np.empty((len(origins), len(destinations)))
+        durations = np.empty((len(origins), len(destinations)))
+        missing_rows = []
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                route = self.cache.get(origin, destination)
+                if route is None:
+                    missing_rows.append(i)
+                    break
+                distances[i, j], durations[i, j] = route.distance_km, route.duration_minutes
+
+        if missing_rows:
+            # One backend call for every origin with at least one miss
+            fresh_distances, fresh_durations = self.provider.distance_matrix(
+                [origins[i] for i in missing_rows], destinations)
+            for row, i in enumerate(missing_rows):
+                distances[i], durations[i] = fresh_distances[row], fresh_durations[row]
+                for j, destination in enumerate(destinations):
+                    self.cache.put(origins[i], destination, Route(distance_km=float(fresh_distances[row, j]),
+                                                                  duration_minutes=float(fresh_durations[row, j])))
+        return distances, durations
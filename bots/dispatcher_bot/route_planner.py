@@ -0,0 +1,346 @@
+# bots/dispatcher_bot/route_planner.py
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from bots.dispatcher_bot.models import DeliveryJob, DriverStatus
+from bots.dispatcher_bot.routing import HaversineRouting, RoutingProvider
+
+Coordinate = Tuple[float, float]
+
+PICKUP = "pickup"
+DROPOFF = "dropoff"
+IMPROVEMENT_EPS_KM = 1e-6
+
+
+class DistanceMatrix:
+    """
+    Travel km and minutes between the points of one plan, as nested lists
+    (fast scalar access in the search loops). Adding a point asks the routing
+    provider only for its new row and column; `truncate` drops points added
+    for an insertion that was not taken.
+    """
+
+    def __init__(self, routing: RoutingProvider):
+        self.routing = routing
+        self.points: List[Coordinate] = []
+        self.km: List[List[float]] = []
+        self.minutes: List[List[float]] = []
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def add(self, location: Coordinate) -> int:
+        location = (float(location[0]), float(location[1]))
+        index = len(self.points)
+        self.points.append(location)
+        to_km, to_minutes = self.routing.distance_matrix(self.points, [location])     # column: every point -> new
+        from_km, from_minutes = self.routing.distance_matrix([location], self.points)  # row: new -> every point
+        for row, km, minutes in zip(self.km, to_km[:index, 0].tolist(), to_minutes[:index, 0].tolist()):
+            row.append(km)
+        for row, minutes in zip(self.minutes, to_minutes[:index, 0].tolist()):
+            row.append(minutes)
+        self.km.append(from_km[0].tolist())
+        self.minutes.append(from_minutes[0].tolist())
+        self.km[index][index] = 0.0
+        self.minutes[index][index] = 0.0
+        return index
+
+    def truncate(self, size: int):
+        del self.points[size:], self.km[size:], self.minutes[size:]
+        for row in self.km:
+            del row[size:]
+        for row in self.minutes:
+            del row[size:]
+
+
+@dataclass(slots=True)
+class Stop:
+    job_id: int
+    kind: str                      # PICKUP or DROPOFF
+    point: int                     # Index into the plan's DistanceMatrix
+    load_change: float             # +required_capacity at pickup, -required_capacity at dropoff
+    earliest: float = 0.0          # Time window, minutes after the plan's clock origin
+    latest: float = math.inf
+    service_minutes: float = 5.0
+
+
+@dataclass(slots=True)
+class Insertion:
+    job_id: int
+    added_km: float
+    pickup_position: int
+    dropoff_position: int
+    stops: Tuple[Stop, Stop]
+    matrix_size: int               # Matrix size before the job's points were added (for rollback)
+
+
+class RoutePlan:
+    """
+    One driver's pickup/dropoff sequence. Feasible means: every dropoff after
+    its pickup, load never above the truck's capacity, and every stop reached
+    before its window closes (arriving early waits). Times are minutes after
+    `origin` (epoch seconds), starting from the driver's current position.
+    """
+
+    def __init__(self, driver: DriverStatus, routing: RoutingProvider, origin: Optional[float] = None,
+                 service_minutes: float = 5.0):
+        self.driver_id = driver.id
+        self.capacity = driver.capacity
+        self.origin = origin if origin is not None else time.time()
+        self.service_minutes = service_minutes
+        self.matrix = DistanceMatrix(routing)
+        self.start_point = self.matrix.add(driver.location)
+        self.start_minute = 0.0
+        self.stops: List[Stop] = []
+        self.onboard: Dict[int, float] = {}  # job_id -> load picked up, not yet dropped
+        self.jobs: Dict[int, DeliveryJob] = {}
+
+    def __len__(self) -> int:
+        return len(self.stops)
+
+    def _minutes(self, epoch: Optional[float], default: float) -> float:
+        return default if epoch is None else (epoch - self.origin) / 60.0
+
+    # --- Evaluation ---
+
+    def evaluate(self, stops: Sequence[Stop]) -> Optional[float]:
+        """Total km of a sequence, or None if it breaks precedence, capacity or a time window."""
+        km, minutes = self.matrix.km, self.matrix.minutes
+        load = sum(self.onboard.values())
+        capacity = self.capacity + 1e-9
+        picked: Set[int] = set()
+        clock = self.start_minute
+        previous = self.start_point
+        total = 0.0
+        for stop in stops:
+            point = stop.point
+            total += km[previous][point]
+            clock += minutes[previous][point]
+            if clock < stop.earliest:
+                clock = stop.earliest
+            if clock > stop.latest:
+                return None
+            clock += stop.service_minutes
+            if stop.kind == PICKUP:
+                picked.add(stop.job_id)
+            elif stop.job_id not in picked and stop.job_id not in self.onboard:
+                return None
+            load += stop.load_change
+            if load > capacity:
+                return None
+            previous = point
+        return total
+
+    def cost(self) -> float:
+        km = self.evaluate(self.stops)
+        return km if km is not None else math.inf
+
+    def schedule(self) -> List[Dict[str, Any]]:
+        """Stops with planned arrival times (epoch seconds) and load after each stop."""
+        km, minutes = self.matrix.km, self.matrix.minutes
+        load = sum(self.onboard.values())
+        clock = self.start_minute
+        previous = self.start_point
+        planned = []
+        for stop in self.stops:
+            clock = max(clock + minutes[previous][stop.point], stop.earliest)
+            load += stop.load_change
+            lat, lon = self.matrix.points[stop.point]
+            planned.append({"job_id": stop.job_id, "kind": stop.kind, "lat": lat, "lon": lon,
+                            "arrival": round(self.origin + clock * 60.0, 1), "load_after": round(load, 2),
+                            "leg_km": round(km[previous][stop.point], 2)})
+            clock += stop.service_minutes
+            previous = stop.point
+        return planned
+
+    # --- Cheapest insertion ---
+
+    def _job_stops(self, job: DeliveryJob) -> Tuple[Stop, Stop]:
+        pickup_from, pickup_until = getattr(job, "pickup_window", None) or (None, None)
+        pickup = Stop(job.id, PICKUP, self.matrix.add(job.pickup_location), job.required_capacity,
+                      earliest=self._minutes(pickup_from, 0.0), latest=self._minutes(pickup_until, math.inf),
+                      service_minutes=self.service_minutes)
+        dropoff = Stop(job.id, DROPOFF, self.matrix.add(job.dropoff_location), -job.required_capacity,
+                       latest=self._minutes(getattr(job, "dropoff_deadline", None), math.inf),
+                       service_minutes=self.service_minutes)
+        return pickup, dropoff
+
+    def find_insertion(self, job: DeliveryJob) -> Optional[Insertion]:
+        """
+        Cheapest feasible place for the job's pickup and dropoff in the current
+        sequence. Every (pickup, dropoff) position pair is priced from the matrix
+        in O(1); only the cheapest candidates are fully checked for feasibility.
+        The job's points stay in the matrix until `insert` or `discard`.
+        """
+        if job.required_capacity > self.capacity:
+            return None
+        matrix_size = len(self.matrix)
+        pickup, dropoff = self._job_stops(job)
+        km = self.matrix.km
+        p, d = pickup.point, dropoff.point
+        route = [self.start_point] + [stop.point for stop in self.stops]
+        n = len(self.stops)
+
+        candidates: List[Tuple[float, int, int]] = []
+        for i in range(n + 1):
+            a = route[i]
+            b = route[i + 1] if i < n else None
+            # Dropoff right after the pickup
+            delta = km[a][p] + km[p][d] + (km[d][b] - km[a][b] if b is not None else 0.0)
+            candidates.append((delta, i, i))
+            if b is None:
+                continue
+            pickup_delta = km[a][p] + km[p][b] - km[a][b]
+            for j in range(i + 1, n + 1):
+                c = route[j]
+                e = route[j + 1] if j < n else None
+                dropoff_delta = km[c][d] + (km[d][e] - km[c][e] if e is not None else 0.0)
+                candidates.append((pickup_delta + dropoff_delta, i, j))
+
+        candidates.sort()
+        for delta, i, j in candidates:
+            stops = self.stops[:i] + [pickup] + self.stops[i:j] + [dropoff] + self.stops[j:]
+            if self.evaluate(stops) is not None:
+                return Insertion(job.id, delta, i, j, (pickup, dropoff), matrix_size)
+        self.matrix.truncate(matrix_size)
+        return None
+
+    def discard(self, insertion: Insertion):
+        """Rolls back the matrix points of an insertion that was not taken."""
+        self.matrix.truncate(insertion.matrix_size)
+
+    def insert(self, job: DeliveryJob, insertion: Insertion):
+        pickup, dropoff = insertion.stops
+        i, j = insertion.pickup_position, insertion.dropoff_position
+        self.stops = self.stops[:i] + [pickup] + self.stops[i:j] + [dropoff] + self.stops[j:]
+        self.jobs[job.id] = job
+
+    # --- Local search ---
+
+    def improve(self, max_passes: int = 10) -> float:
+        """
+        Or-opt (move a run of 1-3 stops elsewhere) and 2-opt (reverse a run)
+        until no move shortens the plan or `max_passes` is reached. Moves are
+        priced from the matrix first and checked in full only if they look
+        shorter. Returns the km saved.
+        """
+        before = current = self.cost()
+        for _ in range(max_passes):
+            improved = False
+            for candidate in self._or_opt_moves():
+                km = self.evaluate(candidate)
+                if km is not None and km < current - IMPROVEMENT_EPS_KM:
+                    self.stops, current, improved = candidate, km, True
+                    break
+            if not improved:
+                for candidate in self._two_opt_moves():
+                    km = self.evaluate(candidate)
+                    if km is not None and km < current - IMPROVEMENT_EPS_KM:
+                        self.stops, current, improved = candidate, km, True
+                        break
+            if not improved:
+                break
+        return before - current
+
+    def _or_opt_moves(self):
+        km = self.matrix.km
+        stops = self.stops
+        n = len(stops)
+        route = [self.start_point] + [stop.point for stop in stops]
+        for length in (1, 2, 3):
+            for i in range(n - length + 1):
+                # Remove stops[i:i+length] (route positions i+1..i+length)
+                a, first, last = route[i], route[i + 1], route[i + length]
+                b = route[i + length + 1] if i + length < n else None
+                removed = km[a][first] + (km[last][b] - km[a][b] if b is not None else 0.0)
+                segment = stops[i:i + length]
+                rest = stops[:i] + stops[i + length:]
+                rest_route = [self.start_point] + [stop.point for stop in rest]
+                for k in range(len(rest) + 1):
+                    if k == i:
+                        continue
+                    c = rest_route[k]
+                    e = rest_route[k + 1] if k < len(rest) else None
+                    added = km[c][first] + (km[last][e] - km[c][e] if e is not None else 0.0)
+                    if added - removed < -IMPROVEMENT_EPS_KM:
+                        yield rest[:k] + segment + rest[k:]
+
+    def _two_opt_moves(self):
+        km = self.matrix.km
+        stops = self.stops
+        n = len(stops)
+        route = [self.start_point] + [stop.point for stop in stops]
+        for i in range(n - 1):
+            a, first = route[i], route[i + 1]
+            for j in range(i + 1, n):
+                last = route[j + 1]
+                b = route[j + 2] if j + 1 < n else None
+                before = km[a][first] + (km[last][b] if b is not None else 0.0)
+                after = km[a][last] + (km[first][b] if b is not None else 0.0)
+                if after - before < -IMPROVEMENT_EPS_KM:  # Exact for symmetric matrices; evaluate() confirms
+                    yield stops[:i] + stops[i:j + 1][::-1] + stops[j + 1:]
+
+    # --- Progress ---
+
+    def complete_next_stop(self, now: Optional[float] = None) -> Optional[Stop]:
+        """The driver reached the first stop: it leaves the plan and the start moves there."""
+        if not self.stops:
+            return None
+        stop = self.stops.pop(0)
+        if stop.kind == PICKUP:
+            self.onboard[stop.job_id] = stop.load_change
+        else:
+            self.onboard.pop(stop.job_id, None)
+            self.jobs.pop(stop.job_id, None)
+        self.start_point = stop.point
+        self.start_minute = self._minutes(now if now is not None else time.time(), 0.0)
+        return stop
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"driver_id": self.driver_id, "capacity": self.capacity, "jobs": sorted(self.jobs),
+                "total_km": round(self.cost(), 2), "stops": self.schedule()}
+
+
+class RoutePlanner:
+    """
+    Multi-stop plans for drivers carrying several jobs. New jobs go into the
+    existing plan at their cheapest feasible position, followed by a short
+    local search, so a plan is never re-solved from scratch.
+    """
+
+    def __init__(self, routing: Optional[RoutingProvider] = None, service_minutes: float = 5.0,
+                 improve_passes: int = 10):
+        self.routing = routing or HaversineRouting()
+        self.service_minutes = service_minutes
+        self.improve_passes = improve_passes
+
+    def new_plan(self, driver: DriverStatus, origin: Optional[float] = None) -> RoutePlan:
+        return RoutePlan(driver, self.routing, origin, self.service_minutes)
+
+    def add_job(self, plan: RoutePlan, job: DeliveryJob) -> Optional[float]:
+        """Inserts and re-optimizes. Returns the km the job added, or None if it does not fit."""
+        before = plan.cost()
+        insertion = plan.find_insertion(job)
+        if insertion is None:
+            return None
+        plan.insert(job, insertion)
+        plan.improve(self.improve_passes)
+        return plan.cost() - before
+
+    def build(self, driver: DriverStatus, jobs: Sequence[DeliveryJob], origin: Optional[float] = None,
+              improve_passes: int = 50) -> Tuple[RoutePlan, List[DeliveryJob]]:
+        """Plan for a set of jobs from scratch: returns the plan and the jobs that did not fit."""
+        plan = self.new_plan(driver, origin)
+        rejected = []
+        # Tightest deadlines first, so late insertions do not squeeze them out
+        for job in sorted(jobs, key=lambda job: getattr(job, "dropoff_deadline", None) or math.inf):
+            insertion = plan.find_insertion(job)
+            if insertion is None:
+                rejected.append(job)
+            else:
+                plan.insert(job, insertion)
+        plan.improve(improve_passes)
+        return plan, rejected
@@ -0,0 +1,371 @@
+# bots/dispatcher_bot/routing.py
+
+import heapq
+import math
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bots.dispatcher_bot.geo import haversine_km, haversine_matrix
+from bots.dispatcher_bot.models import Route
+
+Coordinate = Tuple[float, float]  # (latitude, longitude)
+
+
+class RoutingProvider:
+    """
+    Interface for the distance/duration backends behind `Dispatcher.optimize_route`.
+    Implementations must answer single routes; `distance_matrix` falls back to
+    one `route` call per pair unless the backend has a cheaper bulk query.
+    """
+    name = "routing"
+
+    def route(self, start_loc: Coordinate, end_loc: Coordinate) -> Route:
+        raise NotImplementedError
+
+    def distance_matrix(self, origins: Sequence[Coordinate],
+                        destinations: Sequence[Coordinate]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (distance_km, duration_minutes) arrays shaped len(origins) x len(destinations)."""
+        distances = np.empty((len(origins), len(destinations)))
+        durations = np.empty((len(origins), len(destinations)))
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                route = self.route(origin, destination)
+                distances[i, j] = route.distance_km
+                durations[i, j] = route.duration_minutes
+        return distances, durations
+
+
+class HaversineRouting(RoutingProvider):
+    """Straight-line distance at an assumed average speed. No network, no data files."""
+    name = "haversine"
+
+    def __init__(self, average_speed_kmh: float = 60.0):
+        self.average_speed_kmh = average_speed_kmh
+
+    def route(self, start_loc: Coordinate, end_loc: Coordinate) -> Route:
+        distance_km = haversine_km(start_loc, end_loc)
+        return Route(distance_km=distance_km, duration_minutes=distance_km / self.average_speed_kmh * 60.0)
+
+    def distance_matrix(self, origins: Sequence[Coordinate],
+                        destinations: Sequence[Coordinate]) -> Tuple[np.ndarray, np.ndarray]:
+        distances = haversine_matrix(origins, destinations)
+        return distances, distances / self.average_speed_kmh * 60.0
+
+
+class ORSRouting(RoutingProvider):
+    """
+    OpenRouteService HTTP client. Uses the directions endpoint for single routes
+    and the matrix endpoint so a whole candidate set costs one request.
+    """
+    name = "ors"
+
+    def __init__(self, api_key: str, base_url: str = "https://api.openrouteservice.org",
+                 profile: str = "driving-car", timeout: float = 5.0):
+        import requests  # Deferred: offline providers never need it
+
+        self.base_url = base_url.rstrip("/")
+        self.profile = profile
+        self.timeout = timeout
+        self.session = requests.Session()  # Keep-alive across calls
+        self.session.headers.update({"Authorization": api_key, "Content-Type": "application/json"})
+
+    def route(self, start_loc: Coordinate, end_loc: Coordinate) -> Route:
+        response = self.session.post(
+            f"{self.base_url}/v2/directions/{self.profile}",
+            json={"coordinates": [[start_loc[1], start_loc[0]], [end_loc[1], end_loc[0]]]},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        summary = response.json()["routes"][0]["summary"]
+        # ORS omits distance/duration when start and end snap to the same point
+        return Route(distance_km=summary.get("distance", 0.0) / 1000.0,
+                     duration_minutes=summary.get("duration", 0.0) / 60.0)
+
+    def distance_matrix(self, origins: Sequence[Coordinate],
+                        destinations: Sequence[Coordinate]) -> Tuple[np.ndarray, np.ndarray]:
+        locations = [[lon, lat] for lat, lon in list(origins) + list(destinations)]
+        response = self.session.post(
+            f"{self.base_url}/v2/matrix/{self.profile}",
+            json={
+                "locations": locations,
+                "sources": list(range(len(origins))),
+                "destinations": list(range(len(origins), len(locations))),
+                "metrics": ["distance", "duration"],
+                "units": "km",
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        body = response.json()
+        # Unroutable pairs come back as null
+        distances = np.array(body["distances"], dtype=np.float64)
+        durations = np.array(body["durations"], dtype=np.float64) / 60.0
+        return np.nan_to_num(distances, nan=np.inf), np.nan_to_num(durations, nan=np.inf)
+
+
+# Free-flow speeds (km/h) per OSM highway class; ways with other tags are not drivable.
+HIGHWAY_SPEEDS_KMH: Dict[str, float] = {
+    "motorway": 105.0, "motorway_link": 60.0,
+    "trunk": 90.0, "trunk_link": 50.0,
+    "primary": 70.0, "primary_link": 45.0,
+    "secondary": 60.0, "secondary_link": 40.0,
+    "tertiary": 50.0, "tertiary_link": 35.0,
+    "unclassified": 40.0, "residential": 30.0,
+    "living_street": 10.0, "service": 20.0,
+}
+
+
+class RoadGraph:
+    """
+    Directed road graph with travel-time edge weights, stored as adjacency lists
+    over dense node indices. Built from an OSM XML extract or from explicit edges.
+    """
+
+    def __init__(self):
+        self.coords: List[Coordinate] = []
+        self.forward: List[List[Tuple[int, float, float]]] = []   # (to, km, minutes)
+        self.backward: List[List[Tuple[int, float, float]]] = []  # (from, km, minutes)
+        self._node_ids: Dict[int, int] = {}
+        self._snap_cells: Dict[Tuple[int, int], List[int]] = {}
+        self._snap_cell_deg = 0.01
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    def add_node(self, node_id: int, location: Coordinate) -> int:
+        index = self._node_ids.get(node_id)
+        if index is not None:
+            return index
+        index = len(self.coords)
+        self._node_ids[node_id] = index
+        self.coords.append(location)
+        self.forward.append([])
+        self.backward.append([])
+        self._snap_cells.setdefault(self._snap_cell(location), []).append(index)
+        return index
+
+    def add_edge(self, from_id: int, to_id: int, speed_kmh: float, oneway: bool = False):
+        start, end = self._node_ids[from_id], self._node_ids[to_id]
+        km = haversine_km(self.coords[start], self.coords[end])
+        minutes = km / speed_kmh * 60.0
+        self.forward[start].append((end, km, minutes))
+        self.backward[end].append((start, km, minutes))
+        if not oneway:
+            self.forward[end].append((start, km, minutes))
+            self.backward[start].append((end, km, minutes))
+
+    @classmethod
+    def from_osm_xml(cls, path: str, speeds_kmh: Optional[Dict[str, float]] = None) -> "RoadGraph":
+        """
+        Loads drivable ways from an OSM XML extract (.osm). Parsing is streamed with
+        iterparse so statewide extracts do not need the whole document in memory.
+        """
+        speeds_kmh = speeds_kmh or HIGHWAY_SPEEDS_KMH
+        node_coords: Dict[int, Coordinate] = {}
+        ways: List[Tuple[List[int], float, str]] = []
+
+        for _, element in ET.iterparse(path, events=("end",)):
+            if element.tag == "node":
+                node_coords[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+                element.clear()
+            elif element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                highway = tags.get("highway")
+                if highway in speeds_kmh:
+                    refs = [int(nd.get("ref")) for nd in element.iter("nd")]
+                    speed = _parse_maxspeed(tags.get("maxspeed")) or speeds_kmh[highway]
+                    oneway = tags.get("oneway", "no")
+                    if tags.get("junction") == "roundabout" and oneway == "no":
+                        oneway = "yes"
+                    ways.append((refs, speed, oneway))
+                element.clear()
+
+        graph = cls()
+        for refs, speed, oneway in ways:
+            refs = [ref for ref in refs if ref in node_coords]
+            if oneway == "-1":
+                refs.reverse()
+            for ref in refs:
+                graph.add_node(ref, node_coords[ref])
+            for a, b in zip(refs, refs[1:]):
+                graph.add_edge(a, b, speed, oneway=oneway in ("yes", "true", "1", "-1"))
+        return graph
+
+    @classmethod
+    def from_edges(cls, nodes: Dict[int, Coordinate],
+                   edges: Iterable[Tuple[int, int, float]], oneway: bool = False) -> "RoadGraph":
+        """Builds a graph from {node_id: (lat, lon)} and (from_id, to_id, speed_kmh) edges."""
+        graph = cls()
+        for node_id, location in nodes.items():
+            graph.add_node(node_id, location)
+        for from_id, to_id, speed_kmh in edges:
+            graph.add_edge(from_id, to_id, speed_kmh, oneway=oneway)
+        return graph
+
+    # --- Snapping ---
+
+    def _snap_cell(self, location: Coordinate) -> Tuple[int, int]:
+        return (math.floor(location[0] / self._snap_cell_deg), math.floor(location[1] / self._snap_cell_deg))
+
+    def nearest_node(self, location: Coordinate, max_rings: int = 20) -> int:
+        """Closest graph node to `location` (searches outward cell by cell)."""
+        if not self.coords:
+            raise ValueError("Road graph is empty")
+        row0, col0 = self._snap_cell(location)
+        best, best_km = -1, float('inf')
+        for ring in range(max_rings + 1):
+            for row in range(row0 - ring, row0 + ring + 1):
+                for col in range(col0 - ring, col0 + ring + 1):
+                    if max(abs(row - row0), abs(col - col0)) != ring:
+                        continue
+                    for index in self._snap_cells.get((row, col), ()):
+                        km = haversine_km(location, self.coords[index])
+                        if km < best_km:
+                            best, best_km = index, km
+            if best != -1 and ring >= 1:
+                return best
+        if best == -1:
+            best = min(range(len(self.coords)), key=lambda i: haversine_km(location, self.coords[i]))
+        return best
+
+    # --- Shortest paths ---
+
+    def shortest_path(self, source: int, target: int) -> Tuple[float, float, List[int]]:
+        """
+        Bidirectional Dijkstra on travel time. Returns (minutes, km, node path);
+        minutes is inf and the path empty when target is unreachable.
+        """
+        if source == target:
+            return 0.0, 0.0, [source]
+
+        dist = ({source: 0.0}, {target: 0.0})
+        km = ({source: 0.0}, {target: 0.0})
+        parent: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+        settled = (set(), set())
+        heaps = ([(0.0, source)], [(0.0, target)])
+        adjacency = (self.forward, self.backward)
+        best, meeting = float('inf'), -1
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d, node = heapq.heappop(heaps[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+            for neighbour, edge_km, minutes in adjacency[side][node]:
+                candidate = d + minutes
+                if candidate < dist[side].get(neighbour, float('inf')):
+                    dist[side][neighbour] = candidate
+                    km[side][neighbour] = km[side][node] + edge_km
+                    parent[side][neighbour] = node
+                    heapq.heappush(heaps[side], (candidate, neighbour))
+                other = dist[1 - side].get(neighbour)
+                if other is not None and candidate + other < best:
+                    best, meeting = candidate + other, neighbour
+
+        if meeting == -1:
+            return float('inf'), float('inf'), []
+
+        path = [meeting]
+        while path[-1] in parent[0]:
+            path.append(parent[0][path[-1]])
+        path.reverse()
+        while path[-1] in parent[1]:
+            path.append(parent[1][path[-1]])
+        return best, km[0][meeting] + km[1][meeting], path
+
+    def one_to_many(self, source: int, targets: Iterable[int]) -> Dict[int, Tuple[float, float]]:
+        """Single Dijkstra from `source`, stopped once every target is settled. Returns {target: (minutes, km)}."""
+        remaining = set(targets)
+        found: Dict[int, Tuple[float, float]] = {}
+        dist = {source: 0.0}
+        km = {source: 0.0}
+        heap = [(0.0, source)]
+        settled = set()
+        while heap and remaining:
+            d, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if node in remaining:
+                remaining.discard(node)
+                found[node] = (d, km[node])
+            for neighbour, edge_km, minutes in self.forward[node]:
+                candidate = d + minutes
+                if candidate < dist.get(neighbour, float('inf')):
+                    dist[neighbour] = candidate
+                    km[neighbour] = km[node] + edge_km
+                    heapq.heappush(heap, (candidate, neighbour))
+        return found
+
+
+class RoadGraphRouting(RoutingProvider):
+    """
+    Offline routing over a local road graph (e.g. loaded from an OSM extract).
+    Points are snapped to their nearest graph node; the short hop from the point
+    to the road is added at `access_speed_kmh`. Pairs the graph cannot connect
+    fall back to `fallback` (straight-line by default).
+    """
+    name = "road_graph"
+
+    def __init__(self, graph: RoadGraph, access_speed_kmh: float = 20.0,
+                 fallback: Optional[RoutingProvider] = None):
+        self.graph = graph
+        self.access_speed_kmh = access_speed_kmh
+        self.fallback = fallback or HaversineRouting()
+
+    @classmethod
+    def from_osm_xml(cls, path: str, **kwargs) -> "RoadGraphRouting":
+        return cls(RoadGraph.from_osm_xml(path), **kwargs)
+
+    def _snap(self, location: Coordinate) -> Tuple[int, float]:
+        node = self.graph.nearest_node(location)
+        return node, haversine_km(location, self.graph.coords[node])
+
+    def route(self, start_loc: Coordinate, end_loc: Coordinate) -> Route:
+        start_node, start_access = self._snap(start_loc)
+        end_node, end_access = self._snap(end_loc)
+        minutes, km, _ = self.graph.shortest_path(start_node, end_node)
+        if math.isinf(minutes):
+            return self.fallback.route(start_loc, end_loc)
+        access_km = start_access + end_access
+        return Route(distance_km=km + access_km,
+                     duration_minutes=minutes + access_km / self.access_speed_kmh * 60.0)
+
+    def distance_matrix(self, origins: Sequence[Coordinate],
+                        destinations: Sequence[Coordinate]) -> Tuple[np.ndarray, np.ndarray]:
+        destination_snaps = [self._snap(location) for location in destinations]
+        target_nodes = {node for node, _ in destination_snaps}
+        distances = np.empty((len(origins), len(destinations)))
+        durations = np.empty((len(origins), len(destinations)))
+        for i, origin in enumerate(origins):
+            start_node, start_access = self._snap(origin)
+            reached = self.graph.one_to_many(start_node, target_nodes)
+            for j, (end_node, end_access) in enumerate(destination_snaps):
+                if end_node not in reached:
+                    route = self.fallback.route(origin, destinations[j])
+                    distances[i, j], durations[i, j] = route.distance_km, route.duration_minutes
+                    continue
+                minutes, km = reached[end_node]
+                access_km = start_access + end_access
+                distances[i, j] = km + access_km
+                durations[i, j] = minutes + access_km / self.access_speed_kmh * 60.0
+        return distances, durations
+
+
+def _parse_maxspeed(value: Optional[str]) -> Optional[float]:
+    """Parses OSM maxspeed ('55 mph', '50', '80 km/h') to km/h; None if missing or unparsable."""
+    if not value:
+        return None
+    parts = value.strip().split()
+    try:
+        speed = float(parts[0])
+    except ValueError:
+        return None
+    if len(parts) > 1 and parts[1].lower() == "mph":
+        speed *= 1.609344
+    return speed if speed > 0 else None
@@ -0,0 +1,315 @@
+# bots/dispatcher_bot/sharding.py
+
+import logging
+import math
+import multiprocessing
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bots.dispatcher_bot.dispatcher import Dispatcher
+from bots.dispatcher_bot.geo import KM_PER_DEGREE_LAT, km_per_degree_lon
+from bots.dispatcher_bot.models import DeliveryJob, DriverStatus, LocationPing
+from bots.common.instrumentation import get_logger, log_event
+
+log = get_logger("dispatcher.sharding")
+
+ShardKey = Tuple[int, int]  # (latitude cell, longitude cell)
+
+
+class ShardMap:
+    """
+    Partitions the map into a grid of lat/lon cells; each cell is one shard.
+
+    Cells are large (a metro area or a state, not a city block): Phase 1 fits in
+    one Charlotte cell, later phases just populate more cells. `shards_near`
+    returns every cell within `radius_km` of a point, so a pickup close to a
+    border is also matched against the neighbouring shard's drivers.
+    """
+
+    def __init__(self, cell_lat_deg: float = 1.0, cell_lon_deg: Optional[float] = None):
+        self.cell_lat_deg = cell_lat_deg
+        self.cell_lon_deg = cell_lon_deg if cell_lon_deg is not None else cell_lat_deg
+
+    def shard_for(self, location: Tuple[float, float]) -> ShardKey:
+        return (math.floor(location[0] / self.cell_lat_deg), math.floor(location[1] / self.cell_lon_deg))
+
+    def bounds(self, key: ShardKey) -> Tuple[float, float, float, float]:
+        """(min_lat, max_lat, min_lon, max_lon) of a shard's cell."""
+        lat_cell, lon_cell = key
+        return (lat_cell * self.cell_lat_deg, (lat_cell + 1) * self.cell_lat_deg,
+                lon_cell * self.cell_lon_deg, (lon_cell + 1) * self.cell_lon_deg)
+
+    def shards_near(self, location: Tuple[float, float], radius_km: float) -> List[ShardKey]:
+        """Home shard first, then every other cell whose edge is within `radius_km`."""
+        lat, lon = location
+        home = self.shard_for(location)
+        lon_km = km_per_degree_lon(lat)
+        lat_rings = math.ceil(radius_km / (self.cell_lat_deg * KM_PER_DEGREE_LAT))
+        lon_rings = math.ceil(radius_km / (self.cell_lon_deg * lon_km))
+        keys = [home]
+        for d_lat in range(-lat_rings, lat_rings + 1):
+            for d_lon in range(-lon_rings, lon_rings + 1):
+                if d_lat == 0 and d_lon == 0:
+                    continue
+                key = (home[0] + d_lat, home[1] + d_lon)
+                min_lat, max_lat, min_lon, max_lon = self.bounds(key)
+                gap_lat = max(0.0, min_lat - lat, lat - max_lat) * KM_PER_DEGREE_LAT
+                gap_lon = max(0.0, min_lon - lon, lon - max_lon) * lon_km
+                if math.hypot(gap_lat, gap_lon) <= radius_km:
+                    keys.append(key)
+        return keys
+
+
+# --- Shard workers ---
+
+def _handle(dispatcher: Dispatcher, command: str, payload: Any) -> Any:
+    if command == "upsert":
+        for driver in payload:
+            dispatcher.update_driver(driver)
+        return len(payload)
+    if command == "locations":
+        return dispatcher.apply_locations(payload)
+    if command == "remove":
+        return [dispatcher.remove_driver(driver_id) for driver_id in payload]
+    if command == "match":
+        return dispatcher.match_jobs(payload)
+    if command == "stats":
+        return {"drivers": len(dispatcher.fleet), "eligible": int(dispatcher.fleet.eligible_mask().sum())}
+    raise ValueError(f"Unknown shard command: {command}")
+
+
+def _shard_main(conn, candidate_pool_size: int):
+    """Worker process loop: one Dispatcher, commands in and results out over a pipe."""
+    dispatcher = Dispatcher(candidate_pool_size=candidate_pool_size, warm_from_db=False)
+    while True:
+        command, payload = conn.recv()
+        if command == "stop":
+            break
+        try:
+            conn.send((True, _handle(dispatcher, command, payload)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+class _ProcessShard:
+    """A shard whose Dispatcher lives in its own process (one core per shard)."""
+
+    def __init__(self, key: ShardKey, candidate_pool_size: int, context):
+        self.key = key
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_shard_main, args=(child_conn, candidate_pool_size),
+                                       name=f"dispatcher-shard-{key[0]}_{key[1]}", daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def send(self, command: str, payload: Any):
+        self._conn.send((command, payload))
+
+    def receive(self) -> Any:
+        ok, result = self._conn.recv()
+        if not ok:
+            raise RuntimeError(f"Shard {self.key} failed: {result}")
+        return result
+
+    def close(self):
+        try:
+            self._conn.send(("stop", None))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._conn.close()
+
+
+class _LocalShard:
+    """Same interface, in-process (development, debugging, single-core hosts)."""
+
+    def __init__(self, key: ShardKey, candidate_pool_size: int):
+        self.key = key
+        self.dispatcher = Dispatcher(candidate_pool_size=candidate_pool_size, warm_from_db=False)
+        self._result: Any = None
+        self._error: Optional[Exception] = None
+
+    def send(self, command: str, payload: Any):
+        # Errors surface on receive(), like a process shard's
+        self._result, self._error = None, None
+        try:
+            self._result = _handle(self.dispatcher, command, payload)
+        except Exception as e:
+            self._error = e
+
+    def receive(self) -> Any:
+        if self._error is not None:
+            raise RuntimeError(f"Shard {self.key} failed: {type(self._error).__name__}: {self._error}") \
+                from self._error
+        return self._result
+
+    def close(self):
+        pass
+
+
+class ShardedDispatcher:
+    """
+    Region-sharded matching: drivers live in the shard of the cell they are in,
+    and each shard runs its own Dispatcher in a separate worker process.
+
+    Calls fan out to the shards involved, which all work in parallel, and the
+    parent merges the answers. A job whose pickup lies within `border_km` of
+    another cell is also matched there and takes the closer driver, so trucks
+    just across a shard border are not missed. Drivers that cross a border are
+    handed over to the new shard with their capacity and rating.
+    """
+
+    def __init__(self, shard_map: Optional[ShardMap] = None, candidate_pool_size: int = 5,
+                 border_km: float = 15.0, use_processes: bool = True, start_method: Optional[str] = None):
+        self.shard_map = shard_map or ShardMap()
+        self.candidate_pool_size = candidate_pool_size
+        self.border_km = border_km
+        self.use_processes = use_processes
+        self._context = multiprocessing.get_context(start_method) if use_processes else None
+        self._shards: Dict[ShardKey, Any] = {}
+        self._driver_shard: Dict[int, ShardKey] = {}
+        self._lock = threading.Lock()  # one fan-out at a time; shard pipes are not shared safely
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def shard_keys(self) -> List[ShardKey]:
+        return list(self._shards)
+
+    def _shard(self, key: ShardKey):
+        shard = self._shards.get(key)
+        if shard is None:
+            if self.use_processes:
+                shard = _ProcessShard(key, self.candidate_pool_size, self._context)
+            else:
+                shard = _LocalShard(key, self.candidate_pool_size)
+            self._shards[key] = shard
+            log_event(log, logging.INFO, "shard_started", shard=list(key),
+                      mode="process" if self.use_processes else "in-process")
+        return shard
+
+    def _fan_out(self, batches: Dict[ShardKey, Tuple[str, Any]]) -> Dict[ShardKey, Any]:
+        """
+        Sends every shard its command first, then collects, so shards run concurrently.
+        Every shard's reply is read before the first failure is raised: a reply left
+        in a pipe would be taken as the answer to that shard's next command.
+        """
+        sent = []
+        for key, (command, payload) in batches.items():
+            self._shard(key).send(command, payload)
+            sent.append(key)
+        results: Dict[ShardKey, Any] = {}
+        errors: List[Exception] = []
+        for key in sent:
+            try:
+                results[key] = self._shards[key].receive()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            if len(errors) > 1:
+                log_event(log, logging.ERROR, "shard_fan_out_failed", failed=len(errors),
+                          errors=[str(e) for e in errors])
+            raise errors[0]
+        return results
+
+    # --- Fleet updates ---
+
+    def update_drivers(self, drivers: Iterable[DriverStatus]):
+        """Adds or refreshes drivers, moving them between shards when their cell changed."""
+        with self._lock:
+            upserts: Dict[ShardKey, List[DriverStatus]] = {}
+            removals: Dict[ShardKey, List[int]] = {}
+            for driver in drivers:
+                key = self.shard_map.shard_for(driver.location)
+                previous = self._driver_shard.get(driver.id)
+                if previous is not None and previous != key:
+                    removals.setdefault(previous, []).append(driver.id)
+                self._driver_shard[driver.id] = key
+                upserts.setdefault(key, []).append(driver)
+            if removals:
+                self._fan_out({key: ("remove", ids) for key, ids in removals.items()})
+            self._fan_out({key: ("upsert", batch) for key, batch in upserts.items()})
+
+    def apply_locations(self, pings: Iterable[LocationPing]) -> int:
+        """
+        Routes a batch of location pings to their shards. A driver whose ping lands
+        in another cell is popped from the old shard and re-added to the new one.
+        Returns the number of pings dropped because no shard knows the driver.
+        """
+        with self._lock:
+            local: Dict[ShardKey, List[LocationPing]] = {}
+            crossing: Dict[ShardKey, List[LocationPing]] = {}
+            for ping in pings:
+                key = self.shard_map.shard_for((ping.lat, ping.lon))
+                previous = self._driver_shard.get(ping.driver_id)
+                if previous is None or previous == key:
+                    local.setdefault(key, []).append(ping)
+                else:
+                    crossing.setdefault(previous, []).append(ping)
+                self._driver_shard[ping.driver_id] = key
+
+            handovers: Dict[ShardKey, List[DriverStatus]] = {}
+            if crossing:
+                popped = self._fan_out({key: ("remove", [p.driver_id for p in batch])
+                                        for key, batch in crossing.items()})
+                for key, batch in crossing.items():
+                    for ping, driver in zip(batch, popped[key]):
+                        if driver is None:  # never reached the old shard; treat as a plain ping
+                            local.setdefault(self._driver_shard[ping.driver_id], []).append(ping)
+                            continue
+                        driver.location = (ping.lat, ping.lon)
+                        if ping.is_active is not None:
+                            driver.is_active = ping.is_active
+                        handovers.setdefault(self._driver_shard[ping.driver_id], []).append(driver)
+            if handovers:
+                self._fan_out({key: ("upsert", batch) for key, batch in handovers.items()})
+            if not local:
+                return 0
+            return sum(self._fan_out({key: ("locations", batch) for key, batch in local.items()}).values())
+
+    # --- Matching ---
+
+    def match_jobs(self, jobs: List[DeliveryJob]) -> List[Dict[str, Any]]:
+        """`Dispatcher.match_jobs` across shards: one result per job, in input order."""
+        if not jobs:
+            return []
+        with self._lock:
+            targets: Dict[ShardKey, List[int]] = {}
+            for position, job in enumerate(jobs):
+                for key in self.shard_map.shards_near(job.pickup_location, self.border_km):
+                    if key in self._shards:
+                        targets.setdefault(key, []).append(position)
+            answers = self._fan_out({key: ("match", [jobs[p] for p in positions])
+                                     for key, positions in targets.items()})
+
+        best: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        for key, positions in targets.items():
+            for position, result in zip(positions, answers[key]):
+                if result.get("status") != "MATCHED":
+                    continue
+                current = best[position]
+                if current is None or result["empty_miles_km"] < current["empty_miles_km"]:
+                    best[position] = {**result, "shard": list(key)}
+        return [result or Dispatcher._match_result(None, 0.0) for result in best]
+
+    def match_job(self, job: DeliveryJob) -> Dict[str, Any]:
+        return self.match_jobs([job])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_shard = self._fan_out({key: ("stats", None) for key in self._shards})
+        return {"shards": len(per_shard),
+                "per_shard": {f"{key[0]}_{key[1]}": value for key, value in per_shard.items()}}
+
+    def close(self):
+        with self._lock:
+            for shard in self._shards.values():
+                shard.close()
+            self._shards.clear()
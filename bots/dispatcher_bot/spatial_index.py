@@ -0,0 +1,200 @@
+# bots/dispatcher_bot/spatial_index.py
+
+import heapq
+import math
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from bots.dispatcher_bot.fleet_store import FleetStore
+from bots.dispatcher_bot.geo import EARTH_RADIUS_KM, KM_PER_DEGREE_LAT, haversine_km, km_per_degree_lon, unit_vector
+from bots.dispatcher_bot.models import DriverStatus
+
+Cell = Tuple[int, int]
+VECTORIZE_MIN_DRIVERS = 32  # Below this many drivers in a ring, per-row reads beat NumPy's call overhead
+
+
+class DriverSpatialIndex:
+    """
+    In-memory grid index over live driver locations.
+
+    Drivers are bucketed into fixed-size lat/lon cells (0.02 deg is roughly 2 km
+    around Charlotte). Nearest-neighbour and radius queries walk rings of cells
+    outward from the query point and stop as soon as no unvisited cell can hold
+    a closer driver, so a match only looks at the drivers around the pickup.
+
+    The index holds driver ids only: locations, capacity and status are read
+    from the `fleet` rows, the one copy of the live fleet, and DriverStatus
+    objects are built only for the drivers a query returns. Call `place` after
+    the fleet row of a driver is written or moved, and `remove` before the row
+    is dropped.
+    """
+
+    def __init__(self, fleet: FleetStore, cell_size_deg: float = 0.02):
+        if cell_size_deg <= 0:
+            raise ValueError("cell_size_deg must be positive")
+        self.fleet = fleet
+        self.cell_size_deg = cell_size_deg
+        self._driver_cells: Dict[int, Cell] = {}
+        self._cells: Dict[Cell, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._driver_cells)
+
+    def __contains__(self, driver_id: int) -> bool:
+        return driver_id in self._driver_cells
+
+    def get(self, driver_id: int) -> Optional[DriverStatus]:
+        return self.fleet.driver(driver_id) if driver_id in self._driver_cells else None
+
+    def drivers(self) -> Iterator[DriverStatus]:
+        return (self.fleet.driver(driver_id) for driver_id in list(self._driver_cells))
+
+    def cell_of(self, location: Tuple[float, float]) -> Cell:
+        return (math.floor(location[0] / self.cell_size_deg),
+                math.floor(location[1] / self.cell_size_deg))
+
+    # --- Updates ---
+
+    def place(self, driver_id: int) -> bool:
+        """Buckets a driver by its fleet row's location (re-bucketing if it moved). False if not in the fleet."""
+        row = self.fleet.row_of(driver_id)
+        if row is None:
+            return False
+        cell = self.cell_of((float(self.fleet.lat[row]), float(self.fleet.lon[row])))
+        old_cell = self._driver_cells.get(driver_id)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            self._discard_from_cell(driver_id, old_cell)
+        self._driver_cells[driver_id] = cell
+        self._cells.setdefault(cell, set()).add(driver_id)
+        return True
+
+    def remove(self, driver_id: int) -> bool:
+        cell = self._driver_cells.pop(driver_id, None)
+        if cell is None:
+            return False
+        self._discard_from_cell(driver_id, cell)
+        return True
+
+    def _discard_from_cell(self, driver_id: int, cell: Cell):
+        members = self._cells.get(cell)
+        if members is None:
+            return
+        members.discard(driver_id)
+        if not members:
+            del self._cells[cell]
+
+    # --- Queries ---
+
+    def _candidates(self, location: Tuple[float, float], required_capacity: float,
+                    cells: List[Cell]) -> List[Tuple[float, int]]:
+        """
+        (distance_km, driver_id) of the eligible (active, verified, enough
+        capacity) drivers in `cells`. A few drivers are read row by row; more
+        are scored in one vectorized pass over their fleet rows.
+        """
+        driver_ids = [driver_id for cell in cells for driver_id in self._cells[cell]]
+        if len(driver_ids) < VECTORIZE_MIN_DRIVERS:
+            return self._candidates_by_row(location, required_capacity, driver_ids)
+        fleet = self.fleet
+        rows = np.fromiter(map(fleet.row_of, driver_ids), dtype=np.intp, count=len(driver_ids))
+        eligible = np.flatnonzero(fleet.is_active[rows] & fleet.is_verified[rows]
+                                  & (fleet.capacity[rows] >= required_capacity))
+        if not len(eligible):
+            return []
+        # Great-circle distance from the chord between unit vectors (no per-driver trigonometry)
+        chords = np.linalg.norm(fleet.xyz[rows[eligible]] - unit_vector(location), axis=1)
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chords / 2.0, 1.0))
+        return list(zip(distances.tolist(), np.asarray(driver_ids)[eligible].tolist()))
+
+    def _candidates_by_row(self, location: Tuple[float, float], required_capacity: float,
+                           driver_ids: List[int]) -> List[Tuple[float, int]]:
+        fleet = self.fleet
+        lat, lon, capacity = fleet.lat, fleet.lon, fleet.capacity
+        is_active, is_verified = fleet.is_active, fleet.is_verified
+        found = []
+        for driver_id in driver_ids:
+            row = fleet.row_of(driver_id)
+            if is_active.item(row) and is_verified.item(row) and capacity.item(row) >= required_capacity:
+                found.append((haversine_km(location, (lat.item(row), lon.item(row))), driver_id))
+        return found
+
+    def nearest(self, location: Tuple[float, float], k: int,
+                required_capacity: float = 0.0,
+                max_radius_km: Optional[float] = None) -> List[Tuple[float, DriverStatus]]:
+        """
+        Returns up to k eligible drivers closest to `location` as (distance_km, driver),
+        nearest first. Only active, verified drivers with enough capacity are returned.
+        """
+        if k <= 0:
+            return []
+        best: List[Tuple[float, int]] = []  # max-heap via negated distance
+        for ring, cells in self._rings(location):
+            for distance, driver_id in self._candidates(location, required_capacity, cells):
+                if max_radius_km is not None and distance > max_radius_km:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, driver_id))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, driver_id))
+            next_ring_bound = self._ring_lower_bound_km(location, ring + 1)
+            if len(best) == k and next_ring_bound >= -best[0][0]:
+                break
+            if max_radius_km is not None and next_ring_bound > max_radius_km:
+                break
+        return [(distance, self.fleet.driver(driver_id))
+                for distance, driver_id in sorted((-neg_distance, driver_id) for neg_distance, driver_id in best)]
+
+    def within(self, location: Tuple[float, float], radius_km: float,
+               required_capacity: float = 0.0) -> List[Tuple[float, DriverStatus]]:
+        """Returns every eligible driver within `radius_km` of `location`, nearest first."""
+        found: List[Tuple[float, int]] = []
+        for ring, cells in self._rings(location):
+            found.extend(item for item in self._candidates(location, required_capacity, cells)
+                         if item[0] <= radius_km)
+            if self._ring_lower_bound_km(location, ring + 1) > radius_km:
+                break
+        found.sort()
+        return [(distance, self.fleet.driver(driver_id)) for distance, driver_id in found]
+
+    def _rings(self, location: Tuple[float, float]) -> Iterator[Tuple[int, List[Cell]]]:
+        """
+        Yields (ring, occupied cells) moving outward from the query cell. Once a
+        ring would cover more cells than are occupied, the remaining occupied cells
+        are yielded in one final step so sparse fleets never walk empty space.
+        """
+        row0, col0 = self.cell_of(location)
+        remaining = len(self._cells)
+        ring = 0
+        while remaining > 0:
+            if (2 * ring + 1) ** 2 > 4 * len(self._cells):
+                tail = [cell for cell in self._cells
+                        if max(abs(cell[0] - row0), abs(cell[1] - col0)) >= ring]
+                yield ring, tail
+                return
+            occupied = [cell for cell in self._ring_cells(row0, col0, ring) if cell in self._cells]
+            remaining -= len(occupied)
+            yield ring, occupied
+            ring += 1
+
+    @staticmethod
+    def _ring_cells(row0: int, col0: int, ring: int) -> Iterator[Cell]:
+        if ring == 0:
+            yield (row0, col0)
+            return
+        for col in range(col0 - ring, col0 + ring + 1):
+            yield (row0 - ring, col)
+            yield (row0 + ring, col)
+        for row in range(row0 - ring + 1, row0 + ring):
+            yield (row, col0 - ring)
+            yield (row, col0 + ring)
+
+    def _ring_lower_bound_km(self, location: Tuple[float, float], ring: int) -> float:
+        """Minimum distance from `location` to any point in a cell `ring` steps away."""
+        if ring <= 1:
+            return 0.0
+        steps_deg = (ring - 1) * self.cell_size_deg
+        worst_lat = min(89.9, abs(location[0]) + ring * self.cell_size_deg)
+        return steps_deg * min(KM_PER_DEGREE_LAT, km_per_degree_lon(worst_lat))
@@ -0,0 +1,7 @@
+# bots/finance_bot/__init__.py
+"""Finance Bot: earnings splits, payouts and settlement. `python -m bots.finance_bot` (runs the example workflow)."""
+
+from bots.common.lazy import lazy_exports
+
+__all__ = ["FinanceBot"]
+__getattr__, __dir__ = lazy_exports(__name__, {"FinanceBot": "finance_bot"})
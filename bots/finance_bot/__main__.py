@@ -0,0 +1,10 @@
+# bots/finance_bot/__main__.py
+
+import sys
+
+from bots.common.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main("python -m bots.finance_bot", "bots.finance_bot.finance_bot", app="bots.finance_bot.api:app",
+                  url_setting="FINANCE_URL", needs=("DRIVER_STANDARD_PERCENT", "DRIVER_EXPRESS_PERCENT"),
+                  single_process=True))
@@ -0,0 +1,52 @@
+# bots/finance_bot/api.py
+
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from bots.common.config import settings
+from bots.common.event_bus import open_event_bus, publish_hook
+from bots.common.instrumentation import configure_from_settings, instrument_app
+from bots.common.storage import open_storage
+from bots.finance_bot.finance_bot import FinanceBot, build_payout_gateway
+
+# With settings.EVENT_BUS_URL set, funding requests also arrive over the event bus, and payout and
+# marketing events are published for Governance's KPIs
+event_bus = open_event_bus(getattr(settings, "EVENT_BUS_URL", None))
+# With settings.DATABASE_URL set, funded missions are recorded in the shared DB
+finance = FinanceBot(build_payout_gateway(), event_hook=publish_hook(event_bus) if event_bus is not None else None,
+                     storage=open_storage(getattr(settings, "DATABASE_URL", None)))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if event_bus is not None:
+        await event_bus.start()
+    yield
+    if event_bus is not None:
+        await event_bus.stop()
+
+
+app = FastAPI(title="PickupLink Finance Bot", lifespan=lifespan)
+# Request metrics and GET /metrics; settings.PROFILER_ENABLED adds the /debug/profiler endpoints
+instrument_app(app, "finance", profiler_enabled=configure_from_settings(settings))
+
+
+class FundingRequest(BaseModel):
+    mission: str = "UNKNOWN"
+    estimated_spend: float = 0.0
+    bot: Optional[str] = None
+    region: Optional[str] = None
+
+
+@app.post("/allocate_funds")
+def allocate_funds(request: FundingRequest):
+    """Marketing Bot's funding request over HTTP (without an event bus)."""
+    return finance.handle_bot_funding_request(request.dict(exclude_none=True))
+
+
+if event_bus is not None:
+    # FUNDING_REQUESTED from the Marketing Bot; decisions go out on FUNDING_DECIDED
+    finance.subscribe_funding_requests(event_bus)
@@ -1,13 +1,65 @@
 # bots/finance_bot/finance_bot.py
 
-import requests
-from settings import DRIVER_STANDARD_PERCENT, DRIVER_EXPRESS_PERCENT, FINANCE_PAYOUT_API_KEY, GOVERNANCE_URL
-from typing import Dict, Any
+import logging
+import os
+import time
+from typing import Callable, Dict, Any, List, Optional
+from bots.finance_bot.payout_executor import (
+    HTTPPayoutGateway, LocalStandInGateway, PayoutExecutor, PayoutGateway, PayoutRequest, PayoutResult,
+    RetryQueue, make_idempotency_key,
+)
+from bots.common.event_bus import FUNDING_DECIDED, FUNDING_REQUESTED, Event, EventBus, Subscription
+from bots.common.config import MissingSettingError, settings
+from bots.common.storage import Storage
+from bots.common.instrumentation import get_logger, log_event
+
+log = get_logger("finance")
+
+
+def build_payout_gateway() -> PayoutGateway:
+    """The gateway from settings: FINANCE_PAYOUT_URL in production, LocalStandInGateway only with PAYOUT_STANDIN."""
+    if settings.FINANCE_PAYOUT_URL:
+        return HTTPPayoutGateway(settings.FINANCE_PAYOUT_URL, settings.FINANCE_PAYOUT_API_KEY)
+    if settings.PAYOUT_STANDIN:
+        log_event(log, logging.WARNING, "payout_standin", message="Payouts are simulated, no money moves")
+        return LocalStandInGateway()
+    raise MissingSettingError("Payouts need FINANCE_PAYOUT_URL (or PAYOUT_STANDIN=True for development)")
+
+
+def default_payout_journal_path() -> str:
+    """settings.PAYOUT_JOURNAL_PATH, or payout_retry_queue.jsonl under settings.DATA_DIR."""
+    return settings.PAYOUT_JOURNAL_PATH or os.path.join(settings.DATA_DIR, "payout_retry_queue.jsonl")
+
 
 class FinanceBot:
-    def __init__(self):
-        # In a real app, this connects to the DB using DATABASE_URL from settings
-        print("FinanceBot Initialized. Controlling all platform revenue streams.")
+    def __init__(self, payout_gateway: PayoutGateway, payout_journal_path: Optional[str] = None,
+                 event_hook: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 storage: Optional[Storage] = None):
+        # Shared DB: platform fees and driver earnings (invoices, settlements), payouts
+        # and funded bot_missions are persisted when given
+        self.storage = storage
+        log_event(log, logging.INFO, "finance_bot_initialized")
+        self.driver_standard_percent = settings.DRIVER_STANDARD_PERCENT
+        self.driver_express_percent = settings.DRIVER_EXPRESS_PERCENT
+        # Bulk payouts: concurrent, rate-limited, idempotent, with a durable retry queue.
+        # No default gateway: production passes build_payout_gateway(), benchmarks LocalStandInGateway
+        self.payout_executor = PayoutExecutor(
+            payout_gateway,
+            RetryQueue(payout_journal_path or default_payout_journal_path()),
+            max_workers=16,
+            rate_per_sec=50.0,
+        )
+        # Receives payout/marketing events, e.g. GovernanceBot's KPIEngine.handle
+        self.event_hook = event_hook
+
+    def _emit(self, event_type: str, payload: Dict[str, Any]):
+        if self.event_hook is None:
+            return
+        try:
+            self.event_hook(event_type, payload)
+        except Exception as e:
+            # Metrics must never break a payout run
+            log_event(log, logging.WARNING, "event_hook_failed", event_type=event_type, error=str(e))
         
     def calculate_distribution(self, job_data: Dict[str, Any]) -> Dict[str, float]:
         """Calculates the split based on job type (Standard vs Express)."""
@@ -16,11 +68,11 @@ class FinanceBot:
         is_express = job_data.get('is_express', False)
         
         if is_express:
-            driver_share = base_price * DRIVER_EXPRESS_PERCENT
-            platform_fee = base_price * (1.0 - DRIVER_EXPRESS_PERCENT) # 25%
+            driver_share = base_price * self.driver_express_percent
+            platform_fee = base_price * (1.0 - self.driver_express_percent) # 25%
         else:
-            driver_share = base_price * DRIVER_STANDARD_PERCENT
-            platform_fee = base_price * (1.0 - DRIVER_STANDARD_PERCENT) # 20%
+            driver_share = base_price * self.driver_standard_percent
+            platform_fee = base_price * (1.0 - self.driver_standard_percent) # 20%
 
         # Governance/Bot Allocation Placeholder (controlled by Governance Bot later)
         bot_funding = 0.0 
@@ -35,24 +87,99 @@ class FinanceBot:
             "bot_funding_allocated": round(bot_funding, 2)
         }
 
-    def process_payout(self, driver_id: int, amount: float) -> bool:
+    def process_invoice(self, job_data: Dict[str, Any]) -> Dict[str, float]:
         """
-        Handles automated payout to the independent driver's account via payment gateway.
+        Final split of a completed job (job_id, driver_id, base_price, is_express),
+        booked as the platform fee and the driver's earning when storage is set.
+        Invoicing the same job again does not book it twice.
         """
-        print(f"Initiating Payout of ${amount:.2f} to Driver ID: {driver_id}...")
-        
-        # --- Payment Gateway Integration (Stripe/PayPal/ACH) ---
-        # headers = {'Authorization': f'Bearer {FINANCE_PAYOUT_API_KEY}'}
-        # response = requests.post(f"https://payment.gateway/payout", json={...})
-        
-        # Simulation: Assume success 95% of the time
-        if amount > 0 and (hash(driver_id) % 20) != 0: 
-            print(f"Payout successful for Driver {driver_id}.")
-            return True
-        else:
-            print(f"Payout FAILED for Driver {driver_id}. Logging for manual review.")
-            return False
-            
+        distribution = self.calculate_distribution(job_data)
+        job_id, driver_id = job_data.get("job_id"), job_data.get("driver_id")
+        reference = f"invoice:{job_id}"
+        if self.storage is not None and driver_id is not None and not self.storage.has_transactions(
+                reference, "platform_fee"):
+            now = time.time()
+            self.storage.record_transactions([
+                (driver_id, job_id, "platform_fee", int(round(distribution["platform_fee"] * 100)), reference, now),
+                (driver_id, job_id, "job_earning", int(round(distribution["driver_payout"] * 100)), reference, now),
+            ])
+        return distribution
+
+    def pay_drivers(self, amounts_cents: Dict[int, int], reference: str) -> Dict[str, Any]:
+        """
+        Pays many drivers at once through the payout executor. `reference` identifies
+        the run (e.g. "settlement-2026-10-18"): re-running it never pays anyone twice.
+        """
+        payouts = [PayoutRequest(driver_id, cents, make_idempotency_key(driver_id, cents, reference))
+                   for driver_id, cents in amounts_cents.items() if cents > 0]
+        results = self.payout_executor.run(payouts)
+        self._emit_payout_results(payouts, results)
+        self._record_payouts(payouts, results)
+        failed: List[int] = [result.driver_id for result in results if not result.ok]
+        log_event(log, logging.INFO, "payout_run", reference=reference, paid=len(results) - len(failed),
+                  failed=len(failed))
+        return {"payouts_sent": len(results) - len(failed), "payouts_failed": len(failed),
+                "failed_driver_ids": failed}
+
+    def _emit_payout_results(self, payouts: List[PayoutRequest], results: List[PayoutResult]):
+        for payout, result in zip(payouts, results):
+            if result.skipped:
+                continue
+            self._emit("payout_succeeded" if result.ok else "payout_failed",
+                       {"driver_id": payout.driver_id, "amount": payout.amount})
+
+    def _record_payouts(self, payouts: List[PayoutRequest], results: List[PayoutResult]):
+        if self.storage is None:
+            return
+        now = time.time()
+        self.storage.record_transactions(
+            (payout.driver_id, None, "payout", payout.amount_cents, payout.idempotency_key, now)
+            for payout, result in zip(payouts, results) if result.ok and not result.skipped
+        )
+
+    def retry_failed_payouts(self) -> Dict[str, Any]:
+        """Re-attempts queued payouts whose backoff has elapsed (run on a schedule)."""
+        due = self.payout_executor.retry_queue.due()
+        results = self.payout_executor.run(due)
+        self._emit_payout_results(due, results)
+        self._record_payouts(due, results)
+        return {"retried": len(results), "succeeded": sum(1 for result in results if result.ok),
+                "metrics": self.payout_executor.metrics()}
+
+    def settle_ledger(self, ledger_path: str, reference: Optional[str] = None) -> Dict[str, Any]:
+        """
+        End-of-day settlement: splits every job in the ledger (CSV or Parquet) with
+        exact integer-cent arithmetic, aggregates per driver and issues one payout
+        per driver instead of one per job.
+        """
+        # numpy is only needed for settlement runs, not for every FinanceBot worker
+        from bots.finance_bot.settlement import SettlementEngine, read_ledger_csv, read_ledger_parquet
+
+        engine = SettlementEngine(self.driver_standard_percent, self.driver_express_percent)
+        reader = read_ledger_parquet if ledger_path.endswith(".parquet") else read_ledger_csv
+        report = engine.settle(reader(ledger_path))
+        log_event(log, logging.INFO, "ledger_settled", ledger=ledger_path, jobs=report.jobs, drivers=len(report.drivers))
+        reference = reference or f"settlement:{ledger_path}"
+        self._record_settlement(report, reference)
+        outcome = self.pay_drivers({driver_id: entry.driver_cents for driver_id, entry in report.drivers.items()},
+                                   reference)
+        return {**report.summary(), **outcome}
+
+    def _record_settlement(self, report, reference: str):
+        """Books per-driver platform fees and earnings once per settlement run (re-runs are not re-booked)."""
+        if self.storage is None or self.storage.has_transactions(reference, "platform_fee"):
+            return
+        now = time.time()
+        rows = []
+        for driver_id, entry in report.drivers.items():
+            rows.append((driver_id, None, "platform_fee", entry.platform_cents, reference, now))
+            rows.append((driver_id, None, "job_earning", entry.driver_cents, reference, now))
+        self.storage.record_transactions(rows)
+
+    def record_campaign_revenue(self, mission: str, amount: float):
+        """Books revenue attributed to a funded mission (feeds Governance's marketing ROI)."""
+        self._emit("marketing_revenue", {"mission": mission, "amount": amount})
+
     def handle_bot_funding_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Endpoint for other bots (like Marketing Bot) to request micro-funding.
@@ -67,16 +194,30 @@ class FinanceBot:
         # Simple Approval Logic: Approve up to $1000 max per mission request for Phase 1.
         approved_amount = min(requested_amount, 1000.00)
         
-        print(f"Funding request: Mission {mission}. Requested: ${requested_amount}, Approved: ${approved_amount}")
+        log_event(log, logging.INFO, "funding_decided", mission=mission, requested=requested_amount,
+                  approved=approved_amount)
+        self._emit("marketing_spend", {"mission": mission, "amount": approved_amount})
         
-        # Log the potential allocation to the bot_missions table (via Governance Bot/DB layer)
+        if self.storage is not None:
+            self.storage.record_mission(mission, request_data.get("bot", "marketing_bot"),
+                                        int(round(approved_amount * 100)), region=request_data.get("region"))
         
         return {"success": True, "approved_amount": approved_amount}
 
+    def subscribe_funding_requests(self, event_bus: EventBus) -> Subscription:
+        """Serves FUNDING_REQUESTED events (Marketing Bot) and publishes each decision on FUNDING_DECIDED."""
+
+        def on_requests(events: List[Event]):
+            decisions = [{**self.handle_bot_funding_request(event.payload), "mission": event.payload.get("mission"),
+                          "request_offset": event.offset} for event in events]
+            event_bus.publish_many(FUNDING_DECIDED, decisions)
+
+        return event_bus.subscribe(FUNDING_REQUESTED, "finance", on_requests, batch_size=50)
+
 
 if __name__ == '__main__':
     # --- Example Execution ---
-    finance = FinanceBot()
+    finance = FinanceBot(build_payout_gateway())
     
     # 1. Standard Job Example
     standard_job = {'base_price': 100.00, 'is_express': False, 'driver_id': 101}
@@ -92,8 +233,9 @@ if __name__ == '__main__':
     print(f"Platform Fee (25%): ${dist_exp['platform_fee']}")
     print(f"Driver Payout (75%): ${dist_exp['driver_payout']}")
 
-    # 3. Payout Test
-    finance.process_payout(driver_id=101, amount=dist_std['driver_payout'])
+    # 3. Payout Test (through the payout executor; re-running the same reference pays nobody twice)
+    payout = finance.pay_drivers({101: int(round(dist_std['driver_payout'] * 100))}, reference="example-payout")
+    print(f"\nPayout result: {payout}")
     
     # 4. Funding Test
     funding_result = finance.handle_bot_funding_request({
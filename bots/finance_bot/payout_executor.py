@@ -0,0 +1,340 @@
+# bots/finance_bot/payout_executor.py
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+from bots.common.instrumentation import get_logger, log_event
+
+log = get_logger("finance.payouts")
+
+
+@dataclass
+class PayoutRequest:
+    driver_id: int
+    amount_cents: int
+    idempotency_key: str
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    last_error: Optional[str] = None
+
+    @property
+    def amount(self) -> float:
+        return self.amount_cents / 100
+
+
+@dataclass
+class PayoutResult:
+    idempotency_key: str
+    driver_id: int
+    ok: bool
+    retryable: bool = False
+    error: Optional[str] = None
+    gateway_ref: Optional[str] = None
+    skipped: bool = False  # key was already paid; no gateway call made
+
+
+def make_idempotency_key(driver_id: int, amount_cents: int, reference: str) -> str:
+    """
+    Deterministic key for one payout. `reference` names the run (e.g. the
+    settlement date), so re-running the same run produces the same keys and the
+    gateway can refuse to pay twice.
+    """
+    digest = hashlib.sha256(f"{reference}:{driver_id}:{amount_cents}".encode()).hexdigest()
+    return f"payout-{digest[:32]}"
+
+
+# --- Gateways ---
+
+class PayoutGateway:
+    """A payment gateway that pays one request. Must honour the idempotency key."""
+
+    def send(self, request: PayoutRequest) -> PayoutResult:
+        raise NotImplementedError
+
+
+class HTTPPayoutGateway(PayoutGateway):
+    """Stripe/ACH style REST gateway: one POST per payout with an Idempotency-Key header."""
+
+    def __init__(self, url: str, api_key: str, timeout: float = 10.0):
+        import requests  # Deferred: only the real gateway needs it
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def send(self, request: PayoutRequest) -> PayoutResult:
+        import requests
+
+        try:
+            response = self.session.post(
+                self.url,
+                json={"driver_id": request.driver_id, "amount_cents": request.amount_cents},
+                headers={"Idempotency-Key": request.idempotency_key},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            return PayoutResult(request.idempotency_key, request.driver_id, ok=False, retryable=True, error=str(e))
+        if response.ok:
+            return PayoutResult(request.idempotency_key, request.driver_id, ok=True,
+                                gateway_ref=response.json().get("id"))
+        # 429 and 5xx are worth retrying; other 4xx (bad account, bad amount) are not
+        retryable = response.status_code == 429 or response.status_code >= 500
+        return PayoutResult(request.idempotency_key, request.driver_id, ok=False, retryable=retryable,
+                            error=f"HTTP {response.status_code}")
+
+
+class LocalStandInGateway(PayoutGateway):
+    """
+    In-process gateway for development and benchmarks. Simulates network latency
+    and transient failures, and, like a real gateway, treats a repeated
+    idempotency key as the original payout instead of paying again.
+    """
+
+    def __init__(self, latency: float = 0.02, failure_rate: float = 0.05, seed: Optional[int] = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.paid: Dict[str, int] = {}  # idempotency key -> cents actually moved
+        self.calls = 0
+        self.duplicate_calls = 0
+
+    def send(self, request: PayoutRequest) -> PayoutResult:
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if request.idempotency_key in self.paid:
+                self.duplicate_calls += 1
+                return PayoutResult(request.idempotency_key, request.driver_id, ok=True,
+                                    gateway_ref=request.idempotency_key)
+            if request.amount_cents <= 0:
+                return PayoutResult(request.idempotency_key, request.driver_id, ok=False,
+                                    error="Amount must be positive")
+            if self._random.random() < self.failure_rate:
+                return PayoutResult(request.idempotency_key, request.driver_id, ok=False, retryable=True,
+                                    error="Gateway timeout (simulated)")
+            self.paid[request.idempotency_key] = request.amount_cents
+        return PayoutResult(request.idempotency_key, request.driver_id, ok=True,
+                            gateway_ref=request.idempotency_key)
+
+    def total_paid_cents(self) -> int:
+        with self._lock:
+            return sum(self.paid.values())
+
+
+# --- Rate limiting and durable retries ---
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` acquisitions per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self.clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryQueue:
+    """
+    Durable queue of payouts awaiting retry, plus the set of keys already paid.
+
+    Every change is appended to a JSON-lines journal and fsynced before the call
+    returns, so a crash never loses a failed payout or forgets a completed one.
+    Loading replays the journal; `compact()` rewrites it to the live state.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.pending: Dict[str, PayoutRequest] = {}
+        self.dead: Dict[str, PayoutRequest] = {}
+        self.completed: set = set()
+        self._load()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._journal = open(self.path, "a")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash mid-write
+                self._apply(entry)
+
+    def _apply(self, entry: Dict):
+        op, key = entry["op"], entry["key"]
+        if op == "retry":
+            self.pending[key] = PayoutRequest(**entry["payout"])
+        elif op == "dead":
+            self.pending.pop(key, None)
+            self.dead[key] = PayoutRequest(**entry["payout"])
+        elif op == "done":
+            self.pending.pop(key, None)
+            self.dead.pop(key, None)
+            self.completed.add(key)
+
+    def _write(self, entry: Dict):
+        self._apply(entry)
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def schedule(self, payout: PayoutRequest):
+        with self._lock:
+            self._write({"op": "retry", "key": payout.idempotency_key, "payout": asdict(payout)})
+
+    def dead_letter(self, payout: PayoutRequest):
+        with self._lock:
+            self._write({"op": "dead", "key": payout.idempotency_key, "payout": asdict(payout)})
+
+    def mark_done(self, key: str):
+        with self._lock:
+            self._write({"op": "done", "key": key})
+
+    def is_done(self, key: str) -> bool:
+        with self._lock:
+            return key in self.completed
+
+    def due(self, now: Optional[float] = None) -> List[PayoutRequest]:
+        now = time.time() if now is None else now
+        with self._lock:
+            return [p for p in self.pending.values() if p.next_attempt_at <= now]
+
+    def compact(self):
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as handle:
+                for key in self.completed:
+                    handle.write(json.dumps({"op": "done", "key": key}) + "\n")
+                for op, entries in (("dead", self.dead), ("retry", self.pending)):
+                    for key, payout in entries.items():
+                        handle.write(json.dumps({"op": op, "key": key, "payout": asdict(payout)}) + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            self._journal.close()
+            os.replace(tmp_path, self.path)
+            self._journal = open(self.path, "a")
+
+    def close(self):
+        with self._lock:
+            self._journal.close()
+
+
+# --- Executor ---
+
+class PayoutExecutor:
+    """
+    Runs gateway payouts concurrently on a thread pool, capped at `rate_per_sec`.
+
+    A payout whose key is already recorded as done is skipped. Retryable failures
+    go to the RetryQueue with exponential backoff (plus jitter); after
+    `max_attempts`, or on a permanent failure, the payout is dead-lettered for
+    manual review. Call `retry_due()` periodically to drain the queue.
+    """
+
+    def __init__(self, gateway: PayoutGateway, retry_queue: RetryQueue, max_workers: int = 16,
+                 rate_per_sec: float = 50.0, max_attempts: int = 5,
+                 backoff_base: float = 2.0, backoff_max: float = 600.0):
+        self.gateway = gateway
+        self.retry_queue = retry_queue
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate_per_sec)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._counters = {"attempts": 0, "succeeded": 0, "failed_attempts": 0,
+                          "scheduled_retries": 0, "dead_lettered": 0, "skipped_already_paid": 0}
+        self._busy_seconds = 0.0
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _execute(self, payout: PayoutRequest) -> PayoutResult:
+        if self.retry_queue.is_done(payout.idempotency_key):
+            self._count("skipped_already_paid")
+            return PayoutResult(payout.idempotency_key, payout.driver_id, ok=True, skipped=True)
+
+        self.limiter.acquire()
+        payout.attempts += 1
+        self._count("attempts")
+        try:
+            result = self.gateway.send(payout)
+        except Exception as e:  # a broken gateway client must not kill the run
+            result = PayoutResult(payout.idempotency_key, payout.driver_id, ok=False, retryable=True, error=str(e))
+
+        if result.ok:
+            self.retry_queue.mark_done(payout.idempotency_key)
+            self._count("succeeded")
+            return result
+
+        self._count("failed_attempts")
+        payout.last_error = result.error
+        if result.retryable and payout.attempts < self.max_attempts:
+            payout.next_attempt_at = time.time() + self._backoff(payout.attempts)
+            self.retry_queue.schedule(payout)
+            self._count("scheduled_retries")
+        else:
+            self.retry_queue.dead_letter(payout)
+            self._count("dead_lettered")
+            log_event(log, logging.ERROR, "payout_dead_lettered", driver_id=payout.driver_id,
+                      attempts=payout.attempts, error=payout.last_error)
+        return result
+
+    def run(self, payouts: Iterable[PayoutRequest]) -> List[PayoutResult]:
+        """Executes payouts concurrently; returns one result per payout in input order."""
+        payouts = list(payouts)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="payout") as pool:
+            results = list(pool.map(self._execute, payouts))
+        with self._lock:
+            self._busy_seconds += time.perf_counter() - started
+        return results
+
+    def retry_due(self, now: Optional[float] = None) -> List[PayoutResult]:
+        """Re-attempts every queued payout whose backoff has elapsed."""
+        return self.run(self.retry_queue.due(now))
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            counters = dict(self._counters)
+            busy = self._busy_seconds
+        attempts = counters["attempts"]
+        return {
+            **counters,
+            "pending_retries": len(self.retry_queue.pending),
+            "dead_letter_size": len(self.retry_queue.dead),
+            "payouts_per_sec": round(counters["succeeded"] / busy, 2) if busy else 0.0,
+            "failure_rate": round(counters["failed_attempts"] / attempts, 4) if attempts else 0.0,
+        }
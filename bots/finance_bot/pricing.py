@@ -0,0 +1,252 @@
+# bots/finance_bot/pricing.py
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bots.dispatcher_bot.geo import cosine_to_km, haversine_km, unit_vectors
+from bots.dispatcher_bot.routing import RoutingProvider
+
+Cell = Tuple[int, int]  # (floor(lat / cell_deg), floor(lon / cell_deg))
+
+PRICING_CELL_DEG = 0.05  # ~5.5 km cells; surge looks at the 3 x 3 block around the pickup
+
+
+def pricing_cell(lat: float, lon: float, cell_deg: float = PRICING_CELL_DEG) -> Cell:
+    return (math.floor(lat / cell_deg), math.floor(lon / cell_deg))
+
+
+@dataclass
+class PricingConfig:
+    """Tariff. Money is in integer cents, like settlement."""
+    base_fare_cents: int = 1_500
+    per_km_cents: int = 120
+    per_minute_cents: int = 25
+    minimum_fare_cents: int = 2_500
+    express_multiplier: float = 1.25
+    # (max required capacity, multiplier): bigger loads need bigger trucks
+    capacity_tiers: Tuple[Tuple[float, float], ...] = ((150.0, 1.0), (300.0, 1.15), (math.inf, 1.3))
+    road_factor: float = 1.3          # Straight-line km -> road km when no routing provider is given
+    average_speed_kmh: float = 45.0   # Urban average for the duration estimate
+    max_surge: float = 2.5
+    surge_sensitivity: float = 0.5    # Surge added per unit of demand/supply pressure above 1
+    surge_step: float = 0.05          # Surge is rounded to this step so quotes do not jitter
+
+
+@dataclass
+class Quote:
+    price_cents: int
+    distance_km: float
+    duration_minutes: float
+    surge: float
+    cell: Cell
+    breakdown: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def price(self) -> float:
+        return self.price_cents / 100
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "price": self.price,
+            "price_cents": self.price_cents,
+            "distance_km": round(self.distance_km, 2),
+            "duration_minutes": round(self.duration_minutes, 1),
+            "surge": self.surge,
+            "breakdown": self.breakdown,
+        }
+
+
+class SurgeTable:
+    """
+    Per-cell surge multipliers from live supply (online drivers) and demand
+    (open jobs). A cell's surge uses the counts of the 3 x 3 block around it;
+    those block sums are kept up to date, so a change in one cell adjusts and
+    re-prices only the 9 cells that can see it, and quoting is a single dict
+    lookup. Not thread-safe: update and read it from one thread (the API's
+    event loop).
+    """
+
+    def __init__(self, config: Optional[PricingConfig] = None, cell_deg: float = PRICING_CELL_DEG):
+        self.config = config if config is not None else PricingConfig()
+        self.cell_deg = cell_deg
+        self.supply: Counter = Counter()
+        self.demand: Counter = Counter()
+        self._supply_blocks: Counter = Counter()  # cell -> sum over its 3 x 3 block
+        self._demand_blocks: Counter = Counter()
+        self.surge: Dict[Cell, float] = {}  # Only cells above 1.0 are stored
+        self._driver_cells: Dict[int, Cell] = {}
+        self._job_cells: Dict[int, Cell] = {}
+        self.refreshes = 0
+
+    def cell(self, lat: float, lon: float) -> Cell:
+        return pricing_cell(lat, lon, self.cell_deg)
+
+    def surge_at(self, cell: Cell) -> float:
+        return self.surge.get(cell, 1.0)
+
+    def _adjust(self, counts: Counter, blocks: Counter, cell: Cell, delta: int):
+        """Changes one cell's count and re-prices the 9 cells whose block contains it."""
+        counts[cell] += delta
+        if counts[cell] <= 0:
+            del counts[cell]
+        config = self.config
+        i, j = cell
+        for target in ((i - 1, j - 1), (i - 1, j), (i - 1, j + 1), (i, j - 1), (i, j), (i, j + 1),
+                       (i + 1, j - 1), (i + 1, j), (i + 1, j + 1)):
+            blocks[target] += delta
+            if blocks[target] <= 0:
+                del blocks[target]
+            demand = self._demand_blocks.get(target, 0)
+            if not demand:
+                self.surge.pop(target, None)
+                continue
+            pressure = demand / max(self._supply_blocks.get(target, 0), 1)
+            surge = 1.0 + config.surge_sensitivity * (pressure - 1.0)
+            surge = min(config.max_surge, round(surge / config.surge_step) * config.surge_step)
+            if surge > 1.0:
+                self.surge[target] = round(surge, 2)
+            else:
+                self.surge.pop(target, None)
+        self.refreshes += 1
+
+    def _move(self, counts: Counter, old: Optional[Cell], new: Optional[Cell]):
+        if old == new:
+            return
+        blocks = self._supply_blocks if counts is self.supply else self._demand_blocks
+        if old is not None:
+            self._adjust(counts, blocks, old, -1)
+        if new is not None:
+            self._adjust(counts, blocks, new, 1)
+
+    # --- Supply ---
+
+    def set_driver(self, driver_id: int, lat: float, lon: float, active: bool = True):
+        """One driver's position/online status (e.g. from location events)."""
+        new = self.cell(lat, lon) if active else None
+        old = self._driver_cells.pop(driver_id, None)
+        if new is not None:
+            self._driver_cells[driver_id] = new
+        self._move(self.supply, old, new)
+
+    def set_supply_counts(self, counts: Dict[Cell, int]):
+        """Replaces supply with per-cell online driver counts (e.g. the Dispatcher's /fleet/supply)."""
+        self._driver_cells.clear()
+        for cell in set(counts) | set(self.supply):
+            delta = counts.get(cell, 0) - self.supply.get(cell, 0)
+            if delta:
+                self._adjust(self.supply, self._supply_blocks, cell, delta)
+
+    # --- Demand ---
+
+    def open_job(self, job_id: int, lat: float, lon: float):
+        cell = self.cell(lat, lon)
+        old = self._job_cells.get(job_id)
+        self._job_cells[job_id] = cell
+        self._move(self.demand, old, cell)
+
+    def close_job(self, job_id: int):
+        self._move(self.demand, self._job_cells.pop(job_id, None), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"online_drivers": sum(self.supply.values()), "open_jobs": sum(self.demand.values()),
+                "surging_cells": len(self.surge), "max_surge": max(self.surge.values(), default=1.0),
+                "refreshes": self.refreshes}
+
+
+class PricingEngine:
+    """
+    Job quotes from distance, duration, required capacity, the express flag
+    and the pickup cell's surge:
+
+        price = max(minimum, base + per_km * km + per_minute * minutes)
+                x capacity tier x express x surge
+
+    Distance is straight-line km times `road_factor` unless a routing provider
+    is given for single quotes. `quote_many` prices a whole batch with vectorized
+    distances for partner bulk pricing.
+    """
+
+    def __init__(self, config: Optional[PricingConfig] = None, surge_table: Optional[SurgeTable] = None,
+                 routing: Optional[RoutingProvider] = None):
+        self.config = config if config is not None else PricingConfig()
+        self.surge_table = surge_table if surge_table is not None else SurgeTable(self.config)
+        self.routing = routing
+        self.quotes = 0
+
+    def capacity_multiplier(self, required_capacity: float) -> float:
+        for max_capacity, multiplier in self.config.capacity_tiers:
+            if required_capacity <= max_capacity:
+                return multiplier
+        return self.config.capacity_tiers[-1][1]
+
+    def _price(self, distance_km: float, duration_minutes: float, required_capacity: float,
+               is_express: bool, cell: Cell) -> Quote:
+        config = self.config
+        surge = self.surge_table.surge_at(cell)
+        base = config.base_fare_cents + config.per_km_cents * distance_km + config.per_minute_cents * duration_minutes
+        base = max(config.minimum_fare_cents, base)
+        multiplier = self.capacity_multiplier(required_capacity) * (config.express_multiplier if is_express else 1.0)
+        adjusted = base * multiplier
+        price_cents = round(adjusted * surge)
+        breakdown = {"base_cents": round(base), "capacity_and_express_cents": round(adjusted) - round(base),
+                     "surge_cents": price_cents - round(adjusted)}
+        return Quote(price_cents, distance_km, duration_minutes, surge, cell, breakdown)
+
+    def quote(self, pickup: Sequence[float], dropoff: Sequence[float], required_capacity: float = 0.0,
+              is_express: bool = False) -> Quote:
+        self.quotes += 1
+        if self.routing is not None:
+            route = self.routing.route(tuple(pickup), tuple(dropoff))
+            distance_km, duration_minutes = route.distance_km, route.duration_minutes
+        else:
+            distance_km = haversine_km(tuple(pickup), tuple(dropoff)) * self.config.road_factor
+            duration_minutes = distance_km / self.config.average_speed_kmh * 60.0
+        return self._price(distance_km, duration_minutes, required_capacity, is_express,
+                           self.surge_table.cell(pickup[0], pickup[1]))
+
+    def quote_many(self, shipments: Iterable[Dict[str, Any]]) -> List[Quote]:
+        """
+        Prices a batch of {"pickup_coords", "dropoff_coords", "required_capacity",
+        "is_express"} dicts; one Quote per shipment, in order. Always uses the
+        straight-line estimate (one vectorized pass, no per-shipment routing).
+        """
+        shipments = list(shipments)
+        if not shipments:
+            return []
+        pickups = np.array([s["pickup_coords"] for s in shipments], dtype=np.float64)
+        dropoffs = np.array([s["dropoff_coords"] for s in shipments], dtype=np.float64)
+        cosines = np.einsum("ij,ij->i", unit_vectors(pickups), unit_vectors(dropoffs))
+        distances = cosine_to_km(cosines) * self.config.road_factor
+        durations = distances / self.config.average_speed_kmh * 60.0
+        config = self.config
+        cell_deg = self.surge_table.cell_deg
+        cells = list(zip(np.floor(pickups[:, 0] / cell_deg).astype(np.int64).tolist(),
+                         np.floor(pickups[:, 1] / cell_deg).astype(np.int64).tolist()))
+        surge_at = self.surge_table.surge_at
+        surges = np.array([surge_at(cell) for cell in cells])
+        capacities = np.array([s.get("required_capacity", 0.0) for s in shipments], dtype=np.float64)
+        express = np.array([bool(s.get("is_express", False)) for s in shipments])
+
+        tier_limits = [limit for limit, _ in config.capacity_tiers]
+        tier_multipliers = np.array([multiplier for _, multiplier in config.capacity_tiers])
+        tiers = np.minimum(np.searchsorted(tier_limits, capacities, side="left"), len(tier_multipliers) - 1)
+        multipliers = tier_multipliers[tiers] * np.where(express, config.express_multiplier, 1.0)
+        base = np.maximum(config.minimum_fare_cents, config.base_fare_cents + config.per_km_cents * distances
+                          + config.per_minute_cents * durations)
+        adjusted = base * multipliers
+        # Same arithmetic and round-half-even as _price
+        prices = np.round(adjusted * surges).astype(np.int64).tolist()
+        base_cents = np.round(base).astype(np.int64).tolist()
+        adjusted_cents = np.round(adjusted).astype(np.int64).tolist()
+
+        self.quotes += len(shipments)
+        return [
+            Quote(price, distance, duration, surge, cell,
+                  {"base_cents": b, "capacity_and_express_cents": a - b, "surge_cents": price - a})
+            for price, distance, duration, surge, cell, b, a in zip(
+                prices, distances.tolist(), durations.tolist(), surges.tolist(), cells, base_cents, adjusted_cents)
+        ]
@@ -0,0 +1,160 @@
+# bots/finance_bot/settlement.py
+
+import csv
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+# One ledger row: (job_id, driver_id, price_cents, is_express)
+LedgerRow = Tuple[int, int, int, bool]
+
+
+def to_basis_points(fraction: float) -> int:
+    """0.8 -> 8000. Goes through str() so 0.8 is not read as 0.8000000000000000444."""
+    return int((Decimal(str(fraction)) * 10_000).to_integral_value(ROUND_HALF_UP))
+
+
+def to_cents(amount) -> int:
+    """Exact dollars -> integer cents (half-up), accepting str, int, float or Decimal."""
+    if isinstance(amount, str):
+        # Fast path for ledger text like "123.45" / "-7.5" / "12"
+        whole, _, frac = amount.strip().partition(".")
+        digits = whole[1:] if whole[:1] == "-" else whole
+        if digits.isdigit() and len(frac) <= 2 and (not frac or frac.isdigit()):
+            cents = int(digits) * 100 + int(frac.ljust(2, "0"))
+            return -cents if whole[:1] == "-" else cents
+    return int((Decimal(str(amount)) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+@dataclass
+class DriverSettlement:
+    """End-of-day totals for one driver, all in integer cents."""
+    driver_id: int
+    jobs: int = 0
+    gross_cents: int = 0
+    driver_cents: int = 0
+    platform_cents: int = 0
+
+    @property
+    def payout_amount(self) -> Decimal:
+        return Decimal(self.driver_cents) / 100
+
+
+@dataclass
+class SettlementReport:
+    drivers: Dict[int, DriverSettlement] = field(default_factory=dict)
+    jobs: int = 0
+    gross_cents: int = 0
+    driver_cents: int = 0
+    platform_cents: int = 0
+
+    def summary(self) -> Dict[str, str]:
+        return {
+            "jobs": str(self.jobs),
+            "drivers": str(len(self.drivers)),
+            "gross_revenue": str(Decimal(self.gross_cents) / 100),
+            "driver_payouts": str(Decimal(self.driver_cents) / 100),
+            "platform_fees": str(Decimal(self.platform_cents) / 100),
+        }
+
+
+class SettlementEngine:
+    """
+    Batch settlement of a day's ledger.
+
+    Rows are processed in fixed-size chunks: each chunk's driver/platform split is
+    computed with integer-cent NumPy arithmetic (driver share rounded half-up to
+    the cent, platform fee is the exact remainder, so the two always add up to
+    the price) and folded into per-driver totals. Memory is bounded by the chunk
+    size plus one running total per driver, however long the ledger is.
+    """
+
+    def __init__(self, driver_standard_percent: float, driver_express_percent: float,
+                 chunk_size: int = 100_000):
+        self.standard_bp = to_basis_points(driver_standard_percent)
+        self.express_bp = to_basis_points(driver_express_percent)
+        self.chunk_size = chunk_size
+
+    def split(self, price_cents: np.ndarray, is_express: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized (driver_cents, platform_cents) for arrays of prices."""
+        basis_points = np.where(is_express, self.express_bp, self.standard_bp).astype(np.int64)
+        driver_cents = (price_cents * basis_points + 5_000) // 10_000
+        return driver_cents, price_cents - driver_cents
+
+    def settle(self, rows: Iterable[LedgerRow]) -> SettlementReport:
+        report = SettlementReport()
+        for chunk in _chunks(rows, self.chunk_size):
+            self._settle_chunk(chunk, report)
+        return report
+
+    def _settle_chunk(self, chunk: List[LedgerRow], report: SettlementReport):
+        _, driver_ids, prices, express = zip(*chunk)
+        driver_ids = np.fromiter(driver_ids, dtype=np.int64, count=len(chunk))
+        price_cents = np.fromiter(prices, dtype=np.int64, count=len(chunk))
+        is_express = np.fromiter(express, dtype=np.bool_, count=len(chunk))
+        driver_cents, platform_cents = self.split(price_cents, is_express)
+
+        unique_ids, inverse = np.unique(driver_ids, return_inverse=True)
+        totals = np.zeros((len(unique_ids), 4), dtype=np.int64)
+        np.add.at(totals, inverse, np.column_stack((np.ones_like(price_cents), price_cents,
+                                                    driver_cents, platform_cents)))
+
+        for driver_id, (jobs, gross, driver, platform) in zip(unique_ids.tolist(), totals.tolist()):
+            entry = report.drivers.get(driver_id)
+            if entry is None:
+                entry = report.drivers[driver_id] = DriverSettlement(driver_id)
+            entry.jobs += jobs
+            entry.gross_cents += gross
+            entry.driver_cents += driver
+            entry.platform_cents += platform
+        report.jobs += len(chunk)
+        report.gross_cents += int(price_cents.sum())
+        report.driver_cents += int(driver_cents.sum())
+        report.platform_cents += int(platform_cents.sum())
+
+
+def _chunks(rows: Iterable[LedgerRow], size: int) -> Iterator[List[LedgerRow]]:
+    chunk: List[LedgerRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# --- Ledger readers (streamed, bounded memory) ---
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "t", "y")
+
+
+def read_ledger_csv(path: str) -> Iterator[LedgerRow]:
+    """Streams rows from a CSV with header job_id,driver_id,base_price[,is_express]."""
+    with open(path, newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        job_col, driver_col, price_col = (header.index(name) for name in ("job_id", "driver_id", "base_price"))
+        express_col = header.index("is_express") if "is_express" in header else None
+        for record in reader:
+            yield (int(record[job_col]), int(record[driver_col]), to_cents(record[price_col]),
+                   express_col is not None and _parse_bool(record[express_col]))
+
+
+def read_ledger_parquet(path: str, batch_size: int = 100_000) -> Iterator[LedgerRow]:
+    """Streams rows from a Parquet ledger in record batches (needs pyarrow)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet ledgers requires pyarrow (pip install pyarrow)") from e
+    for batch in pq.ParquetFile(path).iter_batches(
+            batch_size=batch_size, columns=["job_id", "driver_id", "base_price", "is_express"]):
+        columns = batch.to_pydict()
+        for job_id, driver_id, price, express in zip(columns["job_id"], columns["driver_id"],
+                                                     columns["base_price"], columns["is_express"]):
+            yield int(job_id), int(driver_id), to_cents(price), _parse_bool(express)
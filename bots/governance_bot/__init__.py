@@ -0,0 +1,7 @@
+# bots/governance_bot/__init__.py
+"""Governance Bot: KPIs, strategic decisions and creator reports. `python -m bots.governance_bot` (runs the example workflow)."""
+
+from bots.common.lazy import lazy_exports
+
+__all__ = ["GovernanceBot"]
+__getattr__, __dir__ = lazy_exports(__name__, {"GovernanceBot": "governance_bot"})
@@ -0,0 +1,10 @@
+# bots/governance_bot/__main__.py
+
+import sys
+
+from bots.common.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main("python -m bots.governance_bot", "bots.governance_bot.governance_bot",
+                  app="bots.governance_bot.api:app", url_setting="GOVERNANCE_URL", needs=("PHASE",),
+                  single_process=True))
@@ -0,0 +1,47 @@
+# bots/governance_bot/api.py
+
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from bots.common.config import settings
+from bots.common.event_bus import open_event_bus
+from bots.common.instrumentation import configure_from_settings, instrument_app
+from bots.common.storage import open_storage
+from bots.governance_bot.governance_bot import GovernanceBot
+
+# With settings.DATABASE_URL set, the report's year-to-date figures come from the shared DB
+governance = GovernanceBot(storage=open_storage(getattr(settings, "DATABASE_URL", None)))
+# The KPIs are fed from the Dispatcher's and Finance Bot's events on settings.EVENT_BUS_URL
+event_bus = open_event_bus(getattr(settings, "EVENT_BUS_URL", None))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if event_bus is not None:
+        await event_bus.start()
+    yield
+    if event_bus is not None:
+        await event_bus.stop()
+
+
+app = FastAPI(title="PickupLink Governance Bot", lifespan=lifespan)
+# Request metrics and GET /metrics; settings.PROFILER_ENABLED adds the /debug/profiler endpoints
+instrument_app(app, "governance", profiler_enabled=configure_from_settings(settings))
+
+
+@app.get("/kpis")
+def kpis():
+    """Rolling-window KPIs."""
+    return governance.monitor_bot_performance()
+
+
+@app.get("/report")
+def report():
+    """KPIs, the strategic decision they lead to and the year-to-date figures."""
+    performance = governance.monitor_bot_performance()
+    return governance.report_to_creator(performance, governance.make_strategic_decision(performance))
+
+
+if event_bus is not None:
+    governance.subscribe_platform_events(event_bus)
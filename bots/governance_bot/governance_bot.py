@@ -1,28 +1,42 @@
 # bots/governance_bot/governance_bot.py
 
-import requests
 import json
-from settings import FINANCE_URL, DISPATCHER_URL, PHASE
-from typing import Dict, Any
+import logging
+import time
+from typing import Dict, Any, List, Optional
+from bots.common.config import settings
+from bots.common.event_bus import PLATFORM_EVENTS, Event, EventBus, Subscription
+from bots.common.instrumentation import get_logger, log_event
+from bots.governance_bot.kpi_engine import KPIEngine
+from bots.common.storage import Storage
+
+log = get_logger("governance")
 
 class GovernanceBot:
-    def __init__(self):
-        print(f"GovernanceBot Initialized. Overseeing Phase {PHASE} operations.")
+    def __init__(self, kpi_engine: Optional[KPIEngine] = None, storage: Optional[Storage] = None):
+        # Rolling 1h KPIs fed by the Dispatcher/FinanceBot event hooks: in-process (pass kpi_engine.handle
+        # to them) or over the event bus (subscribe_platform_events)
+        self.kpi_engine = kpi_engine or KPIEngine(window_seconds=3600.0, bucket_seconds=10.0)
+        # Shared DB for the report's year-to-date figures (simulated without it)
+        self.storage = storage
+        log_event(log, logging.INFO, "governance_bot_initialized", phase=settings.PHASE)
+
+    def subscribe_platform_events(self, event_bus: EventBus) -> Subscription:
+        """Feeds the KPIs from PLATFORM_EVENTS (the Dispatcher's and Finance Bot's published event hooks)."""
+
+        def on_events(events: List[Event]):
+            for event in events:
+                self.kpi_engine.record(event.key, event.payload, timestamp=event.timestamp or None)
+
+        return event_bus.subscribe(PLATFORM_EVENTS, "governance", on_events, batch_size=500)
 
     def monitor_bot_performance(self) -> Dict[str, float]:
         """Collects key performance indicators (KPIs) from all systems."""
         
-        # --- Data Aggregation Simulation (Queries Finance and Dispatcher) ---
-        print("Gathering KPIs: Delivery efficiency, Payout success, Campaign ROI...")
-        
-        # Example KPIs (actual data would come from the 'bot_missions' and 'transactions' tables)
-        kpis = {
-            "delivery_success_rate": 0.985,  # From Dispatcher Bot logs
-            "empty_miles_ratio": 0.15,       # From Dispatcher Bot routing
-            "payout_failure_rate": 0.003,    # From Finance Bot logs
-            "marketing_roi": 1.5,            # From Marketing/Finance Bot synergy
-            "current_platform_fee": 0.20     # Current Standard Fee
-        }
+        # Rolling-window aggregates, maintained incrementally as Dispatcher and
+        # Finance Bot events arrive; reading them is O(1).
+        kpis = self.kpi_engine.kpis()
+        kpis["current_platform_fee"] = 0.20  # Current Standard Fee
         return kpis
 
     def make_strategic_decision(self, kpis: Dict[str, float]) -> str:
@@ -37,26 +51,34 @@ class GovernanceBot:
             # Action: Invest in better routing algorithms
             return "ACTION: Finance_Bot_Fund_Mission: 'Route_Optimization_Upgrade'."
             
-        if kpis['marketing_roi'] > 1.2 and PHASE == '1':
+        if kpis['marketing_roi'] > 1.2 and settings.PHASE == '1':
             # Action: Trigger expansion to the next phase (Phase 2: North Carolina)
             return "STRATEGY: Execute_Phase_Transition_TO_2. Charlotte market saturation reached."
             
         return "STATUS: System nominal. Maintaining current operational parameters."
 
-    def report_to_creator(self, kpis: Dict[str, float], decision: str):
-        """Generates a summary report for the 100% owner (The Creator)."""
+    def report_to_creator(self, kpis: Dict[str, float], decision: str) -> Dict[str, Any]:
+        """Generates a summary report for the 100% owner (The Creator); logged and returned."""
         report = {
-            "title": f"PickupLink Creator Report - Phase {PHASE}",
+            "title": f"PickupLink Creator Report - Phase {settings.PHASE}",
             "kpis": kpis,
             "strategic_decision": decision,
             "total_revenue_ytd": "$150,000 (Simulated)",
             "driver_count_active": "850 / 10,000 Goal (Simulated)"
         }
+        if self.storage is not None:
+            now = time.time()
+            year_start = time.mktime((time.localtime(now).tm_year, 1, 1, 0, 0, 0, 0, 0, -1))
+            revenue_cents = self.storage.revenue_between(year_start, now)
+            missions = self.storage.mission_totals(since=year_start)
+            report["total_revenue_ytd"] = f"${revenue_cents / 100:,.2f}"
+            report["driver_count_active"] = f"{self.storage.count_active_drivers()} / 10,000 Goal"
+            report["bot_missions_ytd"] = {"approved": f"${missions['approved_cents'] / 100:,.2f}",
+                                          "revenue": f"${missions['revenue_cents'] / 100:,.2f}"}
         
         # In the final system, this sends an encrypted email or updates the Creator's Web Dashboard
-        print("\n--- CREATOR REPORT GENERATED ---")
-        print(json.dumps(report, indent=4))
-        print("------------------------------\n")
+        log_event(log, logging.INFO, "creator_report", **report)
+        return report
 
 # Example Usage
 if __name__ == '__main__':
@@ -70,4 +92,7 @@ if __name__ == '__main__':
     print(f"Strategic Decision: {strategic_move}")
     
     # 3. Report
-    bot.report_to_creator(performance, strategic_move)
+    report = bot.report_to_creator(performance, strategic_move)
+    print("\n--- CREATOR REPORT GENERATED ---")
+    print(json.dumps(report, indent=4))
+    print("------------------------------\n")
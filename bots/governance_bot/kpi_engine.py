@@ -0,0 +1,135 @@
+# bots/governance_bot/kpi_engine.py
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Event types emitted by the Dispatcher and FinanceBot through their `event_hook`
+JOB_MATCHED = "job_matched"              # payload: empty_km, loaded_km
+JOB_UNMATCHED = "job_unmatched"
+DELIVERY_COMPLETED = "delivery_completed"
+DELIVERY_FAILED = "delivery_failed"
+PAYOUT_SUCCEEDED = "payout_succeeded"    # payload: amount
+PAYOUT_FAILED = "payout_failed"
+MARKETING_SPEND = "marketing_spend"      # payload: amount
+MARKETING_REVENUE = "marketing_revenue"  # payload: amount
+
+# Running sums kept per time bucket: (event type, payload field or None for a count)
+_FIELDS = {
+    "jobs_matched": (JOB_MATCHED, None),
+    "jobs_unmatched": (JOB_UNMATCHED, None),
+    "empty_km": (JOB_MATCHED, "empty_km"),
+    "loaded_km": (JOB_MATCHED, "loaded_km"),
+    "deliveries_completed": (DELIVERY_COMPLETED, None),
+    "deliveries_failed": (DELIVERY_FAILED, None),
+    "payouts_succeeded": (PAYOUT_SUCCEEDED, None),
+    "payouts_failed": (PAYOUT_FAILED, None),
+    "marketing_spend": (MARKETING_SPEND, "amount"),
+    "marketing_revenue": (MARKETING_REVENUE, "amount"),
+}
+_FIELD_INDEX = {name: i for i, name in enumerate(_FIELDS)}
+# event type -> [(field index, payload key or None)]
+_UPDATES: Dict[str, list] = {}
+for _name, (_event, _key) in _FIELDS.items():
+    _UPDATES.setdefault(_event, []).append((_FIELD_INDEX[_name], _key))
+
+
+class KPIEngine:
+    """
+    Rolling-window KPI aggregation over a stream of platform events.
+
+    The window is a ring of `window_seconds / bucket_seconds` time buckets, each
+    holding a running sum per field, plus window-wide totals. Recording an event
+    adds to the current bucket and the totals (O(1)); when time moves past a
+    bucket, its sums are subtracted from the totals and the slot is reused. Memory
+    is fixed by the bucket count, and reading the KPIs is a handful of divisions.
+
+    `handle(event_type, payload)` matches the `event_hook` signature of the
+    Dispatcher and FinanceBot, so an engine can be passed to them directly.
+    """
+
+    def __init__(self, window_seconds: float = 3600.0, bucket_seconds: float = 10.0, clock=time.time):
+        if bucket_seconds <= 0 or window_seconds < bucket_seconds:
+            raise ValueError("Need 0 < bucket_seconds <= window_seconds")
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self.num_buckets = int(round(window_seconds / bucket_seconds))
+        self._buckets = [[0.0] * len(_FIELDS) for _ in range(self.num_buckets)]
+        self._totals = [0.0] * len(_FIELDS)
+        self._head: Optional[int] = None  # absolute index of the newest bucket
+        self._lock = threading.Lock()
+        self.events_seen = 0
+        self.events_dropped = 0  # unknown types or older than the window
+
+    def _advance(self, index: int):
+        """Moves the newest bucket forward to `index`, expiring buckets that leave the window."""
+        if self._head is None or index - self._head >= self.num_buckets:
+            for bucket in self._buckets:
+                bucket[:] = [0.0] * len(_FIELDS)
+            self._totals = [0.0] * len(_FIELDS)
+        else:
+            for expired in range(self._head + 1, index + 1):
+                bucket = self._buckets[expired % self.num_buckets]
+                totals = self._totals
+                for i, value in enumerate(bucket):
+                    if value:
+                        totals[i] -= value
+                        bucket[i] = 0.0
+        self._head = index
+
+    def record(self, event_type: str, payload: Optional[Dict[str, Any]] = None,
+               timestamp: Optional[float] = None):
+        updates = _UPDATES.get(event_type)
+        if updates is None:
+            self.events_dropped += 1
+            return
+        payload = payload or {}
+        if timestamp is None:
+            timestamp = payload.get("timestamp") or self.clock()
+        index = int(timestamp // self.bucket_seconds)
+        with self._lock:
+            if self._head is None or index > self._head:
+                self._advance(index)
+            elif index <= self._head - self.num_buckets:
+                self.events_dropped += 1
+                return
+            bucket = self._buckets[index % self.num_buckets]
+            for field_index, key in updates:
+                value = 1.0 if key is None else float(payload.get(key, 0.0) or 0.0)
+                bucket[field_index] += value
+                self._totals[field_index] += value
+            self.events_seen += 1
+
+    def handle(self, event_type: str, payload: Dict[str, Any]):
+        """Event-hook entry point (see Dispatcher/FinanceBot `event_hook`)."""
+        self.record(event_type, payload)
+
+    def totals(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Raw window sums per field."""
+        index = int((self.clock() if now is None else now) // self.bucket_seconds)
+        with self._lock:
+            if self._head is not None and index > self._head:
+                self._advance(index)
+            # Clamp float residue left by subtracting expired buckets
+            return {name: max(0.0, self._totals[i]) for name, i in _FIELD_INDEX.items()}
+
+    def kpis(self, now: Optional[float] = None) -> Dict[str, float]:
+        """
+        The governance KPIs over the window. A ratio with no events behind it
+        reports its neutral value (no failures, no empty miles, no ROI) and the
+        `*_samples` counts say how much data each KPI rests on.
+        """
+        t = self.totals(now)
+        deliveries = t["deliveries_completed"] + t["deliveries_failed"]
+        driven_km = t["empty_km"] + t["loaded_km"]
+        payouts = t["payouts_succeeded"] + t["payouts_failed"]
+        return {
+            "delivery_success_rate": t["deliveries_completed"] / deliveries if deliveries else 1.0,
+            "empty_miles_ratio": t["empty_km"] / driven_km if driven_km else 0.0,
+            "payout_failure_rate": t["payouts_failed"] / payouts if payouts else 0.0,
+            "marketing_roi": t["marketing_revenue"] / t["marketing_spend"] if t["marketing_spend"] else 0.0,
+            "delivery_samples": int(deliveries),
+            "match_samples": int(t["jobs_matched"] + t["jobs_unmatched"]),
+            "payout_samples": int(payouts),
+        }
@@ -0,0 +1,7 @@
+# bots/legal_bot/__init__.py
+"""Legal Bot: TRUCKS ONLY verification and driver compliance. `python -m bots.legal_bot` (serves the API)."""
+
+from bots.common.lazy import lazy_exports
+
+__all__ = ["LegalBot"]
+__getattr__, __dir__ = lazy_exports(__name__, {"LegalBot": "legal_bot"})
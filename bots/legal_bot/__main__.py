@@ -0,0 +1,9 @@
+# bots/legal_bot/__main__.py
+
+import sys
+
+from bots.common.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main("python -m bots.legal_bot", "bots.legal_bot.legal_bot", app="bots.legal_bot.api:app",
+                  url_setting="LEGAL_URL", needs=("PHASE", "TRUCKS_ONLY_ENABLED")))
@@ -0,0 +1,74 @@
+# bots/legal_bot/api.py
+
+from typing import List, Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from bots.common.config import settings
+from bots.common.instrumentation import configure_from_settings, instrument_app
+from bots.legal_bot.legal_bot import LegalBot, build_dmv_service
+
+legal = LegalBot(build_dmv_service())
+
+app = FastAPI(title="PickupLink Legal Bot")
+# Request metrics and GET /metrics; settings.PROFILER_ENABLED adds the /debug/profiler endpoints
+instrument_app(app, "legal", profiler_enabled=configure_from_settings(settings))
+
+# Endpoints are plain `def`: FastAPI runs them on its thread pool, so slow
+# DMV lookups never block the event loop.
+
+
+class TruckCheck(BaseModel):
+    vehicle_type: str
+    plate: Optional[str] = None
+    vin: Optional[str] = None
+
+
+class DocumentCheck(BaseModel):
+    license_number: Optional[str] = None
+    plate: Optional[str] = None
+    license_status: Optional[str] = None
+    insurance_status: bool = False
+
+
+def _document_data(check: DocumentCheck) -> dict:
+    # Without license_status the licence is judged by the DMV record (INVALID when no number is given either)
+    return check.dict(exclude_none=True)
+
+
+@app.post("/verify_truck")
+def verify_truck(check: TruckCheck):
+    """TRUCKS ONLY check for one vehicle."""
+    return legal.verify_truck_compliance(check.dict(exclude_none=True))
+
+
+@app.post("/verify_trucks")
+def verify_trucks(checks: List[TruckCheck]):
+    """Bulk TRUCKS ONLY check; one result per vehicle, in order."""
+    return {"results": legal.verify_many(check.dict(exclude_none=True) for check in checks)}
+
+
+@app.post("/verify_documents")
+def verify_documents(check: DocumentCheck):
+    """Licence and insurance check (DMV-backed when license_number / plate are given)."""
+    ok = legal.verify_insurance_and_license(_document_data(check))
+    return {"status": "SUCCESS" if ok else "FAILED", "documents_valid": ok}
+
+
+@app.post("/verify_documents/batch")
+def verify_documents_batch(checks: List[DocumentCheck]):
+    """One result per driver, in order; status ERROR when that driver's DMV lookup failed (retry later)."""
+    results = legal.verify_documents_many(_document_data(check) for check in checks)
+    return {"results": [{"status": "ERROR" if ok is None else "SUCCESS" if ok else "FAILED",
+                         "documents_valid": bool(ok)} for ok in results]}
+
+
+@app.get("/terms_of_service/{region}")
+def terms_of_service(region: str):
+    return {"region": region, "terms": legal.get_terms_of_service(region)}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return legal.compliance_cache.stats()
@@ -0,0 +1,245 @@
+# bots/legal_bot/compliance_cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import quote
+
+DAY_SECONDS = 86_400.0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+
+
+@dataclass
+class _Flight:
+    """An upstream call in progress; later callers for the same key wait on it."""
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class ComplianceCache:
+    """
+    Cache for slow compliance lookups (DMV license/insurance checks, generated ToS).
+
+    Each entry lives until the earlier of `max_ttl` and the expiry the loader
+    reports for the underlying document, so a licence that lapses tomorrow is
+    re-checked tomorrow, not in a week. Failed checks are cached only for
+    `negative_ttl` so a driver who fixes their paperwork is not blocked for long.
+
+    Loads are single-flight: while one thread fetches a key, other threads
+    asking for the same key wait for that result instead of calling upstream again.
+    """
+
+    def __init__(self, max_ttl: float = 7 * DAY_SECONDS, negative_ttl: float = 300.0,
+                 max_entries: int = 100_000, clock=time.time):
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.load_errors = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    expires_at: Optional[Callable[[Any], Optional[float]]] = None,
+                    is_negative: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Returns the cached value for `key` or calls `loader()` once to fetch it.
+        `expires_at(value)` gives the document's own expiry (epoch seconds, or None)
+        and `is_negative(value)` marks results cached for `negative_ttl` only.
+        Loader exceptions propagate to every waiting caller and are not cached.
+        """
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                del self._entries[key]
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.load_errors += 1
+                del self._flights[key]
+            flight.done.set()
+            raise
+
+        now = self.clock()
+        negative = is_negative is not None and is_negative(value)
+        deadline = now + (self.negative_ttl if negative else self.max_ttl)
+        document_expiry = expires_at(value) if expires_at is not None and not negative else None
+        if document_expiry is not None:
+            deadline = min(deadline, document_expiry)
+        flight.value = value
+        with self._lock:
+            self.loads += 1
+            if deadline > now:
+                self._entries[key] = _Entry(value, deadline)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            del self._flights[key]
+        flight.done.set()
+        return value
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "loads": self.loads,
+                "load_errors": self.load_errors,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+class DMVService:
+    """State DMV / insurer records: licence status and insurance per plate, each with an expiry."""
+
+    def lookup_license(self, license_number: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def lookup_insurance(self, plate: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class HTTPDMVService(DMVService):
+    """
+    REST client for the DMV/insurer gateway: GET /licenses/{number} and
+    GET /insurance/{plate}, answering with the same fields as LocalDMVService.
+    A 404 means the DMV has no such licence / policy: an INVALID licence or an
+    uninsured plate. Other errors raise (not cached; the check fails).
+    """
+
+    def __init__(self, url: str, api_key: Optional[str] = None, timeout: float = 10.0):
+        import requests  # Deferred: only the real DMV client needs it
+
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _get(self, kind: str, value: str) -> Optional[Dict[str, Any]]:
+        """The record, or None when the DMV does not know `value`."""
+        response = self.session.get(f"{self.url}/{kind}/{quote(value, safe='')}", timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()  # Errors are not cached (ComplianceCache) and fail the check
+        return response.json()
+
+    def lookup_license(self, license_number: str) -> Dict[str, Any]:
+        record = self._get("licenses", license_number)
+        if record is None:
+            return {"license_number": license_number, "license_status": "INVALID", "expires_at": None}
+        return record
+
+    def lookup_insurance(self, plate: str) -> Dict[str, Any]:
+        record = self._get("insurance", plate)
+        if record is None:
+            return {"plate": plate, "insurance_status": False, "expires_at": None}
+        return record
+
+
+class LocalDMVService(DMVService):
+    """
+    Offline stand-in for state DMV / insurer APIs, with a fixed per-call latency,
+    for benchmarks and development only (settings.DMV_STANDIN). Answers are
+    deterministic per licence number / plate: most are valid with an expiry some
+    weeks to years out, a few are suspended, lapsed or unknown.
+    """
+
+    def __init__(self, latency: float = 0.05, clock=time.time):
+        self.latency = latency
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @staticmethod
+    def _bucket(value: str) -> int:
+        return int(hashlib.sha256(value.encode()).hexdigest()[:8], 16)
+
+    def _call(self):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+
+    def lookup_license(self, license_number: str) -> Dict[str, Any]:
+        self._call()
+        bucket = self._bucket(f"license:{license_number}")
+        if bucket % 50 == 0:
+            return {"license_number": license_number, "license_status": "SUSPENDED", "expires_at": None}
+        days_left = 30 + bucket % 1500
+        if bucket % 37 == 0:
+            days_left = -(bucket % 90) - 1  # lapsed
+        expires_at = self.clock() + days_left * DAY_SECONDS
+        status = "VALID" if days_left > 0 else "EXPIRED"
+        return {"license_number": license_number, "license_status": status, "expires_at": expires_at}
+
+    def lookup_insurance(self, plate: str) -> Dict[str, Any]:
+        self._call()
+        bucket = self._bucket(f"insurance:{plate}")
+        if bucket % 40 == 0:
+            return {"plate": plate, "insurance_status": False, "expires_at": None}
+        expires_at = self.clock() + (14 + bucket % 365) * DAY_SECONDS
+        return {"plate": plate, "insurance_status": True, "expires_at": expires_at}
+
+
+def document_expiry(record: Dict[str, Any]) -> Optional[float]:
+    """`expires_at` selector for DMV records (epoch seconds or None)."""
+    return record.get("expires_at")
+
+
+def license_is_negative(record: Dict[str, Any]) -> bool:
+    return record.get("license_status") != "VALID"
+
+
+def insurance_is_negative(record: Dict[str, Any]) -> bool:
+    return not record.get("insurance_status")
+
+
+def cache_key(kind: str, value: str) -> Tuple[str, str]:
+    """Normalized cache key, e.g. ("plate", "PKPLK1") or ("license", "NC1234567")."""
+    return kind, value.strip().upper()
@@ -1,52 +1,153 @@
 # bots/legal_bot/legal_bot.py
 
-import requests
-import json
-from settings import LEGAL_URL, PHASE, TRUCKS_ONLY_ENABLED
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from bots.legal_bot.compliance_cache import (
+    ComplianceCache, DMVService, HTTPDMVService, LocalDMVService, cache_key, document_expiry, insurance_is_negative, license_is_negative,
+)
+from bots.legal_bot.vehicle_classifier import VehicleClassification, default_classifier
+from bots.common.config import MissingSettingError, settings
+from bots.common.instrumentation import counter, get_logger, log_event, timed
+
+log = get_logger("legal")
+TRUCK_CHECKS = counter("legal_truck_checks_total", "TRUCKS ONLY verifications by outcome", ("outcome",))
+DOCUMENT_CHECKS = counter("legal_document_checks_total", "Licence/insurance verifications by outcome", ("outcome",))
+
+
+
+def build_dmv_service() -> DMVService:
+    """The DMV client from settings: DMV_URL in production, LocalDMVService only with DMV_STANDIN."""
+    if settings.DMV_URL:
+        return HTTPDMVService(settings.DMV_URL, api_key=settings.DMV_API_KEY)
+    if settings.DMV_STANDIN:
+        log_event(log, logging.WARNING, "dmv_standin", message="Document checks use the offline DMV stand-in")
+        return LocalDMVService()
+    raise MissingSettingError("Document checks need DMV_URL (or DMV_STANDIN=True for development)")
+
 
 class LegalBot:
-    def __init__(self):
-        print(f"LegalBot Initialized. Compliance mode: Phase {PHASE}.")
+    def __init__(self, dmv: DMVService, compliance_cache: Optional[ComplianceCache] = None):
+        log_event(log, logging.INFO, "legal_bot_initialized", phase=settings.PHASE)
+        # Compiled make/model matcher + offline VIN decoder, shared by every check
+        self.vehicle_classifier = default_classifier()
+        # DMV/insurer lookups and generated ToS are slow upstream calls: cached until the
+        # document expires, one upstream call per key even under concurrent registrations.
+        # No default: production passes the real DMV client (build_dmv_service), benchmarks LocalDMVService
+        self.dmv = dmv
+        self.compliance_cache = compliance_cache if compliance_cache is not None else ComplianceCache()
+        self.trucks_only = settings.TRUCKS_ONLY_ENABLED
         
-    def verify_truck_compliance(self, registration_data: dict) -> dict:
+    @timed("legal_verify_truck_seconds")
+    def verify_truck_compliance(self, registration_data: dict, verbose: bool = True) -> dict:
         """
         CRITICAL function: Ensures the vehicle is a registered truck and not a sedan/SUV.
         This enforces the 'TRUCKS ONLY' core principle.
         """
-        if not TRUCKS_ONLY_ENABLED:
+        if not self.trucks_only:
             return {"status": "SUCCESS", "message": "TRUCKS_ONLY rule is disabled (dev mode)."}
 
         vehicle_type = registration_data.get('vehicle_type', '').upper()
         plate = registration_data.get('plate', 'N/A')
         
-        # --- AI/Database Lookup Simulation (External API Check) ---
-        # In a real app, this integrates with state/national DMV APIs.
-        
-        # Basic filter check: Must contain keywords associated with pickup trucks
-        if any(keyword in vehicle_type for keyword in ["PICKUP", "TRUCK", "F-150", "RAM", "SILVERADO", "TUNDRA"]):
-            print(f"Truck Verified: Plate {plate}, Type: {vehicle_type}")
-            return {"status": "SUCCESS", "is_truck": True, "liability_checked": True}
+        # --- Offline classification (approved make/model table + VIN WMI/VDS decode) ---
+        # In a real app, this is backed by state/national DMV APIs.
+        result = self.vehicle_classifier.classify(vehicle_type, registration_data.get('vin'))
+        TRUCK_CHECKS.labels("SUCCESS" if result.is_truck else "FAILED").inc()
+        if result.is_truck:
+            if verbose:
+                log_event(log, logging.DEBUG, "truck_verified", plate=plate, vehicle_type=vehicle_type)
+            return {"status": "SUCCESS", "is_truck": True, "liability_checked": True, **self._vehicle_details(result)}
         else:
-            print(f"VERIFICATION FAILED: Vehicle {vehicle_type} is not a valid truck type.")
+            if verbose:
+                log_event(log, logging.INFO, "truck_rejected", plate=plate, vehicle_type=vehicle_type,
+                          reason=result.reason)
             # Trigger a block on the Dispatcher/Driver API
-            return {"status": "FAILED", "is_truck": False, "message": "Vehicle is not an approved truck type."}
+            return {"status": "FAILED", "is_truck": False, "message": "Vehicle is not an approved truck type.",
+                    **self._vehicle_details(result)}
+
+    @staticmethod
+    def _vehicle_details(result: VehicleClassification) -> Dict[str, Any]:
+        return {"make": result.make, "model": result.model,
+                "classified_by": result.classified_by, "reason": result.reason}
+
+    def verify_many(self, registrations: Iterable[dict]) -> List[dict]:
+        """
+        Bulk truck check (nightly compliance sweep, bulk imports). Same result per
+        registration as verify_truck_compliance, in input order, without per-vehicle logging.
+        """
+        results = [self.verify_truck_compliance(registration, verbose=False) for registration in registrations]
+        failed = sum(1 for result in results if result["status"] != "SUCCESS")
+        log_event(log, logging.INFO, "compliance_sweep", checked=len(results), failed=failed)
+        return results
 
-    def verify_insurance_and_license(self, driver_data: dict) -> bool:
+    @timed("legal_verify_documents_seconds")
+    def verify_insurance_and_license(self, driver_data: dict, verbose: bool = True) -> bool:
         """Ensures all independent driver documentation is valid."""
-        license_status = driver_data.get('license_status', 'INVALID')
-        insurance_valid = driver_data.get('insurance_status', False)
+        # DMV/insurer records can only veto what the driver declared, never approve
+        # something the driver did not claim (a declared lapse stays a lapse).
+        license_status = driver_data.get('license_status')
+        if driver_data.get('license_number'):
+            if license_status in (None, 'VALID'):
+                license_status = self.check_license(driver_data['license_number'])['license_status']
+        elif license_status is None:
+            license_status = 'INVALID'
+        insurance_valid = bool(driver_data.get('insurance_status', False))
+        if insurance_valid and driver_data.get('plate'):
+            insurance_valid = bool(self.check_insurance(driver_data['plate'])['insurance_status'])
         
-        if license_status == 'VALID' and insurance_valid:
-            print("Driver license and insurance verified. Zero direct liability confirmed.")
-            return True
-        else:
-            print("WARNING: Driver documentation incomplete or invalid.")
-            return False
+        valid = license_status == 'VALID' and bool(insurance_valid)
+        DOCUMENT_CHECKS.labels("SUCCESS" if valid else "FAILED").inc()
+        if verbose:
+            log_event(log, logging.DEBUG if valid else logging.INFO,
+                      "documents_verified" if valid else "documents_invalid",
+                      license_status=license_status, insurance_valid=bool(insurance_valid))
+        return valid
+
+    def verify_documents_many(self, drivers: Iterable[dict], max_workers: int = 16) -> List[Optional[bool]]:
+        """
+        Bulk licence/insurance check. DMV lookups overlap on a thread pool (and share
+        the compliance cache), results are in input order, one summary line is logged.
+        A driver whose lookup fails gets None (not checked) instead of aborting the sweep.
+        """
+        drivers = list(drivers)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(self._verify_documents_or_none, drivers))
+        log_event(log, logging.INFO, "document_sweep", checked=len(results), failed=results.count(False),
+                  errors=results.count(None))
+        return results
+
+    def _verify_documents_or_none(self, driver_data: dict) -> Optional[bool]:
+        try:
+            return self.verify_insurance_and_license(driver_data, verbose=False)
+        except Exception as e:
+            DOCUMENT_CHECKS.labels("ERROR").inc()
+            log_event(log, logging.WARNING, "document_lookup_failed", error=repr(e))
+            return None
+
+    def check_license(self, license_number: str) -> Dict[str, Any]:
+        """DMV licence record, cached until the licence expires (failures for a few minutes)."""
+        return self.compliance_cache.get_or_load(
+            cache_key("license", license_number), lambda: self.dmv.lookup_license(license_number),
+            expires_at=document_expiry, is_negative=license_is_negative,
+        )
+
+    def check_insurance(self, plate: str) -> Dict[str, Any]:
+        """Insurer record for a plate, cached until the policy expires (failures for a few minutes)."""
+        return self.compliance_cache.get_or_load(
+            cache_key("plate", plate), lambda: self.dmv.lookup_insurance(plate),
+            expires_at=document_expiry, is_negative=insurance_is_negative,
+        )
 
     def get_terms_of_service(self, region: str) -> str:
         """
         Adapts the Terms of Service based on regional compliance needs (e.g., California vs. NC).
+        Generated once per region and served from the compliance cache afterwards.
         """
+        return self.compliance_cache.get_or_load(("tos", region),
+                                                 lambda: self._generate_terms_of_service(region))
+
+    def _generate_terms_of_service(self, region: str) -> str:
         # This function would use an LLM or a localized DB to generate the appropriate legal text.
         if "CA" in region:
             return "TOS_CALIFORNIA_2025: Includes AB5 compliance notes for independent contractors..."
@@ -57,7 +158,7 @@ class LegalBot:
 
 # Example Usage
 if __name__ == '__main__':
-    bot = LegalBot()
+    bot = LegalBot(LocalDMVService())  # Offline demo
     
     # Test 1: Valid Truck
     result_success = bot.verify_truck_compliance({
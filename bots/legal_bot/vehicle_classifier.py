@@ -0,0 +1,211 @@
+# bots/legal_bot/vehicle_classifier.py
+
+import operator
+import re
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# --- Reference tables (extend these, not the matching code) ---
+
+# Approved pickup truck lines: make -> model aliases as they appear on registrations
+PICKUP_MODELS: Dict[str, List[str]] = {
+    "FORD": ["F-150", "F-250", "F-350", "F-450", "F-SERIES", "SUPER DUTY", "RANGER", "MAVERICK", "LIGHTNING"],
+    "CHEVROLET": ["SILVERADO", "COLORADO", "AVALANCHE", "S-10", "CHEYENNE"],
+    "GMC": ["SIERRA", "CANYON", "SONOMA"],
+    "RAM": ["RAM", "RAM 1500", "RAM 2500", "RAM 3500"],
+    "DODGE": ["DAKOTA"],
+    "TOYOTA": ["TUNDRA", "TACOMA", "HILUX"],
+    "NISSAN": ["TITAN", "FRONTIER", "NAVARA"],
+    "HONDA": ["RIDGELINE"],
+    "JEEP": ["GLADIATOR"],
+    "HYUNDAI": ["SANTA CRUZ"],
+    "RIVIAN": ["R1T"],
+    "TESLA": ["CYBERTRUCK"],
+}
+MAKE_ALIASES = {"CHEVY": "CHEVROLET", "CHEV": "CHEVROLET", "RAM TRUCKS": "RAM"}
+# Makes that share VIN manufacturer codes (a Dodge Ram or Jeep Gladiator decodes as RAM/DODGE)
+MAKE_GROUPS = {"DODGE": "STELLANTIS", "RAM": "STELLANTIS", "JEEP": "STELLANTIS", "CHRYSLER": "STELLANTIS"}
+
+# Body-style words that mark a vehicle as a truck, or rule it out
+PICKUP_BODY_WORDS = ["PICKUP", "PICK-UP", "TRUCK", "CREW CAB", "EXTENDED CAB", "REGULAR CAB", "CREWMAX",
+                     "DOUBLE CAB", "QUAD CAB", "SUPERCREW", "SUPERCAB"]
+NON_TRUCK_BODY_WORDS = ["SEDAN", "COUPE", "HATCHBACK", "WAGON", "CONVERTIBLE", "MINIVAN", "VAN", "SUV",
+                        "CROSSOVER", "PROMASTER", "TRANSIT", "MOTORCYCLE"]
+
+# World Manufacturer Identifier (VIN chars 1-3) -> (make, is_truck_line).
+# North American truck WMIs are separate from the same maker's car/SUV WMIs.
+WMI_TABLE: Dict[str, Tuple[str, bool]] = {
+    "1FT": ("FORD", True), "3FT": ("FORD", True), "1FD": ("FORD", True),
+    "1FA": ("FORD", False), "1FM": ("FORD", False), "1ZV": ("FORD", False),
+    "1GC": ("CHEVROLET", True), "2GC": ("CHEVROLET", True), "3GC": ("CHEVROLET", True),
+    "1GB": ("CHEVROLET", True), "1G1": ("CHEVROLET", False), "1GN": ("CHEVROLET", False),
+    "1GT": ("GMC", True), "2GT": ("GMC", True), "3GT": ("GMC", True), "1GK": ("GMC", False),
+    "1D7": ("DODGE", True), "3D7": ("DODGE", True), "1C6": ("RAM", True), "3C6": ("RAM", True),
+    "1C4": ("JEEP", False), "2C4": ("CHRYSLER", False),
+    "5TF": ("TOYOTA", True), "3TM": ("TOYOTA", True), "5TE": ("TOYOTA", True), "3TY": ("TOYOTA", True),
+    "4T1": ("TOYOTA", False), "2T1": ("TOYOTA", False), "5TD": ("TOYOTA", False), "JTD": ("TOYOTA", False),
+    "1N6": ("NISSAN", True), "1N4": ("NISSAN", False), "5N1": ("NISSAN", False),
+    "5FP": ("HONDA", True), "1HG": ("HONDA", False), "2HG": ("HONDA", False), "5FN": ("HONDA", False),
+    "5NT": ("HYUNDAI", True), "5NP": ("HYUNDAI", False), "KMH": ("HYUNDAI", False),
+    "7FC": ("RIVIAN", True), "7PD": ("RIVIAN", False),
+    "7G2": ("TESLA", True), "5YJ": ("TESLA", False), "7SA": ("TESLA", False),
+}
+# (WMI, VDS prefix) -> is_truck, for WMIs that mix pickups with vans or chassis cabs.
+# Longest matching VDS prefix wins (VDS = VIN chars 4-8).
+VDS_OVERRIDES: Dict[Tuple[str, str], bool] = {
+    ("1FT", "BR"): False, ("1FT", "BW"): False, ("1FT", "NE"): False,  # Transit / E-Series vans
+    ("1FT", "SE"): False, ("1FD", "SE"): False,
+    ("3C6", "TRV"): False, ("3C6", "LRV"): False,                        # ProMaster vans
+}
+
+VIN_PATTERN = re.compile(r"^[A-HJ-NPR-Z0-9]{17}$")
+_TRANSLITERATION = {**{str(d): d for d in range(10)},
+                    **dict(zip("ABCDEFGH", range(1, 9))), **dict(zip("JKLMN", range(1, 6))),
+                    "P": 7, "R": 9, **dict(zip("STUVWXYZ", range(2, 10)))}
+_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def vin_check_digit(vin: str) -> str:
+    """ISO 3779 / 49 CFR 565 check digit (VIN position 9) for a 17-character VIN."""
+    total = sum(map(operator.mul, map(_TRANSLITERATION.__getitem__, vin), _WEIGHTS))
+    remainder = total % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def _normalize(text: str) -> str:
+    """Upper-case, drop hyphens (F-150 == F150), other punctuation to single spaces."""
+    return " ".join(re.sub(r"[^A-Z0-9]+", " ", text.upper().replace("-", "")).split())
+
+
+@dataclass
+class VehicleClassification:
+    is_truck: bool
+    make: Optional[str] = None
+    model: Optional[str] = None
+    classified_by: str = "none"  # "vin", "model", "body" or "none"
+    reason: str = ""
+
+
+class VehicleClassifier:
+    """
+    Truck/non-truck decisions from a registration's free-text vehicle type and,
+    when present, its VIN.
+
+    The text side is one compiled, word-bounded regex built from the tables
+    above (so "TRAMPOLINE" never matches RAM), scanned once per vehicle. The VIN
+    side is an offline WMI/VDS lookup plus check-digit validation; a decodable
+    VIN outranks the description, and a description that contradicts the VIN
+    is rejected. Both tables are plain dicts loaded once per process.
+    """
+
+    def __init__(self, pickup_models: Dict[str, List[str]] = PICKUP_MODELS,
+                 wmi_table: Dict[str, Tuple[str, bool]] = WMI_TABLE,
+                 vds_overrides: Dict[Tuple[str, str], bool] = VDS_OVERRIDES):
+        self.wmi_table = wmi_table
+        self.vds_overrides = vds_overrides
+        # normalized phrase -> ("model", make, model) | ("make", make, None) | ("body", None, None) | ("deny", ...)
+        self._phrases: Dict[str, Tuple[str, Optional[str], Optional[str]]] = {}
+        for make, models in pickup_models.items():
+            self._phrases.setdefault(_normalize(make), ("make", make, None))
+            for model in models:
+                self._phrases[_normalize(model)] = ("model", make, model)
+        for alias, make in MAKE_ALIASES.items():
+            self._phrases.setdefault(_normalize(alias), ("make", make, None))
+        for word in PICKUP_BODY_WORDS:
+            self._phrases[_normalize(word)] = ("body", None, None)
+        for word in NON_TRUCK_BODY_WORDS:
+            self._phrases[_normalize(word)] = ("deny", None, word)
+        # Longest alternatives first so "RAM 1500" wins over "RAM"
+        alternatives = sorted(self._phrases, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?:" + "|".join(re.escape(p) for p in alternatives) + r")\b")
+        self._vds_lengths = sorted({len(vds) for _, vds in vds_overrides}, reverse=True)
+        # Fleets repeat the same few hundred descriptions; cache text verdicts by raw string
+        self._text_cache: Dict[str, VehicleClassification] = {}
+        self.text_cache_size = 65_536
+
+    # --- Description ---
+
+    def classify_text(self, vehicle_type: str) -> VehicleClassification:
+        cached = self._text_cache.get(vehicle_type)
+        if cached is None:
+            cached = self._classify_text(vehicle_type)
+            if len(self._text_cache) >= self.text_cache_size:
+                self._text_cache.clear()
+            self._text_cache[vehicle_type] = cached
+        return replace(cached)  # callers may annotate their copy
+
+    def _classify_text(self, vehicle_type: str) -> VehicleClassification:
+        make = model = None
+        has_body = False
+        for phrase in self._pattern.findall(_normalize(vehicle_type or "")):
+            kind, phrase_make, phrase_model = self._phrases[phrase]
+            if kind == "deny":
+                return VehicleClassification(False, make, model, "body", f"Body style {phrase_model} is not a pickup")
+            if kind == "model" and model is None:
+                make, model = phrase_make, phrase_model
+            elif kind == "make" and make is None:
+                make = phrase_make
+            elif kind == "body":
+                has_body = True
+        if model is not None:
+            return VehicleClassification(True, make, model, "model", f"Approved pickup model {model}")
+        if has_body:
+            return VehicleClassification(True, make, None, "body", "Described as a pickup truck")
+        return VehicleClassification(False, make, None, "none", "No approved pickup make/model found")
+
+    # --- VIN ---
+
+    def decode_vin(self, vin: str) -> Optional[VehicleClassification]:
+        """Offline WMI/VDS decode. None when the manufacturer is not in the index."""
+        vin = vin.strip().upper()
+        if not VIN_PATTERN.match(vin):
+            return VehicleClassification(False, classified_by="vin", reason="Malformed VIN")
+        # Check digits are mandatory for North American VINs (WMI starting 1-5)
+        if vin[0] in "12345" and vin[8] != vin_check_digit(vin):
+            return VehicleClassification(False, classified_by="vin", reason="VIN check digit mismatch")
+        wmi = vin[:3]
+        entry = self.wmi_table.get(wmi)
+        if entry is None:
+            return None
+        make, is_truck = entry
+        vds = vin[3:8]
+        for length in self._vds_lengths:
+            override = self.vds_overrides.get((wmi, vds[:length]))
+            if override is not None:
+                is_truck = override
+                break
+        reason = f"VIN {wmi} decodes to a {make} {'truck' if is_truck else 'non-truck'} line"
+        return VehicleClassification(is_truck, make, None, "vin", reason)
+
+    # --- Combined ---
+
+    def classify(self, vehicle_type: str, vin: Optional[str] = None) -> VehicleClassification:
+        text = self.classify_text(vehicle_type)
+        if not vin:
+            return text
+        decoded = self.decode_vin(vin)
+        if decoded is None:
+            return text
+        if decoded.is_truck and text.classified_by in ("model", "body") and not text.is_truck:
+            return VehicleClassification(False, decoded.make, text.model, "vin",
+                                         f"Description contradicts VIN ({text.reason})")
+        if decoded.is_truck and text.make and (MAKE_GROUPS.get(text.make, text.make)
+                                               != MAKE_GROUPS.get(decoded.make, decoded.make)):
+            return VehicleClassification(False, decoded.make, text.model, "vin",
+                                         f"VIN make {decoded.make} does not match described make {text.make}")
+        decoded.model = text.model
+        return decoded
+
+    def classify_many(self, vehicles: Iterable[Tuple[str, Optional[str]]]) -> List[VehicleClassification]:
+        return [self.classify(vehicle_type, vin) for vehicle_type, vin in vehicles]
+
+
+_default_classifier: Optional[VehicleClassifier] = None
+
+
+def default_classifier() -> VehicleClassifier:
+    """Process-wide classifier built from the bundled tables (compiled on first use)."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = VehicleClassifier()
+    return _default_classifier
@@ -0,0 +1,7 @@
+# bots/marketing_bot/__init__.py
+"""Marketing Bot: demand analysis and driver recruitment campaigns. `python -m bots.marketing_bot` (runs the example workflow)."""
+
+from bots.common.lazy import lazy_exports
+
+__all__ = ["MarketingBot"]
+__getattr__, __dir__ = lazy_exports(__name__, {"MarketingBot": "marketing_bot"})
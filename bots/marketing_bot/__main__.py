@@ -0,0 +1,9 @@
+# bots/marketing_bot/__main__.py
+
+import sys
+
+from bots.common.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main("python -m bots.marketing_bot", "bots.marketing_bot.marketing_bot",
+                  needs=("AI_MARKETING_API_KEY", "FINANCE_URL")))
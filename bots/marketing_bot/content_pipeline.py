@@ -0,0 +1,258 @@
+# bots/marketing_bot/content_pipeline.py
+
+import asyncio
+import dataclasses
+import hashlib
+import logging
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from bots.common.instrumentation import get_logger, log_event
+from bots.marketing_bot.models import MarketDemandSignal, ViralContentDraft
+
+log = get_logger("marketing.content")
+
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class LLMResponseError(Exception):
+    """The completion endpoint answered 2xx but not with {"text": "..."}."""
+
+PROMPT_TEMPLATE = """
+Create a highly viral social media recruitment post for independent truck drivers in {region}.
+The key selling points must be: 'Be your own boss', 'Highest pay per mile in the industry', and 'Flexible schedule'.
+The tone must be energetic and directly address pickup/light truck owners (F-150, RAM).
+The CTA must direct them to the sign-up link. Keep it under 280 characters for Twitter simulation.
+Answer with three lines: HEADLINE: ..., BODY: ..., CTA: ...
+"""
+
+
+def build_prompt(signal: MarketDemandSignal) -> str:
+    return PROMPT_TEMPLATE.format(region=signal.region).strip()
+
+
+def prompt_key(prompt: str) -> str:
+    """Cache key: regions that produce the same prompt share one generation."""
+    return hashlib.sha256(" ".join(prompt.split()).encode()).hexdigest()
+
+
+def parse_draft(text: str, signal: MarketDemandSignal, platform: str = "Twitter/X") -> ViralContentDraft:
+    """Turns the model's HEADLINE/BODY/CTA lines into a draft; missing fields fall back to defaults."""
+    fields: Dict[str, str] = {}
+    for line in text.splitlines():
+        label, _, value = line.partition(":")
+        if value and label.strip().upper() in ("HEADLINE", "BODY", "CTA"):
+            fields[label.strip().upper()] = value.strip()
+    return ViralContentDraft(
+        platform=platform,
+        headline=fields.get("HEADLINE", "TRUCK OWNERS: Stop waiting! 🚚"),
+        body=fields.get("BODY", text.strip()[:280]),
+        call_to_action=fields.get("CTA", "SignUp.PickupLink.com/Trucker"),
+        # Bigger, needier regions are predicted to spread further
+        estimated_reach_metric=round(5000.0 * (1.0 + signal.priority_score)
+                                     * max(signal.delivery_requests_7d, 100) / 850, 1),
+    )
+
+
+@dataclass
+class _Entry:
+    draft: ViralContentDraft
+    expires_at: float
+
+
+class DraftCache:
+    """
+    Generated drafts by prompt hash, each kept for `ttl` seconds (LRU-bounded),
+    so re-running a campaign for the same regions does not pay for the LLM again.
+    Used from one event loop; not thread-safe.
+    """
+
+    def __init__(self, ttl: float = 6 * 3600.0, max_entries: int = 10_000, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[ViralContentDraft]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= self.clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dataclasses.replace(entry.draft)  # Callers may edit their copy
+
+    def put(self, key: str, draft: ViralContentDraft):
+        self._entries[key] = _Entry(dataclasses.replace(draft), self.clock() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+class LLMClient:
+    """
+    Async client for a completion endpoint (POST {base_url}/v1/completions with
+    {"prompt", "max_tokens"} -> {"text"}), e.g. a local model server or the
+    stand-in in llm_standin.py. At most `max_concurrency` requests are in flight;
+    connection errors, timeouts, 429 and 502-504 are retried with jittered backoff.
+    """
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, max_concurrency: int = 8,
+                 timeout: float = 30.0, retries: int = 2, backoff_base: float = 0.2, max_tokens: int = 200):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.max_tokens = max_tokens
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+
+    async def __aenter__(self) -> "LLMClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+    def _ensure_client(self):
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_concurrency,
+                                  max_keepalive_connections=self.max_concurrency)
+            self._client = httpx.AsyncClient(base_url=self.base_url, headers=self.headers, limits=limits,
+                                             timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def complete(self, prompt: str) -> str:
+        """Raises httpx.HTTPError once retries are exhausted, LLMResponseError on a malformed reply."""
+        self._ensure_client()
+        payload = {"prompt": prompt, "max_tokens": self.max_tokens}
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    response = await self._client.post("/v1/completions", json=payload)
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS or attempt >= self.retries:
+                    response.raise_for_status()
+                    return _completion_text(response)
+            await asyncio.sleep(random.uniform(0.0, self.backoff_base * (2 ** attempt)))
+            attempt += 1
+
+
+def _completion_text(response: httpx.Response) -> str:
+    try:
+        text = response.json()["text"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise LLMResponseError(f"Malformed completion reply: {e!r}") from e
+    if not isinstance(text, str):
+        raise LLMResponseError(f"Completion text is {type(text).__name__}, not str")
+    return text
+
+
+class ContentPipeline:
+    """
+    Generates one draft per demand signal: prompts are sent to the LLM
+    concurrently (bounded by the client), identical prompts are generated once
+    (within a batch and across overlapping calls), and finished drafts are
+    cached by prompt hash. `stream` yields drafts as they complete, so the
+    first campaign launches while later regions are still generating.
+    """
+
+    def __init__(self, client: LLMClient, cache: Optional[DraftCache] = None, platform: str = "Twitter/X"):
+        self.client = client
+        self.cache = cache if cache is not None else DraftCache()
+        self.platform = platform
+        self._inflight: Dict[str, "asyncio.Future[str]"] = {}
+        self.generated = 0
+        self.deduplicated = 0
+        self.failed = 0
+
+    async def _complete(self, key: str, prompt: str) -> str:
+        """Single-flight LLM call per prompt key."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            text = await self.client.complete(prompt)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Marks it retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(text)
+            self.generated += 1
+            return text
+        finally:
+            del self._inflight[key]
+
+    async def generate(self, signal: MarketDemandSignal) -> ViralContentDraft:
+        prompt = build_prompt(signal)
+        key = prompt_key(prompt)
+        draft = self.cache.get(key)
+        if draft is not None:
+            return draft
+        draft = parse_draft(await self._complete(key, prompt), signal, self.platform)
+        self.cache.put(key, draft)
+        return draft
+
+    async def stream(self, signals: Iterable[MarketDemandSignal]
+                     ) -> AsyncIterator[Tuple[MarketDemandSignal, ViralContentDraft]]:
+        """
+        Yields (signal, draft) in completion order. Signals whose generation
+        fails after retries or gets a malformed reply are logged and skipped;
+        the rest still stream.
+        """
+        async def generate(signal: MarketDemandSignal):
+            return signal, await self.generate(signal)
+
+        tasks = [asyncio.ensure_future(generate(signal)) for signal in signals]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    yield await finished
+                except (httpx.HTTPError, LLMResponseError) as e:
+                    self.failed += 1
+                    log_event(log, logging.WARNING, "content_generation_failed", error=repr(e))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def generate_all(self, signals: Iterable[MarketDemandSignal]) -> List[ViralContentDraft]:
+        """Drafts in input order (waits for all of them)."""
+        return list(await asyncio.gather(*(self.generate(signal) for signal in signals)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"generated": self.generated, "deduplicated": self.deduplicated, "failed": self.failed,
+                "llm_requests": self.client.requests, "cache": self.cache.stats()}
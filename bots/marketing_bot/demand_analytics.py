@@ -0,0 +1,314 @@
+# bots/marketing_bot/demand_analytics.py
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bots.marketing_bot.models import MarketDemandSignal
+
+Cell = Tuple[int, int]  # (floor(lat / cell_deg), floor(lon / cell_deg))
+
+REGION_CELL_DEG = 0.1          # ~11 km recruitment regions
+WEEK_SECONDS = 7 * 86_400.0
+JOBS_PER_DRIVER_WEEK = 35.0    # Weekly jobs one active driver can absorb; density 0.5 = supply matches demand
+_KEY_OFFSET = 1 << 20          # Packs a cell into one int64 key for vectorized grouping
+MATCHED = "MATCHED"            # Job status counted as a conversion
+# job_events ids re-read on every refresh: PostgreSQL can commit a lower id after a higher one
+EVENT_LOOKBACK = 10_000
+
+
+class DemandAnalytics:
+    """
+    Recruitment demand per region (REGION_CELL_DEG grid cell) from job and
+    driver-location history.
+
+    Job requests and matches are counted in a ring of hourly buckets x regions
+    (numpy tables), with 7-day totals per region kept alongside: recording a
+    batch adds to its buckets and the totals in one vectorized pass, and when
+    time moves past a bucket its row is subtracted from the totals and reused.
+    Active drivers are counted per region from their latest location. Turning
+    every region into a MarketDemandSignal, or picking the top-k by priority,
+    is then a few array operations over the totals, not a rescan of history.
+    """
+
+    def __init__(self, cell_deg: float = REGION_CELL_DEG, window_seconds: float = WEEK_SECONDS,
+                 bucket_seconds: float = 3600.0, region_names: Optional[Dict[Cell, str]] = None,
+                 clock=time.time, initial_regions: int = 1024):
+        if bucket_seconds <= 0 or window_seconds < bucket_seconds:
+            raise ValueError("Need 0 < bucket_seconds <= window_seconds")
+        self.cell_deg = cell_deg
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = int(round(window_seconds / bucket_seconds))
+        self.region_names = region_names or {}
+        self.clock = clock
+        self._slots: Dict[int, int] = {}  # packed cell key -> column
+        self._keys: List[int] = []
+        self._requests = np.zeros((self.num_buckets, initial_regions), dtype=np.int32)
+        self._matched = np.zeros((self.num_buckets, initial_regions), dtype=np.int32)
+        self._request_totals = np.zeros(initial_regions, dtype=np.int64)
+        self._matched_totals = np.zeros(initial_regions, dtype=np.int64)
+        self._active = np.zeros(initial_regions, dtype=np.int64)
+        self._driver_slots: Dict[int, int] = {}  # driver_id -> column of an active driver
+        self._head: Optional[int] = None  # absolute index of the newest bucket
+        self._lock = threading.Lock()
+        self.jobs_seen = 0
+        self.jobs_dropped = 0  # older than the window
+        self.events_loaded_until = 0  # Highest job_events id applied by refresh_from_storage
+        self._applied_events: set = set()  # Applied ids within EVENT_LOOKBACK of the high-water mark
+        self._job_matched: Dict[int, Tuple[bool, float]] = {}  # job_id -> (counted as matched, created_at)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # --- Regions ---
+
+    def _cell_keys(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        rows = np.floor(np.asarray(lats, dtype=np.float64) / self.cell_deg).astype(np.int64) + _KEY_OFFSET
+        cols = np.floor(np.asarray(lons, dtype=np.float64) / self.cell_deg).astype(np.int64) + _KEY_OFFSET
+        return rows * (2 * _KEY_OFFSET) + cols
+
+    def _cell(self, key: int) -> Cell:
+        return key // (2 * _KEY_OFFSET) - _KEY_OFFSET, key % (2 * _KEY_OFFSET) - _KEY_OFFSET
+
+    def _columns(self, keys: np.ndarray) -> np.ndarray:
+        """Column per key, adding (and growing the tables for) regions seen for the first time."""
+        unique, inverse = np.unique(keys, return_inverse=True)
+        columns = np.empty(len(unique), dtype=np.int64)
+        for i, key in enumerate(unique.tolist()):
+            column = self._slots.get(key)
+            if column is None:
+                column = self._slots[key] = len(self._keys)
+                self._keys.append(key)
+            columns[i] = column
+        if len(self._keys) > self._request_totals.shape[0]:
+            self._grow(len(self._keys))
+        return columns[inverse]
+
+    def _grow(self, needed: int):
+        size = self._request_totals.shape[0]
+        while size < needed:
+            size *= 2
+        extra = size - self._request_totals.shape[0]
+        self._requests = np.pad(self._requests, ((0, 0), (0, extra)))
+        self._matched = np.pad(self._matched, ((0, 0), (0, extra)))
+        self._request_totals = np.pad(self._request_totals, (0, extra))
+        self._matched_totals = np.pad(self._matched_totals, (0, extra))
+        self._active = np.pad(self._active, (0, extra))
+
+    def region_name(self, cell: Cell) -> str:
+        name = self.region_names.get(cell)
+        if name is not None:
+            return name
+        return f"Region {(cell[0] + 0.5) * self.cell_deg:.2f},{(cell[1] + 0.5) * self.cell_deg:.2f}"
+
+    # --- Time buckets ---
+
+    def _advance(self, index: int):
+        """Moves the newest bucket forward to `index`, subtracting buckets that leave the window."""
+        if self._head is None or index - self._head >= self.num_buckets:
+            self._requests[:] = 0
+            self._matched[:] = 0
+            self._request_totals[:] = 0
+            self._matched_totals[:] = 0
+        else:
+            for expired in range(self._head + 1, index + 1):
+                row = expired % self.num_buckets
+                self._request_totals[:len(self._keys)] -= self._requests[row, :len(self._keys)]
+                self._matched_totals[:len(self._keys)] -= self._matched[row, :len(self._keys)]
+                self._requests[row] = 0
+                self._matched[row] = 0
+        self._head = index
+
+    def record_jobs(self, lats: Sequence[float], lons: Sequence[float], timestamps: Sequence[float],
+                    matched: Optional[Sequence[bool]] = None) -> int:
+        """
+        Adds a batch of job requests (pickup location, created_at, whether a
+        driver was found). Returns how many fell inside the window.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not len(timestamps):
+            return 0
+        matched = (np.zeros(len(timestamps), dtype=bool) if matched is None
+                   else np.asarray(matched, dtype=bool))
+        buckets = np.floor(timestamps / self.bucket_seconds).astype(np.int64)
+        with self._lock:
+            newest = int(buckets.max())
+            if self._head is None or newest > self._head:
+                self._advance(newest)
+            keep = buckets > self._head - self.num_buckets
+            self.jobs_seen += int(keep.sum())
+            self.jobs_dropped += int(len(keep) - keep.sum())
+            if not keep.any():
+                return 0
+            columns = self._columns(self._cell_keys(np.asarray(lats)[keep], np.asarray(lons)[keep]))
+            rows = buckets[keep] % self.num_buckets
+            matched = matched[keep]
+            size = self._request_totals.shape[0]
+            if len(columns) * 8 > self._requests.size:
+                # Bulk loads: one bincount over the flattened table beats scattered adds
+                cells = rows * size + columns
+                self._requests += np.bincount(cells, minlength=self._requests.size).reshape(
+                    self._requests.shape).astype(np.int32)
+                self._matched += np.bincount(cells[matched], minlength=self._matched.size).reshape(
+                    self._matched.shape).astype(np.int32)
+            else:
+                np.add.at(self._requests, (rows, columns), 1)
+                np.add.at(self._matched, (rows[matched], columns[matched]), 1)
+            self._request_totals += np.bincount(columns, minlength=size)
+            self._matched_totals += np.bincount(columns[matched], minlength=size)
+            return len(columns)
+
+    def record_match_changes(self, lats: Sequence[float], lons: Sequence[float], timestamps: Sequence[float],
+                             deltas: Sequence[int]):
+        """
+        Moves the matched count of already recorded jobs: +1 when a job was
+        matched after it was recorded, -1 when its match was released.
+        `timestamps` are the jobs' created_at, so the change lands in their bucket.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not len(timestamps):
+            return
+        buckets = np.floor(timestamps / self.bucket_seconds).astype(np.int64)
+        with self._lock:
+            if self._head is None:
+                return
+            keep = (buckets > self._head - self.num_buckets) & (buckets <= self._head)
+            if not keep.any():
+                return
+            columns = self._columns(self._cell_keys(np.asarray(lats)[keep], np.asarray(lons)[keep]))
+            deltas = np.asarray(deltas, dtype=np.int64)[keep]
+            np.add.at(self._matched, (buckets[keep] % self.num_buckets, columns), deltas.astype(np.int32))
+            self._matched_totals += np.bincount(columns, weights=deltas,
+                                                minlength=self._matched_totals.shape[0]).astype(np.int64)
+
+    # --- Drivers ---
+
+    def record_drivers(self, driver_ids: Sequence[int], lats: Sequence[float], lons: Sequence[float],
+                       active: Optional[Sequence[bool]] = None):
+        """Latest location/online status of some drivers (e.g. a location batch)."""
+        if not len(driver_ids):
+            return
+        active = [True] * len(driver_ids) if active is None else list(active)
+        with self._lock:
+            columns = self._columns(self._cell_keys(lats, lons)).tolist()
+            counts = self._active
+            for driver_id, column, is_active in zip(driver_ids, columns, active):
+                old = self._driver_slots.pop(driver_id, None)
+                if old is not None:
+                    counts[old] -= 1
+                if is_active:
+                    self._driver_slots[driver_id] = column
+                    counts[column] += 1
+
+    def set_active_drivers(self, driver_ids: Sequence[int], lats: Sequence[float], lons: Sequence[float]):
+        """Replaces the active fleet with a full snapshot (e.g. the drivers table)."""
+        with self._lock:
+            columns = self._columns(self._cell_keys(lats, lons)) if len(driver_ids) else np.zeros(0, np.int64)
+            self._active = np.bincount(columns, minlength=self._request_totals.shape[0]).astype(np.int64)
+            self._driver_slots = dict(zip(driver_ids, columns.tolist()))
+
+    # --- History ---
+
+    def refresh_from_storage(self, storage) -> Dict[str, int]:
+        """
+        Applies job changes recorded in the shared Storage since the last
+        refresh and loads the current active fleet. Progress is kept as the
+        last job_events id applied, so rows committed late are still picked up:
+        a new job counts as a request, and a later match (or release) moves the
+        matched count of the job's own bucket.
+        """
+        start = max(self.events_loaded_until - EVENT_LOOKBACK, 0)
+        since = self.clock() - self.window_seconds
+        rows = [row for row in storage.job_events_since(start, created_since=since)
+                if row[0] not in self._applied_events]
+        new_jobs: List[Tuple[float, float, float, bool]] = []
+        changes: List[Tuple[float, float, float, int]] = []
+        for event_id, kind, job_id, status, lat, lon, created_at in rows:
+            matched = status == MATCHED
+            if kind == "created":
+                self._job_matched[job_id] = (matched, created_at)
+                new_jobs.append((lat, lon, created_at, matched))
+                continue
+            previous = self._job_matched.get(job_id)
+            if previous is not None and previous[0] != matched:
+                self._job_matched[job_id] = (matched, created_at)
+                changes.append((lat, lon, created_at, 1 if matched else -1))
+        if new_jobs:
+            lats, lons, created, matched = (np.array(column) for column in zip(*new_jobs))
+            self.record_jobs(lats, lons, created, matched.astype(bool))
+        if changes:
+            self.record_match_changes(*(np.array(column) for column in zip(*changes)))
+        if rows:
+            self.events_loaded_until = max(self.events_loaded_until, max(row[0] for row in rows))
+            self._applied_events.update(row[0] for row in rows)
+        floor = self.events_loaded_until - EVENT_LOOKBACK
+        self._applied_events = {event_id for event_id in self._applied_events if event_id > floor}
+        self._job_matched = {job_id: state for job_id, state in self._job_matched.items() if state[1] >= since}
+        drivers = storage.active_drivers()
+        self.set_active_drivers([d["id"] for d in drivers], [d["lat"] for d in drivers],
+                                [d["lon"] for d in drivers])
+        return {"jobs_loaded": len(new_jobs), "match_changes": len(changes), "active_drivers": len(drivers)}
+
+    # --- Signals ---
+
+    def _scores(self, now: Optional[float]):
+        """(columns, requests_7d, active, matched, density, priority) for every region with data."""
+        index = int((self.clock() if now is None else now) // self.bucket_seconds)
+        if self._head is not None and index > self._head:
+            self._advance(index)
+        n = len(self._keys)
+        requests = self._request_totals[:n]
+        active = self._active[:n]
+        columns = np.flatnonzero((requests > 0) | (active > 0))
+        requests, active, matched = requests[columns], active[columns], self._matched_totals[:n][columns]
+        demand_drivers = requests / JOBS_PER_DRIVER_WEEK * (WEEK_SECONDS / self.window_seconds)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            density = np.where(active + demand_drivers > 0, active / (active + demand_drivers), 1.0)
+        # Under-supplied regions first, weighted by how much volume they carry
+        busiest = requests.max() if len(requests) else 0
+        volume = np.sqrt(requests / busiest) if busiest else np.zeros(len(requests))
+        priority = (1.0 - density) * volume
+        return columns, requests, active, matched, density, priority
+
+    def _signal(self, column: int, requests: int, matched: int, density: float,
+                priority: float) -> MarketDemandSignal:
+        return MarketDemandSignal(
+            region=self.region_name(self._cell(self._keys[column])),
+            driver_density_score=round(float(density), 3),
+            delivery_requests_7d=int(requests),
+            conversion_rate=round(matched / requests, 3) if requests else 0.0,
+            priority_score=round(float(priority), 3),
+        )
+
+    def signals(self, now: Optional[float] = None) -> List[MarketDemandSignal]:
+        """One signal per region with any jobs or active drivers in the window, highest priority first."""
+        with self._lock:
+            columns, requests, _, matched, density, priority = self._scores(now)
+            order = np.argsort(-priority, kind="stable")
+            return [self._signal(c, r, m, d, p) for c, r, m, d, p in zip(
+                columns[order].tolist(), requests[order].tolist(), matched[order].tolist(),
+                density[order].tolist(), priority[order].tolist())]
+
+    def top_k(self, k: int = 10, min_requests: int = 1, now: Optional[float] = None) -> List[MarketDemandSignal]:
+        """The `k` regions most in need of recruitment (with at least `min_requests` jobs this window)."""
+        with self._lock:
+            columns, requests, _, matched, density, priority = self._scores(now)
+            candidates = np.flatnonzero(requests >= min_requests)
+            if not len(candidates) or k <= 0:
+                return []
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-priority[candidates], k - 1)[:k]]
+            candidates = candidates[np.argsort(-priority[candidates], kind="stable")]
+            return [self._signal(c, r, m, d, p) for c, r, m, d, p in zip(
+                columns[candidates].tolist(), requests[candidates].tolist(), matched[candidates].tolist(),
+                density[candidates].tolist(), priority[candidates].tolist())]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = len(self._keys)
+            return {"regions": n, "jobs_in_window": int(self._request_totals[:n].sum()),
+                    "active_drivers": len(self._driver_slots), "jobs_seen": self.jobs_seen,
+                    "jobs_dropped": self.jobs_dropped}
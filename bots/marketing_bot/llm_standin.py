@@ -0,0 +1,58 @@
+# bots/marketing_bot/llm_standin.py
+#
+# Local stand-in for the content LLM: same completion API as the real server,
+# a fixed per-request latency and a deterministic, region-aware answer.
+# Run: uvicorn bots.marketing_bot.llm_standin:app --port 8010
+
+import asyncio
+import re
+from typing import Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+REGION_PATTERN = re.compile(r"truck drivers in (.+?)\.\s")
+
+
+class CompletionRequest(BaseModel):
+    prompt: str
+    max_tokens: int = 200
+
+
+def make_llm_standin(latency_s: float = 1.0, max_concurrency: Optional[int] = None) -> FastAPI:
+    """
+    `latency_s` mimics generation time (the old time.sleep(1)); with
+    `max_concurrency` set, extra requests queue like on a server with a
+    fixed number of model slots.
+    """
+    app = FastAPI(title="LLM stand-in")
+    slots = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    app.state.completions = 0
+
+    async def generate(prompt: str) -> str:
+        await asyncio.sleep(latency_s)
+        match = REGION_PATTERN.search(prompt)
+        region = match.group(1) if match else "your area"
+        app.state.completions += 1
+        return (f"HEADLINE: {region.upper()} TRUCK OWNERS: Stop waiting! 🚚\n"
+                f"BODY: Your schedule. Your truck ({region}). Earn premium rates NOW. "
+                f"PickupLink handles the load, you handle the drive.\n"
+                f"CTA: SignUp.PickupLink.com/Trucker")
+
+    @app.post("/v1/completions")
+    async def completions(request: CompletionRequest):
+        if slots is None:
+            text = await generate(request.prompt)
+        else:
+            async with slots:
+                text = await generate(request.prompt)
+        return {"text": text[:request.max_tokens * 4]}
+
+    @app.get("/stats")
+    def stats():
+        return {"completions": app.state.completions}
+
+    return app
+
+
+app = make_llm_standin()
@@ -1,23 +1,55 @@
 # bots/marketing_bot/marketing_bot.py
 
-import requests
-import json
-from settings import AI_MARKETING_API_KEY, GOVERNANCE_URL, FINANCE_URL
-from models import MarketDemandSignal, ViralContentDraft
+import asyncio
+import logging
+from bots.marketing_bot.models import MarketDemandSignal, ViralContentDraft
 import time # Placeholder for simulating API latency
+from typing import TYPE_CHECKING, Iterable, List, Optional
+from bots.common.config import settings
+from bots.common.event_bus import EventBus, FUNDING_REQUESTED
+from bots.common.instrumentation import get_logger, log_event
+from bots.common.storage import Storage, open_storage
+
+if TYPE_CHECKING:  # httpx and numpy are imported only by the features that use them
+    from bots.marketing_bot.content_pipeline import ContentPipeline
+    from bots.marketing_bot.demand_analytics import DemandAnalytics
+
+log = get_logger("marketing")
 
 class MarketingBot:
-    def __init__(self):
-        print("MarketingBot Initialized. Ready for viral growth.")
+    def __init__(self, event_bus: Optional[EventBus] = None, content_pipeline: Optional["ContentPipeline"] = None,
+                 demand_analytics: Optional["DemandAnalytics"] = None, storage: Optional[Storage] = None):
+        # With a bus, funding requests are published for the Finance Bot instead of POSTed to it
+        self.event_bus = event_bus
+        # Drafts come from the LLM at settings.MARKETING_LLM_URL when configured (concurrent, deduped, cached)
+        llm_url = getattr(settings, "MARKETING_LLM_URL", None)
+        if content_pipeline is None and llm_url:
+            from bots.marketing_bot.content_pipeline import ContentPipeline, LLMClient
+
+            content_pipeline = ContentPipeline(LLMClient(llm_url, api_key=settings.AI_MARKETING_API_KEY))
+        self.content_pipeline = content_pipeline
+        # Per-region demand from job/driver history; with storage, refreshed incrementally from the shared tables
+        self.storage = storage
+        if demand_analytics is None and storage is not None:
+            from bots.marketing_bot.demand_analytics import DemandAnalytics
+
+            demand_analytics = DemandAnalytics()
+        self.demand_analytics = demand_analytics
+        log_event(log, logging.INFO, "marketing_bot_initialized")
 
     def analyze_demand(self) -> MarketDemandSignal:
         """
         Scans data (simulated data source: Governance Bot's performance metrics) 
         to identify high-demand/low-driver zones.
         """
+        if self.demand_analytics is not None:
+            top = self.top_demand_signals(1)
+            if top:
+                return top[0]
+
         # --- Phase 1: Data Ingestion (Simulated call to Governance Bot) ---
         # In a real scenario, this queries the Governance Bot for regional density reports.
-        print(f"Polling Governance Bot for regional performance data...")
+        log_event(log, logging.DEBUG, "demand_signal_simulated")
         
         # Mock Data: Charlotte area needs drivers badly.
         return MarketDemandSignal(
@@ -28,21 +60,42 @@ class MarketingBot:
             priority_score=0.92 # High priority
         )
 
+    def top_demand_signals(self, k: int = 10) -> List[MarketDemandSignal]:
+        """The `k` regions most in need of drivers, from the demand analytics tables."""
+        if self.demand_analytics is None:
+            return [self.analyze_demand()]
+        if self.storage is not None:
+            self.demand_analytics.refresh_from_storage(self.storage)
+        return self.demand_analytics.top_k(k)
+
+    def analyze_regions(self, regions: Iterable[str]) -> List[MarketDemandSignal]:
+        """Demand signals for a statewide campaign, one per region (mock data, like analyze_demand)."""
+        base = self.analyze_demand()
+        return [MarketDemandSignal(region=region, driver_density_score=base.driver_density_score,
+                                   delivery_requests_7d=base.delivery_requests_7d,
+                                   conversion_rate=base.conversion_rate, priority_score=base.priority_score)
+                for region in regions]
+
+    async def _generate_once(self, signal: MarketDemandSignal) -> ViralContentDraft:
+        try:
+            return await self.content_pipeline.generate(signal)
+        finally:
+            await self.content_pipeline.client.aclose()  # The client is bound to this asyncio.run loop
+
     def generate_content(self, signal: MarketDemandSignal) -> ViralContentDraft:
         """
         Uses free AI APIs (like a local LLM or Hugging Face) to auto-create content.
         """
-        
-        prompt = f"""
-        Create a highly viral social media recruitment post for independent truck drivers in {signal.region}. 
-        The key selling points must be: 'Be your own boss', 'Highest pay per mile in the industry', and 'Flexible schedule'.
-        The tone must be energetic and directly address pickup/light truck owners (F-150, RAM). 
-        The CTA must direct them to the sign-up link. Keep it under 280 characters for Twitter simulation.
-        """
+        if self.content_pipeline is not None:
+            return asyncio.run(self._generate_once(signal))
+
+        from bots.marketing_bot.content_pipeline import build_prompt
+
+        prompt = build_prompt(signal)
         
         # --- AI API Call Simulation ---
         # Actual implementation would use requests.post to an LLM endpoint
-        print(f"Generating content using AI API with key: {AI_MARKETING_API_KEY[:5]}...")
+        log_event(log, logging.DEBUG, "content_simulated", region=signal.region)
         time.sleep(1) # Simulate processing time
         
         return ViralContentDraft(
@@ -53,11 +106,27 @@ class MarketingBot:
             estimated_reach_metric=5000.0 # Placeholder for predicted impressions
         )
 
-    def launch_campaign(self, draft: ViralContentDraft):
+    async def run_campaigns(self, signals: Iterable[MarketDemandSignal]) -> int:
+        """
+        Generates drafts for every region concurrently and launches each
+        campaign as soon as its draft is ready. Returns the campaigns launched.
+        """
+        if self.content_pipeline is None:
+            raise RuntimeError("run_campaigns needs a content pipeline (settings.MARKETING_LLM_URL)")
+        launched = 0
+        async for signal, draft in self.content_pipeline.stream(signals):
+            # Funding requests may block on HTTP; keep the stream moving
+            await asyncio.to_thread(self.launch_campaign, draft, signal.region)
+            launched += 1
+        log_event(log, logging.INFO, "campaigns_launched", launched=launched, **self.content_pipeline.stats())
+        return launched
+
+    def launch_campaign(self, draft: ViralContentDraft, region: str = "Charlotte"):
         """
         Launches the campaign and requests micro-funding from the Finance Bot.
         """
-        print(f"Launching campaign on {draft.platform}: '{draft.headline[:20]}...'")
+        log_event(log, logging.INFO, "campaign_launched", platform=draft.platform, region=region,
+                  headline=draft.headline[:40])
         
         # --- Funding Request to Finance Bot ---
         # Governance Bot usually delegates this, but here we call Finance directly.
@@ -65,20 +134,31 @@ class MarketingBot:
             "mission": "VIRAL_RECRUITMENT",
             "bot": "MARKETING_BOT",
             "estimated_spend": 500.00, # Estimated spend for initial burst on platform X
-            "region": "Charlotte"
+            "region": region
         }
         
+        if self.event_bus is not None:
+            # Finance answers on FUNDING_DECIDED; the campaign does not wait for it
+            offset = self.event_bus.publish(FUNDING_REQUESTED, funding_request, key=funding_request["region"])
+            log_event(log, logging.INFO, "funding_requested", region=region, offset=offset)
+            return
+
+        import requests
+
         try:
-            response = requests.post(f"{FINANCE_URL}/allocate_funds", json=funding_request)
+            response = requests.post(f"{settings.FINANCE_URL}/allocate_funds", json=funding_request)
             response.raise_for_status()
-            print(f"Finance Bot approved funding: ${response.json().get('approved_amount', 'N/A')}")
+            log_event(log, logging.INFO, "funding_approved", region=region,
+                      approved=response.json().get("approved_amount"))
         except requests.exceptions.RequestException as e:
-            print(f"WARNING: Could not secure micro-funding. Proceeding with organic push. Error: {e}")
+            # The campaign proceeds as an organic push
+            log_event(log, logging.WARNING, "funding_request_failed", region=region, error=str(e))
 
 
 if __name__ == '__main__':
     # --- Autonomous Execution Flow ---
-    bot = MarketingBot()
+    # With settings.DATABASE_URL set, demand comes from the shared jobs/drivers tables
+    bot = MarketingBot(storage=open_storage(getattr(settings, "DATABASE_URL", None)))
     
     # 1. Scan Market
     demand = bot.analyze_demand()
@@ -0,0 +1,97 @@
+# tests/test_event_bus.py
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from bots.common.event_bus import FileTopicLog, LogEventBus, open_event_bus
+
+
+def publish(topic_log, count, start=0):
+    return topic_log.append_many([({"n": n}, None, None) for n in range(start, start + count)])
+
+
+def test_segments_roll_and_offsets_continue(tmp_path):
+    topic_log = FileTopicLog("t", tmp_path, segment_bytes=200, retention_seconds=None)
+    offsets = [publish(topic_log, 3, start)[0] for start in range(0, 30, 3)]
+    assert offsets == list(range(0, 30, 3))
+    assert len(list(tmp_path.glob("*.log"))) > 1
+    assert [event.payload["n"] for event in topic_log.read(0, 100)] == list(range(30))
+    assert [event.offset for event in topic_log.read(7, 5)] == [7, 8, 9, 10, 11]
+
+    reopened = FileTopicLog("t", tmp_path, segment_bytes=200, retention_seconds=None)
+    assert reopened.end_offset() == 30
+    assert publish(reopened, 1, 30) == [30]
+    assert topic_log.end_offset() == 31  # Picks up the other writer's append and segment
+    assert topic_log.read(30, 1)[0].payload == {"n": 30}
+
+
+def test_retention_by_size_keeps_the_active_segment(tmp_path):
+    topic_log = FileTopicLog("t", tmp_path, segment_bytes=200, retention_seconds=None, retention_bytes=400)
+    for start in range(0, 60, 3):
+        publish(topic_log, 3, start)
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.log")) <= 400 + 200
+    first = topic_log.start_offset()
+    assert first > 0
+    events = topic_log.read(0, 1_000)
+    assert events[0].offset == first and events[-1].offset == 59
+
+
+def test_retention_by_age(tmp_path):
+    topic_log = FileTopicLog("t", tmp_path, segment_bytes=100, retention_seconds=3600)
+    publish(topic_log, 5)
+    publish(topic_log, 5, 5)  # Rolls over: the first segment is closed but recent
+    assert topic_log.start_offset() == 0
+    week_ago = time.time() - 7 * 24 * 3600
+    for path in tmp_path.glob("*.log"):
+        if path != topic_log._segments[-1].path:
+            os.utime(path, (week_ago, week_ago))
+    assert topic_log.enforce_retention() >= 1
+    assert topic_log.start_offset() > 0
+    assert topic_log.end_offset() == 10
+
+
+def test_group_skips_expired_events(tmp_path):
+    async def run():
+        bus = LogEventBus(tmp_path, segment_bytes=100, retention_seconds=None, retention_bytes=300)
+        for start in range(0, 40, 4):
+            bus.publish_many("t", [{"n": n} for n in range(start, start + 4)])
+        received = []
+        bus.subscribe("t", "g", lambda events: received.extend(event.offset for event in events))
+        for _ in range(100):
+            if received and received[-1] == 39:
+                break
+            await asyncio.sleep(0.02)
+        await bus.stop()
+        bus.close()
+        return received, bus.topic("t").start_offset()
+
+    received, first = asyncio.run(run())
+    assert received == list(range(first, 40))
+
+
+def test_group_is_held_by_one_process(tmp_path):
+    first = LogEventBus(tmp_path)
+    first.subscribe("t", "g", lambda events: None)
+    second = LogEventBus(tmp_path)  # A second open file description conflicts like another process would
+    with pytest.raises(RuntimeError, match="already consumed"):
+        second.subscribe("t", "g", lambda events: None)
+    second.subscribe("t", "other", lambda events: None)
+    first.close()
+    second.close()
+
+
+def test_legacy_single_file_log_is_migrated(tmp_path):
+    with open(tmp_path / "t.log", "wb") as legacy:
+        legacy.write(b'{"ts":1.0,"key":null,"headers":{},"payload":{"n":0}}\n')
+    bus = LogEventBus(tmp_path)
+    assert bus.read("t")[0].payload == {"n": 0}
+    assert bus.publish("t", {"n": 1}) == 1
+    bus.close()
+
+
+def test_url_options(tmp_path):
+    bus = open_event_bus(f"file://{tmp_path}?fsync=1&retention_hours=0&retention_mb=1&segment_mb=0.5")
+    assert (bus.fsync, bus.retention_seconds, bus.retention_bytes, bus.segment_bytes) == (True, None, 2 ** 20, 2 ** 19)
@@ -0,0 +1,87 @@
+# tests/test_routing.py
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from bots.dispatcher_bot.dispatcher import Dispatcher, build_routing_provider
+from bots.dispatcher_bot.geo import haversine_km
+from bots.dispatcher_bot.routing import HaversineRouting, RoadGraph, RoadGraphRouting
+
+OSM = Path(__file__).parent / "fixtures" / "tiny_road_graph.osm"
+
+A, B, C, D = (35.2000, -80.8000), (35.2300, -80.8000), (35.2300, -80.7900), (35.2000, -80.7900)
+RAMP = (35.2000, -80.8200)
+ISLAND = (35.3000, -80.9000)
+PRIMARY_KMH = 45 * 1.609344  # maxspeed "45 mph"
+
+
+@pytest.fixture(scope="module")
+def routing():
+    return RoadGraphRouting.from_osm_xml(str(OSM))
+
+
+def test_loads_only_drivable_ways(routing):
+    assert len(routing.graph) == 7  # Node 8 is only on the footway
+    assert routing.graph.coords[routing.graph.nearest_node((35.1985, -80.7950))] in (A, D)
+
+
+def test_route_follows_the_road_not_the_footway(routing):
+    road_km = haversine_km(A, B) + haversine_km(B, C) + haversine_km(C, D)
+    route = routing.route(A, D)
+    assert route.distance_km == pytest.approx(road_km)
+    assert route.duration_minutes == pytest.approx(road_km / PRIMARY_KMH * 60.0)
+    assert route.distance_km > 5 * haversine_km(A, D)
+
+
+def test_access_hop_is_added_at_access_speed(routing):
+    start = (35.2010, -80.8000)  # ~110 m off node A
+    access_km = haversine_km(start, A)
+    route = routing.route(start, D)
+    direct = routing.route(A, D)
+    assert route.distance_km == pytest.approx(direct.distance_km + access_km)
+    assert route.duration_minutes == pytest.approx(direct.duration_minutes + access_km / 20.0 * 60.0)
+
+
+def test_oneway_and_unreachable_fall_back_to_straight_line(routing):
+    ramp = routing.route(RAMP, A)
+    assert ramp.distance_km == pytest.approx(haversine_km(RAMP, A))
+    against = routing.route(A, RAMP)  # Against the oneway: no road path
+    assert against == HaversineRouting().route(A, RAMP)
+    assert routing.route(A, ISLAND) == HaversineRouting().route(A, ISLAND)
+
+
+def test_distance_matrix_matches_single_routes(routing):
+    origins = [A, RAMP, (35.2010, -80.8000)]
+    destinations = [D, A, RAMP, ISLAND]
+    distances, durations = routing.distance_matrix(origins, destinations)
+    for i, origin in enumerate(origins):
+        for j, destination in enumerate(destinations):
+            route = routing.route(origin, destination)
+            assert distances[i, j] == pytest.approx(route.distance_km)
+            assert durations[i, j] == pytest.approx(route.duration_minutes)
+    assert np.isfinite(distances).all()
+
+
+def test_shortest_path_nodes(routing):
+    graph = routing.graph
+    minutes, km, path = graph.shortest_path(graph.nearest_node(A), graph.nearest_node(D))
+    assert [graph.coords[node] for node in path] == [A, B, C, D]
+    assert graph.shortest_path(graph.nearest_node(A), graph.nearest_node(ISLAND))[2] == []
+
+
+def test_build_routing_provider_from_settings(monkeypatch):
+    from bots.common.config import settings
+
+    monkeypatch.setattr(settings, "ROUTING_BACKEND", "road_graph")
+    monkeypatch.setattr(settings, "ROUTING_OSM_PATH", str(OSM))
+    provider = build_routing_provider()
+    assert isinstance(provider, RoadGraphRouting) and len(provider.graph) == 7
+    dispatcher = Dispatcher(routing=provider, warm_from_db=False)
+    assert dispatcher.optimize_route(A, D).distance_km == pytest.approx(provider.route(A, D).distance_km)
+
+    monkeypatch.setattr(settings, "ROUTING_OSM_PATH", None)
+    with pytest.raises(ValueError, match="osm_path"):
+        build_routing_provider()
+    assert isinstance(build_routing_provider("haversine"), HaversineRouting)
@@ -0,0 +1,26 @@
+# tests/test_startup.py
+#
+# Bot entry modules must not pull in heavy dependencies at import time (the
+# forbidden lists of benchmarks/bench_startup.py; its time budgets are left to
+# the benchmark, they are too machine-dependent for a test), and stateful apps
+# must refuse to be served by several workers.
+
+import pytest
+
+from bench_startup import BUDGETS, importtime
+from bots.common.cli import main
+
+
+@pytest.mark.parametrize("budget", [budget for budget in BUDGETS if budget.forbidden],
+                         ids=lambda budget: budget.module)
+def test_entry_module_defers_heavy_imports(budget):
+    _, _, loaded, _ = importtime(budget.module)
+    assert sorted(set(budget.forbidden) & set(loaded)) == []
+
+
+def test_serve_refuses_workers_for_single_process_app(capsys):
+    code = main("python -m bots.dispatcher_bot", "bots.dispatcher_bot.dispatcher",
+                app="bots.dispatcher_bot.api:app", url_setting="DISPATCHER_URL", single_process=True,
+                argv=["serve", "--workers", "4"])
+    assert code == 2
+    assert "single worker" in capsys.readouterr().err